@@ -0,0 +1,7 @@
+"""
+Benchmarks for the central logging database and its HTTP API.
+
+- generator.py  builds realistic central_logging.sqlite files
+- runner.py     times every db_log_api route at several database sizes and
+                compares the result with the previous baseline
+"""
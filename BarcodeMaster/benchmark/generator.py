@@ -0,0 +1,183 @@
+"""
+Synthetic central_logging.sqlite generator.
+
+Builds a database shaped like production: every project passes the stations
+in order as OPEN -> AFGEMELD pairs (the OPEN row is closed, like /log does),
+spread over a configurable number of months that end today. Projects still
+in progress at the end of the history keep an OPEN row at their current
+station, so the dashboard and the "recent" queries have realistic data. The
+newest ``open_projects`` projects are always left open (one OPEN row in the
+last hours), so even a small database has OPEN rows for the write routes.
+
+Usage:
+    python -m benchmark.generator --rows 100000 --out bench.sqlite
+    python -m benchmark.generator --rows 1000000 --months 24 --rep-ratio 0.25 --stations NESTING OPUS INPAK
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from database.db_schema import create_schema, ensure_logs_table, SCHEMA_VERSION
+from database.db_queries import INSERT_LOG
+
+DEFAULT_STATIONS = ['NESTING', 'OPUS', 'KL GANNOMAT', 'GR GANNOMAT', 'MONTAGE', 'INPAK']
+# Stations whose OPEN event carries the path of the generated checklist
+FILE_PATH_STATIONS = {'OPUS', 'KL GANNOMAT', 'GR GANNOMAT'}
+INSERT_BATCH = 50_000
+DEFAULT_OPEN_PROJECTS = 10
+
+
+def synthetic_logs(rows, stations=DEFAULT_STATIONS, months=12, rep_ratio=0.15, seed=42, end=None, projects=None,
+                   open_projects=DEFAULT_OPEN_PROJECTS):
+    """Yields log rows in INSERT_LOG column order.
+
+    ``projects`` defaults to what ``rows`` needs; with ``rows`` None every
+    project is generated completely. The last ``open_projects`` projects get
+    a single OPEN row each, and room for those rows is kept within ``rows``.
+    """
+    rng = random.Random(seed)
+    end = end or datetime.now()
+    begin = end - timedelta(days=30 * months)
+    span_minutes = (end - begin).total_seconds() / 60
+    projects = projects or max(1, rows // (2 * len(stations)))
+    open_projects = max(0, min(open_projects, projects, rows if rows is not None else projects))
+    rows = rows - open_projects if rows is not None else float('inf')
+    produced = 0
+    for p in range(projects - open_projects):
+        number = f"MO{10000 + p:05d}"
+        is_rep = 1 if rng.random() < rep_ratio else 0
+        project = f"{number}_REP" if is_rep else number
+        t = begin + timedelta(minutes=span_minutes * p / projects)
+        for user in stations:
+            if produced >= rows or t > end:
+                break
+            opened = t
+            closed = opened + timedelta(minutes=rng.randint(10, 480))
+            file_path = rf"\\fileserver\productie\{user}\{project}.xlsx" if user in FILE_PATH_STATIONS else ''
+            item_count = rng.randint(5, 400)
+            if closed > end or produced + 2 > rows:
+                # Still being worked on at this station
+                yield (opened.isoformat(), 'OPEN', f"Scan: {project}", project, user, 'OPEN',
+                       number, is_rep, file_path, item_count)
+                produced += 1
+                break
+            yield (opened.isoformat(), 'OPEN', f"Scan: {project}", project, user, 'CLOSED',
+                   number, is_rep, file_path, item_count)
+            yield (closed.isoformat(), 'AFGEMELD', f"Scan: {project}", project, user, 'AFGEMELD',
+                   number, is_rep, '', None)
+            produced += 2
+            t = closed + timedelta(minutes=rng.randint(5, 720))
+        if produced >= rows:
+            break
+
+    for p in range(projects - open_projects, projects):
+        number = f"MO{10000 + p:05d}"
+        is_rep = 1 if rng.random() < rep_ratio else 0
+        project = f"{number}_REP" if is_rep else number
+        user = stations[p % len(stations)]
+        opened = end - timedelta(minutes=rng.randint(5, 600))
+        file_path = rf"\\fileserver\productie\{user}\{project}.xlsx" if user in FILE_PATH_STATIONS else ''
+        yield (opened.isoformat(), 'OPEN', f"Scan: {project}", project, user, 'OPEN',
+               number, is_rep, file_path, rng.randint(5, 400))
+
+
+def generate_database(path, rows, stations=DEFAULT_STATIONS, months=12, rep_ratio=0.15, seed=42,
+                      end=None, projects=None, progress=None):
+    """Creates ``path`` with up to ``rows`` synthetic log rows and the current schema.
+
+    Returns a summary dict (rows, projects, open rows, size, seconds).
+    """
+    start = time.perf_counter()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')
+        # Bulk load into the bare table, then build the index plan once
+        ensure_logs_table(conn)
+        batch = []
+        written = 0
+        for row in synthetic_logs(rows, stations, months, rep_ratio, seed, end, projects):
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH:
+                conn.executemany(INSERT_LOG, batch)
+                written += len(batch)
+                batch = []
+                if progress:
+                    progress(written)
+        if batch:
+            conn.executemany(INSERT_LOG, batch)
+            written += len(batch)
+        conn.commit()
+        create_schema(conn)
+        summary = {
+            'rows': written,
+            'projects': conn.execute('SELECT COUNT(DISTINCT project) FROM logs').fetchone()[0],
+            'open_rows': conn.execute(
+                "SELECT COUNT(*) FROM logs WHERE event = 'OPEN' AND status = 'OPEN'").fetchone()[0],
+            'stations': list(stations),
+            'months': months,
+            'rep_ratio': rep_ratio,
+            'seed': seed,
+        }
+    finally:
+        conn.close()
+    summary['size_mb'] = round(os.path.getsize(path) / (1024 * 1024), 1)
+    summary['seconds'] = round(time.perf_counter() - start, 1)
+    return summary
+
+
+def cached_dataset(rows, stations=DEFAULT_STATIONS, months=12, rep_ratio=0.15, seed=42, rebuild=False,
+                   progress=None):
+    """Returns the path of a generated database in the temp dir, building it when missing.
+
+    The cache key includes today's date: the history ends today, so the
+    dashboard's "today" and "last 7 days" queries see the same shape every run.
+    """
+    key = (f"{rows}|{','.join(stations)}|{months}|{rep_ratio}|{seed}|open{DEFAULT_OPEN_PROJECTS}"
+           f"|v{SCHEMA_VERSION}|{datetime.now():%Y-%m-%d}")
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]
+    path = os.path.join(tempfile.gettempdir(), f"barcodemaster_bench_{rows}_{digest}.sqlite")
+    if rebuild or not os.path.exists(path):
+        generate_database(path, rows, stations, months, rep_ratio, seed, progress=progress)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genereer een synthetische central_logging.sqlite.")
+    parser.add_argument('--rows', type=int, help="Aantal logregels (standaard 100.000 zonder --projects)")
+    parser.add_argument('--projects', type=int, help="Aantal projecten (standaard afgeleid van --rows)")
+    parser.add_argument('--stations', nargs='+', default=DEFAULT_STATIONS, help="Stations in volgorde van de workflow")
+    parser.add_argument('--months', type=int, default=12, help="Maanden historie, eindigend vandaag")
+    parser.add_argument('--rep-ratio', type=float, default=0.15, help="Aandeel REP-varianten (0-1)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', required=True, help="Pad van de te maken database")
+    args = parser.parse_args(argv)
+    rows = args.rows if (args.rows or args.projects) else 100_000
+
+    def _progress(done):
+        print(f"  {done:,} rijen", flush=True)
+
+    summary = generate_database(args.out, rows, args.stations, args.months, args.rep_ratio, args.seed,
+                                projects=args.projects, progress=_progress)
+    print(f"{args.out}: {summary['rows']:,} rijen, {summary['projects']:,} projecten, "
+          f"{summary['open_rows']:,} open, {summary['size_mb']} MB in {summary['seconds']}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,426 @@
+"""
+Multi-station load simulator for the DB API.
+
+Simulates N scanner stations that replay the scan pipeline against one API:
+
+    OPEN (scanning station)
+      -> fan-out OPENs for other stations (after the 0.2-1.5 s delay the
+         background task uses)
+      -> update_file_path + update_item_count (checklist generated)
+      -> AFGEMELD for every station that opened the project
+
+Scans arrive per station as a Poisson process (--rate scans per minute);
+--burst-interval/--burst-scans add shift-change bursts where every station
+fires several scans at once. Work time between OPEN and AFGEMELD is compressed
+to seconds (--work-seconds).
+
+By default a local run_api_server() is started on a copy of a generated
+database (see generator.py), so SQLite busy/locked errors can be counted from
+the server log. Simulated stations are named "SIM <station>", which no
+configuration enables for imports: OPEN events never reach the Access or HOPS
+processing, so this runs headless without serial ports or ODBC drivers.
+
+Usage:
+    python -m benchmark.load_simulator --stations 6 --duration 120
+    python -m benchmark.load_simulator --rate 6 --burst-interval 30 --burst-scans 4 --json load.json
+    python -m benchmark.load_simulator --url http://localhost:5001 --duration 60
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmark.generator import DEFAULT_STATIONS, cached_dataset
+from benchmark.runner import percentile
+from scan_trace import new_trace_id, stamp
+
+SIM_PREFIX = 'SIM '
+FANOUT_DELAY = (0.2, 1.5)  # same window as the background OPEN task
+LOCK_MARKERS = {'locked': 'database is locked', 'busy': 'database is busy'}
+
+
+class LoadStats:
+    """Thread-safe per-endpoint latency and error bookkeeping."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}     # endpoint -> [ms]
+        self.errors = {}        # endpoint -> count
+        self.statuses = {}      # status (or error text) -> count
+        self.sequences_started = 0
+        self.sequences_completed = 0
+
+    def record(self, endpoint, latency_ms, status):
+        ok = isinstance(status, int) and status < 400
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(latency_ms)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def sequence_started(self):
+        with self._lock:
+            self.sequences_started += 1
+
+    def sequence_completed(self):
+        with self._lock:
+            self.sequences_completed += 1
+
+
+class LockErrorCounter(logging.Handler):
+    """Counts 'database is locked' / 'database is busy' in the server log."""
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.counts = {name: 0 for name in LOCK_MARKERS}
+        self._count_lock = threading.Lock()
+
+    def emit(self, record):
+        text = record.getMessage()
+        if record.exc_info and record.exc_info[1] is not None:
+            text += f" {record.exc_info[1]}"
+        text = text.lower()
+        for name, marker in LOCK_MARKERS.items():
+            if marker in text:
+                with self._count_lock:
+                    self.counts[name] += 1
+
+
+class ApiClient:
+    """Keep-alive HTTP client with one connection per thread (like one requests session per station)."""
+
+    def __init__(self, base_url, stats, timeout=30):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 80
+        self.stats = stats
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def request(self, method, path, body=None):
+        """Returns (status, parsed JSON or None, elapsed ms); status is the exception name when the request failed."""
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        start = time.perf_counter()
+        try:
+            conn = self._connection()
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self._local.conn = None
+            return type(e).__name__, None, (time.perf_counter() - start) * 1000
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        try:
+            parsed = json.loads(data) if data else None
+        except ValueError:
+            parsed = None
+        return response.status, parsed, elapsed_ms
+
+    def post(self, endpoint, path, body):
+        status, _, elapsed_ms = self.request('POST', path, body)
+        self.stats.record(endpoint, elapsed_ms, status)
+        return status
+
+
+class StationSimulator:
+    """Generates scan sequences for the stations and runs them on a thread pool."""
+
+    def __init__(self, client, stats, stations, args, seed=42):
+        self.client = client
+        self.stats = stats
+        self.stations = stations
+        self.args = args
+        self.rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._project_counter = 0
+        self._counter_lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix='station')
+        self.stop_event = threading.Event()
+
+    def _random(self):
+        with self._rng_lock:
+            return self.rng.random()
+
+    def _uniform(self, low, high):
+        with self._rng_lock:
+            return self.rng.uniform(low, high)
+
+    def _expovariate(self, rate):
+        with self._rng_lock:
+            return self.rng.expovariate(rate)
+
+    def _sample(self, population, k):
+        with self._rng_lock:
+            return self.rng.sample(population, k)
+
+    def _next_project(self):
+        with self._counter_lock:
+            self._project_counter += 1
+            number = f"SIM{self._project_counter:05d}"
+        is_rep = self._random() < self.args.rep_ratio
+        return (f"{number}_REP" if is_rep else number), number, is_rep
+
+    def _log_event(self, endpoint, event, user, project, base_mo, is_rep, details):
+        trace = stamp({}, 'post_start')
+        return self.client.post(endpoint, '/log', {
+            'event': event,
+            'user': user,
+            'project': project,
+            'base_mo_code': base_mo,
+            'is_rep_variant': is_rep,
+            'details': details,
+            'trace_id': new_trace_id(),
+            'trace': trace,
+        })
+
+    def _fanout_station(self, user, project, base_mo, is_rep, scanned_by):
+        time.sleep(self._uniform(*FANOUT_DELAY) * self.args.delay_scale)
+        self._log_event('log OPEN (fan-out)', 'OPEN', user, project, base_mo, is_rep,
+                        f"Auto-detected from {scanned_by}'s scan of {project}")
+        time.sleep(self._expovariate(1.0 / self.args.work_seconds))
+        self._log_event('log AFGEMELD', 'AFGEMELD', user, project, base_mo, is_rep, None)
+
+    def scan_sequence(self, station, start_delay=0.0):
+        """One scan at ``station``: OPEN, fan-out, checklist updates, AFGEMELD."""
+        if start_delay:
+            time.sleep(start_delay)
+        self.stats.sequence_started()
+        project, base_mo, is_rep = self._next_project()
+        user = SIM_PREFIX + station
+
+        self._log_event('log OPEN', 'OPEN', user, project, base_mo, is_rep, f"Scan: {project}")
+
+        others = [s for s in self.stations if s != station]
+        fanout = self._sample(others, min(self.args.fanout, len(others))) if others else []
+        fanout_threads = []
+        for other in fanout:
+            thread = threading.Thread(target=self._fanout_station,
+                                      args=(SIM_PREFIX + other, project, base_mo, is_rep, user), daemon=True)
+            thread.start()
+            fanout_threads.append(thread)
+
+        # Checklist generated for the scanning station
+        time.sleep(self._uniform(0.1, 0.5) * self.args.delay_scale)
+        self.client.post('update_file_path', '/update_file_path', {
+            'project': project, 'user': user, 'file_path': rf"\\fileserver\sim\{station}\{project}.xlsx"})
+        self.client.post('update_item_count', '/update_item_count', {
+            'project': project, 'user': user, 'item_count': int(self._uniform(5, 400))})
+
+        time.sleep(self._expovariate(1.0 / self.args.work_seconds))
+        self._log_event('log AFGEMELD', 'AFGEMELD', user, project, base_mo, is_rep, None)
+        for thread in fanout_threads:
+            thread.join()
+        self.stats.sequence_completed()
+
+    def _station_arrivals(self, station, deadline):
+        """Poisson arrivals at ``--rate`` scans per minute for one station."""
+        rate_per_second = self.args.rate / 60.0
+        if rate_per_second <= 0:
+            return
+        while True:
+            wait = self._expovariate(rate_per_second)
+            if self.stop_event.wait(wait) or time.monotonic() >= deadline:
+                return
+            self.pool.submit(self.scan_sequence, station)
+
+    def _bursts(self, deadline):
+        """Every --burst-interval seconds each station fires --burst-scans scans within --burst-spread seconds."""
+        while not self.stop_event.wait(self.args.burst_interval):
+            if time.monotonic() >= deadline:
+                return
+            for station in self.stations:
+                for _ in range(self.args.burst_scans):
+                    self.pool.submit(self.scan_sequence, station, self._uniform(0, self.args.burst_spread))
+
+    def run(self, duration):
+        deadline = time.monotonic() + duration
+        threads = [threading.Thread(target=self._station_arrivals, args=(station, deadline), daemon=True)
+                   for station in self.stations]
+        if self.args.burst_interval and self.args.burst_scans:
+            threads.append(threading.Thread(target=self._bursts, args=(deadline,), daemon=True))
+        for thread in threads:
+            thread.start()
+        try:
+            time.sleep(duration)
+        finally:
+            self.stop_event.set()
+            for thread in threads:
+                thread.join()
+            # Let scans already in progress finish (AFGEMELD included)
+            self.pool.shutdown(wait=True)
+
+
+def wait_for_port(host, port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_local_server(db_path, port, quiet):
+    """Starts db_log_api.run_api_server() on ``db_path`` in a daemon thread; returns the lock counter."""
+    from database import db_log_api as api
+    api.DB_PATH = db_path
+    counter = LockErrorCounter()
+    logging.getLogger().addHandler(counter)
+    if quiet:
+        logging.getLogger().setLevel(logging.WARNING)
+    threading.Thread(target=api.run_api_server, kwargs={'host': '127.0.0.1', 'port': port}, daemon=True).start()
+    if not wait_for_port('127.0.0.1', port):
+        raise RuntimeError(f"API-server niet bereikbaar op poort {port}")
+    return counter
+
+
+def build_report(stats, elapsed, lock_counter, server_segments):
+    total = sum(len(v) for v in stats.latencies.values())
+    errors = sum(stats.errors.values())
+    endpoints = {}
+    for endpoint, values in sorted(stats.latencies.items()):
+        endpoints[endpoint] = {
+            'requests': len(values),
+            'errors': stats.errors.get(endpoint, 0),
+            'p50_ms': round(percentile(values, 50), 1),
+            'p95_ms': round(percentile(values, 95), 1),
+            'p99_ms': round(percentile(values, 99), 1),
+            'max_ms': round(max(values), 1),
+        }
+    return {
+        'duration_s': round(elapsed, 1),
+        'sequences_started': stats.sequences_started,
+        'sequences_completed': stats.sequences_completed,
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 1) if elapsed else 0.0,
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'statuses': {str(k): v for k, v in stats.statuses.items()},
+        'sqlite_locked': lock_counter.counts['locked'] if lock_counter else None,
+        'sqlite_busy': lock_counter.counts['busy'] if lock_counter else None,
+        'endpoints': endpoints,
+        'server_segments': server_segments,
+    }
+
+
+def format_report(report):
+    lines = [
+        f"Duur: {report['duration_s']} s, scans gestart/voltooid: "
+        f"{report['sequences_started']}/{report['sequences_completed']}",
+        f"Requests: {report['requests']} ({report['throughput_rps']} req/s), fouten: {report['errors']} "
+        f"({report['error_rate'] * 100:.2f}%)",
+        "SQLite locked/busy (serverlog): "
+        + (f"{report['sqlite_locked']}/{report['sqlite_busy']}" if report['sqlite_locked'] is not None
+           else "n.v.t. (externe server)"),
+        f"HTTP-statussen: {', '.join(f'{k}={v}' for k, v in sorted(report['statuses'].items()))}",
+        "",
+        f"  {'endpoint':<22} {'requests':>8} {'fouten':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)",
+    ]
+    for endpoint, e in report['endpoints'].items():
+        lines.append(f"  {endpoint:<22} {e['requests']:>8} {e['errors']:>7} {e['p50_ms']:>8.1f} "
+                     f"{e['p95_ms']:>8.1f} {e['p99_ms']:>8.1f} {e['max_ms']:>8.1f}")
+    if report['server_segments']:
+        lines += ["", "Serverzijde /log (scan_latency):"]
+        for name, seg in report['server_segments'].items():
+            lines.append(f"  {name:<30} n={seg['count']:<6} p50 {seg['p50_ms']:>8.1f}  p95 {seg['p95_ms']:>8.1f}  "
+                         f"max {seg['max_ms']:>8.1f} ms")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simuleer meerdere scanstations tegen één DB API.")
+    parser.add_argument('--stations', type=int, default=len(DEFAULT_STATIONS), help="Aantal stations")
+    parser.add_argument('--duration', type=float, default=60.0, help="Duur van de aankomsten in seconden")
+    parser.add_argument('--rate', type=float, default=4.0, help="Scans per minuut per station (Poisson)")
+    parser.add_argument('--burst-interval', type=float, default=0.0, help="Seconden tussen pieken (0 = geen)")
+    parser.add_argument('--burst-scans', type=int, default=3, help="Scans per station per piek")
+    parser.add_argument('--burst-spread', type=float, default=2.0, help="Seconden waarover een piek verdeeld is")
+    parser.add_argument('--fanout', type=int, default=2, help="Stations die per scan automatisch een OPEN krijgen")
+    parser.add_argument('--work-seconds', type=float, default=5.0, help="Gemiddelde tijd tussen OPEN en AFGEMELD")
+    parser.add_argument('--delay-scale', type=float, default=1.0, help="Schaal voor de fan-out- en checklistvertraging")
+    parser.add_argument('--rep-ratio', type=float, default=0.15, help="Aandeel REP-projecten")
+    parser.add_argument('--concurrency', type=int, default=64, help="Maximaal gelijktijdige scans")
+    parser.add_argument('--rows', type=int, default=100_000, help="Grootte van de gegenereerde startdatabase")
+    parser.add_argument('--db', help="Kopie van deze database gebruiken in plaats van een gegenereerde")
+    parser.add_argument('--url', help="Bestaande API gebruiken (bijv. http://localhost:5001) in plaats van een lokale server")
+    parser.add_argument('--quiet-server', action='store_true', help="Server-INFO-logging uitzetten")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help="Rapport ook als JSON naar dit pad schrijven")
+    args = parser.parse_args(argv)
+
+    stations = [DEFAULT_STATIONS[i % len(DEFAULT_STATIONS)] + ('' if i < len(DEFAULT_STATIONS) else f" {i + 1}")
+                for i in range(args.stations)]
+
+    workdir = None
+    lock_counter = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+            if base_url.endswith('/log'):
+                base_url = base_url[:-len('/log')]
+        else:
+            workdir = tempfile.mkdtemp(prefix='barcodemaster_load_')
+            db_path = os.path.join(workdir, 'central_logging.sqlite')
+            source = args.db or cached_dataset(args.rows)
+            shutil.copyfile(source, db_path)
+            port = free_port()
+            lock_counter = start_local_server(db_path, port, args.quiet_server)
+            base_url = f"http://127.0.0.1:{port}"
+
+        stats = LoadStats()
+        client = ApiClient(base_url, stats)
+        client.request('DELETE', '/api/metrics/scan_latency')
+        print(f"{len(stations)} stations tegen {base_url}: {args.rate}/min per station, "
+              f"{args.duration:.0f}s" + (f", piek elke {args.burst_interval:.0f}s" if args.burst_interval else ''),
+              flush=True)
+
+        simulator = StationSimulator(client, stats, stations, args, seed=args.seed)
+        started = time.perf_counter()
+        simulator.run(args.duration)
+        elapsed = time.perf_counter() - started
+
+        latency = client.request('GET', '/api/metrics/scan_latency?recent=0')
+        segments = (latency[1] or {}).get('segments', {}) if latency[0] == 200 else {}
+        report = build_report(stats, elapsed, lock_counter, segments)
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
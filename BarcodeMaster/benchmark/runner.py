@@ -0,0 +1,410 @@
+"""
+Endpoint benchmark for db_log_api.
+
+Every scale (database size) runs in its own worker process so peak RSS is
+per scale. A worker copies a generated database (see generator.py), points
+db_log_api at the copy and times every route, first through Flask's test
+client and then through a real waitress server on a free local port. Per route
+it records p50/p95 latency, SQL statements per request, response size and the
+HTTP status.
+
+The combined result is written to benchmark/results/last_run.json and compared
+with benchmark/results/baseline.json: a route regresses when its p95 grows by
+more than the tolerance (and by more than --min-delta-ms), or when it runs more
+statements per request than before.
+
+Usage:
+    python -m benchmark.runner                           # 10k, 100k and 1M rows
+    python -m benchmark.runner --scales 10000 --iterations 5
+    python -m benchmark.runner --save-baseline           # accept this run as the new baseline
+
+Exit code 1 when a regression was found or a scale failed. A scale fails when
+its worker crashes or when a route's warm-up request does not return 2xx.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote, urlencode
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmark.generator import cached_dataset
+
+SCALES = [10_000, 100_000, 1_000_000]
+MODES = ['test_client', 'waitress']
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+BASELINE_FILE = os.path.join(RESULTS_DIR, 'baseline.json')
+LAST_RUN_FILE = os.path.join(RESULTS_DIR, 'last_run.json')
+MIN_SAMPLES = 3
+
+# Statements counted per request; transaction control is not a query
+_TRANSACTION_PREFIXES = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values`` (pct in 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[k]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None when it cannot be read."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+class QueryCounter:
+    """Counts SQL statements on every connection db_log_api opens."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _trace(self, statement):
+        if not statement.lstrip().upper().startswith(_TRANSACTION_PREFIXES):
+            with self._lock:
+                self.count += 1
+
+    def install(self, api):
+        original = api.create_db_connection
+
+        def counting_connection():
+            conn = original()
+            conn.set_trace_callback(self._trace)
+            return conn
+
+        api.create_db_connection = counting_connection
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+
+
+class TestClientTarget:
+    """Requests through Flask's test client (no network, no server threads)."""
+
+    name = 'test_client'
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body)
+        data = response.get_data()
+        return response.status_code, len(data)
+
+    def close(self):
+        pass
+
+
+class WaitressTarget:
+    """Requests over HTTP to a waitress server running in this process."""
+
+    name = 'waitress'
+
+    def __init__(self, app):
+        import http.client
+        from waitress.server import create_server
+        self.server = create_server(app, host='127.0.0.1', port=0, threads=4)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection('127.0.0.1', self.server.effective_port, timeout=300)
+
+    def request(self, method, path, body=None):
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        self.connection.request(method, path, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        return response.status, len(data)
+
+    def close(self):
+        self.connection.close()
+        self.server.close()
+
+
+def route_plan(db_path):
+    """Returns [(name, method, path, json body)] covering the read routes, the
+    metrics, export and the write paths, with parameters sampled from the database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        open_row = conn.execute(
+            "SELECT project, user FROM logs WHERE event = 'OPEN' AND status = 'OPEN' "
+            "ORDER BY timestamp DESC LIMIT 1").fetchone()
+        recent_row = conn.execute('SELECT project, user FROM logs ORDER BY timestamp DESC LIMIT 1').fetchone()
+    finally:
+        conn.close()
+    project, user = open_row or recent_row or ('MO10000', 'OPUS')
+    today = datetime.now().strftime('%Y-%m-%d')
+    month_start = datetime.now().replace(day=1).strftime('%Y-%m-%d')
+    # Station names contain spaces ("KL GANNOMAT")
+    user_path = quote(user)
+    project_path = quote(project)
+    return [
+        ('dashboard', 'GET', '/dashboard', None),
+        ('database page', 'GET', '/database', None),
+        ('projects', 'GET', '/projects', None),
+        ('users', 'GET', '/users', None),
+        ('statistics', 'GET', '/statistics', None),
+        ('reports', 'GET', '/reports', None),
+        ('logs (no filter)', 'GET', '/logs', None),
+        ('logs (project)', 'GET', f"/logs?{urlencode({'project': project})}", None),
+        ('logs (user + month)', 'GET', f"/logs?{urlencode({'user': user, 'start_date': month_start, 'end_date': today})}", None),
+        ('logs count', 'GET', '/logs/count', None),
+        ('logs_project', 'GET', f"/logs_project?{urlencode({'project': project})}", None),
+        ('user stats', 'GET', f'/api/user/{user_path}/stats', None),
+        ('user recent projects', 'GET', f'/api/user/{user_path}/recent_projects', None),
+        ('configured users', 'GET', '/api/configured_users', None),
+        ('metrics: completion times', 'GET', '/api/metrics/project_completion_times', None),
+        ('metrics: project history', 'GET', f'/api/metrics/project_history/{user_path}?days=30', None),
+        ('metrics: expected completion', 'GET', f'/api/metrics/expected_completion/{project_path}', None),
+        ('metrics: workflow chain', 'GET', '/api/metrics/workflow_chain', None),
+        ('metrics: daily summary', 'GET', f'/api/metrics/daily_summary?date={today}', None),
+        ('metrics: performance analysis', 'GET', '/api/metrics/performance_analysis', None),
+        ('metrics: scan latency', 'GET', '/api/metrics/scan_latency', None),
+        ('report generate', 'POST', '/api/report/generate', {'report_type': 'workflow', 'period': 'month'}),
+        ('database stats', 'GET', '/api/database/stats', None),
+        ('database info', 'GET', '/api/database/info', None),
+        ('export', 'GET', '/api/database/export', None),
+        ('update_file_path', 'POST', '/update_file_path',
+         {'project': project, 'user': user, 'file_path': r'\\fileserver\bench\checklist.xlsx'}),
+        ('update_item_count', 'POST', '/update_item_count', {'project': project, 'user': user, 'item_count': 42}),
+        ('log AFGEMELD', 'POST', '/log', {'event': 'AFGEMELD', 'project': 'BENCH0001', 'user': 'BENCH'}),
+    ]
+
+
+def time_routes(target, plan, counter, iterations, max_seconds):
+    """Times every route in ``plan``; returns {route name: summary}.
+
+    A route whose warm-up request does not return 2xx is still timed, but its
+    summary gets ``warmup_status``, so the scale is reported as failed.
+    """
+    results = {}
+    for name, method, path, body in plan:
+        warmup_status, _ = target.request(method, path, body)  # warm-up (caches, template compilation)
+        latencies, queries, statuses = [], [], {}
+        size = 0
+        started = time.perf_counter()
+        for i in range(iterations):
+            if i >= MIN_SAMPLES and time.perf_counter() - started > max_seconds:
+                break
+            counter.reset()
+            t0 = time.perf_counter()
+            status, size = target.request(method, path, body)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            queries.append(counter.count)
+            statuses[status] = statuses.get(status, 0) + 1
+        results[name] = {
+            'method': method,
+            'path': path,
+            'samples': len(latencies),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'max_ms': round(max(latencies), 2),
+            'queries': max(queries),
+            'status': max(statuses, key=statuses.get),
+            'bytes': size,
+        }
+        flag = ''
+        if not 200 <= warmup_status < 300:
+            results[name]['warmup_status'] = warmup_status
+            flag = f"  FOUT: opwarmen gaf HTTP {warmup_status}"
+        print(f"    {name:<32} p50 {results[name]['p50_ms']:>9.1f} ms  p95 {results[name]['p95_ms']:>9.1f} ms  "
+              f"{results[name]['queries']:>3} q  HTTP {results[name]['status']}{flag}", file=sys.stderr, flush=True)
+    return results
+
+
+def run_worker(rows, modes, iterations, max_seconds, rebuild, out_path):
+    """Benchmarks one scale in this process and writes the result to ``out_path``."""
+    gen_start = time.perf_counter()
+    dataset = cached_dataset(rows, rebuild=rebuild)
+    gen_seconds = time.perf_counter() - gen_start
+
+    workdir = tempfile.mkdtemp(prefix='barcodemaster_bench_')
+    db_path = os.path.join(workdir, 'central_logging.sqlite')
+    shutil.copyfile(dataset, db_path)
+    try:
+        from database import db_log_api as api
+        # Route logging is INFO-heavy; keep it out of the timings and out of the real log file
+        logging.getLogger().setLevel(logging.WARNING)
+        api.DB_PATH = db_path
+        api.init_db()
+        counter = QueryCounter()
+        counter.install(api)
+        plan = route_plan(db_path)
+
+        result = {
+            'rows': rows,
+            'dataset': dataset,
+            'dataset_mb': round(os.path.getsize(dataset) / (1024 * 1024), 1),
+            'dataset_seconds': round(gen_seconds, 1),
+            'modes': {},
+        }
+        for mode in modes:
+            print(f"  [{rows:,} rijen] {mode}", file=sys.stderr, flush=True)
+            try:
+                target = WaitressTarget(api.app) if mode == 'waitress' else TestClientTarget(api.app)
+            except ImportError as e:
+                result['modes'][mode] = {'skipped': f"niet beschikbaar: {e}"}
+                continue
+            try:
+                result['modes'][mode] = time_routes(target, plan, counter, iterations, max_seconds)
+            finally:
+                target.close()
+        result['peak_rss_mb'] = peak_rss_mb()
+        # Timings of an error path are not comparable; keep them out of the baseline
+        failing = [f"{mode}: {name} (HTTP {summary['warmup_status']})"
+                   for mode, routes in result['modes'].items() if 'skipped' not in routes
+                   for name, summary in routes.items() if 'warmup_status' in summary]
+        if failing:
+            result['error'] = "route(s) zonder 2xx-status: " + ", ".join(failing)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+
+
+def run_scale(rows, args):
+    """Runs one scale in a fresh worker process and returns its result dict."""
+    fd, out_path = tempfile.mkstemp(suffix='.json', prefix='barcodemaster_bench_')
+    os.close(fd)
+    try:
+        cmd = [sys.executable, os.path.abspath(__file__), '--worker', '--rows', str(rows),
+               '--iterations', str(args.iterations), '--max-seconds', str(args.max_seconds),
+               '--modes', *args.modes, '--out', out_path]
+        if args.rebuild:
+            cmd.append('--rebuild')
+        completed = subprocess.run(cmd, cwd=project_root)
+        if completed.returncode != 0:
+            return {'rows': rows, 'error': f"worker afgebroken (exit code {completed.returncode})"}
+        with open(out_path, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.remove(out_path)
+
+
+def compare(previous, current, tolerance, min_delta_ms):
+    """Returns a list of regression messages between two runs."""
+    regressions = []
+    for scale, cur_scale in current.get('scales', {}).items():
+        prev_scale = previous.get('scales', {}).get(scale)
+        if not prev_scale:
+            continue
+        prev_rss, cur_rss = prev_scale.get('peak_rss_mb'), cur_scale.get('peak_rss_mb')
+        if prev_rss and cur_rss and cur_rss > prev_rss * (1 + tolerance):
+            regressions.append(f"{scale} rijen: piek-RSS {prev_rss} -> {cur_rss} MB")
+        for mode, cur_routes in cur_scale.get('modes', {}).items():
+            prev_routes = prev_scale.get('modes', {}).get(mode, {})
+            for route, cur in cur_routes.items():
+                prev = prev_routes.get(route)
+                if not isinstance(cur, dict) or not isinstance(prev, dict) or 'p95_ms' not in prev:
+                    continue
+                label = f"{scale} rijen, {mode}, {route}"
+                if (cur['p95_ms'] > prev['p95_ms'] * (1 + tolerance)
+                        and cur['p95_ms'] - prev['p95_ms'] > min_delta_ms):
+                    regressions.append(f"{label}: p95 {prev['p95_ms']:.1f} -> {cur['p95_ms']:.1f} ms")
+                if cur['queries'] > prev['queries']:
+                    regressions.append(f"{label}: queries per request {prev['queries']} -> {cur['queries']}")
+                if cur['status'] != prev['status']:
+                    regressions.append(f"{label}: HTTP {prev['status']} -> {cur['status']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark van alle db_log_api-routes op meerdere databasegroottes.")
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES, help="Databasegroottes in rijen")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--iterations', type=int, default=20, help="Metingen per route (standaard 20)")
+    parser.add_argument('--max-seconds', type=float, default=15.0,
+                        help=f"Tijdsbudget per route; daarna stoppen (na minstens {MIN_SAMPLES} metingen)")
+    parser.add_argument('--rebuild', action='store_true', help="Synthetische databases opnieuw genereren")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Baseline om mee te vergelijken")
+    parser.add_argument('--save-baseline', action='store_true', help="Deze run als nieuwe baseline opslaan")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Toegestane relatieve toename (standaard 0.25)")
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help="Kleinere p95-toenames worden genegeerd")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--rows', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--out', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.rows, args.modes, args.iterations, args.max_seconds, args.rebuild, args.out)
+        return 0
+
+    run = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'iterations': args.iterations,
+        'scales': {},
+    }
+    for rows in args.scales:
+        print(f"Schaal {rows:,} rijen", flush=True)
+        run['scales'][str(rows)] = run_scale(rows, args)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(LAST_RUN_FILE, 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=2)
+    print(f"\nResultaat: {LAST_RUN_FILE}")
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            previous = json.load(f)
+        regressions = compare(previous, run, args.tolerance, args.min_delta_ms)
+        print(f"Vergeleken met baseline van {previous.get('created', '?')}: "
+              f"{len(regressions)} regressie(s)")
+        for message in regressions:
+            print(f"  REGRESSIE {message}")
+    else:
+        print("Geen baseline gevonden.")
+
+    failed = [scale for scale, result in run['scales'].items() if 'error' in result]
+    for scale in failed:
+        print(f"  FOUT bij {scale} rijen: {run['scales'][scale]['error']}")
+
+    if failed:
+        print("Baseline niet bijgewerkt: niet alle schalen zijn gelukt.")
+    elif args.save_baseline or not os.path.exists(args.baseline):
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+        print(f"Baseline opgeslagen: {args.baseline}")
+    return 1 if (regressions or failed) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
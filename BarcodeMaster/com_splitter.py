@@ -3,21 +3,196 @@ import threading
 import time
 import queue
 
+# Overflow policies for the per-port output queues
+OVERFLOW_DROP_OLDEST = 'drop_oldest'
+OVERFLOW_DROP_NEWEST = 'drop_newest'
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST)
+
+DEFAULT_QUEUE_SIZE = 256
+RECONNECT_BACKOFF_MIN = 0.5
+RECONNECT_BACKOFF_MAX = 30.0
+
+
+class _OutputPort:
+    """A single output port with its own writer thread and bounded queue.
+
+    A slow or disconnected port only fills its own queue; the reader and the
+    other outputs keep running.
+    """
+
+    def __init__(self, port_name, baud_rate, stop_event, log_callback,
+                 queue_size=DEFAULT_QUEUE_SIZE, overflow_policy=OVERFLOW_DROP_OLDEST):
+        self.port_name = port_name
+        self.baud_rate = baud_rate
+        self.stop_event = stop_event
+        self._log = log_callback
+        self.overflow_policy = overflow_policy if overflow_policy in OVERFLOW_POLICIES else OVERFLOW_DROP_OLDEST
+        self.queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.port = None
+        self.thread = None
+
+        self._metrics_lock = threading.Lock()
+        self.bytes_written = 0
+        self.lines_written = 0
+        self.lines_dropped = 0
+        self.write_errors = 0
+        self.reconnects = 0
+        self.last_write_latency_ms = 0.0
+        self.max_write_latency_ms = 0.0
+        self._total_write_latency_ms = 0.0
+        self.connected = False
+
+    def start(self):
+        self.thread = threading.Thread(target=self._writer_loop, name=f"splitter-{self.port_name}", daemon=True)
+        self.thread.start()
+
+    def join(self, timeout=None):
+        if self.thread:
+            self.thread.join(timeout=timeout)
+
+    def put(self, line):
+        """Enqueue a line without blocking the reader, applying the overflow policy."""
+        enqueued_at = time.perf_counter()
+        try:
+            self.queue.put_nowait((line, enqueued_at))
+            return
+        except queue.Full:
+            pass
+
+        if self.overflow_policy == OVERFLOW_DROP_NEWEST:
+            self._count_drop()
+            return
+
+        # drop_oldest: make room for the new line
+        try:
+            self.queue.get_nowait()
+            self._count_drop()
+        except queue.Empty:
+            pass
+        try:
+            self.queue.put_nowait((line, enqueued_at))
+        except queue.Full:
+            self._count_drop()
+
+    def _count_drop(self):
+        with self._metrics_lock:
+            self.lines_dropped += 1
+            dropped = self.lines_dropped
+        # Only log the first drop and then every 100th to avoid flooding the log
+        if dropped == 1 or dropped % 100 == 0:
+            self._log(f"Queue vol voor {self.port_name}: {dropped} regel(s) verworpen ({self.overflow_policy}).")
+
+    def _open(self):
+        """Open the port, retrying with exponential backoff until it succeeds or we stop."""
+        backoff = RECONNECT_BACKOFF_MIN
+        while not self.stop_event.is_set():
+            try:
+                if self.port is None:
+                    self.port = serial.Serial(port=self.port_name, baudrate=self.baud_rate, timeout=1, write_timeout=2)
+                elif not self.port.is_open:
+                    self.port.open()
+                self.connected = True
+                self._log(f"Writer: Port {self.port_name} opened successfully.")
+                return True
+            except serial.SerialException as e:
+                self.connected = False
+                self._log(f"Writer Error on {self.port_name}: {e}. Retrying in {backoff:.1f}s.")
+                if self.stop_event.wait(backoff):
+                    break
+                backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+                with self._metrics_lock:
+                    self.reconnects += 1
+        return False
+
+    def _writer_loop(self):
+        if not self._open():
+            return
+        while not self.stop_event.is_set():
+            try:
+                line, enqueued_at = self.queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            try:
+                if not self.port.is_open:
+                    if not self._open():
+                        break
+                self.port.write(line)
+                now = time.perf_counter()
+                latency_ms = (now - enqueued_at) * 1000.0
+                with self._metrics_lock:
+                    self.bytes_written += len(line)
+                    self.lines_written += 1
+                    self.last_write_latency_ms = latency_ms
+                    self.max_write_latency_ms = max(self.max_write_latency_ms, latency_ms)
+                    self._total_write_latency_ms += latency_ms
+            except serial.SerialException as e:
+                with self._metrics_lock:
+                    self.write_errors += 1
+                self.connected = False
+                self._log(f"Write Error on {self.port_name}: {e}")
+                self._close()
+                # Requeue the line at the back so it is retried once the port is back
+                self.put(line)
+                if not self._open():
+                    break
+            except Exception as e:
+                with self._metrics_lock:
+                    self.write_errors += 1
+                self._log(f"Writer Unexpected Error on {self.port_name}: {e}")
+        self._close()
+        self._log(f"Writer thread for {self.port_name} has stopped.")
+
+    def _close(self):
+        try:
+            if self.port and self.port.is_open:
+                self.port.close()
+        except Exception:
+            pass
+        self.connected = False
+
+    def get_metrics(self):
+        with self._metrics_lock:
+            lines = self.lines_written
+            return {
+                'port': self.port_name,
+                'connected': self.connected,
+                'bytes': self.bytes_written,
+                'lines': lines,
+                'dropped': self.lines_dropped,
+                'errors': self.write_errors,
+                'reconnects': self.reconnects,
+                'queue_depth': self.queue.qsize(),
+                'queue_size': self.queue.maxsize,
+                'last_latency_ms': round(self.last_write_latency_ms, 2),
+                'avg_latency_ms': round(self._total_write_latency_ms / lines, 2) if lines else 0.0,
+                'max_latency_ms': round(self.max_write_latency_ms, 2),
+            }
+
+
 class ComSplitter:
     def __init__(self, config, log_callback):
         self.physical_port_name = config.get('physical_port')
-        self.virtual_port_1_name = config.get('virtual_port_1')
-        self.virtual_port_2_name = config.get('virtual_port_2')
+        # 'output_ports' is a list of any length; the two legacy keys are still accepted
+        output_ports = list(config.get('output_ports') or [])
+        if not output_ports:
+            output_ports = [config.get('virtual_port_1'), config.get('virtual_port_2')]
+        self.output_port_names = [p for p in output_ports if p]
         self.baud_rate = int(config.get('baud_rate', 9600))
+        self.queue_size = int(config.get('queue_size', DEFAULT_QUEUE_SIZE))
+        self.overflow_policy = config.get('overflow_policy', OVERFLOW_DROP_OLDEST)
         self.log_callback = log_callback
 
         self.stop_event = threading.Event()
-        self.data_queue = queue.Queue()
         self.main_thread = None
 
         self.scanner_port = None
-        self.vport1 = None
-        self.vport2 = None
+        self.outputs = []
+
+        self._metrics_lock = threading.Lock()
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.reader_connected = False
 
     def _log(self, message):
         if self.log_callback:
@@ -27,7 +202,7 @@ class ComSplitter:
         if self.main_thread and self.main_thread.is_alive():
             self._log("Splitter is already running.")
             return
-        
+
         self.stop_event.clear()
         self.main_thread = threading.Thread(target=self._run, daemon=True)
         self.main_thread.start()
@@ -46,93 +221,92 @@ class ComSplitter:
         self._log("ComSplitter process stopped.")
 
     def _run(self):
-        if not all([self.physical_port_name, self.virtual_port_1_name, self.virtual_port_2_name]):
-            self._log("Error: All COM ports must be specified.")
-            return
-
-        try:
-            self.scanner_port = serial.Serial(port=self.physical_port_name, baudrate=self.baud_rate, timeout=1)
-            self.vport1 = serial.Serial(port=self.virtual_port_1_name, baudrate=self.baud_rate, timeout=1)
-            self.vport2 = serial.Serial(port=self.virtual_port_2_name, baudrate=self.baud_rate, timeout=1)
-            self.scanner_port.close()
-            self.vport1.close()
-            self.vport2.close()
-        except serial.SerialException as e:
-            self._log(f"Fatal: Could not initialize COM ports: {e}")
+        if not self.physical_port_name or not self.output_port_names:
+            self._log("Error: A physical port and at least one output port must be specified.")
             return
 
-        reader = threading.Thread(target=self._reader_loop, daemon=True)
-        reader.start()
+        self.outputs = [
+            _OutputPort(name, self.baud_rate, self.stop_event, self._log,
+                        queue_size=self.queue_size, overflow_policy=self.overflow_policy)
+            for name in self.output_port_names
+        ]
+        for output in self.outputs:
+            output.start()
 
-        self._writer_loop()
+        self._reader_loop()
 
-        self.stop_event.set() # Ensure reader stops if writer loop exits
-        reader.join(timeout=2)
+        self.stop_event.set() # Ensure writers stop if the reader exits
+        for output in self.outputs:
+            output.join(timeout=2)
         self._cleanup_ports()
 
     def _reader_loop(self):
         self._log(f"Reader: Attempting to open {self.physical_port_name}...")
+        backoff = RECONNECT_BACKOFF_MIN
         while not self.stop_event.is_set():
             try:
-                if not self.scanner_port.is_open:
+                if self.scanner_port is None:
+                    # The read timeout bounds how long read_until blocks, so stop() stays responsive
+                    self.scanner_port = serial.Serial(port=self.physical_port_name, baudrate=self.baud_rate, timeout=0.5)
+                elif not self.scanner_port.is_open:
                     self.scanner_port.open()
+                self.reader_connected = True
+                backoff = RECONNECT_BACKOFF_MIN
                 self._log(f"Reader: Port {self.physical_port_name} opened successfully.")
-                
+
+                pending = b''
                 while not self.stop_event.is_set():
-                    if self.scanner_port.in_waiting > 0:
-                        line = self.scanner_port.readline()
-                        if line:
-                            self.data_queue.put(line)
-                            self._log(f"Data Read: {line.strip().decode(errors='ignore')}")
-                    else:
-                        time.sleep(0.05)
+                    chunk = self.scanner_port.read_until(b'\n')
+                    if not chunk:
+                        continue
+                    pending += chunk
+                    if not pending.endswith(b'\n'):
+                        # Timed out mid-line; keep the partial data for the next read
+                        continue
+                    line, pending = pending, b''
+                    with self._metrics_lock:
+                        self.bytes_read += len(line)
+                        self.lines_read += 1
+                    for output in self.outputs:
+                        output.put(line)
+                    self._log(f"Data Read: {line.strip().decode(errors='ignore')}")
 
             except serial.SerialException as e:
-                self._log(f"Reader Error: {e}. Retrying in 5s.")
-                if self.scanner_port.is_open: self.scanner_port.close()
-                # Interruptible sleep
-                for _ in range(50):
-                    if self.stop_event.is_set():
-                        break
-                    time.sleep(0.1)
+                self.reader_connected = False
+                self._log(f"Reader Error: {e}. Retrying in {backoff:.1f}s.")
+                try:
+                    if self.scanner_port and self.scanner_port.is_open:
+                        self.scanner_port.close()
+                except Exception:
+                    pass
+                if self.stop_event.wait(backoff):
+                    break
+                backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
             except Exception as e:
                 self._log(f"Reader Unexpected Error: {e}")
                 self.stop_event.set()
                 break
+        self.reader_connected = False
         self._log("Reader thread has stopped.")
 
-    def _writer_loop(self):
-        while not self.stop_event.is_set():
-            try:
-                line = self.data_queue.get(timeout=1)
-                self._write_to_port(self.vport1, self.virtual_port_1_name, line)
-                self._write_to_port(self.vport2, self.virtual_port_2_name, line)
-                self.data_queue.task_done()
-            except queue.Empty:
-                continue
-            except Exception as e:
-                self._log(f"Writer Unexpected Error: {e}")
-                self.stop_event.set()
-                break
-        self._log("Writer loop has stopped.")
-
-    def _write_to_port(self, port, port_name, data):
-        try:
-            if not port.is_open:
-                port.open()
-            port.write(data)
-            self._log(f"Forwarded to {port_name}")
-        except serial.SerialException as e:
-            self._log(f"Write Error on {port_name}: {e}")
-            if port.is_open: port.close()
-            time.sleep(2)
+    def get_metrics(self):
+        """Return a snapshot of reader and per-output metrics (safe to call from any thread)."""
+        with self._metrics_lock:
+            reader = {
+                'port': self.physical_port_name,
+                'connected': self.reader_connected,
+                'bytes': self.bytes_read,
+                'lines': self.lines_read,
+            }
+        return {
+            'reader': reader,
+            'outputs': [output.get_metrics() for output in self.outputs],
+        }
 
     def _cleanup_ports(self):
         self._log("Cleaning up COM ports...")
         if self.scanner_port and self.scanner_port.is_open:
             self.scanner_port.close()
-        if self.vport1 and self.vport1.is_open:
-            self.vport1.close()
-        if self.vport2 and self.vport2.is_open:
-            self.vport2.close()
+        for output in self.outputs:
+            output._close()
         self._log("Cleanup complete.")
@@ -0,0 +1,186 @@
+"""
+Monthly archive partitions for the logs table.
+
+Rows older than a configurable age move out of central_logging.sqlite into
+one SQLite file per month, ``logs_YYYY-MM.sqlite``, in the archive folder.
+Rows of work still in progress (``event = 'OPEN' AND status = 'OPEN'``) stay
+behind whatever their age: the dashboard, the AFGEMELD close-out and the
+file-path and item-count updates look for them in the hot table.
+The files have the same table and index plan. The move is an ArchiveJob: the
+batched window walk of db_cleanup, done one month at a time, so the hot
+database stays small and the move never holds the write lock for long.
+
+Reads that need history go through ``logs_for_range()``. When the requested
+date range touches archived months, it attaches only those partitions and
+exposes hot and archived rows together as the temp view ``logs_all``.
+Otherwise it hands back plain ``logs`` and attaches nothing. A range wider
+than SQLite's attach limit is first copied, a group of partitions at a time,
+into a temp table.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from database.db_cleanup import CleanupJob, Criteria, DEFAULT_BATCH_SIZE, DEFAULT_BATCH_PAUSE, age_criteria
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 180
+PARTITION_PATTERN = re.compile(r'^logs_(\d{4}-\d{2})\.sqlite$')
+MONTH_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+# Used when the sqlite3 module cannot report SQLITE_LIMIT_ATTACHED (SQLite's compile-time default)
+DEFAULT_ATTACH_LIMIT = 10
+RANGE_VIEW = 'logs_all'
+# Rows an ArchiveJob may move: everything except the OPEN rows that were never closed
+ARCHIVABLE = "NOT (event = 'OPEN' AND status IS 'OPEN')"
+
+
+def partition_path(archive_dir, month):
+    return os.path.join(archive_dir, f'logs_{month}.sqlite')
+
+
+def month_bounds(month):
+    """Returns the ISO start of ``month`` ('YYYY-MM') and of the month after it."""
+    year, mon = int(month[:4]), int(month[5:7])
+    following = f'{year + 1:04d}-01' if mon == 12 else f'{year:04d}-{mon + 1:02d}'
+    return f'{month}-01', f'{following}-01'
+
+
+def list_partitions(archive_dir):
+    """Returns the archive partitions as dicts (month, path, size), oldest first."""
+    partitions = []
+    if os.path.isdir(archive_dir):
+        for filename in os.listdir(archive_dir):
+            match = PARTITION_PATTERN.match(filename)
+            if match:
+                path = os.path.join(archive_dir, filename)
+                partitions.append({'month': match.group(1), 'path': path, 'size': os.path.getsize(path)})
+    partitions.sort(key=lambda p: p['month'])
+    return partitions
+
+
+def partitions_for_range(archive_dir, start_date=None, end_date=None):
+    """Returns the partitions whose month overlaps [start_date, end_date] (dates inclusive, open ends allowed)."""
+    first = start_date[:7] if start_date else None
+    last = end_date[:7] if end_date else None
+    return [p for p in list_partitions(archive_dir)
+            if (first is None or p['month'] >= first) and (last is None or p['month'] <= last)]
+
+
+class ArchiveJob(CleanupJob):
+    """Moves rows older than ``days`` into their monthly partition, oldest month first."""
+
+    def __init__(self, db_path, archive_dir, days=DEFAULT_ARCHIVE_AFTER_DAYS, batch_size=DEFAULT_BATCH_SIZE,
+                 batch_pause=DEFAULT_BATCH_PAUSE, now=None):
+        age = age_criteria(days, now)
+        criteria = Criteria(f"{age.description}, lopende OPEN-regels uitgezonderd",
+                            f'{age.count_where} AND {ARCHIVABLE}', age.count_params,
+                            f'{age.row_where} AND {ARCHIVABLE}', age.row_params)
+        super().__init__(db_path, 'archive', criteria, batch_size, batch_pause, archive_path=archive_dir)
+        self.cutoff = self.criteria.count_params[0]
+        self.months = []
+
+    def to_dict(self):
+        result = super().to_dict()
+        result['months'] = list(self.months)
+        return result
+
+    def _update_percent(self, done_ids, span):
+        if self.matched:
+            self.percent = round(100.0 * min(self.deleted, self.matched) / self.matched, 1)
+
+    def _next_month(self, conn, after):
+        """Returns the month of the oldest row to archive at or after ``after``, or None."""
+        oldest = conn.execute(f'SELECT MIN(timestamp) FROM logs WHERE timestamp >= ? AND timestamp < ? AND {ARCHIVABLE}',
+                              (after, self.cutoff)).fetchone()[0]
+        if oldest is None:
+            return None
+        if not MONTH_PATTERN.match(oldest[:7]):
+            logging.warning(f"Archive job {self.id}: timestamp '{oldest}' has no YYYY-MM prefix, stopping")
+            return None
+        return oldest[:7]
+
+    def _execute(self, conn):
+        os.makedirs(self.archive_path, exist_ok=True)
+        self.matched = conn.execute(f'SELECT COUNT(*) FROM logs WHERE timestamp >= ? AND timestamp < ? AND {ARCHIVABLE}',
+                                    ('0000', self.cutoff)).fetchone()[0]
+        month = self._next_month(conn, '0000')
+        while month and not self._cancel.is_set():
+            start, end = month_bounds(month)
+            end = min(end, self.cutoff)
+            where = f'timestamp >= ? AND timestamp < ? AND {ARCHIVABLE}'
+            criteria = Criteria(f"maand {month}", where, (start, end), where, (start, end))
+            self._run_windows(conn, criteria, partition_path(self.archive_path, month))
+            self.months.append(month)
+            month = self._next_month(conn, end)
+
+
+def _attach_limit(conn):
+    try:
+        return conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    except AttributeError:
+        # Connection.getlimit() needs Python 3.11
+        return DEFAULT_ATTACH_LIMIT
+
+
+@contextmanager
+def logs_for_range(conn, archive_dir, start_date=None, end_date=None):
+    """Yields the table name to query for rows in [start_date, end_date].
+
+    That is ``logs`` when no archived month is involved, otherwise the temp
+    view ``logs_all`` over the hot table and the attached partitions. Dates
+    are 'YYYY-MM-DD' strings; ``None`` means unbounded on that side.
+    Everything attached or created here is removed again on exit.
+    """
+    partitions = partitions_for_range(archive_dir, start_date, end_date)
+    if not partitions:
+        yield 'logs'
+        return
+
+    columns = ', '.join(row[1] for row in conn.execute('PRAGMA main.table_info(logs)'))
+    attached = []
+    temp_table = None
+    try:
+        # temp is only listed once it has been used, so count the attached databases by name
+        in_use = sum(1 for row in conn.execute('PRAGMA database_list') if row[1] not in ('main', 'temp'))
+        capacity = max(0, _attach_limit(conn) - in_use)
+        sources = ['main.logs']
+        if len(partitions) <= capacity:
+            for partition in partitions:
+                alias = f"archive_{partition['month'].replace('-', '_')}"
+                conn.execute('ATTACH DATABASE ? AS ' + alias, (partition['path'],))
+                attached.append(alias)
+                sources.append(f'{alias}.logs')
+        elif capacity:
+            # Too many months to attach at once: collect the rows in the range group by group
+            temp_table = 'temp.logs_archived'
+            conn.execute(f'CREATE TEMP TABLE logs_archived AS SELECT {columns} FROM main.logs WHERE 0')
+            low = start_date or '0000'
+            high = (datetime.fromisoformat(end_date[:10]) + timedelta(days=1)).date().isoformat() if end_date else '9999'
+            for offset in range(0, len(partitions), capacity):
+                group = partitions[offset:offset + capacity]
+                for partition in group:
+                    alias = f"archive_{partition['month'].replace('-', '_')}"
+                    conn.execute('ATTACH DATABASE ? AS ' + alias, (partition['path'],))
+                    attached.append(alias)
+                    conn.execute(f'INSERT INTO temp.logs_archived SELECT {columns} FROM {alias}.logs '
+                                 f'WHERE timestamp >= ? AND timestamp < ?', (low, high))
+                conn.commit()
+                while attached:
+                    conn.execute('DETACH DATABASE ' + attached.pop())
+            sources.append(temp_table)
+        else:
+            raise sqlite3.OperationalError("no attach slots left for the archive partitions")
+        union = ' UNION ALL '.join(f'SELECT {columns} FROM {source}' for source in sources)
+        conn.execute(f'CREATE TEMP VIEW {RANGE_VIEW} AS {union}')
+        yield RANGE_VIEW
+    finally:
+        # Readers may leave an open transaction behind; DETACH needs none
+        conn.commit()
+        conn.execute(f'DROP VIEW IF EXISTS temp.{RANGE_VIEW}')
+        if temp_table:
+            conn.execute(f'DROP TABLE IF EXISTS {temp_table}')
+        for alias in attached:
+            conn.execute('DETACH DATABASE ' + alias)
@@ -0,0 +1,302 @@
+"""
+Online backups of central_logging.sqlite.
+
+Copying the file with shutil on a live WAL database can miss what is still in
+the -wal file and can produce a torn copy. Backups here go through SQLite:
+
+- ``method='backup'`` uses the online backup API. It copies ``pages_per_step``
+  pages at a time and sleeps between steps, so scans keep getting the
+  connection's attention. A read transaction is held on the source for the
+  whole copy. Under WAL this does not block writers, and the copy is one
+  consistent snapshot. Without it, every write made during the backup would
+  restart the copy.
+- ``method='vacuum'`` uses ``VACUUM INTO``. It writes a compacted snapshot
+  (no free pages, rebuilt indexes) in one statement, also from a read
+  snapshot.
+
+The copy is written next to the target as ``.part`` and checked with
+``PRAGMA quick_check``. It can then be gzip-compressed as a stream. Only then
+is it moved into place, so an interrupted backup never looks like a valid one.
+
+Restores run the other way. The backup is staged into a scratch file next to
+the live database and validated there, and brought to the live page size and
+schema. It is then copied into the live database with the backup API in one
+step. That step holds the write lock only for the copy itself. Open
+connections keep working: WAL readers finish on their old snapshot and see
+the restored data on their next transaction, so the file is never swapped
+underneath them.
+"""
+
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import time
+
+BACKUP_METHODS = ('backup', 'vacuum')
+DEFAULT_PAGES_PER_STEP = 1024
+DEFAULT_STEP_SLEEP = 0.005
+COMPRESS_BLOCK_SIZE = 1024 * 1024
+BACKUP_SUFFIXES = ('.sqlite', '.sqlite.gz')
+
+
+class BackupError(Exception):
+    """The backup could not be made or failed verification."""
+
+
+def is_backup_file(filename):
+    return filename.endswith(BACKUP_SUFFIXES)
+
+
+def _remove_quietly(path):
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        try:
+            os.remove(path + suffix)
+        except OSError:
+            pass
+
+
+def _report(progress, phase, done=0, total=0):
+    if progress:
+        percent = round(100.0 * done / total, 1) if total else (100.0 if phase == 'done' else 0.0)
+        progress({'phase': phase, 'done': done, 'total': total, 'percent': percent})
+
+
+def _copy_with_backup_api(source_path, part_path, pages_per_step, step_sleep, progress):
+    """Returns (pages, steps) copied from source_path into part_path."""
+    stats = {'pages': 0, 'steps': 0}
+
+    def _on_step(status, remaining, total):
+        stats['steps'] += 1
+        stats['pages'] = total
+        _report(progress, 'copy', total - remaining, total)
+        if remaining and step_sleep:
+            # Give live requests a turn between steps
+            time.sleep(step_sleep)
+
+    src = sqlite3.connect(source_path, timeout=10, isolation_level=None)
+    dst = sqlite3.connect(part_path)
+    try:
+        # Pin one read snapshot for the whole copy (see module docstring)
+        src.execute('BEGIN')
+        src.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        src.backup(dst, pages=pages_per_step, progress=_on_step)
+        src.execute('COMMIT')
+        # A self-contained file: no -wal needed next to the backup
+        dst.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        dst.close()
+        src.close()
+    return stats['pages'], stats['steps']
+
+
+def _copy_with_vacuum_into(source_path, part_path, progress):
+    _report(progress, 'copy')
+    src = sqlite3.connect(source_path, timeout=10, isolation_level=None)
+    try:
+        src.execute('VACUUM INTO ?', (part_path,))
+    finally:
+        src.close()
+    dst = sqlite3.connect(part_path)
+    try:
+        dst.execute('PRAGMA journal_mode=DELETE')
+        pages = dst.execute('PRAGMA page_count').fetchone()[0]
+    finally:
+        dst.close()
+    _report(progress, 'copy', pages, pages)
+    return pages, 1
+
+
+def quick_check(path):
+    """Returns the PRAGMA quick_check result of ``path`` ('ok' when healthy)."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute('PRAGMA quick_check').fetchall()
+    finally:
+        conn.close()
+    return '; '.join(row[0] for row in rows)
+
+
+def _compress(part_path, gz_part_path, progress):
+    total = os.path.getsize(part_path)
+    done = 0
+    with open(part_path, 'rb') as src, gzip.open(gz_part_path, 'wb', compresslevel=6) as dst:
+        while True:
+            block = src.read(COMPRESS_BLOCK_SIZE)
+            if not block:
+                break
+            dst.write(block)
+            done += len(block)
+            _report(progress, 'compress', done, total)
+
+
+def backup_database(source_path, target_path, method='backup', pages_per_step=DEFAULT_PAGES_PER_STEP,
+                    step_sleep=DEFAULT_STEP_SLEEP, compress=False, verify=True, progress=None):
+    """Writes a consistent copy of ``source_path`` to ``target_path``.
+
+    With ``compress`` the file is written as ``target_path + '.gz'``.
+    ``progress`` is called with a dict (phase, done, total, percent). Returns
+    a dict with the final path, method, size, source size, pages, steps,
+    quick_check result and duration. Raises BackupError on failure; partial
+    files are removed.
+    """
+    if method not in BACKUP_METHODS:
+        raise BackupError(f"Onbekende backup methode '{method}'")
+    if not os.path.isfile(source_path):
+        raise BackupError(f"Database bestand '{source_path}' niet gevonden")
+    os.makedirs(os.path.dirname(os.path.abspath(target_path)), exist_ok=True)
+
+    start = time.perf_counter()
+    final_path = target_path + '.gz' if compress else target_path
+    part_path = target_path + '.part'
+    gz_part_path = final_path + '.part' if compress else None
+    _remove_quietly(part_path)
+    try:
+        if method == 'vacuum':
+            pages, steps = _copy_with_vacuum_into(source_path, part_path, progress)
+        else:
+            pages, steps = _copy_with_backup_api(source_path, part_path, max(1, int(pages_per_step)),
+                                                 max(0.0, float(step_sleep)), progress)
+        check = 'skipped'
+        if verify:
+            _report(progress, 'verify')
+            check = quick_check(part_path)
+            if check != 'ok':
+                raise BackupError(f"quick_check van de backup faalde: {check}")
+        if compress:
+            _compress(part_path, gz_part_path, progress)
+            os.replace(gz_part_path, final_path)
+            _remove_quietly(part_path)
+        else:
+            os.replace(part_path, final_path)
+    except BackupError:
+        _remove_quietly(part_path)
+        if gz_part_path:
+            _remove_quietly(gz_part_path)
+        raise
+    except (sqlite3.Error, OSError) as e:
+        _remove_quietly(part_path)
+        if gz_part_path:
+            _remove_quietly(gz_part_path)
+        raise BackupError(str(e)) from e
+
+    result = {
+        'path': final_path,
+        'filename': os.path.basename(final_path),
+        'method': method,
+        'compressed': bool(compress),
+        'size': os.path.getsize(final_path),
+        'source_size': os.path.getsize(source_path),
+        'pages': pages,
+        'steps': steps,
+        'quick_check': check,
+        'duration_s': round(time.perf_counter() - start, 2),
+    }
+    _report(progress, 'done', pages, pages)
+    logging.info(
+        f"Backup ({method}{', gzip' if compress else ''}) written to {final_path}: "
+        f"{result['size']} bytes, {pages} pages in {steps} step(s), {result['duration_s']}s, quick_check={check}"
+    )
+    return result
+
+
+def _stage_restore(backup_path, staging_path):
+    _remove_quietly(staging_path)
+    if backup_path.endswith('.gz'):
+        decompress_backup(backup_path, staging_path)
+    else:
+        # Backup files are not written to while they sit in the backup folder
+        shutil.copyfile(backup_path, staging_path)
+
+
+def _validate_staged(staging, required_tables, page_size):
+    """Checks the staged copy; returns True when its page size had to be changed."""
+    check = '; '.join(row[0] for row in staging.execute('PRAGMA quick_check').fetchall())
+    if check != 'ok':
+        raise BackupError(f"Backup is beschadigd (quick_check: {check})")
+    tables = {row[0] for row in staging.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    missing = [name for name in required_tables if name not in tables]
+    if missing:
+        raise BackupError(f"Backup mist tabel(len): {', '.join(missing)}")
+    # A WAL database cannot change page size, so the staged copy adapts instead
+    if staging.execute('PRAGMA page_size').fetchone()[0] != page_size:
+        staging.execute(f'PRAGMA page_size={int(page_size)}')
+        staging.execute('VACUUM')
+        return True
+    return False
+
+
+def restore_database(backup_path, target_path, prepare=None, required_tables=('logs',), progress=None):
+    """Restores ``backup_path`` (.sqlite or .sqlite.gz) into the live database at ``target_path``.
+
+    ``prepare`` is called with a connection to the validated staging copy
+    before the swap (e.g. to migrate it to the current schema). Returns a
+    dict with the restored row count, page-size adjustment, checkpoint
+    result, write pause and total duration. Raises BackupError when the
+    backup is unusable; the live database is then left untouched.
+    """
+    if not os.path.isfile(backup_path):
+        raise BackupError(f"Backup bestand '{backup_path}' niet gevonden")
+    start = time.perf_counter()
+    staging_path = target_path + '.restore'
+    try:
+        _report(progress, 'stage')
+        _stage_restore(backup_path, staging_path)
+
+        _report(progress, 'verify')
+        live = sqlite3.connect(target_path, timeout=10, isolation_level=None)
+        try:
+            page_size = live.execute('PRAGMA page_size').fetchone()[0]
+        finally:
+            live.close()
+        staging = sqlite3.connect(staging_path, isolation_level=None)
+        try:
+            staging.execute('PRAGMA journal_mode=DELETE')
+            page_size_adjusted = _validate_staged(staging, required_tables, page_size)
+            if prepare:
+                staging.isolation_level = ''
+                prepare(staging)
+                staging.commit()
+            rows = staging.execute('SELECT COUNT(*) FROM logs').fetchone()[0] if 'logs' in required_tables else None
+        finally:
+            staging.close()
+
+        _report(progress, 'restore')
+        src = sqlite3.connect(staging_path)
+        dst = sqlite3.connect(target_path, timeout=10)
+        try:
+            # One step: writers wait on the lock for exactly this long
+            paused_at = time.perf_counter()
+            src.backup(dst)
+            write_pause_ms = round((time.perf_counter() - paused_at) * 1000, 1)
+            # Move the restored pages out of the WAL; best effort while readers are active
+            checkpoint = dst.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+        finally:
+            dst.close()
+            src.close()
+    except (sqlite3.Error, OSError) as e:
+        raise BackupError(str(e)) from e
+    finally:
+        _remove_quietly(staging_path)
+
+    result = {
+        'rows': rows,
+        'page_size_adjusted': page_size_adjusted,
+        'checkpoint_busy': bool(checkpoint[0]),
+        'write_pause_ms': write_pause_ms,
+        'duration_s': round(time.perf_counter() - start, 2),
+    }
+    _report(progress, 'done', 1, 1)
+    logging.info(
+        f"Database restored from {backup_path}: {rows} rows, writes paused {write_pause_ms} ms, "
+        f"{result['duration_s']}s total"
+    )
+    return result
+
+
+def decompress_backup(gz_path, target_path):
+    """Streams a .sqlite.gz backup back into a plain SQLite file at ``target_path``."""
+    with gzip.open(gz_path, 'rb') as src, open(target_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, COMPRESS_BLOCK_SIZE)
+    return target_path
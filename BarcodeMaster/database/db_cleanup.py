@@ -0,0 +1,249 @@
+"""
+Retention and cleanup jobs for the logs table.
+
+A cleanup never runs as one big DELETE. The job first finds the id range that
+can hold matching rows. It then walks that range in windows of ``batch_size``
+ids. Each window is one short BEGIN IMMEDIATE transaction that deletes the
+matching rows in the window, and optionally copies them to an archive
+database first. Between windows the job sleeps, so waiting scans get the
+write lock. Windows are read through the primary key (``NOT INDEXED``),
+which keeps the work per transaction bounded by the window size, however
+selective the criteria are.
+
+Jobs run in a background thread. CleanupJobs keeps their progress for the
+job-status endpoint. Only the standard library is used here.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from database.db_schema import create_schema
+
+DEFAULT_BATCH_SIZE = 2000
+MAX_BATCH_SIZE = 50_000
+DEFAULT_BATCH_PAUSE = 0.05
+MAX_FINISHED_JOBS = 20
+
+
+class CleanupBusyError(RuntimeError):
+    """Another cleanup job is still running."""
+
+
+class Criteria:
+    """Which rows a cleanup removes.
+
+    ``count_where`` is written so an index answers it (dry runs, id range);
+    ``row_where`` is applied inside a primary-key window.
+    """
+
+    def __init__(self, description, count_where, count_params, row_where, row_params):
+        self.description = description
+        self.count_where = count_where
+        self.count_params = tuple(count_params)
+        self.row_where = row_where
+        self.row_params = tuple(row_params)
+
+
+def age_criteria(days, now=None):
+    """Rows with a timestamp older than ``days`` days."""
+    days = int(days)
+    if days < 1:
+        raise ValueError("days moet minimaal 1 zijn")
+    cutoff = ((now or datetime.now()) - timedelta(days=days)).isoformat()
+    return Criteria(f"ouder dan {days} dagen (voor {cutoff[:10]})",
+                    'timestamp < ?', (cutoff,), 'timestamp < ?', (cutoff,))
+
+
+def project_criteria(pattern):
+    """Rows whose project matches ``pattern`` (``*`` wildcard, case-insensitive like LIKE)."""
+    pattern = (pattern or '').strip()
+    if not pattern or not pattern.replace('*', '').replace('%', ''):
+        raise ValueError("Patroon mag niet leeg zijn of alleen uit wildcards bestaan")
+    like = pattern.replace('*', '%').lower()
+    # LIKE is ASCII case-insensitive, so lower(project) LIKE lower(pattern) selects
+    # the same rows and can be answered from the lower(project) index
+    where, params = 'lower(project) LIKE ?', [like]
+    prefix = ''
+    for ch in like:
+        if ch in '%_':
+            break
+        prefix += ch
+    if prefix:
+        # A literal prefix narrows the index scan to a range
+        where = 'lower(project) >= ? AND lower(project) < ? AND ' + where
+        params = [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)] + params
+    return Criteria(f"projecten '{pattern}'", where, params, 'lower(project) LIKE ?', (like,))
+
+
+def count_matching(conn, criteria):
+    """Dry run: the number of rows ``criteria`` would remove."""
+    return conn.execute(f'SELECT COUNT(*) FROM logs WHERE {criteria.count_where}',
+                        criteria.count_params).fetchone()[0]
+
+
+def _prepare_archive(conn, archive_path):
+    """Creates the archive database if needed, attaches it as ``archive`` and returns the shared columns."""
+    archive = sqlite3.connect(archive_path)
+    try:
+        create_schema(archive)
+        archive_columns = {row[1] for row in archive.execute('PRAGMA table_info(logs)')}
+    finally:
+        archive.close()
+    conn.execute('ATTACH DATABASE ? AS archive', (archive_path,))
+    return [row[1] for row in conn.execute('PRAGMA main.table_info(logs)') if row[1] in archive_columns]
+
+
+class CleanupJob:
+    """One cleanup run; progress fields are read by the status endpoint while it runs."""
+
+    def __init__(self, db_path, kind, criteria, batch_size=DEFAULT_BATCH_SIZE,
+                 batch_pause=DEFAULT_BATCH_PAUSE, archive_path=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.db_path = db_path
+        self.kind = kind
+        self.criteria = criteria
+        self.batch_size = max(1, min(int(batch_size), MAX_BATCH_SIZE))
+        self.batch_pause = max(0.0, float(batch_pause))
+        self.archive_path = archive_path
+        self.status = 'queued'
+        self.created = datetime.now().isoformat(timespec='seconds')
+        self.started = None
+        self.finished = None
+        self.matched = None
+        self.deleted = 0
+        self.archived = 0
+        self.batches = 0
+        self.percent = 0.0
+        self.lock_wait_ms = 0.0
+        self.error = None
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'description': self.criteria.description,
+            'status': self.status,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'matched': self.matched,
+            'deleted': self.deleted,
+            'archived': self.archived,
+            'archive_path': self.archive_path,
+            'batches': self.batches,
+            'batch_size': self.batch_size,
+            'percent': self.percent,
+            'lock_wait_ms': round(self.lock_wait_ms, 1),
+            'error': self.error,
+        }
+
+    def run(self):
+        self.status = 'running'
+        self.started = datetime.now().isoformat(timespec='seconds')
+        start = time.perf_counter()
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._execute(conn)
+            if self.deleted:
+                conn.execute('PRAGMA optimize')
+            self.status = 'cancelled' if self._cancel.is_set() else 'done'
+            if self.status == 'done':
+                self.percent = 100.0
+        except Exception as e:
+            self.status = 'failed'
+            self.error = str(e)
+            logging.error(f"Cleanup job {self.id} ({self.criteria.description}) failed: {e}", exc_info=True)
+        finally:
+            conn.close()
+            self.finished = datetime.now().isoformat(timespec='seconds')
+        logging.info(
+            f"Cleanup job {self.id} {self.status}: {self.criteria.description}, {self.deleted} deleted, "
+            f"{self.archived} archived in {self.batches} batch(es), {time.perf_counter() - start:.1f}s"
+        )
+
+    def _execute(self, conn):
+        self.matched = count_matching(conn, self.criteria)
+        if self.matched:
+            self._run_windows(conn, self.criteria, self.archive_path)
+
+    def _update_percent(self, done_ids, span):
+        self.percent = round(100.0 * min(done_ids, span) / span, 1)
+
+    def _run_windows(self, conn, criteria, archive_path):
+        """Removes the rows matching ``criteria`` window by window, copying them to ``archive_path`` first if given."""
+        first_id, last_id = conn.execute(
+            f'SELECT MIN(id), MAX(id) FROM logs WHERE {criteria.count_where}', criteria.count_params).fetchone()
+        if first_id is None:
+            return
+        where = criteria.row_where
+        params = criteria.row_params
+        copy_sql = None
+        if archive_path:
+            columns = ', '.join(_prepare_archive(conn, archive_path))
+            # OR IGNORE keeps the original ids and makes a rerun after an interruption harmless
+            copy_sql = (f'INSERT OR IGNORE INTO archive.logs ({columns}) SELECT {columns} FROM main.logs NOT INDEXED '
+                        f'WHERE id >= ? AND id < ? AND {where}')
+        delete_sql = f'DELETE FROM main.logs NOT INDEXED WHERE id >= ? AND id < ? AND {where}'
+        span = last_id - first_id + 1
+        low = first_id
+        while low <= last_id and not self._cancel.is_set():
+            high = low + self.batch_size
+            waited = time.perf_counter()
+            conn.execute('BEGIN IMMEDIATE')
+            self.lock_wait_ms += (time.perf_counter() - waited) * 1000
+            try:
+                if copy_sql:
+                    self.archived += conn.execute(copy_sql, (low, high) + params).rowcount
+                self.deleted += conn.execute(delete_sql, (low, high) + params).rowcount
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            self.batches += 1
+            self._update_percent(high - first_id, span)
+            low = high
+            if self.batch_pause:
+                # Let scans that queued for the write lock go first
+                time.sleep(self.batch_pause)
+        if copy_sql:
+            conn.execute('DETACH DATABASE archive')
+
+
+class CleanupJobs:
+    """Runs cleanup jobs one at a time in background threads and keeps recent results."""
+
+    def __init__(self, max_finished=MAX_FINISHED_JOBS):
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._max_finished = max_finished
+
+    def start(self, job):
+        with self._lock:
+            running = [j for j in self._jobs.values() if j.status in ('queued', 'running')]
+            if running:
+                raise CleanupBusyError(f"Opschoontaak {running[0].id} loopt nog")
+            self._jobs[job.id] = job
+            finished = [j for j in self._jobs.values() if j.status not in ('queued', 'running')]
+            for old in finished[:max(0, len(finished) - self._max_finished)]:
+                del self._jobs[old.id]
+        threading.Thread(target=job.run, name=f'cleanup-{job.id}', daemon=True).start()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def snapshot(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in reversed(jobs)]
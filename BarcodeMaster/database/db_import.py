@@ -0,0 +1,218 @@
+"""
+Batched CSV import into the logs table.
+
+The CSV is read as a stream and validated row by row. Valid rows go into a
+TEMP staging table one chunk at a time. Each chunk is copied into logs with
+a single INSERT ... SELECT that skips rows already present, matched on
+(timestamp, event, project, user), and is then committed. The write lock is
+therefore held for one set-based insert per chunk, and live scans get the
+lock between chunks instead of waiting for the whole file.
+
+Rows that already sit in an archive partition count as duplicates too: before
+the merge, the partition of every month in the chunk is attached in turn and
+the staged rows found there are dropped. Re-importing an old export therefore
+never puts archived rows back into the hot table.
+"""
+
+import csv
+import logging
+import os
+import time
+from datetime import datetime
+
+from database.db_archive import partition_path
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 50_000
+MAX_ERROR_SAMPLES = 20
+REQUIRED_COLUMNS = ('timestamp', 'event')
+IMPORT_COLUMNS = ('timestamp', 'event', 'details', 'project', 'user', 'status',
+                  'base_mo_code', 'is_rep_variant', 'file_path', 'item_count')
+
+# Duplicates inside one chunk are dropped by the UNIQUE constraint, duplicates
+# of existing rows (and of earlier chunks) by the NOT EXISTS below
+_STAGING_TABLE_SQL = '''
+    CREATE TEMP TABLE IF NOT EXISTS import_staging (
+        timestamp TEXT NOT NULL,
+        event TEXT NOT NULL,
+        details TEXT,
+        project TEXT NOT NULL,
+        user TEXT NOT NULL,
+        status TEXT,
+        base_mo_code TEXT,
+        is_rep_variant INTEGER,
+        file_path TEXT,
+        item_count INTEGER,
+        UNIQUE (timestamp, event, project, user)
+    )
+'''
+_STAGE_ROWS_SQL = (
+    'INSERT OR IGNORE INTO import_staging (timestamp, event, details, project, user, status, base_mo_code, '
+    'is_rep_variant, file_path, item_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+)
+# The (event, timestamp, ...) index answers the NOT EXISTS lookup
+_MERGE_STAGED_SQL = '''
+    INSERT INTO logs (timestamp, event, details, project, user, status, base_mo_code, is_rep_variant, file_path, item_count)
+    SELECT s.timestamp, s.event, s.details, s.project, s.user, s.status, s.base_mo_code, s.is_rep_variant, s.file_path, s.item_count
+    FROM import_staging s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM logs l
+        WHERE l.event = s.event
+        AND l.timestamp = s.timestamp
+        AND l.user = s.user
+        AND l.project = s.project
+    )
+    ORDER BY s.timestamp
+'''
+_ARCHIVE_ALIAS = 'import_archive'
+_DROP_ARCHIVED_SQL = f'''
+    DELETE FROM import_staging
+    WHERE EXISTS (
+        SELECT 1 FROM {_ARCHIVE_ALIAS}.logs l
+        WHERE l.event = import_staging.event
+        AND l.timestamp = import_staging.timestamp
+        AND l.user = import_staging.user
+        AND l.project = import_staging.project
+    )
+'''
+
+
+class ImportFormatError(ValueError):
+    """The CSV cannot be imported at all (e.g. required columns missing)."""
+
+
+def _parse_bool_int(value):
+    text = (value or '').strip().lower()
+    if text in ('', '0', 'false', 'nee', 'no'):
+        return 0
+    if text in ('1', 'true', 'ja', 'yes'):
+        return 1
+    raise ValueError(f"ongeldige is_rep_variant '{value}'")
+
+
+def _parse_optional_int(value, name):
+    text = (value or '').strip()
+    if not text:
+        return None
+    try:
+        return int(float(text)) if '.' in text else int(text)
+    except ValueError:
+        raise ValueError(f"ongeldige {name} '{value}'")
+
+
+def validate_row(row):
+    """Returns the row as a tuple in IMPORT_COLUMNS order, or raises ValueError."""
+    timestamp = (row.get('timestamp') or '').strip()
+    if not timestamp:
+        raise ValueError("timestamp ontbreekt")
+    try:
+        # Stored like the API writes it, so duplicates match and date ranges compare as text
+        timestamp = datetime.fromisoformat(timestamp).isoformat()
+    except ValueError:
+        raise ValueError(f"ongeldige timestamp '{timestamp}'")
+    event = (row.get('event') or '').strip()
+    if not event:
+        raise ValueError("event ontbreekt")
+    return (
+        timestamp,
+        event,
+        row.get('details') or None,
+        (row.get('project') or '').strip(),
+        (row.get('user') or '').strip(),
+        (row.get('status') or '').strip(),
+        (row.get('base_mo_code') or '').strip(),
+        _parse_bool_int(row.get('is_rep_variant')),
+        row.get('file_path') or '',
+        _parse_optional_int(row.get('item_count'), 'item_count'),
+    )
+
+
+def _drop_archived(conn, archive_dir, chunk):
+    """Removes the staged rows that already exist in the archive partitions of the chunk's months."""
+    months = sorted({row[0][:7] for row in chunk})
+    for path in (partition_path(archive_dir, month) for month in months):
+        if not os.path.exists(path):
+            continue
+        # ATTACH and DETACH cannot run inside a transaction; the staging table is temp, committing it is harmless
+        conn.commit()
+        conn.execute(f'ATTACH DATABASE ? AS {_ARCHIVE_ALIAS}', (path,))
+        try:
+            conn.execute(_DROP_ARCHIVED_SQL)
+            conn.commit()
+        finally:
+            conn.execute(f'DETACH DATABASE {_ARCHIVE_ALIAS}')
+
+
+def _merge_chunk(conn, chunk, archive_dir=None):
+    """Stages and merges one chunk; returns the number of rows inserted into logs."""
+    conn.execute('DELETE FROM import_staging')
+    conn.executemany(_STAGE_ROWS_SQL, chunk)
+    if archive_dir:
+        _drop_archived(conn, archive_dir, chunk)
+    cursor = conn.execute(_MERGE_STAGED_SQL)
+    inserted = cursor.rowcount
+    conn.commit()
+    return inserted
+
+
+def import_csv(conn, text_stream, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, archive_dir=None):
+    """Imports CSV rows from ``text_stream`` into logs, committing after every chunk.
+
+    With ``archive_dir``, rows already present in an archive partition are
+    skipped as duplicates as well.
+
+    Returns a dict with total/imported/skipped/invalid counts, the number of
+    chunks, the duration and up to MAX_ERROR_SAMPLES invalid-row messages.
+    Raises ImportFormatError when the header lacks the required columns.
+    """
+    chunk_size = max(1, min(int(chunk_size), MAX_CHUNK_SIZE))
+    start = time.perf_counter()
+    reader = csv.DictReader(text_stream)
+    header = [name.strip() for name in (reader.fieldnames or [])]
+    missing = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing:
+        raise ImportFormatError(f"Ontbrekende kolommen: {', '.join(missing)}")
+    reader.fieldnames = header
+
+    conn.execute(_STAGING_TABLE_SQL)
+    result = {'total_rows': 0, 'imported_count': 0, 'skipped_count': 0, 'invalid_count': 0,
+              'chunks': 0, 'errors': []}
+    chunk = []
+    try:
+        for row in reader:
+            result['total_rows'] += 1
+            try:
+                chunk.append(validate_row(row))
+            except ValueError as e:
+                result['invalid_count'] += 1
+                if len(result['errors']) < MAX_ERROR_SAMPLES:
+                    result['errors'].append({'line': reader.line_num, 'error': str(e)})
+                continue
+            if len(chunk) >= chunk_size:
+                inserted = _merge_chunk(conn, chunk, archive_dir)
+                result['imported_count'] += inserted
+                result['skipped_count'] += len(chunk) - inserted
+                result['chunks'] += 1
+                chunk = []
+                if progress:
+                    progress(result)
+        if chunk:
+            inserted = _merge_chunk(conn, chunk, archive_dir)
+            result['imported_count'] += inserted
+            result['skipped_count'] += len(chunk) - inserted
+            result['chunks'] += 1
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute('DROP TABLE IF EXISTS temp.import_staging')
+
+    if result['imported_count']:
+        # Refresh planner statistics if the import changed the table noticeably
+        conn.execute('PRAGMA optimize')
+    result['duration_s'] = round(time.perf_counter() - start, 2)
+    logging.info(
+        f"CSV import: {result['imported_count']} imported, {result['skipped_count']} duplicates skipped, "
+        f"{result['invalid_count']} invalid, {result['chunks']} chunk(s) in {result['duration_s']}s"
+    )
+    return result
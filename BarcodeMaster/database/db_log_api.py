@@ -1,10 +1,9 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory, make_response, send_file, g
+from flask import Flask, request, jsonify, render_template, send_from_directory, send_file, g, Response, stream_with_context
 import sqlite3
 import json
 import os
 from datetime import datetime, timedelta
 import logging
-import shutil
 import csv
 import io
 import threading
@@ -12,6 +11,9 @@ import sys
 from collections import defaultdict
 import statistics
 import math
+import zlib
+import contextlib
+import uuid
 
 # Add project root to path to allow imports from sibling directories
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -20,23 +22,38 @@ if project_root not in sys.path:
 
 # Import path utilities for proper path handling
 from path_utils import get_writable_path, get_resource_path
+from config_utils import get_config_value
+from scan_trace import TraceRecorder, stamp
+from database.db_schema import create_schema
+from database import db_queries
+from database import db_import
+from database import db_backup
+from database import db_cleanup
+from database import db_archive
+from database import db_maintenance
+from database import log_files
+from database import log_setup
 
 # --- Setup logging to writable location ---
 log_dir = get_writable_path('database')
 os.makedirs(log_dir, exist_ok=True)
 log_path = os.path.join(log_dir, 'db_log_api.log')
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s %(message)s',
-    handlers=[
-        logging.FileHandler(log_path, encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+# Rotated at this size or at midnight, keeping LOG_BACKUP_COUNT numbered files
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 10
+
+# Request threads only enqueue records; a listener thread formats and writes
+# them (see log_setup). 'log_format' is 'text' or 'json'.
+log_listener = log_setup.setup_logging(
+    log_path,
+    level=str(get_config_value('log_level', 'INFO')).upper(),
+    log_format=get_config_value('log_format', 'text'),
+    max_bytes=LOG_MAX_BYTES,
+    backup_count=LOG_BACKUP_COUNT,
 )
-
-# --- Service Imports ---
-from services.background_import_service import BackgroundImportService
+log_file_handler = log_listener.handlers[0]
+# Share of /log payloads written at DEBUG (needs log_level DEBUG)
+PAYLOAD_SAMPLE_RATE = float(get_config_value('log_payload_sample_rate', log_setup.DEFAULT_PAYLOAD_SAMPLE_RATE))
 
 # --- Flask App Setup ---
 # Use the 'templates' directory in the same folder as this script
@@ -44,7 +61,22 @@ template_dir = get_resource_path('database/templates')
 app = Flask(__name__, template_folder=template_dir)
 
 # --- Service Initialization ---
-background_service = BackgroundImportService()
+# Created on the first OPEN event rather than at import, so starting the API
+# server does not load the import service (and, through it, pandas/pyodbc).
+_background_service = None
+_background_service_lock = threading.Lock()
+
+def get_background_service():
+    """Returns the BackgroundImportService used for OPEN events, creating it on first use."""
+    global _background_service
+    with _background_service_lock:
+        if _background_service is None:
+            from services.background_import_service import BackgroundImportService
+            _background_service = BackgroundImportService()
+        return _background_service
+
+# --- Scan latency tracing ---
+scan_trace_recorder = TraceRecorder()
 
 # --- Global shutdown control ---
 _server_thread = None
@@ -56,6 +88,7 @@ def stop_api_server():
     global _shutdown_requested, _server
     _shutdown_requested = True
     logging.info("Shutdown requested for DB API server")
+    maintenance.stop()
     
     # If using waitress server, shut it down
     if _server:
@@ -93,6 +126,37 @@ def get_db():
         db = g._database = create_db_connection()
     return db
 
+# --- Scheduled maintenance (incremental vacuum, checkpoints, optimize) ---
+maintenance = db_maintenance.MaintenanceScheduler(create_db_connection)
+
+@app.before_request
+def assign_request_id():
+    """Tags the request's log records with the caller's X-Request-ID, or a new id."""
+    request_id = (request.headers.get('X-Request-ID') or '')[:64] or uuid.uuid4().hex[:12]
+    g.request_id = request_id
+    g._request_id_token = log_setup.request_id_var.set(request_id)
+
+@app.after_request
+def echo_request_id(response):
+    request_id = getattr(g, 'request_id', None)
+    if request_id:
+        response.headers['X-Request-ID'] = request_id
+    return response
+
+@app.teardown_request
+def clear_request_id(exception):
+    # Streamed responses push the request context again, so this can run twice
+    token = g.pop('_request_id_token', None)
+    if token is not None:
+        log_setup.request_id_var.reset(token)
+
+@app.after_request
+def count_writes(response):
+    """Feeds the maintenance scheduler's write rate; every POST is counted as a write."""
+    if request.method == 'POST':
+        maintenance.note_write()
+    return response
+
 @app.teardown_appcontext
 def close_connection(exception):
     """Closes the database again at the end of the request."""
@@ -110,45 +174,10 @@ def init_db():
     conn = None  # Initialize conn to None
     try:
         conn = create_db_connection()  # Use direct connection for init
-        c = conn.cursor()
-        # Create table if it doesn't exist
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                event TEXT,
-                details TEXT,
-                project TEXT,
-                user TEXT,
-                status TEXT,
-                base_mo_code TEXT,
-                is_rep_variant INTEGER,
-                file_path TEXT,
-                item_count INTEGER
-            )
-        ''')
-        
-        # Check and add columns if they don't exist
-        c.execute("PRAGMA table_info(logs)")
-        columns = [column[1] for column in c.fetchall()]
-        if 'base_mo_code' not in columns:
-            c.execute('ALTER TABLE logs ADD COLUMN base_mo_code TEXT')
-            logging.info("Added 'base_mo_code' column to logs table.")
-        if 'is_rep_variant' not in columns:
-            c.execute('ALTER TABLE logs ADD COLUMN is_rep_variant INTEGER')
-            logging.info("Added 'is_rep_variant' column to logs table.")
-        if 'file_path' not in columns:
-            c.execute('ALTER TABLE logs ADD COLUMN file_path TEXT')
-            logging.info("Added 'file_path' column to logs table.")
-        if 'item_count' not in columns:
-            c.execute('ALTER TABLE logs ADD COLUMN item_count INTEGER')
-            logging.info("Added 'item_count' column to logs table.")
-        
-        # Create indexes for better performance
-        c.execute('CREATE INDEX IF NOT EXISTS idx_logs_project ON logs(project)')
-        c.execute('CREATE INDEX IF NOT EXISTS idx_logs_user ON logs(user)')
-        c.execute('CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp)')
-        c.execute('CREATE INDEX IF NOT EXISTS idx_logs_status ON logs(status)')
+        # Table, added columns and the versioned index plan (see db_schema.py)
+        applied = create_schema(conn)
+        if applied:
+            logging.info(f"Database schema upgraded to version(s): {', '.join(str(v) for v in applied)}")
         
         conn.commit()
         logging.info("Database initialization complete.")
@@ -239,12 +268,7 @@ def determine_project_status(project_code, conn):
     c = conn.cursor()
     
     # Get all events for this project
-    c.execute("""
-        SELECT user, event, status, timestamp
-        FROM logs
-        WHERE project = ?
-        ORDER BY timestamp ASC
-    """, (project_code,))
+    c.execute(db_queries.PROJECT_EVENTS, (project_code,))
     
     events = c.fetchall()
     
@@ -323,12 +347,7 @@ def count_active_projects(user):
     """Count active projects for a user"""
     try:
         cursor = get_db().cursor()
-        cursor.execute("""
-            SELECT COUNT(DISTINCT project) 
-            FROM logs 
-            WHERE user = ? AND status = 'OPEN' 
-            AND timestamp > datetime('now', '-7 days')
-        """, (user,))
+        cursor.execute(db_queries.COUNT_ACTIVE_PROJECTS, (user,))
         result = cursor.fetchone()
         return result[0] if result else 0
     except Exception as e:
@@ -340,13 +359,7 @@ def count_completed_today(user):
     try:
         cursor = get_db().cursor()
         today = datetime.now().strftime('%Y-%m-%d')
-        cursor.execute("""
-            SELECT COUNT(DISTINCT project) 
-            FROM logs 
-            WHERE user = ? 
-            AND (status = 'AFGEMELD' OR status = 'CLOSED')
-            AND DATE(timestamp) = ?
-        """, (user, today))
+        cursor.execute(db_queries.COUNT_COMPLETED_ON_DAY, (user, today))
         result = cursor.fetchone()
         return result[0] if result else 0
     except Exception as e:
@@ -357,14 +370,7 @@ def calculate_avg_time(user):
     """Calculate average processing time for user"""
     try:
         cursor = get_db().cursor()
-        cursor.execute("""
-            SELECT project, MIN(timestamp) as start_time, MAX(timestamp) as end_time
-            FROM logs
-            WHERE user = ?
-            AND timestamp > datetime('now', '-30 days')
-            GROUP BY project
-            HAVING COUNT(DISTINCT status) > 1
-        """, (user,))
+        cursor.execute(db_queries.USER_PROJECT_SPANS_30D, (user,))
         
         times = []
         for row in cursor.fetchall():
@@ -388,14 +394,7 @@ def calculate_efficiency(user):
         cursor = get_db().cursor()
         
         # Get completion rate
-        cursor.execute("""
-            SELECT 
-                COUNT(DISTINCT CASE WHEN status IN ('AFGEMELD', 'CLOSED') THEN project END) as completed,
-                COUNT(DISTINCT project) as total
-            FROM logs
-            WHERE user = ?
-            AND timestamp > datetime('now', '-30 days')
-        """, (user,))
+        cursor.execute(db_queries.USER_COMPLETION_RATE_30D, (user,))
         
         result = cursor.fetchone()
         if result and result['total'] > 0:
@@ -425,11 +424,7 @@ def get_user_activity_last_7_days(user):
         
         for i in range(7):
             date = (datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d')
-            cursor.execute("""
-                SELECT COUNT(DISTINCT project) as count
-                FROM logs
-                WHERE user = ? AND DATE(timestamp) = ?
-            """, (user, date))
+            cursor.execute(db_queries.USER_PROJECTS_ON_DAY, (user, date))
             result = cursor.fetchone()
             activities.append(result['count'] if result else 0)
         
@@ -462,7 +457,18 @@ def initialize_database_endpoint():
 @app.route('/log', methods=['POST', 'GET'])
 def log_event():
     data = request.get_json(force=True) if request.method == 'POST' else request.args
-    logging.info(f"[db_log_api] /log called with data: {data}")
+    # Client-side stages (receive, post_start) arrive in the payload; server stages are added here
+    trace_id = data.get('trace_id')
+    trace = None
+    if trace_id:
+        # Only a JSON object of numeric stamps is used; anything else (e.g. a query-string value) is ignored
+        client_trace = data.get('trace')
+        if not isinstance(client_trace, dict):
+            client_trace = {}
+        trace = {stage: value for stage, value in client_trace.items()
+                 if isinstance(value, (int, float)) and not isinstance(value, bool)}
+        stamp(trace, 'server_receive')
+    log_setup.log_payload(logging.getLogger(), "[db_log_api] /log payload", data, PAYLOAD_SAMPLE_RATE)
 
     event = data.get('event')
     if not event:
@@ -470,7 +476,8 @@ def log_event():
 
     user = data.get('user', 'unknown')
     if event == 'test_connect':
-        logging.info(f"  [INFO] Received test_connect from user '{user}'. Connection successful.")
+        logging.info(f"  [INFO] Received test_connect from user '{user}'. Connection successful.",
+                     extra={'rate_key': 'test_connect', 'fields': {'user': user}})
         return jsonify({'success': True})
 
     details = data.get('details')
@@ -489,8 +496,9 @@ def log_event():
         if event == 'OPEN':
             status = 'OPEN'
             # Trigger the background import service for OPUS/GANNOMAT processing
-            logging.info(f"Event OPEN received for {user} on {project}. Triggering background import service.")
-            background_service.trigger_import_for_event(
+            logging.info(f"Event OPEN received for {user} on {project}. Triggering background import service.",
+                         extra={'rate_key': 'scan_open', 'fields': {'event': event, 'user': user, 'project': project}})
+            get_background_service().trigger_import_for_event(
                 user_type=user,
                 project_code=project,
                 event_details=details,
@@ -498,29 +506,55 @@ def log_event():
             )
         elif event == 'AFGEMELD':
             status = 'AFGEMELD'
+
+        # Take the write lock up front so the lock wait is measurable and the
+        # UPDATE + INSERT below cannot fail halfway on a lock upgrade
+        c.execute('BEGIN IMMEDIATE')
+        if trace is not None:
+            stamp(trace, 'lock_acquired')
+
+        if event == 'AFGEMELD':
             # Find the corresponding 'OPEN' log and update its status to 'CLOSED'
-            c.execute(
-                'UPDATE logs SET status = ? WHERE event = ? AND status = ? AND lower(project) = ? AND user = ?',
-                ('CLOSED', 'OPEN', 'OPEN', project.lower(), user)
-            )
+            c.execute(db_queries.CLOSE_OPEN_LOGS, (project.lower(), user))
             if c.rowcount > 0:
-                logging.info(f"Closed {c.rowcount} 'OPEN' log(s) for user '{user}' on project '{project}'.")
+                logging.info(f"Closed {c.rowcount} 'OPEN' log(s) for user '{user}' on project '{project}'.",
+                             extra={'rate_key': 'scan_close', 'fields': {'event': event, 'user': user, 'project': project}})
 
         c.execute(
-            'INSERT INTO logs (timestamp, event, details, project, user, status, base_mo_code, is_rep_variant, file_path, item_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            db_queries.INSERT_LOG,
             (timestamp, event, details, project, user, status, base_mo_code, is_rep_variant, file_path, item_count)
         )
         conn.commit()
-        return jsonify({'success': True, 'message': 'Log entry created.'}), 201
+
+        response = {'success': True, 'message': 'Log entry created.'}
+        if trace is not None:
+            stamp(trace, 'commit')
+            segments = scan_trace_recorder.record(trace_id, trace, event=event, user=user, project=project)
+            logging.info(f"[trace {trace_id}] " + ", ".join(f"{name}={ms:.1f}ms" for name, ms in segments.items()),
+                         extra={'rate_key': 'scan_trace', 'fields': {'trace_id': trace_id, 'segments_ms': segments}})
+            response.update({'trace_id': trace_id, 'trace': trace})
+        return jsonify(response), 201
     except sqlite3.Error as e:
         logging.error(f"Database error on /log: {e}", exc_info=True)
         return jsonify({'error': 'Database operation failed'}), 500
 
+@app.route('/api/metrics/scan_latency', methods=['GET', 'DELETE'])
+def scan_latency_metrics():
+    """Per-stage latency histograms of traced scans (DELETE resets them)."""
+    if request.method == 'DELETE':
+        scan_trace_recorder.reset()
+        return jsonify({'success': True, 'message': 'Scan latency metrics reset.'})
+    try:
+        recent_limit = int(request.args.get('recent', 20))
+    except ValueError:
+        recent_limit = 20
+    return jsonify({'success': True, **scan_trace_recorder.snapshot(recent_limit=recent_limit)})
+
 @app.route('/update_file_path', methods=['POST'])
 def update_file_path():
     """Update the file_path for an existing OPEN event."""
     data = request.get_json(force=True)
-    logging.info(f"[db_log_api] /update_file_path called with data: {data}")
+    log_setup.log_payload(logging.getLogger(), "[db_log_api] /update_file_path payload", data, PAYLOAD_SAMPLE_RATE)
 
     project = data.get('project')
     user = data.get('user')
@@ -534,24 +568,13 @@ def update_file_path():
         c = conn.cursor()
         
         # Update the most recent OPEN event for this user/project combination
-        c.execute('''
-            UPDATE logs 
-            SET file_path = ? 
-            WHERE id = (
-                SELECT id FROM logs 
-                WHERE event = 'OPEN' 
-                AND status = 'OPEN' 
-                AND user = ? 
-                AND project = ? 
-                ORDER BY timestamp DESC 
-                LIMIT 1
-            )
-        ''', (file_path, user, project))
+        c.execute(db_queries.UPDATE_OPEN_FILE_PATH, (file_path, user, project))
         
         conn.commit()
         
         if c.rowcount > 0:
-            logging.info(f"Updated file_path for OPEN event: user={user}, project={project}, path={file_path}")
+            logging.info(f"Updated file_path for OPEN event: user={user}, project={project}, path={file_path}",
+                         extra={'rate_key': 'update_file_path', 'fields': {'user': user, 'project': project}})
             return jsonify({'success': True, 'message': 'File path updated successfully'}), 200
         else:
             logging.warning(f"No OPEN event found to update for user={user}, project={project}")
@@ -565,7 +588,7 @@ def update_file_path():
 def update_item_count():
     """Update the item_count for an existing OPEN event."""
     data = request.get_json(force=True)
-    logging.info(f"[db_log_api] /update_item_count called with data: {data}")
+    log_setup.log_payload(logging.getLogger(), "[db_log_api] /update_item_count payload", data, PAYLOAD_SAMPLE_RATE)
 
     project = data.get('project')
     user = data.get('user')
@@ -579,24 +602,13 @@ def update_item_count():
         c = conn.cursor()
         
         # Update the most recent OPEN event for this user/project combination
-        c.execute('''
-            UPDATE logs 
-            SET item_count = ? 
-            WHERE id = (
-                SELECT id FROM logs 
-                WHERE event = 'OPEN' 
-                AND status = 'OPEN' 
-                AND user = ? 
-                AND project = ? 
-                ORDER BY timestamp DESC 
-                LIMIT 1
-            )
-        ''', (item_count, user, project))
+        c.execute(db_queries.UPDATE_OPEN_ITEM_COUNT, (item_count, user, project))
         
         conn.commit()
         
         if c.rowcount > 0:
-            logging.info(f"Updated item_count for OPEN event: user={user}, project={project}, count={item_count}")
+            logging.info(f"Updated item_count for OPEN event: user={user}, project={project}, count={item_count}",
+                         extra={'rate_key': 'update_item_count', 'fields': {'user': user, 'project': project}})
             return jsonify({'success': True, 'message': 'Item count updated successfully'}), 200
         else:
             logging.warning(f"No OPEN event found to update for user={user}, project={project}")
@@ -613,55 +625,28 @@ def get_logs():
         conn = get_db()
         c = conn.cursor()
         
-        # Build query with filters
-        query = 'SELECT * FROM logs WHERE 1=1'
-        params = []
-        
-        # Project filter
-        project = request.args.get('project')
-        if project:
-            query += ' AND project = ?'
-            params.append(project)
-        
-        # Date range filter
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
-        if start_date:
-            query += ' AND DATE(timestamp) >= ?'
-            params.append(start_date)
-        if end_date:
-            query += ' AND DATE(timestamp) <= ?'
-            params.append(end_date)
-        
-        # User filter
-        user = request.args.get('user')
-        if user:
-            query += ' AND user = ?'
-            params.append(user)
-        
-        # Project type filter
-        project_type = request.args.get('project_type')
-        if project_type:
-            if project_type == 'rep':
-                query += ' AND is_rep_variant = 1'
-            elif project_type == 'normal':
-                query += ' AND is_rep_variant = 0'
-        
-        # Status filter
-        status = request.args.get('status')
-        if status:
-            query += ' AND status = ?'
-            params.append(status)
-        
-        # Add ordering and limit
-        query += ' ORDER BY timestamp DESC'
-        
-        # Add limit if no specific filters
-        if not (project or start_date or end_date or user or project_type or status):
-            query += ' LIMIT 500'
-        
-        c.execute(query, params)
-        rows = c.fetchall()
+        
+        # Archived months are only searched for an explicit date range
+        if start_date or end_date:
+            table_scope = db_archive.logs_for_range(conn, ARCHIVE_DIR, start_date, end_date)
+        else:
+            table_scope = contextlib.nullcontext('logs')
+        with table_scope as table:
+            # Build query with filters (date range as timestamp bounds, see db_queries)
+            query, params = db_queries.build_logs_query(
+                project=request.args.get('project'),
+                start_date=start_date,
+                end_date=end_date,
+                user=request.args.get('user'),
+                project_type=request.args.get('project_type'),
+                status=request.args.get('status'),
+                table=table,
+            )
+            
+            c.execute(query, params)
+            rows = c.fetchall()
         
         return jsonify([dict(row) for row in rows])
     except sqlite3.Error as e:
@@ -738,12 +723,7 @@ def dashboard():
         if not dashboard_users:
             conn = get_db()
             c = conn.cursor()
-            c.execute("""
-                SELECT DISTINCT user 
-                FROM logs 
-                WHERE user IS NOT NULL AND user != ''
-                ORDER BY user
-            """)
+            c.execute(db_queries.DISTINCT_USERS)
             dashboard_users = [row[0] for row in c.fetchall()]
         
         logging.info(f"Dashboard display users: {dashboard_users}")
@@ -755,13 +735,7 @@ def dashboard():
         c = conn.cursor()
         
         # Query all OPEN projects (regardless of date) and today's AFGEMELD projects
-        c.execute("""
-            SELECT * FROM logs 
-            WHERE 
-                (status = 'OPEN' AND event = 'OPEN')  -- All open projects regardless of date
-                OR (DATE(timestamp) = ? AND event = 'AFGEMELD')  -- Today's completed projects
-            ORDER BY timestamp DESC
-        """, (today.isoformat(),))
+        c.execute(db_queries.DASHBOARD_DISPLAY, (today.isoformat(), today.isoformat()))
         
         logs_for_display = c.fetchall()
         
@@ -830,24 +804,13 @@ def dashboard():
         
         # Get all logs for the recent projects list and JavaScript processing
         seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
-        c.execute("""
-            SELECT * FROM logs 
-            WHERE timestamp >= ? 
-            ORDER BY timestamp DESC
-        """, (seven_days_ago,))
+        c.execute(db_queries.LOGS_SINCE, (seven_days_ago,))
         
         recent_logs = c.fetchall()
         
         # Also include ALL logs for JavaScript to process properly
         # This ensures the client-side has all the data it needs
-        c.execute("""
-            SELECT * FROM logs 
-            WHERE 
-                (status = 'OPEN' AND event = 'OPEN')  -- All open projects
-                OR (timestamp >= ?)  -- Or recent logs
-            ORDER BY timestamp DESC
-            LIMIT 1000
-        """, (seven_days_ago,))
+        c.execute(db_queries.OPEN_OR_RECENT_LOGS, (seven_days_ago,))
         
         all_relevant_logs = c.fetchall()
         
@@ -896,13 +859,10 @@ def logs_project():
         conn = get_db()
         c = conn.cursor()
 
-        c.execute('SELECT * FROM logs WHERE lower(project) = ? ORDER BY id DESC', (project.lower(),))
+        c.execute(db_queries.LOGS_FOR_PROJECT_CI, (project.lower(),))
         log_entries = [dict(row) for row in c.fetchall()]
 
-        c.execute('''
-            SELECT user, status, MAX(timestamp) as last_updated
-            FROM logs WHERE lower(project) = ? AND user != '' GROUP BY user
-        ''', (project.lower(),))
+        c.execute(db_queries.PROJECT_USER_STATUS_CI, (project.lower(),))
         user_status_rows = c.fetchall()
 
         order = {'NESTING': 0, 'OPUS': 1, 'GANNOMAT': 2}
@@ -927,7 +887,7 @@ def logs_project():
         user_status_html += '</tbody></table>'
 
         # Fetch all unique project codes for the search datalist
-        c.execute("SELECT DISTINCT project FROM logs WHERE project IS NOT NULL AND project != '' ORDER BY project")
+        c.execute(db_queries.DISTINCT_PROJECTS)
         all_projects = [row['project'] for row in c.fetchall()]
 
         # Get unique users for filter
@@ -957,12 +917,7 @@ def projects():
         c = conn.cursor()
         
         # Get all unique projects
-        c.execute("""
-            SELECT DISTINCT project
-            FROM logs
-            WHERE project IS NOT NULL AND project != ''
-            ORDER BY project
-        """)
+        c.execute(db_queries.DISTINCT_PROJECTS)
         
         all_projects = [row['project'] for row in c.fetchall()]
         
@@ -977,20 +932,12 @@ def projects():
             project_status, current_user = determine_project_status(project_code, conn)
             
             # Get the latest timestamp for this project
-            c.execute("""
-                SELECT MAX(timestamp) as latest_timestamp
-                FROM logs
-                WHERE project = ?
-            """, (project_code,))
+            c.execute(db_queries.PROJECT_LATEST_TIMESTAMP, (project_code,))
             
             latest_timestamp = c.fetchone()['latest_timestamp']
             
             # Get event count
-            c.execute("""
-                SELECT COUNT(*) as event_count
-                FROM logs
-                WHERE project = ?
-            """, (project_code,))
+            c.execute(db_queries.PROJECT_EVENT_COUNT, (project_code,))
             
             event_count = c.fetchone()['event_count']
             
@@ -1124,15 +1071,15 @@ def statistics():
         c = conn.cursor()
         
         # Total projects
-        c.execute("SELECT COUNT(DISTINCT project) FROM logs WHERE project IS NOT NULL AND project != ''")
+        c.execute(db_queries.COUNT_PROJECTS)
         total_projects = c.fetchone()[0]
         
         # Open projects
-        c.execute("SELECT COUNT(DISTINCT project) FROM logs WHERE status = 'OPEN'")
+        c.execute(db_queries.COUNT_OPEN_PROJECTS)
         open_projects = c.fetchone()[0]
         
         # Completed projects
-        c.execute("SELECT COUNT(DISTINCT project) FROM logs WHERE status IN ('AFGEMELD', 'CLOSED')")
+        c.execute(db_queries.COUNT_CLOSED_PROJECTS)
         completed_projects = c.fetchone()[0]
         
         return render_template('statistics.html',
@@ -1159,13 +1106,7 @@ def database():
         c = conn.cursor()
         
         # Query all OPEN projects (regardless of date) and today's AFGEMELD projects
-        c.execute("""
-            SELECT * FROM logs 
-            WHERE 
-                (status = 'OPEN' AND event = 'OPEN')  -- All open projects regardless of date
-                OR (DATE(timestamp) = ? AND event = 'AFGEMELD')  -- Today's completed projects
-            ORDER BY timestamp DESC
-        """, (today.isoformat(),))
+        c.execute(db_queries.DASHBOARD_DISPLAY, (today.isoformat(), today.isoformat()))
         
         logs_for_display = c.fetchall()
         
@@ -1226,24 +1167,13 @@ def database():
         
         # Get all logs for the recent projects list and JavaScript processing
         seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
-        c.execute("""
-            SELECT * FROM logs 
-            WHERE timestamp >= ? 
-            ORDER BY timestamp DESC
-        """, (seven_days_ago,))
+        c.execute(db_queries.LOGS_SINCE, (seven_days_ago,))
         
         recent_logs = c.fetchall()
         
         # Also include ALL logs for JavaScript to process properly
         # This ensures the client-side has all the data it needs
-        c.execute("""
-            SELECT * FROM logs 
-            WHERE 
-                (status = 'OPEN' AND event = 'OPEN')  -- All open projects
-                OR (timestamp >= ?)  -- Or recent logs
-            ORDER BY timestamp DESC
-            LIMIT 1000
-        """, (seven_days_ago,))
+        c.execute(db_queries.OPEN_OR_RECENT_LOGS, (seven_days_ago,))
         
         all_relevant_logs = c.fetchall()
         
@@ -1297,18 +1227,7 @@ def get_user_recent_projects(username):
     """Get recent projects for a user"""
     try:
         cursor = get_db().cursor()
-        cursor.execute("""
-            SELECT DISTINCT project, 
-                   MAX(timestamp) as last_activity,
-                   COUNT(*) as event_count,
-                   MAX(CASE WHEN status IN ('AFGEMELD', 'CLOSED') THEN 1 ELSE 0 END) as is_completed
-            FROM logs
-            WHERE user = ?
-            AND timestamp > datetime('now', '-7 days')
-            GROUP BY project
-            ORDER BY last_activity DESC
-            LIMIT 10
-        """, (username,))
+        cursor.execute(db_queries.USER_RECENT_PROJECTS, (username,))
         
         projects = []
         for row in cursor.fetchall():
@@ -1329,7 +1248,17 @@ def get_user_recent_projects(username):
 
 @app.route('/api/database/vacuum', methods=['POST'])
 def vacuum_database():
+    """Returns free pages with incremental_vacuum; {"full": true} still runs a full VACUUM."""
     try:
+        data = request.get_json(silent=True) or {}
+        if not data.get('full'):
+            entry = maintenance.run_task('incremental_vacuum', max_pages=None)
+            if not entry['success']:
+                return jsonify({'success': False, 'error': entry['error']}), 500
+            # Move the freed pages out of the WAL so the file actually shrinks
+            maintenance.run_task('checkpoint', mode='TRUNCATE')
+            return jsonify({'success': True, 'message': 'Incremental vacuum completed', **entry['result']})
+        
         # VACUUM requires a new connection
         conn = sqlite3.connect(DB_PATH)
         conn.execute('VACUUM')
@@ -1341,6 +1270,23 @@ def vacuum_database():
         logging.error(f"Error during VACUUM: {e}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/database/maintenance', methods=['GET'])
+def get_maintenance():
+    """Scheduler state, current free pages / WAL size and the most recent maintenance runs."""
+    try:
+        limit = request.args.get('limit', 50, type=int)
+        return jsonify({'success': True, 'status': maintenance.status(), 'history': maintenance.history(limit)})
+    except Exception as e:
+        logging.error(f"Error reading maintenance status: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/database/maintenance/<task>', methods=['POST'])
+def run_maintenance_task(task):
+    if task not in db_maintenance.TASK_INTERVALS:
+        return jsonify({'success': False, 'error': f"Unknown maintenance task '{task}'"}), 400
+    entry = maintenance.run_task(task)
+    return jsonify({'success': entry['success'], 'entry': entry}), 200 if entry['success'] else 500
+
 @app.route('/api/database/analyze', methods=['POST'])
 def analyze_database():
     try:
@@ -1377,30 +1323,43 @@ def check_database_integrity():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # Data Management
+# Cleanups run as background jobs in short batches (see db_cleanup)
+cleanup_jobs = db_cleanup.CleanupJobs()
+ARCHIVE_DIR = get_writable_path('database/archive')
+# Rows removed by a cleanup with "archive": true (not part of the monthly partitions)
+ARCHIVE_DB_PATH = os.path.join(ARCHIVE_DIR, 'logs_archive.sqlite')
+
+def _start_cleanup(kind, criteria, data):
+    """Answers a dry run with the count, otherwise starts the job and returns 202 with its status."""
+    if data.get('dry_run'):
+        count = db_cleanup.count_matching(get_db(), criteria)
+        return jsonify({'success': True, 'dry_run': True, 'count': count, 'description': criteria.description})
+    archive_path = None
+    if data.get('archive'):
+        archive_path = ARCHIVE_DB_PATH
+        os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+    job = db_cleanup.CleanupJob(
+        DB_PATH, kind, criteria,
+        batch_size=data.get('batch_size', db_cleanup.DEFAULT_BATCH_SIZE),
+        batch_pause=data.get('batch_pause', db_cleanup.DEFAULT_BATCH_PAUSE),
+        archive_path=archive_path,
+    )
+    try:
+        cleanup_jobs.start(job)
+    except db_cleanup.CleanupBusyError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    logging.info(f"Cleanup job {job.id} started: {criteria.description}{' (archive)' if archive_path else ''}")
+    return jsonify({'success': True, 'job': job.to_dict()}), 202
+
 @app.route('/api/database/cleanup', methods=['POST'])
 def cleanup_old_records():
     try:
-        data = request.get_json()
-        days = data.get('days', 365)
-        
-        cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
-        
-        conn = get_db()
-        c = conn.cursor()
-        
-        # Count records to be deleted
-        c.execute('SELECT COUNT(*) FROM logs WHERE timestamp < ?', (cutoff_date,))
-        count = c.fetchone()[0]
-        
-        # Delete old records
-        c.execute('DELETE FROM logs WHERE timestamp < ?', (cutoff_date,))
-        conn.commit()
-        
-        logging.info(f"Deleted {count} records older than {days} days")
-        return jsonify({
-            'success': True,
-            'deleted_count': count
-        })
+        data = request.get_json() or {}
+        try:
+            criteria = db_cleanup.age_criteria(data.get('days', 365))
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        return _start_cleanup('age', criteria, data)
     except Exception as e:
         logging.error(f"Error cleaning up old records: {e}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1408,59 +1367,112 @@ def cleanup_old_records():
 @app.route('/api/database/cleanup-projects', methods=['POST'])
 def cleanup_projects():
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
         pattern = data.get('pattern', '')
         
         if not pattern:
             return jsonify({'success': False, 'error': 'No pattern provided'}), 400
-        
-        # Replace * with % for SQL LIKE pattern
-        sql_pattern = pattern.replace('*', '%')
-        
-        conn = get_db()
-        c = conn.cursor()
-        
-        # Count records to be deleted
-        c.execute('SELECT COUNT(*) FROM logs WHERE project LIKE ?', (sql_pattern,))
-        count = c.fetchone()[0]
-        
-        # Delete matching records
-        c.execute('DELETE FROM logs WHERE project LIKE ?', (sql_pattern,))
-        conn.commit()
-        
-        logging.info(f"Deleted {count} records for projects matching '{pattern}'")
-        return jsonify({
-            'success': True,
-            'deleted_count': count
-        })
+        try:
+            criteria = db_cleanup.project_criteria(pattern)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        return _start_cleanup('projects', criteria, data)
     except Exception as e:
         logging.error(f"Error cleaning up projects: {e}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/database/archive', methods=['POST'])
+def archive_old_records():
+    """Moves rows older than ``days`` (config 'archive_after_days') into the monthly archive partitions."""
+    try:
+        data = request.get_json(silent=True) or {}
+        days = data.get('days', get_config().get('archive_after_days', db_archive.DEFAULT_ARCHIVE_AFTER_DAYS))
+        try:
+            job = db_archive.ArchiveJob(
+                DB_PATH, ARCHIVE_DIR, days,
+                batch_size=data.get('batch_size', db_cleanup.DEFAULT_BATCH_SIZE),
+                batch_pause=data.get('batch_pause', db_cleanup.DEFAULT_BATCH_PAUSE),
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if data.get('dry_run'):
+            count = db_cleanup.count_matching(get_db(), job.criteria)
+            return jsonify({'success': True, 'dry_run': True, 'count': count, 'description': job.criteria.description})
+        try:
+            cleanup_jobs.start(job)
+        except db_cleanup.CleanupBusyError as e:
+            return jsonify({'success': False, 'error': str(e)}), 409
+        logging.info(f"Archive job {job.id} started: {job.criteria.description}")
+        return jsonify({'success': True, 'job': job.to_dict()}), 202
+    except Exception as e:
+        logging.error(f"Error starting archive job: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/database/archives', methods=['GET'])
+def list_archives():
+    try:
+        partitions = db_archive.list_partitions(ARCHIVE_DIR)
+        for partition in partitions:
+            archive = sqlite3.connect(f"file:{partition['path']}?mode=ro", uri=True)
+            try:
+                partition['rows'] = archive.execute('SELECT COUNT(*) FROM logs').fetchone()[0]
+            finally:
+                archive.close()
+            partition['filename'] = os.path.basename(partition.pop('path'))
+        return jsonify({'success': True, 'archives': partitions})
+    except Exception as e:
+        logging.error(f"Error listing archives: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/database/jobs', methods=['GET'])
+def list_cleanup_jobs():
+    return jsonify({'success': True, 'jobs': cleanup_jobs.snapshot()})
+
+@app.route('/api/database/jobs/<job_id>', methods=['GET'])
+def get_cleanup_job(job_id):
+    job = cleanup_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+@app.route('/api/database/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_cleanup_job(job_id):
+    job = cleanup_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    job.cancel()
+    logging.info(f"Cleanup job {job_id} cancel requested")
+    return jsonify({'success': True, 'job': job.to_dict()})
+
 # Database Logs
 @app.route('/api/database/logs', methods=['GET'])
 def get_database_logs():
+    """Last log entries, read backwards from the end of the file.
+
+    Query parameters: lines (default 100), level (minimum level), since
+    (timestamp) and cursor. With a cursor from an earlier response only the
+    entries written after it are returned (follow mode).
+    """
     try:
-        logs = []
-        
-        # Read the log file
-        if os.path.exists(log_path):
-            with open(log_path, 'r', encoding='utf-8') as f:
-                # Get last 100 lines
-                lines = f.readlines()[-100:]
-                for line in lines:
-                    # Parse log line (adjust format as needed)
-                    parts = line.strip().split(' ', 3)
-                    if len(parts) >= 4:
-                        logs.append({
-                            'timestamp': f"{parts[0]} {parts[1]}",
-                            'level': parts[2],
-                            'message': parts[3]
-                        })
+        level = request.args.get('level')
+        cursor = request.args.get('cursor')
+        try:
+            if cursor:
+                logs, cursor = log_files.follow(log_path, cursor, level=level)
+            else:
+                logs, cursor = log_files.tail(
+                    log_path,
+                    lines=request.args.get('lines', 100, type=int),
+                    level=level,
+                    since=request.args.get('since'),
+                )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
         return jsonify({
             'success': True,
-            'logs': logs
+            'logs': logs,
+            'cursor': cursor
         })
     except Exception as e:
         logging.error(f"Error reading database logs: {e}", exc_info=True)
@@ -1484,14 +1496,12 @@ def download_database_logs():
 @app.route('/api/database/logs/clear', methods=['POST'])
 def clear_database_logs():
     try:
-        # Backup current log
-        if os.path.exists(log_path):
-            backup_path = log_path + f'.backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
-            shutil.copy2(log_path, backup_path)
-            
-            # Clear the log file
-            with open(log_path, 'w') as f:
-                f.write('')
+        # Start a new file; the current one is kept as the newest numbered backup
+        log_file_handler.acquire()
+        try:
+            log_file_handler.doRollover()
+        finally:
+            log_file_handler.release()
         
         logging.info("Database logs cleared")
         return jsonify({'success': True, 'message': 'Logs cleared successfully'})
@@ -1594,95 +1604,13 @@ def get_project_completion_times():
         conn = get_db()
         c = conn.cursor()
         
-        # Get completion times with moving averages
-        query = """
-            WITH ProjectCompletions AS (
-                SELECT 
-                    o.user,
-                    o.project,
-                    o.timestamp as start_time,
-                    a.timestamp as end_time,
-                    o.base_mo_code,
-                    o.is_rep_variant,
-                    (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 as completion_minutes,
-                    DATE(o.timestamp) as project_date
-                FROM logs o
-                INNER JOIN logs a ON 
-                    o.project = a.project 
-                    AND o.user = a.user 
-                    AND a.event = 'AFGEMELD' 
-                    AND a.timestamp > o.timestamp
-                WHERE 
-                    o.event = 'OPEN' 
-                    AND o.user IS NOT NULL 
-                    AND o.user != ''
-            ),
-            UserStats AS (
-                SELECT 
-                    user,
-                    COUNT(*) as total_completed,
-                    AVG(completion_minutes) as avg_minutes,
-                    MIN(completion_minutes) as min_minutes,
-                    MAX(completion_minutes) as max_minutes,
-                    -- Standard deviation for consistency analysis
-                    CASE 
-                        WHEN COUNT(*) > 1 THEN 
-                            SQRT(AVG(completion_minutes * completion_minutes) - AVG(completion_minutes) * AVG(completion_minutes))
-                        ELSE 0 
-                    END as std_dev,
-                    -- Separate averages for REP and non-REP projects
-                    AVG(CASE WHEN is_rep_variant = 1 THEN completion_minutes END) as avg_minutes_rep,
-                    AVG(CASE WHEN is_rep_variant = 0 THEN completion_minutes END) as avg_minutes_normal,
-                    COUNT(CASE WHEN is_rep_variant = 1 THEN 1 END) as count_rep,
-                    COUNT(CASE WHEN is_rep_variant = 0 THEN 1 END) as count_normal
-                FROM ProjectCompletions
-                WHERE completion_minutes > 0 -- Filter out invalid data
-                GROUP BY user
-            ),
-            RecentTrends AS (
-                SELECT 
-                    user,
-                    AVG(completion_minutes) as recent_avg_minutes,
-                    COUNT(*) as recent_count
-                FROM ProjectCompletions
-                WHERE project_date >= date('now', '-7 days')
-                    AND completion_minutes > 0
-                GROUP BY user
-            )
-            SELECT 
-                u.user,
-                u.total_completed,
-                u.avg_minutes,
-                u.min_minutes,
-                u.max_minutes,
-                u.std_dev,
-                u.avg_minutes_rep,
-                u.avg_minutes_normal,
-                u.count_rep,
-                u.count_normal,
-                r.recent_avg_minutes,
-                r.recent_count,
-                -- Performance trend (recent vs overall)
-                CASE 
-                    WHEN r.recent_avg_minutes IS NOT NULL AND u.avg_minutes > 0 THEN
-                        ((u.avg_minutes - r.recent_avg_minutes) / u.avg_minutes) * 100
-                    ELSE NULL
-                END as improvement_percentage
-            FROM UserStats u
-            LEFT JOIN RecentTrends r ON u.user = r.user
-            ORDER BY 
-                CASE u.user 
-                    WHEN 'NESTING' THEN 1 
-                    WHEN 'OPUS' THEN 2 
-                    WHEN 'KL GANNOMAT' THEN 3 
-                    ELSE 4 
-                END
-        """
-        
-        c.execute(query)
+        # Get completion times with moving averages, over the whole history including archived months
+        with db_archive.logs_for_range(conn, ARCHIVE_DIR) as table:
+            c.execute(db_queries.PROJECT_COMPLETION_TIMES.format(table=table))
+            rows = c.fetchall()
         user_metrics = []
         
-        for row in c.fetchall():
+        for row in rows:
             metrics = dict(row)
             
             # Format times
@@ -1742,32 +1670,14 @@ def get_user_project_history(user):
         conn = get_db()
         c = conn.cursor()
         
-        query = """
-            SELECT 
-                o.project,
-                o.base_mo_code,
-                o.is_rep_variant,
-                o.timestamp as start_time,
-                a.timestamp as end_time,
-                (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 as completion_minutes,
-                DATE(o.timestamp) as project_date
-            FROM logs o
-            LEFT JOIN logs a ON 
-                o.project = a.project 
-                AND o.user = a.user 
-                AND a.event = 'AFGEMELD' 
-                AND a.timestamp > o.timestamp
-            WHERE 
-                o.event = 'OPEN' 
-                AND o.user = ?
-                AND DATE(o.timestamp) >= date('now', '-' || ? || ' days')
-            ORDER BY o.timestamp DESC
-        """
-        
-        c.execute(query, (user, days))
+        # Open end: a project started in the window may have been completed later
+        since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        with db_archive.logs_for_range(conn, ARCHIVE_DIR, since) as table:
+            c.execute(db_queries.USER_PROJECT_HISTORY.format(table=table), (user, days))
+            rows = c.fetchall()
         projects = []
         
-        for row in c.fetchall():
+        for row in rows:
             project = dict(row)
             
             # Format times
@@ -1806,22 +1716,7 @@ def get_expected_completion_time(project):
         c = conn.cursor()
         
         # Get project info and current status
-        project_query = """
-            SELECT 
-                user,
-                timestamp as start_time,
-                base_mo_code,
-                is_rep_variant
-            FROM logs
-            WHERE 
-                project = ? 
-                AND event = 'OPEN'
-                AND status = 'OPEN'
-            ORDER BY timestamp DESC
-            LIMIT 1
-        """
-        
-        c.execute(project_query, (project,))
+        c.execute(db_queries.EXPECTED_COMPLETION_PROJECT, (project,))
         project_info = c.fetchone()
         
         if not project_info:
@@ -1832,32 +1727,7 @@ def get_expected_completion_time(project):
         is_rep = project_data['is_rep_variant']
         
         # Get historical average for this user and project type
-        history_query = """
-            SELECT 
-                AVG(completion_minutes) as avg_completion,
-                COUNT(*) as sample_size,
-                MIN(completion_minutes) as best_time,
-                MAX(completion_minutes) as worst_time
-            FROM (
-                SELECT 
-                    (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 as completion_minutes
-                FROM logs o
-                INNER JOIN logs a ON 
-                    o.project = a.project 
-                    AND o.user = a.user 
-                    AND a.event = 'AFGEMELD' 
-                    AND a.timestamp > o.timestamp
-                WHERE 
-                    o.event = 'OPEN' 
-                    AND o.user = ?
-                    AND o.is_rep_variant = ?
-                    AND (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 > 0
-                ORDER BY o.timestamp DESC
-                LIMIT 20  -- Use last 20 similar projects
-            )
-        """
-        
-        c.execute(history_query, (user, is_rep))
+        c.execute(db_queries.EXPECTED_COMPLETION_HISTORY, (user, is_rep))
         history = c.fetchone()
         
         if history and history['avg_completion']:
@@ -1904,44 +1774,13 @@ def get_workflow_chain_metrics():
         conn = get_db()
         c = conn.cursor()
         
-        # Analyze workflow patterns
-        query = """
-            WITH ProjectWorkflow AS (
-                SELECT 
-                    project,
-                    user,
-                    event,
-                    timestamp,
-                    ROW_NUMBER() OVER (PARTITION BY project ORDER BY timestamp) as step_order,
-                    LEAD(timestamp) OVER (PARTITION BY project ORDER BY timestamp) as next_timestamp,
-                    LEAD(user) OVER (PARTITION BY project ORDER BY timestamp) as next_user
-                FROM logs
-                WHERE 
-                    event IN ('OPEN', 'AFGEMELD')
-                    AND project IS NOT NULL
-                ORDER BY project, timestamp
-            )
-            SELECT 
-                user as current_user,
-                next_user,
-                COUNT(*) as transition_count,
-                AVG(
-                    CASE 
-                        WHEN next_timestamp IS NOT NULL THEN 
-                            (julianday(next_timestamp) - julianday(timestamp)) * 24 * 60
-                        ELSE NULL 
-                    END
-                ) as avg_transition_minutes
-            FROM ProjectWorkflow
-            WHERE event = 'OPEN'
-            GROUP BY user, next_user
-            HAVING next_user IS NOT NULL
-        """
-        
-        c.execute(query)
+        # Analyze workflow patterns over the whole history including archived months
+        with db_archive.logs_for_range(conn, ARCHIVE_DIR) as table:
+            c.execute(db_queries.WORKFLOW_CHAIN.format(table=table))
+            rows = c.fetchall()
         transitions = []
         
-        for row in c.fetchall():
+        for row in rows:
             transition = dict(row)
             if transition['avg_transition_minutes']:
                 hours = int(transition['avg_transition_minutes'] // 60)
@@ -1969,35 +1808,14 @@ def get_daily_summary():
         conn = get_db()
         c = conn.cursor()
         
-        # Get daily statistics
-        query = """
-            SELECT 
-                COUNT(DISTINCT CASE WHEN event = 'OPEN' THEN project END) as projects_started,
-                COUNT(DISTINCT CASE WHEN event = 'AFGEMELD' THEN project END) as projects_completed,
-                COUNT(DISTINCT user) as active_users,
-                SUM(CASE WHEN event = 'OPEN' THEN item_count ELSE 0 END) as total_items_created,
-                COUNT(*) as total_events,
-                -- Additional metrics
-                AVG(CASE 
-                    WHEN event = 'AFGEMELD' THEN 
-                        (julianday(timestamp) - (
-                            SELECT julianday(o.timestamp)
-                            FROM logs o
-                            WHERE o.project = logs.project
-                            AND o.user = logs.user
-                            AND o.event = 'OPEN'
-                            AND o.timestamp < logs.timestamp
-                            ORDER BY o.timestamp DESC
-                            LIMIT 1
-                        )) * 24 * 60
-                    ELSE NULL
-                END) as avg_completion_time_minutes
-            FROM logs
-            WHERE DATE(timestamp) = ?
-        """
-        
-        c.execute(query, (date_str,))
-        row = c.fetchone()
+        with db_archive.logs_for_range(conn, ARCHIVE_DIR, date_str, date_str) as table:
+            # Get daily statistics
+            c.execute(db_queries.DAILY_SUMMARY.format(table=table), (date_str,))
+            row = c.fetchone()
+            
+            # Get hourly distribution
+            c.execute(db_queries.DAILY_HOURLY.format(table=table), (date_str,))
+            hourly_rows = c.fetchall()
         
         if row:
             summary = dict(row)
@@ -2016,24 +1834,9 @@ def get_daily_summary():
                 'avg_completion_time': '-'
             }
         
-        # Get hourly distribution
-        hourly_query = """
-            SELECT 
-                strftime('%H', timestamp) as hour,
-                COUNT(*) as event_count,
-                COUNT(DISTINCT user) as active_users,
-                COUNT(CASE WHEN event = 'OPEN' THEN 1 END) as starts,
-                COUNT(CASE WHEN event = 'AFGEMELD' THEN 1 END) as completions
-            FROM logs
-            WHERE DATE(timestamp) = ?
-            GROUP BY hour
-            ORDER BY hour
-        """
-        
-        c.execute(hourly_query, (date_str,))
         hourly_data = []
         
-        for row in c.fetchall():
+        for row in hourly_rows:
             hourly_data.append({
                 'hour': int(row['hour']),
                 'events': row['event_count'],
@@ -2073,65 +1876,29 @@ def get_performance_analysis():
         c = conn.cursor()
         
         # Build query conditions
-        conditions = ["DATE(o.timestamp) BETWEEN ? AND ?"]
+        conditions = [db_queries.PERFORMANCE_DATE_RANGE]
         params = [start_date, end_date]
         
         if user_filter:
-            conditions.append("o.user = ?")
+            conditions.append(db_queries.PERFORMANCE_USER)
             params.append(user_filter)
         
         where_clause = " AND ".join(conditions)
         
-        # Get comprehensive performance metrics
-        query = f"""
-            WITH CompletionData AS (
-                SELECT 
-                    o.user,
-                    o.project,
-                    DATE(o.timestamp) as project_date,
-                    o.is_rep_variant,
-                    (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 as completion_minutes,
-                    strftime('%w', o.timestamp) as day_of_week,
-                    strftime('%H', o.timestamp) as hour_of_day
-                FROM logs o
-                INNER JOIN logs a ON 
-                    o.project = a.project 
-                    AND o.user = a.user 
-                    AND a.event = 'AFGEMELD' 
-                    AND a.timestamp > o.timestamp
-                WHERE 
-                    o.event = 'OPEN' 
-                    AND {where_clause}
-                    AND (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 > 0
-            )
-            SELECT 
-                user,
-                COUNT(*) as total_projects,
-                AVG(completion_minutes) as avg_time,
-                MIN(completion_minutes) as min_time,
-                MAX(completion_minutes) as max_time,
-                -- Calculate percentiles (approximation)
-                AVG(CASE WHEN completion_minutes <= (SELECT AVG(completion_minutes) FROM CompletionData WHERE user = cd.user) THEN completion_minutes END) as median_approx,
-                -- Standard deviation
-                CASE 
-                    WHEN COUNT(*) > 1 THEN 
-                        SQRT(AVG(completion_minutes * completion_minutes) - AVG(completion_minutes) * AVG(completion_minutes))
-                    ELSE 0 
-                END as std_dev,
-                -- Project type breakdown
-                COUNT(CASE WHEN is_rep_variant = 1 THEN 1 END) as rep_count,
-                COUNT(CASE WHEN is_rep_variant = 0 THEN 1 END) as normal_count,
-                AVG(CASE WHEN is_rep_variant = 1 THEN completion_minutes END) as avg_rep_time,
-                AVG(CASE WHEN is_rep_variant = 0 THEN completion_minutes END) as avg_normal_time
-            FROM CompletionData cd
-            GROUP BY user
-            ORDER BY user
-        """
-        
-        c.execute(query, params)
+        # Open end: completions of projects started in the range may fall after end_date
+        with db_archive.logs_for_range(conn, ARCHIVE_DIR, start_date) as table:
+            # Get comprehensive performance metrics
+            query, pattern_query = db_queries.performance_queries(where_clause, table=table)
+            
+            c.execute(query, params)
+            rows = c.fetchall()
+            
+            # Get time-based patterns
+            c.execute(pattern_query, params)
+            pattern_rows = c.fetchall()
         performance_data = []
         
-        for row in c.fetchall():
+        for row in rows:
             data = dict(row)
             
             # Format all time fields
@@ -2163,36 +1930,9 @@ def get_performance_analysis():
             
             performance_data.append(data)
         
-        # Get time-based patterns
-        pattern_query = f"""
-            WITH CompletionData AS (
-                SELECT 
-                    strftime('%w', o.timestamp) as day_of_week,
-                    strftime('%H', o.timestamp) as hour_of_day,
-                    (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 as completion_minutes
-                FROM logs o
-                INNER JOIN logs a ON 
-                    o.project = a.project 
-                    AND o.user = a.user 
-                    AND a.event = 'AFGEMELD' 
-                    AND a.timestamp > o.timestamp
-                WHERE 
-                    o.event = 'OPEN' 
-                    AND {where_clause}
-            )
-            SELECT 
-                day_of_week,
-                hour_of_day,
-                AVG(completion_minutes) as avg_time,
-                COUNT(*) as project_count
-            FROM CompletionData
-            GROUP BY day_of_week, hour_of_day
-        """
-        
-        c.execute(pattern_query, params)
         patterns = []
         
-        for row in c.fetchall():
+        for row in pattern_rows:
             pattern = dict(row)
             pattern['avg_time_formatted'] = format_minutes(pattern['avg_time']) if pattern['avg_time'] else '-'
             patterns.append(pattern)
@@ -2215,6 +1955,7 @@ def get_performance_analysis():
 def run_api_server(host='0.0.0.0', port=5001):
     global _server_thread, _server
     init_db()  # Initialize database once when the server starts
+    maintenance.start()
     
     try:
         # Try to use waitress for production
@@ -2230,6 +1971,8 @@ def run_api_server(host='0.0.0.0', port=5001):
 if __name__ == '__main__':
     run_api_server()
 
+REPORT_PERIOD_DAYS = {'week': 7, 'month': 30, 'year': 365}
+
 @app.route('/api/report/generate', methods=['POST'])
 def generate_report_data():
     """API endpoint to generate report data based on selected criteria"""
@@ -2243,16 +1986,24 @@ def generate_report_data():
         conn = get_db()
         c = conn.cursor()
         
-        # Build date filter
+        # Build date filter (timestamp bounds, so the timestamp index and archive pruning apply)
         date_filter = ""
-        if period == 'week':
-            date_filter = "AND datetime(timestamp) >= datetime('now', '-7 days')"
-        elif period == 'month':
-            date_filter = "AND datetime(timestamp) >= datetime('now', '-1 month')"
-        elif period == 'year':
-            date_filter = "AND datetime(timestamp) >= datetime('now', '-1 year')"
+        date_params = []
+        range_start, range_end = None, None
+        if period in REPORT_PERIOD_DAYS:
+            range_start = (datetime.now() - timedelta(days=REPORT_PERIOD_DAYS[period])).isoformat()
+            date_filter = "AND timestamp >= ?"
+            date_params = [range_start]
         elif period == 'custom' and start_date and end_date:
-            date_filter = f"AND DATE(timestamp) BETWEEN '{start_date}' AND '{end_date}'"
+            range_start, range_end = start_date, end_date
+            date_filter = "AND timestamp >= ? AND timestamp < date(?, '+1 day')"
+            date_params = [start_date, end_date]
+        
+        # Reports span the archived months the period reaches into
+        if range_start:
+            table_scope = db_archive.logs_for_range(conn, ARCHIVE_DIR, range_start[:10], range_end)
+        else:
+            table_scope = contextlib.nullcontext('logs')
         
         if report_type == 'workflow':
             # Generate workflow analysis report
@@ -2265,7 +2016,7 @@ def generate_report_data():
                         timestamp,
                         LAG(timestamp) OVER (PARTITION BY project ORDER BY timestamp) as prev_timestamp,
                         LAG(user) OVER (PARTITION BY project ORDER BY timestamp) as prev_user
-                    FROM logs
+                    FROM {{table}}
                     WHERE project IS NOT NULL AND project != ''
                     {date_filter}
                     ORDER BY project, timestamp
@@ -2287,10 +2038,12 @@ def generate_report_data():
                 LIMIT 100
             """
             
-            c.execute(query)
+            with table_scope as table:
+                c.execute(query.format(table=table), date_params)
+                rows = c.fetchall()
             report_data = []
             
-            for row in c.fetchall():
+            for row in rows:
                 project_data = dict(row)
                 # Parse user times
                 user_times = project_data['user_times'].split('|') if project_data['user_times'] else []
@@ -2318,8 +2071,8 @@ def reset_database():
         timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
         backup_dir = get_writable_path('database/backups')
         os.makedirs(backup_dir, exist_ok=True)
-        backup_path = os.path.join(backup_dir, f'pre_reset_{timestamp}.sqlite')
-        shutil.copy2(DB_PATH, backup_path)
+        backup = db_backup.backup_database(DB_PATH, os.path.join(backup_dir, f'pre_reset_{timestamp}.sqlite'))
+        backup_path = backup['path']
         
         conn = get_db()
         c = conn.cursor()
@@ -2341,42 +2094,127 @@ def reset_database():
         logging.error(f"Error resetting database: {e}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Rows fetched per chunk while streaming an export
+EXPORT_FETCH_SIZE = 1000
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson; charset=utf-8', 'ndjson'),
+}
+
+def _export_chunks(cursor, columns, export_format):
+    """Yields the export as text chunks of EXPORT_FETCH_SIZE rows."""
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            yield ''.join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n' for row in rows)
+
+def _gzip_stream(chunks):
+    """Compresses text chunks into one gzip stream on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
 @app.route('/api/database/export', methods=['GET'])
 def export_database():
+    """Streams the logs table as CSV or NDJSON.
+
+    Query parameters: format (csv|ndjson), gzip (1/true), start_date, end_date,
+    user, project and since_id. Rows are exported in id order up to the highest
+    id at the start of the export; that id is returned in X-Export-Max-Id and
+    is the since_id for the next incremental export. Archived months in the
+    date range (all of them without one) are included.
+    """
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'error': f"Unsupported format '{export_format}' (csv or ndjson)"}), 400
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
     try:
-        conn = get_db()
-        c = conn.cursor()
-        
-        # Get all records
-        c.execute('SELECT * FROM logs ORDER BY id')
-        rows = c.fetchall()
-        
-        # Get column names
-        columns = [description[0] for description in c.description]
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(columns)
-        
-        # Write data
-        for row in rows:
-            writer.writerow(row)
-        
-        # Create response
-        response = make_response(output.getvalue())
-        response.headers["Content-Disposition"] = f"attachment; filename=database_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        response.headers["Content-Type"] = "text/csv"
-        
-        return response
+        since_id = int(request.args.get('since_id') or 0)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'since_id must be an integer'}), 400
+
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    conn = None
+    # Like the connection, the archive scope outlives this function and is closed by the generator
+    table_scope = contextlib.ExitStack()
+    try:
+        # Own connection: it stays open while the response streams and is closed by the generator
+        conn = create_db_connection()
+        table = table_scope.enter_context(db_archive.logs_for_range(conn, ARCHIVE_DIR, start_date, end_date))
+        max_id = conn.execute(db_queries.EXPORT_MAX_ID.format(table=table)).fetchone()[0]
+        query, params = db_queries.build_export_query(
+            since_id=since_id,
+            max_id=max_id,
+            start_date=start_date,
+            end_date=end_date,
+            user=request.args.get('user'),
+            project=request.args.get('project'),
+            table=table,
+        )
+        cursor = conn.execute(query, params)
+        columns = [description[0] for description in cursor.description]
     except Exception as e:
+        if conn:
+            table_scope.close()
+            conn.close()
         logging.error(f"Error exporting database: {e}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+    def generate():
+        try:
+            chunks = _export_chunks(cursor, columns, export_format)
+            if compress:
+                chunks = _gzip_stream(chunks)
+            for chunk in chunks:
+                yield chunk
+        except Exception as e:
+            # Headers are already sent; the truncated download is the only signal left
+            logging.error(f"Error while streaming export: {e}", exc_info=True)
+        finally:
+            cursor.close()
+            try:
+                table_scope.close()
+            finally:
+                conn.close()
+
+    content_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"database_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    if compress:
+        content_type = 'application/gzip'
+        filename += '.gz'
+    response = Response(stream_with_context(generate()), content_type=content_type)
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    response.headers["X-Export-Since-Id"] = str(since_id)
+    response.headers["X-Export-Max-Id"] = str(max_id)
+    logging.info(f"Export started: format={export_format}, gzip={compress}, since_id={since_id}, max_id={max_id}")
+    return response
+
 @app.route('/api/database/import', methods=['POST'])
 def import_database():
+    """Imports a CSV upload in committed chunks, skipping rows that already exist.
+
+    Optional form/query field chunk_size (rows per commit, default 1000).
+    """
     try:
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': 'No file provided'}), 400
@@ -2385,40 +2223,20 @@ def import_database():
         if file.filename == '':
             return jsonify({'success': False, 'error': 'No file selected'}), 400
         
-        # Read CSV file
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_reader = csv.DictReader(stream)
+        chunk_size = request.values.get('chunk_size', db_import.DEFAULT_CHUNK_SIZE, type=int)
         
-        conn = get_db()
-        c = conn.cursor()
-        
-        imported_count = 0
-        for row in csv_reader:
-            # Insert record (adjust columns as needed)
-            c.execute('''
-                INSERT INTO logs (timestamp, event, details, project, user, status, base_mo_code, is_rep_variant, file_path, item_count)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                row.get('timestamp'),
-                row.get('event'),
-                row.get('details'),
-                row.get('project'),
-                row.get('user'),
-                row.get('status'),
-                row.get('base_mo_code'),
-                row.get('is_rep_variant', 0),
-                row.get('file_path'),
-                row.get('item_count')
-            ))
-            imported_count += 1
-        
-        conn.commit()
-        
-        logging.info(f"Imported {imported_count} records from CSV")
-        return jsonify({
-            'success': True,
-            'imported_count': imported_count
-        })
+        # Decode while reading instead of loading the whole upload (utf-8-sig also accepts Excel's BOM)
+        text_stream = io.TextIOWrapper(file.stream, encoding='utf-8-sig', newline='')
+        try:
+            result = db_import.import_csv(get_db(), text_stream, chunk_size=chunk_size, archive_dir=ARCHIVE_DIR)
+        finally:
+            text_stream.detach()
+        
+        return jsonify({'success': True, **result})
+    except db_import.ImportFormatError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except UnicodeDecodeError as e:
+        return jsonify({'success': False, 'error': f'File is not valid UTF-8: {e}'}), 400
     except Exception as e:
         logging.error(f"Error importing database: {e}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -2436,7 +2254,7 @@ def get_database_stats():
         
         # Get records today
         today = datetime.now().strftime('%Y-%m-%d')
-        c.execute('SELECT COUNT(*) FROM logs WHERE DATE(timestamp) = ?', (today,))
+        c.execute("SELECT COUNT(*) FROM logs WHERE timestamp >= ? AND timestamp < date(?, '+1 day')", (today, today))
         records_today = c.fetchone()[0]
         
         # Get oldest record
@@ -2493,19 +2311,36 @@ def create_backup():
         backup_dir = get_writable_path('database/backups')
         os.makedirs(backup_dir, exist_ok=True)
         
+        data = request.get_json(silent=True) or {}
+        method = data.get('method', 'backup')
+        if method not in db_backup.BACKUP_METHODS:
+            return jsonify({'success': False, 'error': f"Unknown backup method '{method}'"}), 400
+        
         # Create backup filename with timestamp
         timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-        backup_filename = f'backup_{timestamp}.sqlite'
-        backup_path = os.path.join(backup_dir, backup_filename)
-        
-        # Copy database file
-        shutil.copy2(DB_PATH, backup_path)
+        backup_path = os.path.join(backup_dir, f'backup_{timestamp}.sqlite')
+        
+        # Online copy through SQLite, verified with quick_check
+        backup = db_backup.backup_database(
+            DB_PATH, backup_path,
+            method=method,
+            pages_per_step=data.get('pages_per_step', db_backup.DEFAULT_PAGES_PER_STEP),
+            step_sleep=data.get('step_sleep', db_backup.DEFAULT_STEP_SLEEP),
+            compress=bool(data.get('compress', False)),
+        )
         
-        logging.info(f"Database backup created: {backup_path}")
+        logging.info(f"Database backup created: {backup['path']}")
         return jsonify({
             'success': True,
-            'filename': backup_filename,
-            'path': backup_path
+            'filename': backup['filename'],
+            'path': backup['path'],
+            'method': backup['method'],
+            'compressed': backup['compressed'],
+            'size': backup['size'],
+            'source_size': backup['source_size'],
+            'pages': backup['pages'],
+            'quick_check': backup['quick_check'],
+            'duration_s': backup['duration_s']
         })
     except Exception as e:
         logging.error(f"Error creating backup: {e}", exc_info=True)
@@ -2519,12 +2354,13 @@ def list_backups():
         
         if os.path.exists(backup_dir):
             for filename in os.listdir(backup_dir):
-                if filename.endswith('.sqlite'):
+                if db_backup.is_backup_file(filename):
                     filepath = os.path.join(backup_dir, filename)
                     stat = os.stat(filepath)
                     backups.append({
                         'filename': filename,
                         'size': stat.st_size,
+                        'compressed': filename.endswith('.gz'),
                         'created': datetime.fromtimestamp(stat.st_mtime).isoformat()
                     })
         
@@ -2539,6 +2375,20 @@ def list_backups():
         logging.error(f"Error listing backups: {e}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Only one restore at a time; a second request gets 409 instead of queueing
+_restore_lock = threading.Lock()
+
+def _invalidate_after_restore():
+    """Drops state derived from the data that was just replaced."""
+    # Latency traces refer to scans of the old data
+    scan_trace_recorder.reset()
+    conn = create_db_connection()
+    try:
+        # Planner statistics came with the backup; refresh them for the current indexes
+        conn.execute('PRAGMA optimize')
+    finally:
+        conn.close()
+
 @app.route('/api/database/restore', methods=['POST'])
 def restore_backup():
     try:
@@ -2547,6 +2397,8 @@ def restore_backup():
         
         if not filename:
             return jsonify({'success': False, 'error': 'No filename provided'}), 400
+        if os.path.basename(filename) != filename or not db_backup.is_backup_file(filename):
+            return jsonify({'success': False, 'error': 'Invalid backup filename'}), 400
         
         backup_dir = get_writable_path('database/backups')
         backup_path = os.path.join(backup_dir, filename)
@@ -2554,16 +2406,33 @@ def restore_backup():
         if not os.path.exists(backup_path):
             return jsonify({'success': False, 'error': 'Backup file not found'}), 404
         
-        # Create a backup of current database before restoring
-        timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-        pre_restore_backup = os.path.join(backup_dir, f'pre_restore_{timestamp}.sqlite')
-        shutil.copy2(DB_PATH, pre_restore_backup)
-        
-        # Restore the backup
-        shutil.copy2(backup_path, DB_PATH)
-        
-        logging.info(f"Database restored from backup: {filename}")
-        return jsonify({'success': True, 'message': 'Database restored successfully'})
+        if not _restore_lock.acquire(blocking=False):
+            return jsonify({'success': False, 'error': 'A restore is already running'}), 409
+        try:
+            # Create a backup of current database before restoring
+            timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+            pre_restore = db_backup.backup_database(DB_PATH, os.path.join(backup_dir, f'pre_restore_{timestamp}.sqlite'))
+            
+            # Validated and migrated off to the side, then copied into the live
+            # database in one step; open connections stay valid
+            try:
+                restored = db_backup.restore_database(backup_path, DB_PATH, prepare=create_schema)
+            except db_backup.BackupError as e:
+                logging.error(f"Restore of {filename} rejected: {e}")
+                return jsonify({'success': False, 'error': str(e), 'pre_restore_backup': pre_restore['filename']}), 400
+            _invalidate_after_restore()
+        finally:
+            _restore_lock.release()
+        
+        logging.info(f"Database restored from backup: {filename} (writes paused {restored['write_pause_ms']} ms)")
+        return jsonify({
+            'success': True,
+            'message': 'Database restored successfully',
+            'pre_restore_backup': pre_restore['filename'],
+            'rows': restored['rows'],
+            'write_pause_ms': restored['write_pause_ms'],
+            'duration_s': restored['duration_s']
+        })
     except Exception as e:
         logging.error(f"Error restoring backup: {e}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -2572,12 +2441,14 @@ def restore_backup():
 @app.route('/api/database/optimize', methods=['POST'])
 def optimize_database():
     try:
+        # Run PRAGMA optimize (recorded in the maintenance history)
+        entry = maintenance.run_task('optimize')
+        if not entry['success']:
+            return jsonify({'success': False, 'error': entry['error']}), 500
+        
         conn = get_db()
         c = conn.cursor()
         
-        # Run PRAGMA optimize
-        c.execute('PRAGMA optimize')
-        
         # Get statistics before and after
         c.execute('PRAGMA page_count')
         page_count = c.fetchone()[0]
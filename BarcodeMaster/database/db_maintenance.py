@@ -0,0 +1,215 @@
+"""
+Scheduled maintenance for central_logging.sqlite.
+
+A background thread wakes up every CHECK_INTERVAL seconds. It only does
+work while the API is idle, meaning fewer than IDLE_WRITES_PER_MINUTE writes
+(as reported through ``note_write()``) in the last minute. Each task has its
+own minimum interval:
+
+- ``checkpoint``: ``wal_checkpoint(PASSIVE)``. It becomes ``TRUNCATE`` when
+  the WAL file has grown past WAL_TRUNCATE_BYTES, so it does not stay large
+  after a burst.
+- ``incremental_vacuum``: returns up to VACUUM_PAGES_PER_RUN free pages to
+  the file system once the freelist passes VACUUM_MIN_FREE_PAGES. This needs
+  auto_vacuum=INCREMENTAL (schema version 3).
+- ``optimize``: ``PRAGMA optimize``, which refreshes planner statistics
+  where SQLite thinks they are stale.
+
+Every run, scheduled or manual, is kept in a bounded history for the
+maintenance endpoint.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+CHECK_INTERVAL = 30
+IDLE_WRITES_PER_MINUTE = 6
+WAL_TRUNCATE_BYTES = 64 * 1024 * 1024
+VACUUM_MIN_FREE_PAGES = 256
+VACUUM_PAGES_PER_RUN = 2000
+# Minimum seconds between two scheduled runs of a task, in run order: the
+# checkpoint after the vacuum lets the WAL hand the freed pages back
+TASK_INTERVALS = {
+    'incremental_vacuum': 900,
+    'checkpoint': 300,
+    'optimize': 6 * 3600,
+}
+MAX_HISTORY = 200
+
+
+class MaintenanceScheduler:
+    """Runs the maintenance tasks on idle moments; ``connect`` returns a new sqlite3 connection."""
+
+    def __init__(self, connect, check_interval=CHECK_INTERVAL, idle_writes_per_minute=IDLE_WRITES_PER_MINUTE):
+        self._connect = connect
+        self.check_interval = check_interval
+        self.idle_writes_per_minute = idle_writes_per_minute
+        self._writes = deque()
+        self._writes_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._history = deque(maxlen=MAX_HISTORY)
+        self._last_run = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- Write rate ---
+    def note_write(self):
+        now = time.monotonic()
+        with self._writes_lock:
+            self._writes.append(now)
+            while self._writes and now - self._writes[0] > 60:
+                self._writes.popleft()
+
+    def writes_per_minute(self):
+        now = time.monotonic()
+        with self._writes_lock:
+            while self._writes and now - self._writes[0] > 60:
+                self._writes.popleft()
+            return len(self._writes)
+
+    def is_idle(self):
+        return self.writes_per_minute() < self.idle_writes_per_minute
+
+    # --- Tasks ---
+    @staticmethod
+    def _wal_size(conn):
+        path = conn.execute('PRAGMA database_list').fetchone()[2]
+        try:
+            return os.path.getsize(path + '-wal') if path else 0
+        except OSError:
+            return 0
+
+    def _checkpoint(self, conn, mode=None):
+        wal_before = self._wal_size(conn)
+        mode = mode or ('TRUNCATE' if wal_before >= WAL_TRUNCATE_BYTES else 'PASSIVE')
+        busy, log_frames, checkpointed = conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+        return {'mode': mode, 'busy': bool(busy), 'wal_frames': log_frames, 'checkpointed_frames': checkpointed,
+                'wal_bytes_before': wal_before, 'wal_bytes_after': self._wal_size(conn)}
+
+    def _incremental_vacuum(self, conn, max_pages=VACUUM_PAGES_PER_RUN):
+        auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if auto_vacuum != 2:
+            return {'skipped': 'auto_vacuum is not INCREMENTAL', 'free_pages': free_before}
+        pages = free_before if max_pages is None else min(free_before, max_pages)
+        if pages:
+            # The pragma frees one page per step and execute() only takes the
+            # first; executescript() steps it to the end
+            conn.executescript(f'PRAGMA incremental_vacuum({int(pages)})')
+        free_after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        return {'freed_pages': free_before - free_after, 'free_pages': free_after,
+                'freed_bytes': (free_before - free_after) * page_size}
+
+    def _optimize(self, conn):
+        conn.execute('PRAGMA optimize')
+        return {}
+
+    def run_task(self, task, trigger='manual', **options):
+        """Runs one task now and returns its history entry."""
+        if task not in TASK_INTERVALS:
+            raise ValueError(f"Onbekende onderhoudstaak '{task}'")
+        with self._run_lock:
+            entry = {'task': task, 'trigger': trigger, 'started': datetime.now().isoformat(timespec='seconds'),
+                     'writes_per_minute': self.writes_per_minute()}
+            start = time.perf_counter()
+            conn = None
+            try:
+                conn = self._connect()
+                conn.isolation_level = None
+                entry['result'] = getattr(self, f'_{task}')(conn, **options)
+                entry['success'] = True
+            except Exception as e:
+                entry['success'] = False
+                entry['error'] = str(e)
+                logging.error(f"Maintenance task {task} failed: {e}", exc_info=True)
+            finally:
+                if conn is not None:
+                    conn.close()
+            entry['duration_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            self._last_run[task] = time.monotonic()
+            self._history.append(entry)
+        logging.info(f"Maintenance {task} ({trigger}) in {entry['duration_ms']} ms: {entry.get('result', entry.get('error'))}")
+        return entry
+
+    def _needs_vacuum(self):
+        conn = self._connect()
+        try:
+            return (conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+                    and conn.execute('PRAGMA freelist_count').fetchone()[0] >= VACUUM_MIN_FREE_PAGES)
+        finally:
+            conn.close()
+
+    def run_due_tasks(self):
+        """Runs the tasks whose interval has passed, if the API is idle. Returns the entries."""
+        entries = []
+        now = time.monotonic()
+        for task, interval in TASK_INTERVALS.items():
+            if self._stop.is_set() or not self.is_idle():
+                break
+            last = self._last_run.get(task)
+            if last is not None and now - last < interval:
+                continue
+            if task == 'incremental_vacuum' and not self._needs_vacuum():
+                self._last_run[task] = now
+                continue
+            entries.append(self.run_task(task, trigger='scheduled'))
+        return entries
+
+    # --- Thread ---
+    def _loop(self):
+        # The first round waits too, so server start-up is not slowed down
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.run_due_tasks()
+            except Exception as e:
+                logging.error(f"Maintenance scheduler error: {e}", exc_info=True)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='db-maintenance', daemon=True)
+        self._thread.start()
+        logging.info("Maintenance scheduler started")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def history(self, limit=50):
+        return list(self._history)[-limit:][::-1]
+
+    def status(self):
+        """Current database counters next to the scheduler state."""
+        conn = self._connect()
+        try:
+            info = {
+                'auto_vacuum': {0: 'NONE', 1: 'FULL', 2: 'INCREMENTAL'}.get(
+                    conn.execute('PRAGMA auto_vacuum').fetchone()[0], 'UNKNOWN'),
+                'page_count': conn.execute('PRAGMA page_count').fetchone()[0],
+                'free_pages': conn.execute('PRAGMA freelist_count').fetchone()[0],
+                'page_size': conn.execute('PRAGMA page_size').fetchone()[0],
+                'wal_bytes': self._wal_size(conn),
+            }
+        finally:
+            conn.close()
+        now = time.monotonic()
+        info.update({
+            'scheduler_running': self.is_running(),
+            'writes_per_minute': self.writes_per_minute(),
+            'idle': self.is_idle(),
+            'next_due_s': {task: max(0, round(interval - (now - self._last_run[task])))
+                           if task in self._last_run else 0
+                           for task, interval in TASK_INTERVALS.items()},
+        })
+        return info
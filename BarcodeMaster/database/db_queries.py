@@ -0,0 +1,615 @@
+"""
+SQL used by the db_log_api routes, kept in one place so query_plan_check.py
+can run exactly the statements the routes run through EXPLAIN QUERY PLAN.
+
+Date filters are written as ranges on the raw ``timestamp`` column
+(``timestamp >= day AND timestamp < day + 1``) instead of ``DATE(timestamp) = day``:
+timestamps are stored as ISO strings, so both select the same rows, but only
+the range form can use an index.
+
+QUERY_PLAN_CASES lists every statement with sample parameters. Cases marked
+``hot`` must be answered through an index; reporting queries that aggregate the
+whole history are listed too, so their plans show up in the report.
+"""
+
+# --- /log ---
+INSERT_LOG = (
+    'INSERT INTO logs (timestamp, event, details, project, user, status, base_mo_code, is_rep_variant, file_path, item_count) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+)
+
+# Literal 'OPEN'/'CLOSED' so the partial index idx_logs_open_projects applies
+CLOSE_OPEN_LOGS = (
+    "UPDATE logs SET status = 'CLOSED' "
+    "WHERE event = 'OPEN' AND status = 'OPEN' AND lower(project) = ? AND user = ?"
+)
+
+# --- /update_file_path, /update_item_count ---
+_LATEST_OPEN_LOG_ID = '''
+            SELECT id FROM logs
+            WHERE event = 'OPEN'
+            AND status = 'OPEN'
+            AND user = ?
+            AND project = ?
+            ORDER BY timestamp DESC
+            LIMIT 1
+'''
+
+UPDATE_OPEN_FILE_PATH = f'''
+        UPDATE logs
+        SET file_path = ?
+        WHERE id = ({_LATEST_OPEN_LOG_ID})
+'''
+
+UPDATE_OPEN_ITEM_COUNT = f'''
+        UPDATE logs
+        SET item_count = ?
+        WHERE id = ({_LATEST_OPEN_LOG_ID})
+'''
+
+# --- /dashboard and /database ---
+DISTINCT_USERS = """
+    SELECT DISTINCT user
+    FROM logs
+    WHERE user IS NOT NULL AND user != ''
+    ORDER BY user
+"""
+
+# All OPEN projects (regardless of date) and the given day's AFGEMELD events.
+# Params: (day, day) with day as 'YYYY-MM-DD'
+DASHBOARD_DISPLAY = """
+    SELECT user, project, status, event, timestamp FROM logs
+    WHERE
+        (status = 'OPEN' AND event = 'OPEN')  -- All open projects regardless of date
+        OR (event = 'AFGEMELD' AND timestamp >= ? AND timestamp < date(?, '+1 day'))  -- Today's completed projects
+    ORDER BY timestamp DESC
+"""
+
+LOGS_SINCE = """
+    SELECT * FROM logs
+    WHERE timestamp >= ?
+    ORDER BY timestamp DESC
+"""
+
+# A UNION instead of "... OR timestamp >= ?": with the OR, SQLite walks the timestamp
+# index backwards until it has 1000 matches, which is the whole table when there are
+# fewer recent rows than that
+OPEN_OR_RECENT_LOGS = """
+    SELECT * FROM logs WHERE status = 'OPEN' AND event = 'OPEN'  -- All open projects
+    UNION
+    SELECT * FROM logs WHERE timestamp >= ?  -- Or recent logs
+    ORDER BY timestamp DESC
+    LIMIT 1000
+"""
+
+# --- /projects ---
+DISTINCT_PROJECTS = """
+    SELECT DISTINCT project
+    FROM logs
+    WHERE project IS NOT NULL AND project != ''
+    ORDER BY project
+"""
+
+PROJECT_EVENTS = """
+    SELECT user, event, status, timestamp
+    FROM logs
+    WHERE project = ?
+    ORDER BY timestamp ASC
+"""
+
+PROJECT_LATEST_TIMESTAMP = """
+    SELECT MAX(timestamp) as latest_timestamp
+    FROM logs
+    WHERE project = ?
+"""
+
+PROJECT_EVENT_COUNT = """
+    SELECT COUNT(*) as event_count
+    FROM logs
+    WHERE project = ?
+"""
+
+# --- /logs_project ---
+LOGS_FOR_PROJECT_CI = 'SELECT * FROM logs WHERE lower(project) = ? ORDER BY id DESC'
+
+PROJECT_USER_STATUS_CI = '''
+    SELECT user, status, MAX(timestamp) as last_updated
+    FROM logs WHERE lower(project) = ? AND user != '' GROUP BY user
+'''
+
+# --- /statistics ---
+COUNT_PROJECTS = "SELECT COUNT(DISTINCT project) FROM logs WHERE project IS NOT NULL AND project != ''"
+COUNT_OPEN_PROJECTS = "SELECT COUNT(DISTINCT project) FROM logs WHERE status = 'OPEN'"
+COUNT_CLOSED_PROJECTS = "SELECT COUNT(DISTINCT project) FROM logs WHERE status IN ('AFGEMELD', 'CLOSED')"
+
+# --- /api/user/<username>/stats helpers ---
+COUNT_ACTIVE_PROJECTS = """
+    SELECT COUNT(DISTINCT project)
+    FROM logs
+    WHERE user = ? AND status = 'OPEN'
+    AND timestamp > datetime('now', '-7 days')
+"""
+
+# Params: (user, day)
+COUNT_COMPLETED_ON_DAY = """
+    SELECT COUNT(DISTINCT project)
+    FROM logs
+    WHERE user = ?1
+    AND (status = 'AFGEMELD' OR status = 'CLOSED')
+    AND timestamp >= ?2 AND timestamp < date(?2, '+1 day')
+"""
+
+USER_PROJECT_SPANS_30D = """
+    SELECT project, MIN(timestamp) as start_time, MAX(timestamp) as end_time
+    FROM logs
+    WHERE user = ?
+    AND timestamp > datetime('now', '-30 days')
+    GROUP BY project
+    HAVING COUNT(DISTINCT status) > 1
+"""
+
+USER_COMPLETION_RATE_30D = """
+    SELECT
+        COUNT(DISTINCT CASE WHEN status IN ('AFGEMELD', 'CLOSED') THEN project END) as completed,
+        COUNT(DISTINCT project) as total
+    FROM logs
+    WHERE user = ?
+    AND timestamp > datetime('now', '-30 days')
+"""
+
+# Params: (user, day)
+USER_PROJECTS_ON_DAY = """
+    SELECT COUNT(DISTINCT project) as count
+    FROM logs
+    WHERE user = ?1 AND timestamp >= ?2 AND timestamp < date(?2, '+1 day')
+"""
+
+USER_RECENT_PROJECTS = """
+    SELECT DISTINCT project,
+           MAX(timestamp) as last_activity,
+           COUNT(*) as event_count,
+           MAX(CASE WHEN status IN ('AFGEMELD', 'CLOSED') THEN 1 ELSE 0 END) as is_completed
+    FROM logs
+    WHERE user = ?
+    AND timestamp > datetime('now', '-7 days')
+    GROUP BY project
+    ORDER BY last_activity DESC
+    LIMIT 10
+"""
+
+# --- /api/metrics/* ---
+# The history queries below are templates: format them with the table name
+# db_archive.logs_for_range() hands out, so archived months are included.
+PROJECT_COMPLETION_TIMES = """
+    WITH ProjectCompletions AS (
+        SELECT
+            o.user,
+            o.project,
+            o.timestamp as start_time,
+            a.timestamp as end_time,
+            o.base_mo_code,
+            o.is_rep_variant,
+            (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 as completion_minutes,
+            DATE(o.timestamp) as project_date
+        FROM {table} o
+        INNER JOIN {table} a ON
+            o.project = a.project
+            AND o.user = a.user
+            AND a.event = 'AFGEMELD'
+            AND a.timestamp > o.timestamp
+        WHERE
+            o.event = 'OPEN'
+            AND o.user IS NOT NULL
+            AND o.user != ''
+    ),
+    UserStats AS (
+        SELECT
+            user,
+            COUNT(*) as total_completed,
+            AVG(completion_minutes) as avg_minutes,
+            MIN(completion_minutes) as min_minutes,
+            MAX(completion_minutes) as max_minutes,
+            -- Standard deviation for consistency analysis
+            CASE
+                WHEN COUNT(*) > 1 THEN
+                    SQRT(AVG(completion_minutes * completion_minutes) - AVG(completion_minutes) * AVG(completion_minutes))
+                ELSE 0
+            END as std_dev,
+            -- Separate averages for REP and non-REP projects
+            AVG(CASE WHEN is_rep_variant = 1 THEN completion_minutes END) as avg_minutes_rep,
+            AVG(CASE WHEN is_rep_variant = 0 THEN completion_minutes END) as avg_minutes_normal,
+            COUNT(CASE WHEN is_rep_variant = 1 THEN 1 END) as count_rep,
+            COUNT(CASE WHEN is_rep_variant = 0 THEN 1 END) as count_normal
+        FROM ProjectCompletions
+        WHERE completion_minutes > 0 -- Filter out invalid data
+        GROUP BY user
+    ),
+    RecentTrends AS (
+        SELECT
+            user,
+            AVG(completion_minutes) as recent_avg_minutes,
+            COUNT(*) as recent_count
+        FROM ProjectCompletions
+        WHERE project_date >= date('now', '-7 days')
+            AND completion_minutes > 0
+        GROUP BY user
+    )
+    SELECT
+        u.user,
+        u.total_completed,
+        u.avg_minutes,
+        u.min_minutes,
+        u.max_minutes,
+        u.std_dev,
+        u.avg_minutes_rep,
+        u.avg_minutes_normal,
+        u.count_rep,
+        u.count_normal,
+        r.recent_avg_minutes,
+        r.recent_count,
+        -- Performance trend (recent vs overall)
+        CASE
+            WHEN r.recent_avg_minutes IS NOT NULL AND u.avg_minutes > 0 THEN
+                ((u.avg_minutes - r.recent_avg_minutes) / u.avg_minutes) * 100
+            ELSE NULL
+        END as improvement_percentage
+    FROM UserStats u
+    LEFT JOIN RecentTrends r ON u.user = r.user
+    ORDER BY
+        CASE u.user
+            WHEN 'NESTING' THEN 1
+            WHEN 'OPUS' THEN 2
+            WHEN 'KL GANNOMAT' THEN 3
+            ELSE 4
+        END
+"""
+
+# Params: (user, days)
+USER_PROJECT_HISTORY = """
+    SELECT
+        o.project,
+        o.base_mo_code,
+        o.is_rep_variant,
+        o.timestamp as start_time,
+        a.timestamp as end_time,
+        (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 as completion_minutes,
+        DATE(o.timestamp) as project_date
+    FROM {table} o
+    LEFT JOIN {table} a ON
+        o.project = a.project
+        AND o.user = a.user
+        AND a.event = 'AFGEMELD'
+        AND a.timestamp > o.timestamp
+    WHERE
+        o.event = 'OPEN'
+        AND o.user = ?
+        AND o.timestamp >= date('now', '-' || ? || ' days')
+    ORDER BY o.timestamp DESC
+"""
+
+EXPECTED_COMPLETION_PROJECT = """
+    SELECT
+        user,
+        timestamp as start_time,
+        base_mo_code,
+        is_rep_variant
+    FROM logs
+    WHERE
+        project = ?
+        AND event = 'OPEN'
+        AND status = 'OPEN'
+    ORDER BY timestamp DESC
+    LIMIT 1
+"""
+
+# Params: (user, is_rep_variant)
+EXPECTED_COMPLETION_HISTORY = """
+    SELECT
+        AVG(completion_minutes) as avg_completion,
+        COUNT(*) as sample_size,
+        MIN(completion_minutes) as best_time,
+        MAX(completion_minutes) as worst_time
+    FROM (
+        SELECT
+            (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 as completion_minutes
+        FROM logs o
+        INNER JOIN logs a ON
+            o.project = a.project
+            AND o.user = a.user
+            AND a.event = 'AFGEMELD'
+            AND a.timestamp > o.timestamp
+        WHERE
+            o.event = 'OPEN'
+            AND o.user = ?
+            AND o.is_rep_variant = ?
+            AND (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 > 0
+        ORDER BY o.timestamp DESC
+        LIMIT 20  -- Use last 20 similar projects
+    )
+"""
+
+WORKFLOW_CHAIN = """
+    WITH ProjectWorkflow AS (
+        SELECT
+            project,
+            user,
+            event,
+            timestamp,
+            ROW_NUMBER() OVER (PARTITION BY project ORDER BY timestamp) as step_order,
+            LEAD(timestamp) OVER (PARTITION BY project ORDER BY timestamp) as next_timestamp,
+            LEAD(user) OVER (PARTITION BY project ORDER BY timestamp) as next_user
+        FROM {table}
+        WHERE
+            event IN ('OPEN', 'AFGEMELD')
+            AND project IS NOT NULL
+        ORDER BY project, timestamp
+    )
+    SELECT
+        user as current_user,
+        next_user,
+        COUNT(*) as transition_count,
+        AVG(
+            CASE
+                WHEN next_timestamp IS NOT NULL THEN
+                    (julianday(next_timestamp) - julianday(timestamp)) * 24 * 60
+                ELSE NULL
+            END
+        ) as avg_transition_minutes
+    FROM ProjectWorkflow
+    WHERE event = 'OPEN'
+    GROUP BY user, next_user
+    HAVING next_user IS NOT NULL
+"""
+
+# Params: (day,)
+DAILY_SUMMARY = """
+    SELECT
+        COUNT(DISTINCT CASE WHEN event = 'OPEN' THEN project END) as projects_started,
+        COUNT(DISTINCT CASE WHEN event = 'AFGEMELD' THEN project END) as projects_completed,
+        COUNT(DISTINCT user) as active_users,
+        SUM(CASE WHEN event = 'OPEN' THEN item_count ELSE 0 END) as total_items_created,
+        COUNT(*) as total_events,
+        -- Additional metrics
+        AVG(CASE
+            WHEN event = 'AFGEMELD' THEN
+                (julianday(timestamp) - (
+                    SELECT julianday(o.timestamp)
+                    FROM {table} o
+                    WHERE o.project = l.project
+                    AND o.user = l.user
+                    AND o.event = 'OPEN'
+                    AND o.timestamp < l.timestamp
+                    ORDER BY o.timestamp DESC
+                    LIMIT 1
+                )) * 24 * 60
+            ELSE NULL
+        END) as avg_completion_time_minutes
+    FROM {table} l
+    WHERE timestamp >= ?1 AND timestamp < date(?1, '+1 day')
+"""
+
+# Params: (day,)
+DAILY_HOURLY = """
+    SELECT
+        strftime('%H', timestamp) as hour,
+        COUNT(*) as event_count,
+        COUNT(DISTINCT user) as active_users,
+        COUNT(CASE WHEN event = 'OPEN' THEN 1 END) as starts,
+        COUNT(CASE WHEN event = 'AFGEMELD' THEN 1 END) as completions
+    FROM {table}
+    WHERE timestamp >= ?1 AND timestamp < date(?1, '+1 day')
+    GROUP BY hour
+    ORDER BY hour
+"""
+
+# /api/metrics/performance_analysis: the WHERE clause is built per request
+PERFORMANCE_DATE_RANGE = "o.timestamp >= ? AND o.timestamp < date(?, '+1 day')"
+PERFORMANCE_USER = "o.user = ?"
+
+
+def performance_queries(where_clause, table='logs'):
+    """Returns (per-user query, time-pattern query) for /api/metrics/performance_analysis."""
+    completion_data = f"""
+            FROM {table} o
+            INNER JOIN {table} a ON
+                o.project = a.project
+                AND o.user = a.user
+                AND a.event = 'AFGEMELD'
+                AND a.timestamp > o.timestamp
+            WHERE
+                o.event = 'OPEN'
+                AND {where_clause}"""
+    per_user = f"""
+        WITH CompletionData AS (
+            SELECT
+                o.user,
+                o.project,
+                DATE(o.timestamp) as project_date,
+                o.is_rep_variant,
+                (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 as completion_minutes,
+                strftime('%w', o.timestamp) as day_of_week,
+                strftime('%H', o.timestamp) as hour_of_day{completion_data}
+                AND (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 > 0
+        ),
+        -- Per-user average computed once (a correlated subquery per row is quadratic per user)
+        UserAverages AS (
+            SELECT user, AVG(completion_minutes) as user_avg
+            FROM CompletionData
+            GROUP BY user
+        )
+        SELECT
+            cd.user as user,
+            COUNT(*) as total_projects,
+            AVG(completion_minutes) as avg_time,
+            MIN(completion_minutes) as min_time,
+            MAX(completion_minutes) as max_time,
+            -- Calculate percentiles (approximation)
+            AVG(CASE WHEN completion_minutes <= ua.user_avg THEN completion_minutes END) as median_approx,
+            -- Standard deviation
+            CASE
+                WHEN COUNT(*) > 1 THEN
+                    SQRT(AVG(completion_minutes * completion_minutes) - AVG(completion_minutes) * AVG(completion_minutes))
+                ELSE 0
+            END as std_dev,
+            -- Project type breakdown
+            COUNT(CASE WHEN is_rep_variant = 1 THEN 1 END) as rep_count,
+            COUNT(CASE WHEN is_rep_variant = 0 THEN 1 END) as normal_count,
+            AVG(CASE WHEN is_rep_variant = 1 THEN completion_minutes END) as avg_rep_time,
+            AVG(CASE WHEN is_rep_variant = 0 THEN completion_minutes END) as avg_normal_time
+        FROM CompletionData cd
+        JOIN UserAverages ua ON ua.user = cd.user
+        GROUP BY cd.user
+        ORDER BY cd.user
+    """
+    patterns = f"""
+        WITH CompletionData AS (
+            SELECT
+                strftime('%w', o.timestamp) as day_of_week,
+                strftime('%H', o.timestamp) as hour_of_day,
+                (julianday(a.timestamp) - julianday(o.timestamp)) * 24 * 60 as completion_minutes{completion_data}
+        )
+        SELECT
+            day_of_week,
+            hour_of_day,
+            AVG(completion_minutes) as avg_time,
+            COUNT(*) as project_count
+        FROM CompletionData
+        GROUP BY day_of_week, hour_of_day
+    """
+    return per_user, patterns
+
+
+def build_logs_query(project=None, start_date=None, end_date=None, user=None, project_type=None, status=None,
+                     table='logs'):
+    """Returns (sql, params) for GET /logs with the given filters.
+
+    ``table`` is the name handed out by db_archive.logs_for_range() when the
+    range reaches into archived months.
+    """
+    query = f'SELECT * FROM {table} WHERE 1=1'
+    params = []
+    if project:
+        query += ' AND project = ?'
+        params.append(project)
+    if start_date:
+        query += ' AND timestamp >= ?'
+        params.append(start_date)
+    if end_date:
+        query += " AND timestamp < date(?, '+1 day')"
+        params.append(end_date)
+    if user:
+        query += ' AND user = ?'
+        params.append(user)
+    if project_type == 'rep':
+        query += ' AND is_rep_variant = 1'
+    elif project_type == 'normal':
+        query += ' AND is_rep_variant = 0'
+    if status:
+        query += ' AND status = ?'
+        params.append(status)
+    query += ' ORDER BY timestamp DESC'
+    # Add limit if no specific filters
+    if not (project or start_date or end_date or user or project_type or status):
+        query += ' LIMIT 500'
+    return query, params
+
+
+# --- /api/database/export ---
+EXPORT_MAX_ID = 'SELECT COALESCE(MAX(id), 0) FROM {table}'
+
+
+def build_export_query(since_id=0, max_id=None, start_date=None, end_date=None, user=None, project=None,
+                       table='logs'):
+    """Returns (sql, params) for an export of the rows with since_id < id <= max_id, in id order.
+
+    The upper bound pins the export to the rows that existed when it started,
+    so ``max_id`` can be handed out as the next ``since_id``. Archived rows keep
+    their id, so the bounds hold for the ``logs_all`` view as well.
+    """
+    query = f'SELECT * FROM {table} WHERE id > ?'
+    params = [since_id]
+    if max_id is not None:
+        query += ' AND id <= ?'
+        params.append(max_id)
+    if start_date:
+        query += ' AND timestamp >= ?'
+        params.append(start_date)
+    if end_date:
+        query += " AND timestamp < date(?, '+1 day')"
+        params.append(end_date)
+    if user:
+        query += ' AND user = ?'
+        params.append(user)
+    if project:
+        query += ' AND project = ?'
+        params.append(project)
+    query += ' ORDER BY id'
+    return query, params
+
+
+def _query_plan_cases():
+    """(name, sql, sample params, hot, allow_index_scan) for every statement above."""
+    day = '2024-06-12'
+    user = 'OPUS'
+    project = 'MO07834'
+    perf_user, perf_patterns = performance_queries(f"{PERFORMANCE_DATE_RANGE} AND {PERFORMANCE_USER}")
+    perf_all, _ = performance_queries(PERFORMANCE_DATE_RANGE)
+    cases = [
+        ('log: close open rows (AFGEMELD)', CLOSE_OPEN_LOGS, (project.lower(), user), True, False),
+        ('update_file_path', UPDATE_OPEN_FILE_PATH, ('X:/p.xlsx', user, project), True, False),
+        ('update_item_count', UPDATE_OPEN_ITEM_COUNT, (10, user, project), True, False),
+        ('dashboard: open + completed today', DASHBOARD_DISPLAY, (day, day), True, False),
+        ('dashboard: logs last 7 days', LOGS_SINCE, ('2024-06-05',), True, False),
+        ('dashboard: open or recent (limit 1000)', OPEN_OR_RECENT_LOGS, ('2024-06-05',), True, False),
+        ('dashboard: distinct users', DISTINCT_USERS, (), True, True),
+        ('projects: distinct projects', DISTINCT_PROJECTS, (), True, True),
+        ('projects: events per project', PROJECT_EVENTS, (project,), True, False),
+        ('projects: latest timestamp', PROJECT_LATEST_TIMESTAMP, (project,), True, False),
+        ('projects: event count', PROJECT_EVENT_COUNT, (project,), True, False),
+        ('logs_project: rows', LOGS_FOR_PROJECT_CI, (project.lower(),), True, False),
+        ('logs_project: user status', PROJECT_USER_STATUS_CI, (project.lower(),), True, False),
+        ('statistics: projects', COUNT_PROJECTS, (), True, True),
+        ('statistics: open projects', COUNT_OPEN_PROJECTS, (), True, False),
+        ('statistics: closed projects', COUNT_CLOSED_PROJECTS, (), True, False),
+        ('user stats: active projects', COUNT_ACTIVE_PROJECTS, (user,), True, False),
+        ('user stats: completed today', COUNT_COMPLETED_ON_DAY, (user, day), True, False),
+        ('user stats: avg time', USER_PROJECT_SPANS_30D, (user,), True, False),
+        ('user stats: efficiency', USER_COMPLETION_RATE_30D, (user,), True, False),
+        ('user stats: activity per day', USER_PROJECTS_ON_DAY, (user, day), True, False),
+        ('user: recent projects', USER_RECENT_PROJECTS, (user,), True, False),
+        ('metrics: project history', USER_PROJECT_HISTORY.format(table='logs'), (user, 30), True, False),
+        ('metrics: expected completion (project)', EXPECTED_COMPLETION_PROJECT, (project,), True, False),
+        ('metrics: expected completion (history)', EXPECTED_COMPLETION_HISTORY, (user, 0), True, False),
+        ('metrics: daily summary', DAILY_SUMMARY.format(table='logs'), (day,), True, False),
+        ('metrics: daily hourly', DAILY_HOURLY.format(table='logs'), (day,), True, False),
+        ('metrics: performance (user)', perf_user, ('2024-06-01', '2024-06-30', user), True, False),
+        ('metrics: performance patterns (user)', perf_patterns, ('2024-06-01', '2024-06-30', user), True, False),
+        ('metrics: performance (all users)', perf_all, ('2024-06-01', '2024-06-30'), True, False),
+        # Whole-history reports: listed for visibility, a full pass is expected
+        ('metrics: completion times (all history)', PROJECT_COMPLETION_TIMES.format(table='logs'), (), False, True),
+        ('metrics: workflow chain (all history)', WORKFLOW_CHAIN.format(table='logs'), (), False, True),
+    ]
+    for label, filters in [
+        ('logs: no filter', {}),
+        ('logs: project', {'project': project}),
+        ('logs: user + date range', {'user': user, 'start_date': '2024-06-01', 'end_date': '2024-06-30'}),
+        ('logs: date range', {'start_date': '2024-06-01', 'end_date': '2024-06-07'}),
+        ('logs: status', {'status': 'OPEN'}),
+    ]:
+        sql, params = build_logs_query(**filters)
+        # Unfiltered listing walks the timestamp index, but stops after LIMIT 500
+        cases.append((label, sql, tuple(params), True, not filters))
+    for label, filters in [
+        ('export: incremental (since_id)', {'since_id': 990000, 'max_id': 1000000}),
+        ('export: user + date range', {'max_id': 1000000, 'user': user,
+                                       'start_date': '2024-06-01', 'end_date': '2024-06-30'}),
+    ]:
+        sql, params = build_export_query(**filters)
+        cases.append((label, sql, tuple(params), True, False))
+    sql, params = build_export_query(max_id=1000000)
+    # A full export reads every row; walking the primary key is the expected plan
+    cases.append(('export: everything', sql, tuple(params), False, True))
+    return cases
+
+
+QUERY_PLAN_CASES = _query_plan_cases()
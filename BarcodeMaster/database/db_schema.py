@@ -0,0 +1,149 @@
+"""
+Schema and versioned index plan for central_logging.sqlite.
+
+The schema version is kept in ``PRAGMA user_version``. Every entry of
+SCHEMA_MIGRATIONS brings the database from the previous version to its own;
+init_db() applies whatever is missing, so an existing database picks up a new
+index plan on the next start without losing data.
+
+Index plan (version 2), by the predicates the API actually uses:
+- (user, event, status, project, timestamp)  file-path / item-count updates, per-user counters
+- partial (lower(project), user) on open rows  AFGEMELD close-out of the matching OPEN row
+- partial covering (timestamp, user, project) on open rows  dashboard "open projects"
+- (project, user, event, timestamp)           metrics self-joins (OPEN -> AFGEMELD), per-project lookups
+- covering (event, timestamp, user, project, status)  dashboard "completed today", metric date ranges
+- (user, timestamp)                           per-user date ranges (user stats, /logs filters)
+- (lower(project))                            case-insensitive project page
+- (status, project)                           statistics counters
+The single-column indexes on project, user and status are prefixes of the
+composites above and are dropped; the timestamp index stays for plain date ranges.
+
+Version 3 switches the file to auto_vacuum=INCREMENTAL, so pages freed by
+cleanups and archiving can be returned in small steps (db_maintenance.py)
+instead of by a full VACUUM. The switch itself needs one VACUUM, so that
+migration is a function that runs outside a transaction.
+
+Only the standard library is used here, so tools (query_plan_check.py) can
+build a database without Flask.
+"""
+
+import logging
+
+LOGS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        event TEXT,
+        details TEXT,
+        project TEXT,
+        user TEXT,
+        status TEXT,
+        base_mo_code TEXT,
+        is_rep_variant INTEGER,
+        file_path TEXT,
+        item_count INTEGER
+    )
+'''
+
+# Columns added after the first release: (name, type)
+ADDED_COLUMNS = [
+    ('base_mo_code', 'TEXT'),
+    ('is_rep_variant', 'INTEGER'),
+    ('file_path', 'TEXT'),
+    ('item_count', 'INTEGER'),
+]
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def _enable_incremental_vacuum(conn):
+    # auto_vacuum can only change through a VACUUM, which rewrites the file once
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+
+
+# (version, description, statements); statements may also be a function
+# called with the connection outside a transaction
+SCHEMA_MIGRATIONS = [
+    (1, "Single-column indexes", [
+        'CREATE INDEX IF NOT EXISTS idx_logs_project ON logs(project)',
+        'CREATE INDEX IF NOT EXISTS idx_logs_user ON logs(user)',
+        'CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_logs_status ON logs(status)',
+    ]),
+    (2, "Composite, partial and covering indexes for the hot queries", [
+        'CREATE INDEX IF NOT EXISTS idx_logs_user_event_status_project '
+        'ON logs(user, event, status, project, timestamp)',
+        "CREATE INDEX IF NOT EXISTS idx_logs_open_projects "
+        "ON logs(lower(project), user) WHERE event = 'OPEN' AND status = 'OPEN'",
+        "CREATE INDEX IF NOT EXISTS idx_logs_dashboard_open "
+        "ON logs(timestamp, user, project) WHERE event = 'OPEN' AND status = 'OPEN'",
+        'CREATE INDEX IF NOT EXISTS idx_logs_project_user_event_ts '
+        'ON logs(project, user, event, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_logs_event_ts '
+        'ON logs(event, timestamp, user, project, status)',
+        'CREATE INDEX IF NOT EXISTS idx_logs_user_ts ON logs(user, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_logs_project_lower ON logs(lower(project))',
+        'CREATE INDEX IF NOT EXISTS idx_logs_status_project ON logs(status, project)',
+        'DROP INDEX IF EXISTS idx_logs_project',
+        'DROP INDEX IF EXISTS idx_logs_user',
+        'DROP INDEX IF EXISTS idx_logs_status',
+        # Give the planner row estimates for the new indexes (bounded, so it stays fast on big files)
+        'PRAGMA analysis_limit = 1000',
+        'ANALYZE',
+    ]),
+    (3, "auto_vacuum=INCREMENTAL", _enable_incremental_vacuum),
+]
+
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def ensure_logs_table(conn):
+    """Creates the logs table and adds columns missing from older databases."""
+    conn.execute(LOGS_TABLE_SQL)
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(logs)').fetchall()]
+    for name, col_type in ADDED_COLUMNS:
+        if name not in columns:
+            conn.execute(f'ALTER TABLE logs ADD COLUMN {name} {col_type}')
+            logging.info(f"Added '{name}' column to logs table.")
+
+
+def apply_migrations(conn, target_version=SCHEMA_VERSION):
+    """Applies the migrations above the database's user_version. Returns the versions applied."""
+    current = get_schema_version(conn)
+    applied = []
+    for version, description, statements in SCHEMA_MIGRATIONS:
+        if version <= current or version > target_version:
+            continue
+        logging.info(f"Applying schema version {version}: {description}")
+        # Each version commits on its own, so an interrupted upgrade resumes where it stopped
+        conn.commit()
+        if callable(statements):
+            statements(conn)
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+            applied.append(version)
+            continue
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+
+def create_schema(conn):
+    """Brings ``conn`` to the current schema: table, added columns and index plan."""
+    ensure_logs_table(conn)
+    conn.commit()
+    return apply_migrations(conn)
@@ -0,0 +1,206 @@
+"""
+Reading and rotating db_log_api.log.
+
+The log viewer only ever needs the end of the file. ``tail()`` reads the file
+backwards in blocks from the end and stops as soon as it has enough entries,
+or reaches the ``since`` time. Its cost depends on what is returned, not on
+the size of the file. Lines without a timestamp (tracebacks) belong to the
+entry above them. Files written in the JSON layout of log_setup are read the
+same way, one object per line.
+
+``follow()`` continues from the cursor an earlier call returned. A cursor is
+"<file id>:<byte offset>". If the file was rotated in the meantime, the rest
+of the rotated file (``.1``) is read first.
+
+SizeAndTimeRotatingFileHandler rotates on size and at midnight, whichever
+comes first, and keeps numbered backups like RotatingFileHandler.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from logging.handlers import RotatingFileHandler
+
+BLOCK_SIZE = 64 * 1024
+MAX_LINES = 5000
+MAX_FOLLOW_BYTES = 1024 * 1024
+ENTRY_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:,\d{3})?) (\w+) (.*)$')
+
+
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that also rolls over at midnight."""
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding=None, delay=False):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=delay)
+        self.rollover_at = self._next_midnight()
+
+    @staticmethod
+    def _next_midnight():
+        tomorrow = datetime.now().date() + timedelta(days=1)
+        return datetime.combine(tomorrow, datetime.min.time()).timestamp()
+
+    def shouldRollover(self, record):
+        if time.time() >= self.rollover_at:
+            # A file that is still empty is not worth a backup
+            if self.stream is None or self.stream.tell() > 0 or not os.path.exists(self.baseFilename):
+                return True
+            self.rollover_at = self._next_midnight()
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = self._next_midnight()
+
+
+def _parse_json_line(line):
+    try:
+        entry = json.loads(line)
+        timestamp, level, message = entry['timestamp'], entry['level'], entry['message']
+    except (ValueError, TypeError, KeyError):
+        return None
+    if entry.get('request_id'):
+        message = f"[{entry['request_id']}] {message}"
+    if entry.get('exc'):
+        message = f"{message}\n{entry['exc']}"
+    return timestamp, level, message
+
+
+def parse_line(line):
+    """Returns (timestamp, level, message) for a line that starts an entry, else None."""
+    if line.startswith('{'):
+        return _parse_json_line(line)
+    match = ENTRY_PATTERN.match(line)
+    return match.groups() if match else None
+
+
+def _level_number(level):
+    if not level:
+        return None
+    number = logging.getLevelName(level.upper())
+    if not isinstance(number, int):
+        raise ValueError(f"Onbekend logniveau '{level}'")
+    return number
+
+
+def _normalize_since(since):
+    # Entries are stamped 'YYYY-MM-DD HH:MM:SS,mmm'; ISO input compares the same way with a space
+    return since.replace('T', ' ') if since else None
+
+
+def _file_id(path):
+    return str(os.stat(path).st_ino)
+
+
+def _make_entry(header, continuation):
+    timestamp, level, message = header
+    if continuation:
+        message = '\n'.join([message] + continuation)
+    return {'timestamp': timestamp, 'level': level, 'message': message}
+
+
+def _reverse_lines(f, end, block_size=BLOCK_SIZE):
+    """Yields the lines of ``f`` before byte ``end``, last line first."""
+    position = end
+    remainder = b''
+    while position > 0:
+        size = min(block_size, position)
+        position -= size
+        f.seek(position)
+        lines = (f.read(size) + remainder).split(b'\n')
+        remainder = lines[0]
+        for line in reversed(lines[1:]):
+            yield line
+    yield remainder
+
+
+def _matches(entry, min_level, since):
+    if since and entry['timestamp'] < since:
+        return False
+    if min_level is not None:
+        number = logging.getLevelName(entry['level'])
+        return isinstance(number, int) and number >= min_level
+    return True
+
+
+def tail(path, lines=100, level=None, since=None):
+    """Returns (entries oldest first, cursor) for the last ``lines`` entries at or above ``level`` since ``since``."""
+    lines = max(1, min(int(lines), MAX_LINES))
+    min_level = _level_number(level)
+    since = _normalize_since(since)
+    if not os.path.exists(path):
+        return [], None
+    entries = []
+    with open(path, 'rb') as f:
+        end = os.fstat(f.fileno()).st_size
+        cursor = f"{_file_id(path)}:{end}"
+        continuation = []
+        for raw in _reverse_lines(f, end):
+            line = raw.decode('utf-8', errors='replace').rstrip('\r')
+            header = parse_line(line)
+            if header is None:
+                if line:
+                    continuation.insert(0, line)
+                continue
+            entry = _make_entry(header, continuation)
+            continuation = []
+            if since and entry['timestamp'] < since:
+                break
+            if _matches(entry, min_level, None):
+                entries.append(entry)
+                if len(entries) >= lines:
+                    break
+    entries.reverse()
+    return entries, cursor
+
+
+def _read_forward(path, offset, limit_bytes):
+    """Returns (complete lines after ``offset``, offset after the last complete line)."""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(limit_bytes)
+    end = data.rfind(b'\n')
+    if end < 0:
+        return [], offset
+    text = data[:end].decode('utf-8', errors='replace')
+    return [line.rstrip('\r') for line in text.split('\n')], offset + end + 1
+
+
+def _group_entries(lines):
+    entries = []
+    for line in lines:
+        header = parse_line(line)
+        if header is not None:
+            entries.append(_make_entry(header, []))
+        elif line and entries:
+            entries[-1]['message'] += '\n' + line
+    return entries
+
+
+def follow(path, cursor, level=None, max_bytes=MAX_FOLLOW_BYTES):
+    """Returns (entries written after ``cursor``, new cursor)."""
+    min_level = _level_number(level)
+    try:
+        file_id, offset = cursor.split(':', 1)
+        offset = int(offset)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Ongeldige cursor '{cursor}'")
+    if not os.path.exists(path):
+        return [], cursor
+
+    lines = []
+    current_id = _file_id(path)
+    if file_id != current_id:
+        # Rotated since the last call: finish the old file, then start the new one at 0
+        rotated = path + '.1'
+        if os.path.exists(rotated) and _file_id(rotated) == file_id:
+            lines, _ = _read_forward(rotated, offset, max_bytes)
+        offset = 0
+    elif offset > os.path.getsize(path):
+        # Truncated in place
+        offset = 0
+    new_lines, offset = _read_forward(path, offset, max_bytes)
+    entries = [e for e in _group_entries(lines + new_lines) if _matches(e, min_level, None)]
+    return entries, f"{current_id}:{offset}"
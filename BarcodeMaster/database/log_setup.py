@@ -0,0 +1,227 @@
+"""
+Queued log output for the API server and the import service.
+
+Request threads never write log lines themselves. ``setup_logging()`` puts a
+QueueHandler on the logger, and a QueueListener thread owns the file and
+console handlers, formatting and writing in the background. Before a record
+goes into the queue, three things happen in the calling thread:
+
+- It gets the id of the current request (``request_id_var``; '-' outside a
+  request).
+- Repetitive records are rate limited.
+- The message and any traceback are rendered to text. The listener then
+  never touches request data that may have changed in the meantime.
+
+Output is either text, ``YYYY-MM-DD HH:MM:SS,mmm LEVEL [request id] message``
+(the layout log_files parses), or one JSON object per line.
+
+Rate limiting only applies to INFO and lower records logged with
+``extra={'rate_key': ...}``, which are the per-scan messages. Per key,
+RATE_LIMIT_BURST records pass in each RATE_LIMIT_INTERVAL seconds. The rest
+are counted, and the count is reported with the next record of that key
+that passes.
+
+``log_payload()`` logs request payloads at DEBUG, for a sample of the calls
+only.
+"""
+
+import atexit
+import copy
+import contextvars
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from database.log_files import SizeAndTimeRotatingFileHandler
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(request_id)s] %(message)s'
+LOG_FORMATS = ('text', 'json')
+# Records beyond this many waiting ones are dropped (and counted) instead of blocking a request
+QUEUE_SIZE = 10_000
+RATE_LIMIT_INTERVAL = 60
+RATE_LIMIT_BURST = 20
+DEFAULT_PAYLOAD_SAMPLE_RATE = 0.01
+NO_REQUEST = '-'
+
+request_id_var = contextvars.ContextVar('request_id', default=NO_REQUEST)
+
+_listeners = {}
+_setup_lock = threading.Lock()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the id of the request being handled by this thread."""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets ``burst`` records per ``rate_key`` through every ``interval`` seconds."""
+
+    def __init__(self, interval=RATE_LIMIT_INTERVAL, burst=RATE_LIMIT_BURST):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._windows = {}  # rate_key -> [window start, passed, suppressed]
+
+    def filter(self, record):
+        key = getattr(record, 'rate_key', None)
+        if key is None or record.levelno > logging.INFO:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(key, [now, 0, 0])
+            if now - window[0] >= self.interval:
+                window[0], window[1] = now, 0
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+            if window[2]:
+                record.suppressed = window[2]
+                window[2] = 0
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def formatMessage(self, record):
+        text = super().formatMessage(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{text} (+{suppressed} similar suppressed)" if suppressed else text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; ``extra={'fields': {...}}`` is included as-is."""
+
+    def format(self, record):
+        entry = {
+            'timestamp': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'request_id': getattr(record, 'request_id', NO_REQUEST),
+            'message': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry['fields'] = fields
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestQueueHandler(QueueHandler):
+    """Hands records to the listener without blocking; a full queue drops them."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exception_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        # Render in the caller's thread: args can be request data, tracebacks hold frames
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            notice = logging.makeLogRecord({
+                'name': record.name, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f"{dropped} log record(s) dropped, log queue was full", 'request_id': NO_REQUEST,
+            })
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                self.dropped += dropped
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # The queue is bounded; wait for room instead of failing on shutdown
+        self.queue.put(self._sentinel)
+
+
+def setup_logging(log_path, logger=None, level=None, log_format='text',
+                  max_bytes=0, backup_count=0, console=True):
+    """Sends ``logger`` (the root logger by default) through a queue to ``log_path``, and the console.
+
+    The logger's level is only set when ``level`` is given, so a child logger
+    keeps following the root level. Calling it again for the same logger
+    changes nothing and returns the existing listener, so services can call it
+    per instance. The first handler of the returned listener is the file
+    handler.
+    """
+    logger = logger if logger is not None else logging.getLogger()
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Onbekend logformaat '{log_format}'")
+    with _setup_lock:
+        listener = _listeners.get(logger.name)
+        if listener is not None:
+            return listener
+        formatter = JsonFormatter() if log_format == 'json' else TextFormatter()
+        handlers = [SizeAndTimeRotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count,
+                                                   encoding='utf-8')]
+        if console:
+            handlers.append(logging.StreamHandler())
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.Queue(QUEUE_SIZE)
+        queue_handler = RequestQueueHandler(log_queue)
+        queue_handler.addFilter(RequestIdFilter())
+        queue_handler.addFilter(RateLimitFilter())
+        logger.addHandler(queue_handler)
+        if level is not None:
+            logger.setLevel(level)
+
+        listener = _Listener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners[logger.name] = listener
+        return listener
+
+
+def stop_logging():
+    """Writes out everything still queued and stops the listener threads."""
+    with _setup_lock:
+        for listener in _listeners.values():
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        _listeners.clear()
+
+
+# Registered after logging's own shutdown hook, so it runs before it
+atexit.register(stop_logging)
+
+
+def log_payload(logger, message, payload, sample_rate=DEFAULT_PAYLOAD_SAMPLE_RATE):
+    """Logs ``payload`` at DEBUG for about ``sample_rate`` of the calls (0 never, 1 always)."""
+    if sample_rate > 0 and logger.isEnabledFor(logging.DEBUG) and random.random() < sample_rate:
+        logger.debug(f"{message}: %s", payload, extra={'fields': {'sample_rate': sample_rate}})
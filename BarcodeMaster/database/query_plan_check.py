@@ -0,0 +1,185 @@
+"""
+Query-plan regression check for central_logging.sqlite.
+
+Builds (once, then reuses) a synthetic database with the current schema and
+index plan, runs every statement in db_queries.QUERY_PLAN_CASES through
+EXPLAIN QUERY PLAN and fails when a hot query reads the logs table with a
+full SCAN instead of an index SEARCH. Whole-index scans are only accepted for
+the cases that allow them (DISTINCT lists, capped listings).
+
+Usage:
+    python database/query_plan_check.py                    # 1,000,000 rows (cached in the temp dir)
+    python database/query_plan_check.py --rows 100000 --rebuild
+    python database/query_plan_check.py --db path/to/copy_of_central_logging.sqlite
+
+Exit code 0 when every hot query passes, 1 otherwise.
+"""
+
+import argparse
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from database.db_schema import create_schema, SCHEMA_VERSION
+from database.db_queries import QUERY_PLAN_CASES
+
+DEFAULT_ROWS = 1_000_000
+STATION_USERS = ['NESTING', 'OPUS', 'KL GANNOMAT', 'GR GANNOMAT', 'MONTAGE', 'INPAK']
+OPEN_PROJECTS = 300
+INSERT_BATCH = 50_000
+
+# "SCAN logs", "SCAN o", "SCAN a" (optionally "USING [COVERING] INDEX ..."); scans of
+# CTEs and subqueries work on rows already found through an index and are fine
+_SCAN_RE = re.compile(r'^SCAN (logs|o|a)\b(.*)$')
+
+
+def synthetic_rows(row_count, seed=42):
+    """Yields log rows shaped like production: every project passes the stations as
+    OPEN -> AFGEMELD pairs over ~3 years; the newest projects are still OPEN."""
+    rng = random.Random(seed)
+    start = datetime(2022, 1, 3, 7, 0)
+    span_minutes = 3 * 365 * 24 * 60
+    pairs = row_count // 2
+    projects = max(1, pairs // len(STATION_USERS))
+    produced = 0
+    for p in range(projects):
+        project = f"MO{10000 + p:05d}"
+        base_mo = project
+        is_rep = 1 if rng.random() < 0.2 else 0
+        t = start + timedelta(minutes=span_minutes * p / projects)
+        still_open = p >= projects - OPEN_PROJECTS
+        for user in STATION_USERS:
+            if produced + 2 > row_count:
+                return
+            opened = t
+            closed = opened + timedelta(minutes=rng.randint(10, 600))
+            t = closed + timedelta(minutes=rng.randint(1, 240))
+            if still_open and user == STATION_USERS[-1]:
+                yield (opened.isoformat(), 'OPEN', None, project, user, 'OPEN', base_mo, is_rep, '', rng.randint(5, 400))
+                produced += 1
+                continue
+            yield (opened.isoformat(), 'OPEN', None, project, user, 'CLOSED', base_mo, is_rep, '', rng.randint(5, 400))
+            yield (closed.isoformat(), 'AFGEMELD', None, project, user, 'AFGEMELD', base_mo, is_rep, '', None)
+            produced += 2
+
+
+def build_database(path, row_count):
+    """Creates ``path`` with ``row_count`` synthetic rows and the current schema."""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')
+        # Table first, bulk load, then the index plan (much faster than loading into indexes)
+        from database.db_schema import ensure_logs_table
+        ensure_logs_table(conn)
+        batch = []
+        for row in synthetic_rows(row_count):
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH:
+                conn.executemany('INSERT INTO logs (timestamp, event, details, project, user, status, base_mo_code, '
+                                 'is_rep_variant, file_path, item_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', batch)
+                batch = []
+        if batch:
+            conn.executemany('INSERT INTO logs (timestamp, event, details, project, user, status, base_mo_code, '
+                             'is_rep_variant, file_path, item_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', batch)
+        conn.commit()
+        create_schema(conn)
+    finally:
+        conn.close()
+
+
+def cached_database(row_count, rebuild=False):
+    path = os.path.join(tempfile.gettempdir(), f"barcodemaster_plan_check_{row_count}_v{SCHEMA_VERSION}.sqlite")
+    if rebuild or not os.path.exists(path):
+        print(f"Synthetische database opbouwen ({row_count:,} rijen): {path}", flush=True)
+        start = time.perf_counter()
+        build_database(path, row_count)
+        print(f"  klaar in {time.perf_counter() - start:.1f}s", flush=True)
+    return path
+
+
+def explain(conn, sql, params):
+    """Returns the EXPLAIN QUERY PLAN detail lines for ``sql``."""
+    return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()]
+
+
+def plan_violations(plan_lines, allow_index_scan):
+    """Returns the plan lines that make a hot query fail."""
+    bad = []
+    for line in plan_lines:
+        match = _SCAN_RE.match(line.strip())
+        if not match:
+            continue
+        uses_index = 'USING' in match.group(2) and 'INDEX' in match.group(2)
+        if not uses_index or not allow_index_scan:
+            bad.append(line.strip())
+    return bad
+
+
+def run_checks(conn, cases=QUERY_PLAN_CASES, time_queries=False):
+    """Returns [(name, hot, plan lines, violations, ms or None)]."""
+    results = []
+    for name, sql, params, hot, allow_index_scan in cases:
+        plan = explain(conn, sql, params)
+        violations = plan_violations(plan, allow_index_scan) if hot else []
+        elapsed_ms = None
+        if time_queries and sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        results.append((name, hot, plan, violations, elapsed_ms))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN regressiecontrole voor de logs-database.")
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help="Aantal synthetische rijen (standaard 1.000.000)")
+    parser.add_argument('--rebuild', action='store_true', help="Synthetische database opnieuw opbouwen")
+    parser.add_argument('--db', help="Bestaande database controleren (wordt bijgewerkt naar het huidige indexplan)")
+    parser.add_argument('--time', action='store_true', help="Ook de SELECT-queries uitvoeren en timen")
+    parser.add_argument('--verbose', '-v', action='store_true', help="Volledige plannen tonen")
+    args = parser.parse_args(argv)
+
+    path = args.db or cached_database(args.rows, args.rebuild)
+    conn = sqlite3.connect(path)
+    try:
+        if args.db:
+            create_schema(conn)
+        results = run_checks(conn, time_queries=args.time)
+    finally:
+        conn.close()
+
+    failures = 0
+    for name, hot, plan, violations, elapsed_ms in results:
+        if violations:
+            failures += 1
+            label = 'FAIL'
+        else:
+            label = 'ok  ' if hot else 'info'
+        timing = f"  {elapsed_ms:8.1f} ms" if elapsed_ms is not None else ''
+        print(f"[{label}] {name}{timing}")
+        for line in (plan if (args.verbose or violations or not hot) else []):
+            marker = '  !! ' if line.strip() in violations else '     '
+            print(f"{marker}{line}")
+
+    hot_count = sum(1 for r in results if r[1])
+    print()
+    print(f"{hot_count - failures}/{hot_count} hot queries gebruiken een index; "
+          f"{len(results) - hot_count} rapportagequeries ter informatie.")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
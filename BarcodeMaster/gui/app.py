@@ -1,8 +1,6 @@
 import tkinter as tk
-from PIL import Image, ImageTk, ImageDraw
 import os
-import psutil
-import requests
+import time
 from services.background_import_service import BackgroundImportService
 from gui.panels.scanner_panel import ScannerPanel
 from gui.panels.database_panel import DatabasePanel
@@ -21,6 +19,7 @@ class ServiceStatus:
 
 def create_placeholder_image(size=(75, 75), text="?", bg_color='lightgray'):
     """Create a placeholder image when the actual image is not found."""
+    from PIL import Image, ImageDraw
     img = Image.new('RGB', size, color=bg_color)
     draw = ImageDraw.Draw(img)
     # Simple text positioning
@@ -31,6 +30,7 @@ def create_placeholder_image(size=(75, 75), text="?", bg_color='lightgray'):
 
 def load_image_safe(path, size=(75, 75), fallback_text="?"):
     """Safely load an image, creating a placeholder if it doesn't exist."""
+    from PIL import Image, ImageTk
     try:
         if os.path.exists(path):
             pil_img = Image.open(path).resize(size, Image.LANCZOS)
@@ -121,9 +121,11 @@ class MainApp(tk.Frame):
         self.parent.bind("<FocusIn>", self._on_focus_in)
         self.parent.bind("<FocusOut>", self._on_focus_out)
 
-        # Create panel instances
+        # Create panel instances (build time per panel is kept for --profile-startup)
+        self.panel_build_times = []
         try:
             for panel_cls in self.panels:
+                panel_start = time.perf_counter()
                 if panel_cls == ScannerPanel:
                     panel = panel_cls(self.content_frame, app=self, 
                                     app_has_focus_var=self.window_has_focus, 
@@ -134,6 +136,7 @@ class MainApp(tk.Frame):
                 else:
                     panel = panel_cls(self.content_frame, app=self)
                 self.panel_instances.append(panel)
+                self.panel_build_times.append((panel_cls.__name__, panel_start, time.perf_counter()))
         except Exception as e:
             print(f"Error creating panels: {e}")
             import traceback
@@ -226,6 +229,7 @@ class MainApp(tk.Frame):
                         print(f"[MainApp] Error shutting down {panel.__class__.__name__}: {e}")
 
         # Terminate child processes
+        import psutil
         try:
             parent = psutil.Process(os.getpid())
             children = parent.children(recursive=True)
@@ -6,19 +6,17 @@ import time
 import queue
 import os
 import subprocess
-import requests
 import socket
 import webbrowser
-import psutil
 import sys
-import shutil
 from datetime import datetime
 from tkinter import filedialog
 from config_utils import get_config, save_config
 import config_manager
-from com_splitter import ComSplitter
+from com_splitter import ComSplitter, OVERFLOW_POLICIES, DEFAULT_QUEUE_SIZE
 from path_utils import get_resource_path, get_writable_path
 from database.db_log_api import run_api_server, stop_api_server
+from database import db_backup
 from urllib.parse import urlparse
 
 PANEL_BG = "#f0f0f0"
@@ -43,6 +41,9 @@ class AdminPanel(tk.Frame):
         self.backup_directory_var = tk.StringVar()
         self.backup_interval_var = tk.StringVar()
         self.last_backup_status_var = tk.StringVar()
+        self.backup_compress_var = tk.BooleanVar()
+        self.backup_compact_var = tk.BooleanVar()
+        self.backup_job_thread = None
         self.backup_thread = None
         self.backup_thread_stop_event = threading.Event()
 
@@ -167,6 +168,7 @@ class AdminPanel(tk.Frame):
 
     def _check_api_status_loop(self):
         """Background thread that continuously checks API status."""
+        import requests
         while not self.api_status_thread_stop.is_set() and self._running:
             try:
                 # Check if API is active
@@ -260,6 +262,7 @@ class AdminPanel(tk.Frame):
             messagebox.showerror("Fout", f"Kon de log in de browser niet openen:\n{e}")
 
     def _clear_db_log(self):
+        import requests
         if not messagebox.askyesno("Bevestigen", "Weet u zeker dat u ALLE logboekvermeldingen permanent wilt verwijderen? Deze actie kan niet ongedaan worden gemaakt."):
             return
 
@@ -317,7 +320,25 @@ class AdminPanel(tk.Frame):
         self.baud_rate_var = tk.StringVar(value=get_config().get('splitter_baud_rate', '9600'))
         self.baud_rate_entry = ttk.Entry(config_frame, textvariable=self.baud_rate_var)
         self.baud_rate_entry.grid(row=3, column=1, padx=5, pady=5, sticky='ew')
-        
+
+        # Additional outputs (comma separated) for fan-out beyond two ports
+        ttk.Label(config_frame, text="Extra Output Poorten:").grid(row=4, column=0, padx=5, pady=5, sticky='w')
+        self.extra_output_ports_var = tk.StringVar(value=get_config().get('splitter_extra_output_ports', ''))
+        self.extra_output_ports_entry = ttk.Entry(config_frame, textvariable=self.extra_output_ports_var)
+        self.extra_output_ports_entry.grid(row=4, column=1, padx=5, pady=5, sticky='ew')
+
+        # Queue size per output port
+        ttk.Label(config_frame, text="Queue Grootte (per poort):").grid(row=5, column=0, padx=5, pady=5, sticky='w')
+        self.splitter_queue_size_var = tk.StringVar(value=str(get_config().get('splitter_queue_size', DEFAULT_QUEUE_SIZE)))
+        self.splitter_queue_size_entry = ttk.Entry(config_frame, textvariable=self.splitter_queue_size_var)
+        self.splitter_queue_size_entry.grid(row=5, column=1, padx=5, pady=5, sticky='ew')
+
+        # Overflow policy when a port's queue is full
+        ttk.Label(config_frame, text="Bij Volle Queue:").grid(row=6, column=0, padx=5, pady=5, sticky='w')
+        self.splitter_overflow_var = tk.StringVar(value=get_config().get('splitter_overflow_policy', OVERFLOW_POLICIES[0]))
+        self.splitter_overflow_menu = ttk.Combobox(config_frame, textvariable=self.splitter_overflow_var, values=OVERFLOW_POLICIES, state='readonly')
+        self.splitter_overflow_menu.grid(row=6, column=1, padx=5, pady=5, sticky='ew')
+
         # Refresh Button
         self.refresh_splitter_ports_btn = ttk.Button(config_frame, text="Ververs Poortenlijst", command=self.refresh_splitter_ports)
         self.refresh_splitter_ports_btn.grid(row=0, column=2, rowspan=3, padx=10, pady=5, sticky='ns')
@@ -344,6 +365,28 @@ class AdminPanel(tk.Frame):
         splitter_startup_check = ttk.Checkbutton(control_frame, text="Start bij opstarten", variable=self.splitter_startup_var, command=self._save_splitter_startup_setting)
         splitter_startup_check.grid(row=2, column=0, columnspan=2, padx=5, pady=5, sticky='w')
 
+        # --- Metrics Frame ---
+        metrics_frame = ttk.LabelFrame(self.splitter_frame, text="Poort Statistieken", padding=10)
+        metrics_frame.pack(fill='x', padx=10, pady=5)
+
+        metrics_columns = ('role', 'connected', 'bytes', 'lines', 'dropped', 'queue', 'latency')
+        self.splitter_metrics_tree = ttk.Treeview(metrics_frame, columns=metrics_columns, show='tree headings', height=4)
+        self.splitter_metrics_tree.heading('#0', text='Poort')
+        self.splitter_metrics_tree.column('#0', width=90, stretch=False)
+        headings = {
+            'role': ('Rol', 70),
+            'connected': ('Verbonden', 75),
+            'bytes': ('Bytes', 80),
+            'lines': ('Regels', 70),
+            'dropped': ('Verworpen', 75),
+            'queue': ('Queue', 70),
+            'latency': ('Latentie ms (laatst/gem/max)', 180),
+        }
+        for col, (text, width) in headings.items():
+            self.splitter_metrics_tree.heading(col, text=text)
+            self.splitter_metrics_tree.column(col, width=width, anchor='center')
+        self.splitter_metrics_tree.pack(fill='x', expand=True)
+
         # --- Log Frame ---
         log_frame = ttk.LabelFrame(self.splitter_frame, text="Splitter Log", padding=10)
         log_frame.pack(fill='both', expand=True, padx=10, pady=10)
@@ -352,6 +395,32 @@ class AdminPanel(tk.Frame):
         self.log_text.pack(fill='both', expand=True)
 
         self.refresh_splitter_ports()
+        self._refresh_splitter_metrics()
+
+    def _refresh_splitter_metrics(self):
+        """Periodically show the splitter's per-port metrics in the metrics tree."""
+        if not self._running:
+            return
+        try:
+            tree = self.splitter_metrics_tree
+            tree.delete(*tree.get_children())
+            if self.splitter_instance:
+                metrics = self.splitter_instance.get_metrics()
+                reader = metrics['reader']
+                tree.insert('', tk.END, text=reader['port'] or '-', values=(
+                    'Input', 'Ja' if reader['connected'] else 'Nee',
+                    reader['bytes'], reader['lines'], '-', '-', '-'))
+                for out in metrics['outputs']:
+                    tree.insert('', tk.END, text=out['port'], values=(
+                        'Output', 'Ja' if out['connected'] else 'Nee',
+                        out['bytes'], out['lines'], out['dropped'],
+                        f"{out['queue_depth']}/{out['queue_size']}",
+                        f"{out['last_latency_ms']}/{out['avg_latency_ms']}/{out['max_latency_ms']}"))
+        except tk.TclError:
+            return
+        except Exception as e:
+            print(f"[AdminPanel] Fout bij verversen splitter statistieken: {e}")
+        self.after(1000, self._refresh_splitter_metrics)
 
     def refresh_splitter_ports(self):
         try:
@@ -377,12 +446,17 @@ class AdminPanel(tk.Frame):
         vport1 = self.virtual_port_1_var.get()
         vport2 = self.virtual_port_2_var.get()
         baud_rate = self.baud_rate_var.get()
+        extra_ports_text = self.extra_output_ports_var.get().strip()
+        extra_ports = [p.strip() for p in extra_ports_text.split(',') if p.strip()]
+        queue_size_text = self.splitter_queue_size_var.get().strip()
+        overflow_policy = self.splitter_overflow_var.get()
 
         if not all([physical_port, vport1, vport2, baud_rate]):
             messagebox.showerror("Fout", "Selecteer alstublieft alle COM-poorten en stel een baudrate in.")
             return
-        
-        if len({physical_port, vport1, vport2}) < 3:
+
+        all_ports = [physical_port, vport1, vport2] + extra_ports
+        if len(set(all_ports)) < len(all_ports):
             messagebox.showerror("Fout", "De geselecteerde poorten moeten uniek zijn.")
             return
 
@@ -392,20 +466,32 @@ class AdminPanel(tk.Frame):
             messagebox.showerror("Fout", "De baudrate moet een getal zijn.")
             return
 
+        try:
+            queue_size = int(queue_size_text)
+            if queue_size < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Fout", "De queue grootte moet een positief getal zijn.")
+            return
+
         # Save config before starting
         config_to_save = {
             'splitter_physical_port': physical_port,
             'splitter_virtual_port_1': vport1,
             'splitter_virtual_port_2': vport2,
-            'splitter_baud_rate': baud_rate
+            'splitter_baud_rate': baud_rate,
+            'splitter_extra_output_ports': extra_ports_text,
+            'splitter_queue_size': queue_size,
+            'splitter_overflow_policy': overflow_policy
         }
         save_config(config_to_save)
         
         splitter_config = {
             'physical_port': physical_port,
-            'virtual_port_1': vport1,
-            'virtual_port_2': vport2,
-            'baud_rate': baud
+            'output_ports': [vport1, vport2] + extra_ports,
+            'baud_rate': baud,
+            'queue_size': queue_size,
+            'overflow_policy': overflow_policy
         }
 
         self.splitter_instance = ComSplitter(splitter_config, self.log_to_queue)
@@ -434,7 +520,10 @@ class AdminPanel(tk.Frame):
         self.physical_port_menu.config(state=state)
         self.virtual_port_1_menu.config(state=state)
         self.virtual_port_2_menu.config(state=state)
+        self.splitter_overflow_menu.config(state=state)
         self.baud_rate_entry.config(state='disabled' if state == 'disabled' else 'normal')
+        self.extra_output_ports_entry.config(state='disabled' if state == 'disabled' else 'normal')
+        self.splitter_queue_size_entry.config(state='disabled' if state == 'disabled' else 'normal')
         self.refresh_splitter_ports_btn.config(state='disabled' if state == 'disabled' else 'normal')
 
     def log_to_queue(self, message):
@@ -448,6 +537,8 @@ class AdminPanel(tk.Frame):
         self.backup_directory_var.set(config.get('backup_directory', ''))
         self.backup_interval_var.set(str(config.get('backup_interval_minutes', '1440')))
         self.last_backup_status_var.set(config.get('last_backup_status', 'Nog geen backups uitgevoerd.'))
+        self.backup_compress_var.set(config.get('backup_compress', False))
+        self.backup_compact_var.set(config.get('backup_method', 'backup') == 'vacuum')
 
         # --- Backup Settings Frame ---
         settings_frame = ttk.LabelFrame(tab, text="Backup Instellingen")
@@ -472,13 +563,19 @@ class AdminPanel(tk.Frame):
         self.backup_interval_entry.bind("<FocusOut>", self._validate_and_save_backup_config)
         self.backup_interval_entry.bind("<Return>", self._validate_and_save_backup_config)
 
+        # Backup options
+        self.backup_compact_check = ttk.Checkbutton(settings_frame, text="Compacte snapshot (VACUUM INTO)", variable=self.backup_compact_var, command=self._validate_and_save_backup_config)
+        self.backup_compact_check.grid(row=3, column=0, columnspan=2, sticky='w', padx=5, pady=2)
+        self.backup_compress_check = ttk.Checkbutton(settings_frame, text="Comprimeren (gzip)", variable=self.backup_compress_var, command=self._validate_and_save_backup_config)
+        self.backup_compress_check.grid(row=4, column=0, columnspan=2, sticky='w', padx=5, pady=2)
+
         # --- Backup Management & Status Frame ---
         status_frame = ttk.LabelFrame(tab, text="Backup Beheer & Status")
         status_frame.pack(fill='x', padx=5, pady=(10, 5)) # Changed pady_top to pady=(top, bottom)
         status_frame.columnconfigure(1, weight=1)
 
-        manual_backup_btn = ttk.Button(status_frame, text="Nu Backuppen", command=self._trigger_manual_backup)
-        manual_backup_btn.grid(row=0, column=0, padx=5, pady=5, sticky='w')
+        self.manual_backup_btn = ttk.Button(status_frame, text="Nu Backuppen", command=self._trigger_manual_backup)
+        self.manual_backup_btn.grid(row=0, column=0, padx=5, pady=5, sticky='w')
 
         ttk.Label(status_frame, text="Laatste Backup Status:").grid(row=1, column=0, sticky='w', padx=5, pady=2)
         last_status_label = ttk.Label(status_frame, textvariable=self.last_backup_status_var, wraplength=400)
@@ -495,6 +592,8 @@ class AdminPanel(tk.Frame):
             self.backup_dir_entry.config(state=readonly_state if is_enabled else 'disabled') # Keep readonly for display, disable if not enabled
             self.browse_backup_dir_btn.config(state=state)
             self.backup_interval_entry.config(state=state)
+            self.backup_compact_check.config(state=state)
+            self.backup_compress_check.config(state=state)
 
     def _on_backup_enable_change(self):
         self._update_backup_ui_state()
@@ -523,6 +622,8 @@ class AdminPanel(tk.Frame):
             'backup_enabled': self.backup_enabled_var.get(),
             'backup_directory': self.backup_directory_var.get(),
             'backup_interval_minutes': interval,
+            'backup_method': 'vacuum' if self.backup_compact_var.get() else 'backup',
+            'backup_compress': self.backup_compress_var.get(),
             'last_backup_status': self.last_backup_status_var.get() # Persist last known status
         }
         save_config(backup_config)
@@ -632,26 +733,69 @@ class AdminPanel(tk.Frame):
             self._validate_and_save_backup_config() # Save status
             return
 
+        if self.backup_job_thread and self.backup_job_thread.is_alive():
+            self.log_to_queue("Backup overgeslagen: er loopt al een backup.")
+            if manual:
+                messagebox.showinfo("Backup", "Er loopt al een backup. Even geduld.")
+            return
+
         timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
         backup_filename = f'backup_{timestamp}.sqlite'
         backup_target_path = os.path.join(backup_dir, backup_filename)
-
+        method = 'vacuum' if self.backup_compact_var.get() else 'backup'
+        compress = self.backup_compress_var.get()
+
+        # The copy runs off the Tk thread; the result is handed back via after()
+        self.manual_backup_btn.config(state='disabled')
+        self.log_to_queue(f"Database backup gestart ({method}{', gzip' if compress else ''}): {backup_target_path}")
+        self.backup_job_thread = threading.Thread(
+            target=self._run_backup_job, args=(backup_target_path, method, compress, manual), daemon=True)
+        self.backup_job_thread.start()
+
+    def _run_backup_job(self, backup_target_path, method, compress, manual):
+        reported = {'phase': None, 'step': -1}
+
+        def _progress(info):
+            # Log each phase once and the copy in steps of 25%
+            step = int(info['percent'] // 25)
+            if info['phase'] != reported['phase'] or (info['phase'] == 'copy' and step > reported['step']):
+                reported['phase'] = info['phase']
+                reported['step'] = step
+                if info['phase'] != 'done':
+                    self.log_to_queue(f"Backup {info['phase']}: {info['percent']:.0f}%")
+
+        result, error = None, None
         try:
-            shutil.copy2(self.db_path, backup_target_path)
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            status_msg = f"Succesvol gebackupt naar {backup_target_path} op {timestamp}"
-            self.last_backup_status_var.set(status_msg)
-            self.log_to_queue(f"Database backup succesvol: {backup_target_path}")
-            if manual:
-                messagebox.showinfo("Backup Succesvol", f"Database succesvol gebackupt naar:\n{backup_target_path}")
+            result = db_backup.backup_database(self.db_path, backup_target_path, method=method,
+                                               compress=compress, progress=_progress)
         except Exception as e:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            status_msg = f"Backup Mislukt: {str(e)} ({timestamp})"
-            self.last_backup_status_var.set(status_msg)
-            self.log_to_queue(f"Database backup mislukt: {str(e)}")
-            if manual:
-                messagebox.showerror("Backup Mislukt", f"Fout tijdens backuppen:\n{str(e)}")
+            error = e
+        try:
+            self.winfo_toplevel().after(0, self._finish_backup, manual, result, error)
+        except Exception:
+            # Widget might be destroyed
+            pass
+
+    def _finish_backup(self, manual, result, error):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            if error is None:
+                size_mb = result['size'] / (1024 * 1024)
+                status_msg = (f"Succesvol gebackupt naar {result['path']} op {timestamp} "
+                              f"({size_mb:.1f} MB, {result['duration_s']}s, controle: {result['quick_check']})")
+                self.last_backup_status_var.set(status_msg)
+                self.log_to_queue(f"Database backup succesvol: {result['path']} ({size_mb:.1f} MB in {result['duration_s']}s)")
+                if manual:
+                    messagebox.showinfo("Backup Succesvol", f"Database succesvol gebackupt naar:\n{result['path']}\n\n"
+                                                            f"Grootte: {size_mb:.1f} MB\nDuur: {result['duration_s']}s")
+            else:
+                status_msg = f"Backup Mislukt: {str(error)} ({timestamp})"
+                self.last_backup_status_var.set(status_msg)
+                self.log_to_queue(f"Database backup mislukt: {str(error)}")
+                if manual:
+                    messagebox.showerror("Backup Mislukt", f"Fout tijdens backuppen:\n{str(error)}")
         finally:
+            self.manual_backup_btn.config(state='normal')
             self._validate_and_save_backup_config() # Save the latest status
 
     # --- End of Backup Tab Methods ---
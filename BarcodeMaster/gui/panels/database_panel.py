@@ -1,11 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
-from PIL import Image, ImageTk
 import os
 import re
 import json
-import requests
 import threading
 import time
 from config_utils import get_config, save_config
@@ -148,6 +146,7 @@ class DatabasePanel(tk.Frame):
             self.test_connection()
 
     def test_connection(self):
+        import requests
         health_check_url = self._get_health_check_url()
         try:
             resp = requests.get(health_check_url, timeout=3)
@@ -172,6 +171,7 @@ class DatabasePanel(tk.Frame):
             self.connection_status_label.config(text="Niet verbonden", foreground="red")
 
     def log_event(self, event, details=None):
+        import requests
         if not self.database_enabled_var.get():
             return False
         url = self.api_url_var.get()
@@ -214,6 +214,7 @@ class DatabasePanel(tk.Frame):
 
     def _perform_network_check(self):
         """Perform the actual network check in a background thread."""
+        import requests
         while self._checking_connection:
             try:
                 if self.database_enabled_var.get():
@@ -1,13 +1,13 @@
-import time
 import tkinter as tk
 import re
 from tkinter import ttk, messagebox, filedialog
 import serial.tools.list_ports
 import serial
-import threading
 import os
 from datetime import datetime
 from config_utils import get_config, save_config
+from serial_line_reader import SerialLineReader, DEFAULT_DEBOUNCE_MS
+from scan_trace import TraceRecorder, new_trace_id, stamp
 from ..utils import Tooltip
 
 class ScannerPanel(tk.Frame):
@@ -83,6 +83,7 @@ class ScannerPanel(tk.Frame):
         log_button_frame = tk.Frame(self.log_viewer_frame, bg="#f0f0f0")
         log_button_frame.pack(fill='x', pady=(0, 5))
         tk.Button(log_button_frame, text="Log wissen", command=self.clear_log).pack(side='right')
+        tk.Button(log_button_frame, text="Scan latentie", command=self.show_latency_view).pack(side='right', padx=(0, 5))
 
         self.log_text = tk.Text(self.log_viewer_frame, height=10, bg="white", fg="black", state='disabled', wrap=tk.WORD)
         self.log_scroll = tk.Scrollbar(self.log_viewer_frame, command=self.log_text.yview)
@@ -124,9 +125,11 @@ class ScannerPanel(tk.Frame):
         self.scanner_user_to_processing_type_map = config.get('scanner_user_to_processing_type_map', {})
 
         # Serial port attributes
-        self.ser = None
-        self.is_reading = False
-        self.read_thread = None
+        self.serial_reader = None
+
+        # Scan latency tracing (client side, includes the server stages returned by /log)
+        self.scan_trace_recorder = TraceRecorder()
+        self.latency_window = None
 
         self.open_projects = set()
 
@@ -591,8 +594,25 @@ class ScannerPanel(tk.Frame):
                 else:
                     browse_btn.config(state=tk.NORMAL if is_corresponding_logic_active else tk.DISABLED)
 
-    def log_scan_event(self, code):
+    def _post_traced(self, api_url, data, trace_id, trace, timeout):
+        """POST a /log payload carrying the scan trace and record the completed trace."""
         import requests
+        if not trace_id:
+            return requests.post(api_url, json=data, timeout=timeout)
+
+        trace = stamp(dict(trace or {}), 'post_start')
+        payload = dict(data, trace_id=trace_id, trace=trace)
+        response = requests.post(api_url, json=payload, timeout=timeout)
+        try:
+            server_trace = response.json().get('trace') or {}
+        except ValueError:
+            server_trace = {}
+        trace.update(server_trace)
+        stamp(trace, 'response')
+        self.scan_trace_recorder.record(trace_id, trace, event=data.get('event'), project=data.get('project'))
+        return response
+
+    def log_scan_event(self, code, trace_id=None, trace=None):
         from config_utils import get_config
         import traceback
         import re
@@ -629,7 +649,7 @@ class ScannerPanel(tk.Frame):
                 'user': current_user
             }
             try:
-                resp_afgemeld = requests.post(api_url, json=data_afgemeld, timeout=3)
+                resp_afgemeld = self._post_traced(api_url, data_afgemeld, trace_id, trace, timeout=3)
                 if resp_afgemeld.ok:
                     if project_code_to_log:
                         self.open_projects.discard(project_code_to_log)
@@ -665,7 +685,7 @@ class ScannerPanel(tk.Frame):
                 'user': current_user
             }
             try:
-                response = requests.post(api_url, json=data, timeout=3)
+                response = self._post_traced(api_url, data, trace_id, trace, timeout=3)
                 if response.ok:
                     if event_type == 'AFGEMELD' and project_code_to_log:
                         self.open_projects.discard(project_code_to_log)
@@ -758,7 +778,7 @@ class ScannerPanel(tk.Frame):
             self.com_port_var.set('')
 
     def connect_com(self):
-        if self.ser and self.ser.is_open:
+        if self.serial_reader and self.serial_reader.is_running:
             self.log_message("Scanner is al verbonden", "info")
             return
 
@@ -779,48 +799,46 @@ class ScannerPanel(tk.Frame):
 
         try:
             self.log_message(f"Verbinding maken met scanner op {port}...", "info")
-            self.ser = serial.Serial(port, baud_rate, timeout=1)
-            
-            if self.ser.is_open:
-                self.com_status_label.config(text="Verbonden", fg="green")
-                self.connect_btn.config(state=tk.DISABLED)
-                self.disconnect_btn.config(state=tk.NORMAL)
-                self.com_port_combo.config(state='disabled')
-                if hasattr(self, 'baud_rate_entry'):
-                    self.baud_rate_entry.config(state='disabled')
-
-                save_config({'scanner_panel_com_auto_connect': True})
-                self.is_reading = True
-                self.read_thread = threading.Thread(target=self._read_com_port_loop, daemon=True)
-                self.read_thread.start()
-                self.log_message(f"✓ Scanner verbonden op {port}", "success")
+            # Lines are delivered on the Tk thread, also while the window has no focus
+            self.serial_reader = SerialLineReader(
+                self, port, baud_rate,
+                on_line=self.process_com_data,
+                on_error=self._on_com_read_error,
+                debounce_ms=get_config().get('scanner_debounce_ms', DEFAULT_DEBOUNCE_MS),
+                log_callback=lambda msg: print(f"[ScannerPanel COM Read] {msg}")
+            )
+            self.serial_reader.start()
+
+            self.com_status_label.config(text="Verbonden", fg="green")
+            self.connect_btn.config(state=tk.DISABLED)
+            self.disconnect_btn.config(state=tk.NORMAL)
+            self.com_port_combo.config(state='disabled')
+            if hasattr(self, 'baud_rate_entry'):
+                self.baud_rate_entry.config(state='disabled')
+
+            save_config({'scanner_panel_com_auto_connect': True})
+            self.log_message(f"✓ Scanner verbonden op {port}", "success")
 
         except serial.SerialException as e:
             self.log_message(f"❌ Kan niet verbinden met {port}", "error")
             self.com_status_label.config(text="Verbindfout", fg="red")
             messagebox.showerror("COM Fout", f"Fout bij verbinden met {port}:\n{e}")
-            self.ser = None
+            self.serial_reader = None
         except Exception as e:
             self.log_message(f"❌ Onbekende fout bij verbinden", "error")
             self.com_status_label.config(text="Onbekende fout", fg="red")
             messagebox.showerror("COM Fout", f"Algemene fout: {e}")
-            self.ser = None
+            self.serial_reader = None
 
     def disconnect_com(self):
         self.log_message("Scanner verbinding wordt verbroken...", "info")
-        self.is_reading = False
-        if hasattr(self, 'read_thread') and self.read_thread and self.read_thread.is_alive():
-            self.read_thread.join()
-        self.read_thread = None
-
-        if hasattr(self, 'ser') and self.ser and self.ser.is_open:
+        if self.serial_reader:
             try:
-                self.ser.close()
+                self.serial_reader.stop()
                 self.log_message(f"✓ Scanner verbinding verbroken", "success")
             except Exception as e:
                 self.log_message(f"⚠️ Fout bij verbreken verbinding", "warning")
-        
-        self.ser = None
+        self.serial_reader = None
 
         if self.winfo_exists():
             self.com_status_label.config(text="Niet verbonden", fg="red")
@@ -832,74 +850,26 @@ class ScannerPanel(tk.Frame):
         
         save_config({'scanner_panel_com_auto_connect': False})
 
-    def _read_com_port_loop(self):
-        print("[ScannerPanel] COM poort leeslus gestart.")
-        try:
-            while self.is_reading:
-                if self.ser and self.ser.is_open:
-                    if self.ser.in_waiting > 0:
-                        try:
-                            line = self.ser.readline().decode('utf-8', errors='ignore')
-                            if line:
-                                line_stripped = line.strip()
-                                if self.app_has_focus_var and not self.app_has_focus_var.get():
-                                    print(f"[ScannerPanel COM Read] Window not focused. Ignoring data: {line_stripped}")
-                                    time.sleep(0.1)
-                                    continue
-
-                                print(f"[ScannerPanel COM Read] Raw data: {line_stripped}")
-                                self.master.after(0, self.process_com_data, line_stripped)
-                        except serial.SerialTimeoutException:
-                            continue
-                        except serial.SerialException as e:
-                            print(f"[ScannerPanel COM Read] Serial error: {e}")
-                            if hasattr(self.master, 'after'):
-                                self.master.after(0, self.disconnect_com)
-                            else:
-                                self.disconnect_com()
-                            break
-                        except Exception as e:
-                            print(f"[ScannerPanel COM Read] Error reading from COM port: {e}")
-                            time.sleep(1)
-                    else:
-                        if self.app_has_focus_var and not self.app_has_focus_var.get():
-                            time.sleep(0.2)
-                        else:
-                            time.sleep(0.05)
-                else:
-                    if self.app_has_focus_var and not self.app_has_focus_var.get():
-                        time.sleep(0.5)
-                    else:
-                        time.sleep(0.1)
-                
-                if not self.is_reading:
-                    break
-        except Exception as e:
-            print(f"[ScannerPanel] Externe fout in _read_com_port_loop: {e}")
-        finally:
-            print("[ScannerPanel] COM poort leeslus beëindigd.")
-            if self.is_reading:
-                self.is_reading = False
-                self.after(0, self.disconnect_com)
+    def _on_com_read_error(self, error):
+        """Called on the Tk thread when the serial reader stops because of a port error."""
+        print(f"[ScannerPanel COM Read] Serial error: {error}")
+        self.disconnect_com()
 
     def shutdown(self):
         """Gracefully disconnect COM port on app shutdown without changing auto-connect config."""
         print("[ScannerPanel] Shutdown called. Disconnecting COM port.")
-        self.is_reading = False
-        if hasattr(self, 'read_thread') and self.read_thread and self.read_thread.is_alive():
-            self.read_thread.join(timeout=1.0)
-        
-        if hasattr(self, 'ser') and self.ser and self.ser.is_open:
+        if self.serial_reader:
             try:
-                self.ser.close()
+                self.serial_reader.stop()
                 print("[ScannerPanel] COM port successfully closed on shutdown.")
             except Exception as e:
                 print(f"[ScannerPanel] Error closing COM port on shutdown: {e}")
-        self.ser = None
+        self.serial_reader = None
 
     def process_com_data(self, data):
         """Process data received from COM port. Runs in main Tkinter thread."""
-        print(f"[ScannerPanel] Verwerken van COM data: {data}")
+        trace_id, trace = new_trace_id(), stamp({}, 'receive')
+        print(f"[ScannerPanel] Verwerken van COM data: {data} (trace {trace_id})")
         event_type = self.event_type_var.get()
         if event_type == 'OPEN':
             self.log_message(f"📋 Project {data} wordt geopend...", "info")
@@ -907,11 +877,12 @@ class ScannerPanel(tk.Frame):
             self.log_message(f"📋 Project {data} wordt afgesloten...", "info")
         
         import threading
-        threading.Thread(target=self.log_scan_event, args=(data,), daemon=True).start()
+        threading.Thread(target=self.log_scan_event, args=(data, trace_id, trace), daemon=True).start()
 
     def on_usb_scan(self, event):
         code = self.usb_code_var.get().strip()
         if code:
+            trace_id, trace = new_trace_id(), stamp({}, 'receive')
             self.usb_code_var.set('')
             
             event_type = self.event_type_var.get()
@@ -921,7 +892,57 @@ class ScannerPanel(tk.Frame):
                 self.log_message(f"📋 Project {code} wordt afgesloten...", "info")
             
             import threading
-            threading.Thread(target=self.log_scan_event, args=(code,), daemon=True).start()
+            threading.Thread(target=self.log_scan_event, args=(code, trace_id, trace), daemon=True).start()
+
+    def show_latency_view(self):
+        """Open (or raise) a debug window with per-stage scan latency histograms."""
+        if self.latency_window and self.latency_window.winfo_exists():
+            self.latency_window.lift()
+            return
+
+        window = tk.Toplevel(self)
+        window.title("Scan Latentie")
+        window.geometry("760x420")
+        self.latency_window = window
+
+        columns = ('count', 'avg', 'p50', 'p95', 'max', 'histogram')
+        tree = ttk.Treeview(window, columns=columns, show='tree headings', height=8)
+        tree.heading('#0', text='Traject')
+        tree.column('#0', width=200)
+        for col, text, width in (('count', 'Aantal', 60), ('avg', 'Gem. ms', 70), ('p50', 'p50 ms', 70),
+                                 ('p95', 'p95 ms', 70), ('max', 'Max ms', 70), ('histogram', 'Verdeling (ms: aantal)', 200)):
+            tree.heading(col, text=text)
+            tree.column(col, width=width, anchor='center' if col != 'histogram' else 'w')
+        tree.pack(fill='both', expand=True, padx=10, pady=(10, 5))
+
+        recent_text = tk.Text(window, height=6, state='disabled', wrap=tk.NONE)
+        recent_text.pack(fill='x', padx=10, pady=(0, 5))
+
+        button_frame = tk.Frame(window)
+        button_frame.pack(fill='x', padx=10, pady=(0, 10))
+        tk.Button(button_frame, text="Reset", command=self.scan_trace_recorder.reset).pack(side='left')
+        tk.Button(button_frame, text="Sluiten", command=window.destroy).pack(side='right')
+
+        def refresh():
+            if not window.winfo_exists():
+                return
+            snapshot = self.scan_trace_recorder.snapshot(recent_limit=10)
+            tree.delete(*tree.get_children())
+            for name, hist in snapshot['segments'].items():
+                distribution = ", ".join(
+                    f"{'>' + str(hist['buckets'][-2]['le_ms']) if b['le_ms'] is None else '≤' + str(b['le_ms'])}: {b['count']}"
+                    for b in hist['buckets'] if b['count'])
+                tree.insert('', tk.END, text=name, values=(hist['count'], hist['avg_ms'], hist['p50_ms'],
+                                                           hist['p95_ms'], hist['max_ms'], distribution))
+            recent_text.config(state='normal')
+            recent_text.delete('1.0', tk.END)
+            for entry in reversed(snapshot['recent']):
+                segments = ", ".join(f"{k}={v}" for k, v in entry['segments_ms'].items())
+                recent_text.insert(tk.END, f"{entry['trace_id']} {entry.get('event', '')} {entry.get('project', '')}: {segments}\n")
+            recent_text.config(state='disabled')
+            window.after(1000, refresh)
+
+        refresh()
 
     def save_com_port(self, *args):
         save_config({'scanner_panel_com_port': self.com_port_var.get()})
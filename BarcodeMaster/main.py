@@ -1,17 +1,21 @@
 import sys
 import os
-import tkinter as tk
-import importlib
-import threading
-import time
-from urllib.parse import urlparse
-from PIL import Image, ImageTk
 
 # Add the project root to the Python path
 project_root = os.path.abspath(os.path.dirname(__file__))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+# --profile-startup: installed before anything else is imported so every import is timed
+from startup_profile import create_profiler
+profiler = create_profiler()
+
+import tkinter as tk
+import importlib.util
+import threading
+import time
+from urllib.parse import urlparse
+
 # Import path utilities first
 from path_utils import ensure_writable_dirs, get_resource_path, get_writable_path
 
@@ -27,11 +31,19 @@ REQUIRED_MODULES = {
 }
 
 def check_dependencies():
+    """Checks that the required packages are installed without importing them.
+
+    The modules themselves are imported where they are first used, so the
+    window (and the API server) do not wait for pandas, pyodbc and friends.
+    """
     missing_for_pip = []
     for import_name, pip_name in REQUIRED_MODULES.items():
+        # Look up the top-level package only; find_spec on a submodule imports its parents
         try:
-            importlib.import_module(import_name)
-        except ImportError:
+            found = importlib.util.find_spec(import_name.split('.')[0]) is not None
+        except (ImportError, ValueError):
+            found = False
+        if not found:
             missing_for_pip.append(pip_name)
 
     if missing_for_pip:
@@ -48,21 +60,24 @@ def check_dependencies():
         
         # Try to show GUI error if possible
         try:
+            from tkinter import messagebox
             root = tk.Tk()
             root.withdraw()
-            tk.messagebox.showerror("Missing Dependencies", error_message)
+            messagebox.showerror("Missing Dependencies", error_message)
         except:
             pass
         
         sys.exit(1)
 
 # Check dependencies early
-check_dependencies()
+with profiler.phase("Dependency check (find_spec)"):
+    check_dependencies()
 
 # --- App Imports (after dependency check) ---
-from gui.app import MainApp, ServiceStatus
-from config_utils import get_config
-from database.db_log_api import run_api_server, stop_api_server
+with profiler.phase("App imports"):
+    from gui.app import MainApp, ServiceStatus
+    from config_utils import get_config
+    from database.db_log_api import run_api_server, stop_api_server
 
 # Global variable to track the API thread
 db_api_thread = None
@@ -77,6 +92,7 @@ def show_splash(main_tk_root):
     y = (hs // 2) - (h // 2)
     splash.geometry(f"{w}x{h}+{x}+{y}")
     try:
+        from PIL import Image, ImageTk
         logo_path = get_resource_path("assets/Logo.png")
         pil_img = Image.open(logo_path).resize((w, h), Image.LANCZOS)
         img = ImageTk.PhotoImage(pil_img)
@@ -108,6 +124,7 @@ def start_db_api_thread():
 
     db_api_thread = threading.Thread(target=run_api_server, kwargs={'port': port}, daemon=True)
     db_api_thread.start()
+    profiler.watch_port("API server accepteert verbindingen", port)
     print(f"Database API thread started on port {port}.")
     print(f"Dashboard available at: http://localhost:{port}/dashboard")
     return db_api_thread
@@ -130,17 +147,20 @@ def main():
     ensure_writable_dirs()
     
     # Create root window but keep it hidden initially
-    root = tk.Tk()
-    root.withdraw()
+    with profiler.phase("Tk root"):
+        root = tk.Tk()
+        root.withdraw()
     
     # Register cleanup on exit
     import atexit
     atexit.register(cleanup_on_exit)
     
-    splash = show_splash(root)
+    with profiler.phase("Splash"):
+        splash = show_splash(root)
     
     # Start DB API in background
-    db_api_thread = start_db_api_thread()
+    with profiler.phase("API thread start"):
+        db_api_thread = start_db_api_thread()
 
     # Prepare service status
     service_status = ServiceStatus()
@@ -172,10 +192,28 @@ def main():
         root.deiconify()  # Show the main window
         
         # Create the main app
-        app = MainApp(root, service_status=service_status)
-        app.pack(side="top", fill="both", expand=True)
-    
-    root.after(3000, launch_main_app)
+        with profiler.phase("Main window (MainApp)"):
+            app = MainApp(root, service_status=service_status)
+            app.pack(side="top", fill="both", expand=True)
+        for panel_name, panel_start, panel_end in getattr(app, 'panel_build_times', []):
+            profiler.add_phase(f"  Panel {panel_name}", panel_start, panel_end)
+        root.after_idle(write_startup_profile)
+
+    def write_startup_profile():
+        profiler.mark("Hoofdvenster klaar (idle)")
+        try:
+            report_path = profiler.write_report(get_writable_path(os.path.join('logs', 'startup_profile.txt')))
+            if report_path:
+                print(f"Startup profile written to: {report_path}")
+        except OSError as e:
+            print(f"Could not write startup profile: {e}")
+
+    splash_delay_start = time.perf_counter()
+    def launch_after_splash():
+        profiler.add_phase("Splash wachttijd", splash_delay_start, time.perf_counter())
+        launch_main_app()
+
+    root.after(3000, launch_after_splash)
     
     try:
         root.mainloop()
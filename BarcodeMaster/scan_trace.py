@@ -0,0 +1,130 @@
+"""
+End-to-end scan latency tracing.
+
+Every scan gets a trace ID and a dict of wall-clock timestamps (``time.time()``)
+for the stages it passes through. The scanner panel fills in the client-side
+stages, the DB API adds the server-side ones and returns them in the ``/log``
+response. A TraceRecorder turns complete or partial traces into per-segment
+latency histograms.
+
+Client and server timestamps are only comparable when both run on the same
+machine or have synchronised clocks; negative segments caused by clock skew
+are clamped to 0.
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+
+# Stages in the order a scan passes through them
+STAGES = ('receive', 'post_start', 'server_receive', 'lock_acquired', 'commit', 'response')
+
+# Histogram bucket upper bounds in milliseconds; the last bucket catches everything above
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+MAX_SAMPLES = 1000
+MAX_RECENT_TRACES = 100
+
+
+def new_trace_id():
+    """Return a short random trace ID."""
+    return uuid.uuid4().hex[:16]
+
+
+def stamp(trace, stage):
+    """Record the current time for ``stage`` in ``trace`` and return the trace."""
+    trace[stage] = time.time()
+    return trace
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram with a bounded sample window for percentiles."""
+
+    def __init__(self, bounds_ms=BUCKET_BOUNDS_MS, max_samples=MAX_SAMPLES):
+        self.bounds_ms = tuple(bounds_ms)
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+    def add(self, value_ms):
+        value_ms = max(0.0, value_ms)
+        for i, bound in enumerate(self.bounds_ms):
+            if value_ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+        self.samples.append(value_ms)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def to_dict(self):
+        buckets = [{'le_ms': bound, 'count': count} for bound, count in zip(self.bounds_ms, self.counts)]
+        buckets.append({'le_ms': None, 'count': self.counts[-1]})
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 2) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50), 2),
+            'p95_ms': round(self.percentile(95), 2),
+            'max_ms': round(self.max_ms, 2),
+            'buckets': buckets,
+        }
+
+
+class TraceRecorder:
+    """Thread-safe collector of per-segment latency histograms."""
+
+    def __init__(self, max_recent=MAX_RECENT_TRACES):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._recent = deque(maxlen=max_recent)
+
+    @staticmethod
+    def segments(trace):
+        """Yield (segment_name, milliseconds) for consecutive stages present in ``trace``."""
+        present = [stage for stage in STAGES if isinstance(trace.get(stage), (int, float))]
+        for start, end in zip(present, present[1:]):
+            yield f"{start}->{end}", (trace[end] - trace[start]) * 1000.0
+        if len(present) > 2:
+            yield 'total', (trace[present[-1]] - trace[present[0]]) * 1000.0
+
+    def record(self, trace_id, trace, **info):
+        """Add a trace to the histograms. Extra keyword info (event, user, ...) is kept with the recent traces."""
+        segments = dict(self.segments(trace))
+        with self._lock:
+            for name, value_ms in segments.items():
+                histogram = self._histograms.get(name)
+                if histogram is None:
+                    histogram = self._histograms[name] = LatencyHistogram()
+                histogram.add(value_ms)
+            recent = {'trace_id': trace_id, 'segments_ms': {k: round(max(0.0, v), 2) for k, v in segments.items()}}
+            recent.update(info)
+            self._recent.append(recent)
+        return segments
+
+    def snapshot(self, recent_limit=20):
+        """Return the histograms (in stage order) and the most recent traces."""
+        with self._lock:
+            order = [f"{a}->{b}" for a, b in zip(STAGES, STAGES[1:])]
+            names = sorted(self._histograms, key=lambda n: order.index(n) if n in order else len(order))
+            return {
+                'stages': list(STAGES),
+                'segments': {name: self._histograms[name].to_dict() for name in names},
+                'recent': list(self._recent)[-recent_limit:] if recent_limit else [],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._recent.clear()
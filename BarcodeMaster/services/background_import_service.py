@@ -14,11 +14,10 @@ import traceback
 import threading
 import time
 import random
-import pandas as pd
-import pyodbc
 
 from config_utils import get_config
 from path_utils import get_writable_path
+from database.log_setup import setup_logging
 
 class BackgroundImportService:
     _stats_lock = threading.Lock() # Class level lock for stats
@@ -53,16 +52,16 @@ class BackgroundImportService:
         
         log_file = os.path.join(log_dir, 'background_import_service.log')
         
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
-        
+        # One queued handler shared by all instances. Records still propagate to
+        # the root logger (console, API log), so this one only writes the file;
+        # the level is left to the root logger.
         self.logger = logging.getLogger(__name__)
+        setup_logging(
+            log_file,
+            logger=self.logger,
+            log_format=get_config().get('log_format', 'text'),
+            console=False
+        )
         
     def load_config(self):
         """Laad configuratie van config file."""
@@ -388,6 +387,8 @@ class BackgroundImportService:
             return
 
         try:
+            import pandas as pd
+
             # Maak een DataFrame van de bestandsnamen
             df_data = [{'Item': os.path.basename(f['Item'])} for f in collected_files]
             df = pd.DataFrame(df_data)
@@ -485,8 +486,8 @@ class BackgroundImportService:
         mdb_filename_without_extension = os.path.splitext(mdb_basename)[0]
         
         try:
-            # pyodbc should be imported at the top of the file
-            pass 
+            # Imported on first use so the API server (and app start) don't pay for pyodbc
+            import pyodbc
         except ImportError:
             self._log("pyodbc is niet geïnstalleerd. Kan MDB-bestanden niet verwerken voor Excel.")
             self.logger.warning("pyodbc is niet geïnstalleerd. Kan MDB-bestanden niet verwerken voor Excel.")
@@ -544,8 +545,8 @@ class BackgroundImportService:
         """
         mdb_basename = os.path.basename(db_path)
         try:
-            # pandas should be imported at the top of the file
-            pass
+            # Imported on first use; pandas alone adds seconds to a cold start
+            import pandas as pd
         except ImportError:
             self._log("Pandas is niet geïnstalleerd. Kan geen Excel rapport genereren.")
             self.logger.error("Pandas is niet geïnstalleerd. Kan geen Excel rapport genereren.")
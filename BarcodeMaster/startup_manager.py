@@ -9,7 +9,7 @@ import sys
 import os
 import time
 import threading
-import importlib
+import importlib.util
 from pathlib import Path
 from urllib.parse import urlparse
 import tkinter as tk
@@ -58,9 +58,12 @@ class StartupManager:
         missing_modules = []
         
         for import_name, pip_name in self.required_modules.items():
+            # find_spec only locates the package; importing it here would load pandas & co. up front
             try:
-                importlib.import_module(import_name)
-            except ImportError:
+                found = importlib.util.find_spec(import_name.split('.')[0]) is not None
+            except (ImportError, ValueError):
+                found = False
+            if not found:
                 missing_modules.append(pip_name)
         
         if missing_modules:
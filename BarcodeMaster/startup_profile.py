@@ -0,0 +1,177 @@
+"""
+Startup profiling for BarcodeMaster (``python main.py --profile-startup``).
+
+Records how long every first-time import takes (inclusive and self time,
+nested like ``python -X importtime``) and how long each startup phase takes
+(dependency check, splash, API thread, main window and panels), and writes a
+plain-text report to logs/startup_profile.txt so startup regressions show up
+as numbers instead of a feeling.
+"""
+
+import builtins
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+PROFILE_FLAG = '--profile-startup'
+TOP_IMPORTS_IN_REPORT = 40
+
+
+class StartupProfiler:
+    """Collects import and phase timings. Only the thread that installed it is timed."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.phases = []        # (name, start offset, duration)
+        self.marks = []         # (name, offset)
+        self.imports = []       # (module, depth, inclusive, self)
+        self._stack = []        # child time accumulated per active import
+        self._orig_import = None
+        self._thread_id = threading.get_ident()
+
+    # --- Imports ---
+    def install_import_hook(self):
+        if self._orig_import is not None:
+            return
+        self._orig_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def remove_import_hook(self):
+        if self._orig_import is not None:
+            builtins.__import__ = self._orig_import
+            self._orig_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        orig = self._orig_import
+        if (level or name in sys.modules or orig is None
+                or threading.get_ident() != self._thread_id):
+            return orig(name, globals, locals, fromlist, level)
+        depth = len(self._stack)
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return orig(name, globals, locals, fromlist, level)
+        finally:
+            inclusive = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += inclusive
+            self.imports.append((name, depth, inclusive, inclusive - children))
+
+    # --- Phases ---
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start - self.t0, time.perf_counter() - start))
+
+    def add_phase(self, name, start, end):
+        """Records a phase measured elsewhere (perf_counter timestamps)."""
+        self.phases.append((name, start - self.t0, end - start))
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.t0))
+
+    def watch_port(self, name, port, timeout=30.0):
+        """Marks ``name`` once localhost:``port`` accepts connections (polled from a daemon thread)."""
+        def _poll():
+            deadline = time.perf_counter() + timeout
+            while time.perf_counter() < deadline:
+                try:
+                    with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                        self.mark(name)
+                        return
+                except OSError:
+                    time.sleep(0.05)
+            self.mark(f"{name} (niet bereikt binnen {timeout:.0f}s)")
+        threading.Thread(target=_poll, daemon=True).start()
+
+    # --- Report ---
+    def format_report(self):
+        total = time.perf_counter() - self.t0
+        lines = [
+            f"BarcodeMaster startup profile - {time.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Python {sys.version.split()[0]}, totaal gemeten: {total * 1000:.0f} ms",
+            "",
+            "Fasen (start -> duur):",
+        ]
+        for name, offset, duration in sorted(self.phases, key=lambda p: p[1]):
+            lines.append(f"  {name:<34} {offset * 1000:>8.0f} ms  {duration * 1000:>8.1f} ms")
+        if self.marks:
+            lines += ["", "Momenten:"]
+            for name, offset in self.marks:
+                lines.append(f"  {name:<34} {offset * 1000:>8.0f} ms")
+
+        top_level = [imp for imp in self.imports if imp[1] == 0]
+        lines += [
+            "",
+            f"Imports: {len(self.imports)} modules, top-level samen "
+            f"{sum(imp[2] for imp in top_level) * 1000:.0f} ms",
+            f"Traagste imports (inclusief submodules, top {TOP_IMPORTS_IN_REPORT}):",
+            f"  {'inclusief':>10}  {'zelf':>8}  module",
+        ]
+        for name, depth, inclusive, self_time in sorted(self.imports, key=lambda i: -i[2])[:TOP_IMPORTS_IN_REPORT]:
+            lines.append(f"  {inclusive * 1000:>8.1f}ms  {self_time * 1000:>6.1f}ms  {'  ' * depth}{name}")
+        heavy = [name for name in ('pandas', 'pyodbc', 'openpyxl', 'PIL', 'psutil', 'requests', 'flask', 'serial')
+                 if name in sys.modules]
+        lines += ["", f"Geladen zware modules: {', '.join(heavy) if heavy else '-'}"]
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'phases': [{'name': n, 'start_ms': round(o * 1000, 1), 'duration_ms': round(d * 1000, 1)}
+                       for n, o, d in self.phases],
+            'marks': [{'name': n, 'at_ms': round(o * 1000, 1)} for n, o in self.marks],
+            'imports': [{'module': n, 'depth': dp, 'inclusive_ms': round(i * 1000, 2), 'self_ms': round(s * 1000, 2)}
+                        for n, dp, i, s in self.imports],
+        }
+
+    def write_report(self, path):
+        """Writes the text report to ``path`` and the raw numbers next to it as .json.
+
+        Stops import timing: the report covers startup only.
+        """
+        self.remove_import_hook()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.format_report() + "\n")
+        with open(os.path.splitext(path)[0] + '.json', 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+class _NullProfiler:
+    """Stand-in when profiling is off; every call is a no-op."""
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+    def add_phase(self, name, start, end):
+        pass
+
+    def mark(self, name):
+        pass
+
+    def watch_port(self, name, port, timeout=30.0):
+        pass
+
+    def write_report(self, path):
+        return None
+
+
+def create_profiler(argv=None):
+    """Returns an active StartupProfiler (import hook installed) if --profile-startup was passed."""
+    argv = sys.argv if argv is None else argv
+    if PROFILE_FLAG not in argv:
+        return _NullProfiler()
+    profiler = StartupProfiler()
+    profiler.install_import_hook()
+    return profiler
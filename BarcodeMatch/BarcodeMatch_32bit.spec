@@ -54,6 +54,13 @@ a = Analysis(
         'pandas.io.excel._openpyxl',
         'openpyxl',
         'PIL._tkinter_finder',
+        # Panels are imported by name (gui.app.PANEL_CLASSES), invisible to the analysis
+        'gui.panels.import_panel',
+        'gui.panels.scanner_panel',
+        'gui.panels.email_panel',
+        'gui.panels.database_panel',
+        'gui.panels.help_panel',
+        'gui.panels.settings_panel',
         'requests',
         'serial',
         'serial.tools',
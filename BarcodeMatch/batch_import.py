@@ -0,0 +1,298 @@
+"""
+Batch checklist generation for many projects at once.
+
+Used by the import panel ("Batch importeren...") and as a headless command
+line tool. Each project is an OPUS directory (scanned for .hop/.hops files)
+or a GANNOMAT .mdb/.accdb file (ProgramNumber extraction). Projects are
+processed concurrently by a worker pool; every project gets its own
+``<project>.xlsx`` next to it, and a failing project is reported without
+stopping the rest of the batch.
+
+Usage:
+    python batch_import.py --base-dir \\\\server\\projects           # every subfolder (OPUS)
+    python batch_import.py --base-dir D:\\mdb --mode GANNOMAT          # every .mdb/.accdb
+    python batch_import.py D:\\projects\\MO07834 D:\\mdb\\MO07901.mdb   # explicit projects
+    python batch_import.py --projects-file shift.txt --report batch.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from hop_scanner import scan_hop_files
+
+MODE_OPUS = "OPUS"
+MODE_GANNOMAT = "GANNOMAT"
+MDB_EXTENSIONS = ('.mdb', '.accdb')
+DEFAULT_BATCH_WORKERS = 4
+# Directory listings per project; the batch pool already runs several projects side by side
+PROJECT_SCAN_WORKERS = 4
+
+
+class ProjectResult:
+    """Outcome for one project of a batch."""
+
+    def __init__(self, path, mode):
+        self.path = path
+        self.mode = mode
+        self.project = checklist_name(path, mode)
+        self.excel_path = None
+        self.item_count = 0
+        self.seconds = 0.0
+        self.status = 'pending'   # 'ok', 'skipped', 'empty' or 'error'
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.status in ('ok', 'skipped', 'empty')
+
+    def to_dict(self):
+        return {
+            'project': self.project,
+            'path': self.path,
+            'mode': self.mode,
+            'status': self.status,
+            'items': self.item_count,
+            'seconds': round(self.seconds, 3),
+            'excel_path': self.excel_path,
+            'error': self.error,
+        }
+
+
+def detect_mode(path):
+    return MODE_GANNOMAT if path.lower().endswith(MDB_EXTENSIONS) else MODE_OPUS
+
+
+def checklist_name(path, mode):
+    if mode == MODE_GANNOMAT:
+        return os.path.splitext(os.path.basename(path))[0]
+    return os.path.basename(os.path.normpath(path))
+
+
+def checklist_excel_path(path, mode):
+    """Where the checklist for a project goes (same naming as a single import)."""
+    export_dir = os.path.dirname(path) if mode == MODE_GANNOMAT else path
+    return os.path.join(export_dir, f"{checklist_name(path, mode)}.xlsx")
+
+
+def find_projects(base_dir, mode):
+    """Lists the projects directly under ``base_dir``: subfolders (OPUS) or .mdb/.accdb files (GANNOMAT)."""
+    projects = []
+    with os.scandir(base_dir) as it:
+        for entry in it:
+            if mode == MODE_GANNOMAT:
+                if entry.is_file() and entry.name.lower().endswith(MDB_EXTENSIONS):
+                    projects.append(entry.path)
+            elif entry.is_dir() and entry.name.lower() != 'archief':
+                projects.append(entry.path)
+    return sorted(projects, key=str.casefold)
+
+
+def extract_mdb_items(path):
+    """Returns the checklist rows ({'MDB File', 'Item'}) for a GANNOMAT .mdb/.accdb file.
+
+    Raises ImportError without pyodbc and LookupError when no table has a 'ProgramNumber' column.
+    """
+    import pyodbc
+
+    conn_str = (
+        r'DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};'
+        f'DBQ={path};'
+    )
+    conn = pyodbc.connect(conn_str, autocommit=True)
+    try:
+        cursor = conn.cursor()
+        tables = [tbl_info.table_name for tbl_info in cursor.tables(tableType='TABLE')]
+        program_table = None
+        fallback_table = None
+        for table in tables:
+            columns = [column.column_name for column in cursor.columns(table=table)]
+            if table.lower() == 'program' and 'ProgramNumber' in columns:
+                program_table = table
+                break
+            elif not fallback_table and 'ProgramNumber' in columns:
+                fallback_table = table
+
+        table = program_table or fallback_table
+        if table is None:
+            raise LookupError(f"Geen tabel met 'ProgramNumber' kolom gevonden in {os.path.basename(path)}")
+
+        mdb_filename_without_extension = os.path.splitext(os.path.basename(path))[0]
+        cursor.execute(f'SELECT ProgramNumber FROM [{table}]')
+        return [{'MDB File': os.path.basename(path), 'Item': f"{mdb_filename_without_extension}:{row.ProgramNumber}"}
+                for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def scan_opus_items(path, filename_only=False, max_workers=PROJECT_SCAN_WORKERS):
+    """Returns the checklist rows ({'Item'}) for an OPUS project directory."""
+    result = scan_hop_files(path, max_workers=max_workers)
+    if result.errors and not result.files:
+        raise OSError(result.errors[0][1])
+    return [{'Item': os.path.basename(p) if filename_only else p} for p in result.files]
+
+
+def write_checklist(rows, excel_path, mode):
+    """Writes checklist rows to ``excel_path`` with an empty Status column and returns the DataFrame."""
+    import pandas as pd
+
+    df = pd.DataFrame(rows)
+    if mode == MODE_GANNOMAT and 'Item' in df.columns:
+        df = df[['Item']].copy()
+        df['Status'] = ''
+    elif 'Status' not in df.columns:
+        df['Status'] = ''
+    df.to_excel(excel_path, index=False)
+    return df
+
+
+def _prewarm_cache(excel_path, df):
+    try:
+        from checklist_cache import get_checklist_cache, fingerprint
+        from checklist_loader import parse_checklist
+        get_checklist_cache().put(excel_path, parse_checklist(df), fingerprint(excel_path))
+    except Exception as e:
+        print(f"[CACHE] Voorladen van checklist {excel_path} mislukt: {e}")
+
+
+def process_project(path, mode=None, filename_only=False, skip_existing=False):
+    """Generates the checklist for one project. Never raises; errors end up in the result."""
+    mode = mode or detect_mode(path)
+    result = ProjectResult(path, mode)
+    start = time.perf_counter()
+    try:
+        result.excel_path = checklist_excel_path(path, mode)
+        if skip_existing and os.path.exists(result.excel_path):
+            result.status = 'skipped'
+            return result
+        if mode == MODE_GANNOMAT:
+            rows = extract_mdb_items(path)
+        else:
+            rows = scan_opus_items(path, filename_only=filename_only)
+        result.item_count = len(rows)
+        if not rows:
+            result.status = 'empty'
+            result.excel_path = None
+            return result
+        df = write_checklist(rows, result.excel_path, mode)
+        _prewarm_cache(result.excel_path, df)
+        result.status = 'ok'
+    except Exception as e:
+        result.status = 'error'
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        result.seconds = time.perf_counter() - start
+    return result
+
+
+def run_batch(projects, max_workers=DEFAULT_BATCH_WORKERS, filename_only=False, skip_existing=False,
+              on_result=None, stop_event=None):
+    """Processes ``projects`` (paths; mode detected per path) concurrently.
+
+    on_result(result, done, total) is called from the calling thread as projects finish.
+    Returns the results in input order. Projects not started before stop_event is set are left out.
+    """
+    results = {}
+    total = len(projects)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='batch-import') as pool:
+        futures = {}
+        for path in projects:
+            futures[pool.submit(_run_unless_stopped, path, filename_only, skip_existing, stop_event)] = path
+        for future in as_completed(futures):
+            result = future.result()
+            if result is None:
+                continue
+            results[futures[future]] = result
+            if on_result:
+                on_result(result, len(results), total)
+    return [results[path] for path in projects if path in results]
+
+
+def _run_unless_stopped(path, filename_only, skip_existing, stop_event):
+    if stop_event is not None and stop_event.is_set():
+        return None
+    return process_project(path, filename_only=filename_only, skip_existing=skip_existing)
+
+
+def format_summary(results, elapsed):
+    """Plain-text report with per-project timings."""
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    width = max([len(r.project) for r in results] + [7])
+    lines = [
+        f"Batch import: {len(results)} projecten in {elapsed:.1f}s "
+        f"({counts.get('ok', 0)} ok, {counts.get('skipped', 0)} overgeslagen, "
+        f"{counts.get('empty', 0)} leeg, {counts.get('error', 0)} fout)",
+        "",
+        f"{'Project':<{width}}  {'Modus':<8}  {'Status':<10}  {'Items':>7}  {'Tijd':>8}",
+        "-" * (width + 41),
+    ]
+    for result in sorted(results, key=lambda r: -r.seconds):
+        lines.append(f"{result.project:<{width}}  {result.mode:<8}  {result.status:<10}  "
+                     f"{result.item_count:>7}  {result.seconds:>7.2f}s")
+    failed = [r for r in results if r.status == 'error']
+    if failed:
+        lines += ["", "Fouten:"]
+        lines += [f"  {r.project}: {r.error}" for r in failed]
+    return "\n".join(lines)
+
+
+def write_report(results, elapsed, report_path):
+    """Writes the summary as JSON (``.json``) or plain text (anything else)."""
+    with open(report_path, 'w', encoding='utf-8') as f:
+        if report_path.lower().endswith('.json'):
+            json.dump({'elapsed_seconds': round(elapsed, 3),
+                       'generated_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+                       'projects': [r.to_dict() for r in results]}, f, indent=2, ensure_ascii=False)
+        else:
+            f.write(format_summary(results, elapsed) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genereer checklists voor meerdere projecten tegelijk.")
+    parser.add_argument('projects', nargs='*', help="Projectmappen (OPUS) en/of .mdb/.accdb-bestanden (GANNOMAT)")
+    parser.add_argument('--base-dir', help="Verwerk alle projecten direct onder deze map")
+    parser.add_argument('--mode', choices=[MODE_OPUS, MODE_GANNOMAT], default=MODE_OPUS,
+                        help="Projecttype voor --base-dir (standaard OPUS)")
+    parser.add_argument('--projects-file', help="Tekstbestand met één projectpad per regel")
+    parser.add_argument('--workers', type=int, default=DEFAULT_BATCH_WORKERS, help="Aantal projecten tegelijk")
+    parser.add_argument('--filename-only', action='store_true', help="OPUS: alleen bestandsnamen als Item")
+    parser.add_argument('--skip-existing', action='store_true', help="Sla projecten met een bestaande .xlsx over")
+    parser.add_argument('--report', help="Schrijf het rapport naar dit bestand (.json of tekst)")
+    args = parser.parse_args(argv)
+
+    projects = list(args.projects)
+    if args.projects_file:
+        with open(args.projects_file, 'r', encoding='utf-8') as f:
+            projects += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if args.base_dir:
+        projects += find_projects(args.base_dir, args.mode)
+    if not projects:
+        parser.error("geen projecten opgegeven (gebruik paden, --base-dir of --projects-file)")
+
+    def _progress(result, done, total):
+        detail = result.error if result.status == 'error' else f"{result.item_count} items"
+        print(f"[{done}/{total}] {result.project}: {result.status} ({detail}, {result.seconds:.2f}s)", flush=True)
+
+    start = time.perf_counter()
+    results = run_batch(projects, max_workers=args.workers, filename_only=args.filename_only,
+                        skip_existing=args.skip_existing, on_result=_progress)
+    elapsed = time.perf_counter() - start
+
+    print()
+    print(format_summary(results, elapsed))
+    if args.report:
+        write_report(results, elapsed, args.report)
+        print(f"\nRapport opgeslagen: {args.report}")
+    return 0 if all(r.ok for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
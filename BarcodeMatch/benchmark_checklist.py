@@ -0,0 +1,138 @@
+"""
+Benchmark for loading BarcodeMatch checklists.
+
+Generates checklists of 1k/10k/100k rows and times the old row-by-row load
+(iterrows + one Treeview insert per row) against the column-wise parser and
+the virtualized Treeview.
+
+Usage:
+    python benchmark_checklist.py                 # in-memory DataFrames, parsing only
+    python benchmark_checklist.py --excel         # also write/read real .xlsx files
+    python benchmark_checklist.py --gui           # also time Treeview population (needs a display)
+    python benchmark_checklist.py --sizes 1000 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from checklist_loader import parse_checklist
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+STATUS_CHOICES = (None, None, None, 'OK', 'NIET OK', 'DUPLICAAT', 'ok ', 'onbekend')
+
+
+def generate_checklist(rows, seed=42):
+    """Returns a checklist DataFrame with OPUS-like file paths and a mix of statuses."""
+    rng = random.Random(seed)
+    items = [f"\\\\server\\projects\\MO{10000 + i // 250:05d}\\panel_{i:06d}.hop" for i in range(rows)]
+    statuses = [rng.choice(STATUS_CHOICES) for _ in range(rows)]
+    descriptions = [f"Onderdeel {i}" for i in range(rows)]
+    return pd.DataFrame({'Item': items, 'Status': statuses, 'Omschrijving': descriptions})
+
+
+def legacy_parse(df):
+    """The previous iterrows()-based normalization, kept for comparison."""
+    result = []
+    for _, row in df.iterrows():
+        barcode_val = str(row['Item']).strip()
+        description_val = str(row['Omschrijving']) if 'Omschrijving' in df.columns else ""
+        raw_status = row.get('Status', pd.NA)
+        display, internal, tag = "", 'NIET OK', 'NOT_OK'
+        if not pd.isna(raw_status):
+            processed = str(raw_status).strip().upper()
+            if processed == 'OK':
+                display, internal, tag = 'OK', 'OK', 'OK'
+            elif processed == 'DUPLICAAT':
+                display, internal, tag = 'DUPLICAAT', 'DUPLICAAT', 'DUPLICATE'
+            else:
+                display = 'NIET OK'
+        result.append((barcode_val, description_val, internal, display, tag))
+    return result
+
+
+def _fmt_ms(value):
+    return f"{value:.1f}ms" if value is not None else "-"
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+def bench_gui(parsed, root):
+    """Times populating a plain Treeview (row by row) and the VirtualTreeview (bulk)."""
+    from tkinter import ttk
+    from gui.virtual_treeview import VirtualTreeview
+
+    rows = list(zip(parsed.displays, parsed.items, parsed.tags))
+
+    def fill_plain():
+        tree = ttk.Treeview(root, columns=('Status', 'Item'), show='headings')
+        tree.pack()
+        for display, item, tag in rows:
+            tree.insert('', 'end', values=(display, item), tags=(tag,))
+        root.update_idletasks()
+        tree.destroy()
+
+    def fill_virtual():
+        tree = VirtualTreeview(root, columns=('Status', 'Item'), show='headings')
+        tree.pack()
+        tree.set_rows(((display, item), (tag,)) for display, item, tag in rows)
+        root.update_idletasks()
+        tree.destroy()
+
+    _, plain_ms = timed(fill_plain)
+    _, virtual_ms = timed(fill_virtual)
+    return plain_ms, virtual_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BarcodeMatch checklist loading.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--excel', action='store_true', help="Write and read real .xlsx files")
+    parser.add_argument('--gui', action='store_true', help="Also time Treeview population")
+    args = parser.parse_args()
+
+    root = None
+    if args.gui:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+
+    print(f"{'Rijen':>8} | {'read_excel':>11} | {'iterrows':>10} | {'kolomsgewijs':>12} | {'versnelling':>11} | {'Treeview':>10} | {'Virtueel':>10}")
+    print("-" * 92)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            df = generate_checklist(size)
+            read_ms = None
+            if args.excel:
+                path = os.path.join(tmp_dir, f"checklist_{size}.xlsx")
+                df.to_excel(path, index=False)
+                df, read_ms = timed(pd.read_excel, path)
+
+            _, legacy_ms = timed(legacy_parse, df)
+            parsed, vector_ms = timed(parse_checklist, df)
+            speedup = legacy_ms / vector_ms if vector_ms else float('inf')
+
+            plain_ms = virtual_ms = None
+            if root is not None:
+                plain_ms, virtual_ms = bench_gui(parsed, root)
+
+            print(f"{size:>8} | {_fmt_ms(read_ms):>11} | {_fmt_ms(legacy_ms):>10} | {_fmt_ms(vector_ms):>12} | "
+                  f"{speedup:10.1f}x | {_fmt_ms(plain_ms):>10} | {_fmt_ms(virtual_ms):>10}")
+
+    if root is not None:
+        root.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -84,6 +84,8 @@ def main():
     
     # Run the main build script
     subprocess.run([sys.executable, str(build_script)])
+    print("\nCold-start timings of this build are recorded in startup_report.json next to")
+    print("config.json on every start (also shown in the Help panel).")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+On-disk cache of parsed checklists.
+
+Reading a large .xlsx with pandas dominates the time to open a checklist. The
+parsed result (items, descriptions, statuses and the flexible-match indexes)
+is stored per workbook in a compressed pickle, keyed on the absolute path and
+validated against the file's size and mtime, so reopening an unchanged
+workbook skips Excel parsing entirely.
+
+The cache directory is bounded by total size; the least recently used entries
+are evicted first (a hit refreshes the entry's mtime).
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import zlib
+
+from config_utils import get_config_path, load_config
+from checklist_loader import ParsedChecklist, parse_checklist
+
+CACHE_FORMAT_VERSION = 1
+CACHE_SUFFIX = '.ckl'
+DEFAULT_MAX_MB = 256
+COMPRESS_LEVEL = 1  # Fast; checklist data is very repetitive so this already compresses well
+
+
+def fingerprint(path):
+    """Returns (absolute path, size, mtime_ns) of a workbook, or None if it cannot be read."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return os.path.normcase(os.path.abspath(path)), st.st_size, st.st_mtime_ns
+
+
+class ChecklistCache:
+    """Size-bounded LRU cache of ParsedChecklist objects, one file per workbook."""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, abs_path):
+        digest = hashlib.sha1(abs_path.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest + CACHE_SUFFIX)
+
+    def get(self, path):
+        """Returns the cached ParsedChecklist for ``path`` if it is still current, else None."""
+        key = fingerprint(path)
+        if key is None:
+            return None
+        entry_path = self._entry_path(key[0])
+        try:
+            with open(entry_path, 'rb') as f:
+                version, stored_key, blob = pickle.load(f)
+            if version != CACHE_FORMAT_VERSION or tuple(stored_key) != key:
+                # Workbook changed (or old format); the entry is useless now
+                self._remove(entry_path)
+                self.misses += 1
+                return None
+            parsed = ParsedChecklist.from_payload(pickle.loads(zlib.decompress(blob)))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"[CACHE] Ongeldige cache-entry verwijderd ({os.path.basename(entry_path)}): {e}")
+            self._remove(entry_path)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(entry_path, None)  # LRU: mark as recently used
+        except OSError:
+            pass
+        self.hits += 1
+        return parsed
+
+    def put(self, path, parsed, key=None):
+        """Stores ``parsed`` for ``path``. Pass ``key`` (see fingerprint()) taken before the
+        workbook was read, so a file modified while parsing is never cached as current."""
+        key = key or fingerprint(path)
+        if key is None:
+            return False
+        parsed.ensure_match_indexes()
+        blob = zlib.compress(pickle.dumps(parsed.to_payload(), protocol=pickle.HIGHEST_PROTOCOL), COMPRESS_LEVEL)
+        entry_path = self._entry_path(key[0])
+        tmp_path = f"{entry_path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((CACHE_FORMAT_VERSION, key, blob), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            print(f"[CACHE] Kon cache-entry niet schrijven voor {path}: {e}")
+            self._remove(tmp_path)
+            return False
+        self._evict()
+        return True
+
+    def invalidate(self, path):
+        """Drops the entry for ``path`` (if any)."""
+        self._remove(self._entry_path(os.path.normcase(os.path.abspath(path))))
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            'entries': len(entries),
+            'total_bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def _entries(self):
+        """Returns [(path, size, mtime)] for all cache files."""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith(CACHE_SUFFIX):
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((entry.path, st.st_size, st.st_mtime))
+        except OSError:
+            pass
+        return entries
+
+    def _evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            for entry_path, size, _ in sorted(entries, key=lambda e: e[2]):
+                if total <= self.max_bytes:
+                    break
+                self._remove(entry_path)
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_checklist_cache():
+    """Returns the application-wide cache, stored next to config.json ('cache/checklists').
+
+    The size limit comes from the root config key 'checklist_cache_max_mb' (default 256).
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            config = load_config()
+            try:
+                max_mb = float(config.get('checklist_cache_max_mb', DEFAULT_MAX_MB))
+            except (TypeError, ValueError):
+                max_mb = DEFAULT_MAX_MB
+            cache_dir = os.path.join(os.path.dirname(get_config_path()), 'cache', 'checklists')
+            _default_cache = ChecklistCache(cache_dir, int(max_mb * 1024 * 1024))
+        return _default_cache
+
+
+def prewarm_async(path, df):
+    """Parses ``df`` (the frame just written to ``path``) and caches it in a background thread."""
+    key = fingerprint(path)
+    if key is None:
+        return None
+
+    def _worker():
+        try:
+            get_checklist_cache().put(path, parse_checklist(df), key)
+        except Exception as e:
+            print(f"[CACHE] Voorladen van checklist {path} mislukt: {e}")
+
+    thread = threading.Thread(target=_worker, daemon=True)
+    thread.start()
+    return thread
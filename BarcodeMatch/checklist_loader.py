@@ -0,0 +1,159 @@
+"""
+Column-wise parsing of BarcodeMatch checklists.
+
+Turns a checklist DataFrame (columns 'Item', optional 'Status' and
+'Omschrijving') into plain lists in one vectorized pass, instead of walking
+the frame with iterrows(), and builds the indexes used for flexible barcode
+matching.
+"""
+
+import os
+import re
+
+import pandas as pd
+
+STATUS_OK = 'OK'
+STATUS_NOT_OK = 'NIET OK'
+STATUS_DUPLICATE = 'DUPLICAAT'
+
+# Excel status (upper-cased) -> (internal status, Treeview display text, Treeview tag)
+STATUS_MAP = {
+    STATUS_OK: (STATUS_OK, 'OK', 'OK'),
+    STATUS_DUPLICATE: (STATUS_DUPLICATE, 'DUPLICAAT', 'DUPLICATE'),
+    STATUS_NOT_OK: (STATUS_NOT_OK, 'NIET OK', 'NOT_OK'),
+}
+
+_WHITESPACE_RE = re.compile(r'\s')
+
+
+def normalize_barcode_key(value):
+    """Normalizes a barcode/path for flexible matching: no whitespace, '/' separators, case-folded."""
+    normalized = os.path.normpath(_WHITESPACE_RE.sub('', value).replace('\\', '/'))
+    return normalized.replace('\\', '/').casefold()
+
+
+def build_match_indexes(items):
+    """Builds the flexible-match indexes for a list of item keys.
+
+    Returns (normalized, suffix, filename):
+      normalized: normalized key -> first item with that normalized key
+      suffix:     tuple of trailing path parts -> set of items
+      filename:   normalized filename -> set of items
+    """
+    normalized_index, suffix_index, filename_index = {}, {}, {}
+    for key in items:
+        normalized = normalize_barcode_key(key)
+        # Keep the first key for a normalized value, like the old linear search did
+        normalized_index.setdefault(normalized, key)
+
+        parts = [part for part in normalized.split('/') if part]
+        if len(parts) > 1:
+            # Trailing path parts, so a scan that only differs in its root directory still matches
+            for length in range(2, len(parts) + 1):
+                suffix_index.setdefault(tuple(parts[-length:]), set()).add(key)
+        if parts:
+            filename_index.setdefault(parts[-1], set()).add(key)
+    return normalized_index, suffix_index, filename_index
+
+
+class ParsedChecklist:
+    """Parsed checklist as parallel lists (one entry per Excel row)."""
+
+    def __init__(self, items, descriptions, statuses, displays, tags, invalid, match_indexes=None):
+        self.items = items
+        self.descriptions = descriptions
+        self.statuses = statuses
+        self.displays = displays
+        self.tags = tags
+        # (item, raw status) pairs with an unrecognized status; treated as 'NIET OK'
+        self.invalid = invalid
+        self.match_indexes = match_indexes
+
+    def __len__(self):
+        return len(self.items)
+
+    def ensure_match_indexes(self):
+        """Builds the flexible-match indexes once and returns them."""
+        if self.match_indexes is None:
+            self.match_indexes = build_match_indexes(self.items)
+        return self.match_indexes
+
+    def with_status_overrides(self, overrides):
+        """Returns a copy with item -> status overrides applied (None = blank).
+
+        Items, descriptions and indexes are shared; only the status lists are copied.
+        """
+        if not overrides:
+            return self
+        statuses, displays, tags = list(self.statuses), list(self.displays), list(self.tags)
+        for i, item in enumerate(self.items):
+            if item in overrides:
+                status = overrides[item]
+                if status is None:
+                    statuses[i], displays[i], tags[i] = STATUS_NOT_OK, "", 'NOT_OK'
+                else:
+                    statuses[i], displays[i], tags[i] = STATUS_MAP.get(
+                        str(status).strip().upper(), (STATUS_NOT_OK, STATUS_NOT_OK, 'NOT_OK'))
+        return ParsedChecklist(self.items, self.descriptions, statuses, displays, tags,
+                               self.invalid, self.match_indexes)
+
+    def to_payload(self):
+        """Plain-data form for serialization (see checklist_cache)."""
+        return {
+            'items': self.items,
+            'descriptions': self.descriptions,
+            'statuses': self.statuses,
+            'displays': self.displays,
+            'tags': self.tags,
+            'invalid': self.invalid,
+            'match_indexes': self.match_indexes,
+        }
+
+    @classmethod
+    def from_payload(cls, payload):
+        return cls(**payload)
+
+
+def parse_checklist(df):
+    """Parses a checklist DataFrame column-wise.
+
+    An empty Status cell means 'NIET OK' internally but is shown blank.
+    """
+    items = df['Item'].astype(str).str.strip()
+
+    if 'Omschrijving' in df.columns:
+        descriptions = df['Omschrijving'].astype(str).tolist()
+    else:
+        descriptions = [""] * len(df)
+
+    if 'Status' in df.columns:
+        raw_status = df['Status'].astype(object)
+    else:
+        raw_status = pd.Series(pd.NA, index=df.index, dtype=object)
+
+    normalized = raw_status.astype(str).str.strip().str.upper()
+    # Blank strings (e.g. a freshly generated workbook still in memory) count as empty cells
+    is_empty = raw_status.isna() | (normalized == '')
+
+    statuses = pd.Series(STATUS_NOT_OK, index=df.index, dtype=object)
+    displays = pd.Series("", index=df.index, dtype=object)
+    tags = pd.Series('NOT_OK', index=df.index, dtype=object)
+
+    for excel_value, (status, display, tag) in STATUS_MAP.items():
+        mask = ~is_empty & (normalized == excel_value)
+        statuses[mask] = status
+        displays[mask] = display
+        tags[mask] = tag
+
+    invalid_mask = ~is_empty & ~normalized.isin(list(STATUS_MAP))
+    displays[invalid_mask] = STATUS_NOT_OK
+    invalid = list(zip(items[invalid_mask].tolist(), raw_status[invalid_mask].astype(str).tolist()))
+
+    return ParsedChecklist(
+        items=items.tolist(),
+        descriptions=descriptions,
+        statuses=statuses.tolist(),
+        displays=displays.tolist(),
+        tags=tags.tolist(),
+        invalid=invalid,
+    )
@@ -7,6 +7,9 @@ from pathlib import Path
 CONFIG_FILENAME = "config.json"
 ALT_CONFIG_DIR = os.path.join(os.path.expanduser('~'), '.barcodematch')
 
+# In-memory copy of the config for hot paths; kept current by update_config()
+_cached_config = None
+
 def get_base_path():
     """Get the base path for the application, handling both development and frozen states."""
     if getattr(sys, 'frozen', False):
@@ -103,8 +106,25 @@ def load_config():
     print("[CONFIG] No config file found, using defaults")
     return {}
 
+def get_cached_config():
+    """Return the configuration from memory, loading it from disk only the first time.
+
+    update_config() keeps the cached copy current; call invalidate_config_cache()
+    after editing config.json by other means. Returns a shallow copy.
+    """
+    global _cached_config
+    if _cached_config is None:
+        _cached_config = load_config()
+    return dict(_cached_config)
+
+def invalidate_config_cache():
+    """Force the next get_cached_config() to re-read config.json."""
+    global _cached_config
+    _cached_config = None
+
 def update_config(updates):
     """Update configuration file with new values"""
+    global _cached_config
     config_path = get_config_path()
     
     # Load existing config
@@ -130,6 +150,7 @@ def update_config(updates):
                 os.remove(config_path)
             os.rename(temp_path, config_path)
             
+            _cached_config = config
             print(f"[CONFIG] Successfully saved config to: {config_path}")
             
         except Exception as e:
@@ -151,6 +172,7 @@ def update_config(updates):
                 ensure_config_dir(alt_path)
                 with open(alt_path, 'w', encoding='utf-8') as f:
                     json.dump(config, f, indent=4, ensure_ascii=False)
+                _cached_config = config
                 print(f"[CONFIG] Config saved to alternative location: {alt_path}")
             except Exception as e2:
                 print(f"[ERROR] Failed to save config to alternative location: {e2}")
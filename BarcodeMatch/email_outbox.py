@@ -0,0 +1,499 @@
+"""
+Persistent email outbox with a background SMTP sender.
+
+Project-complete mails are no longer sent on the Tk thread. They are written
+to a small SQLite outbox next to config.json (attachments included, since the
+Excel file may be archived right after completion) and delivered by
+OutboxSender, a background thread that keeps one authenticated SMTP
+connection open across messages, retries failed messages with exponential
+backoff and closes the connection after a quiet period.
+
+For the non-``per_scan`` send modes completed projects are collected as digest
+entries; once a day (at ``email_digest_hour``, default 17:00) they are folded
+into one digest mail.
+
+Self-check against a local SMTP stand-in (needs ``aiosmtpd``):
+    python email_outbox.py --selftest
+"""
+
+import datetime
+import os
+import smtplib
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+OUTBOX_FILENAME = 'email_outbox.db'
+DEFAULT_DIGEST_HOUR = 17
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_S = 30
+BACKOFF_MAX_S = 3600
+POLL_INTERVAL_S = 15
+IDLE_DISCONNECT_S = 120
+SMTP_TIMEOUT_S = 30
+SENT_RETENTION_S = 30 * 24 * 3600
+
+DIGEST_TITLES = {'daily': "Dagelijks rapport"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_due ON messages(status, next_attempt_at);
+CREATE TABLE IF NOT EXISTS attachments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    message_id INTEGER,
+    digest_entry_id INTEGER,
+    filename TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_attachments_message ON attachments(message_id);
+CREATE INDEX IF NOT EXISTS idx_attachments_digest ON attachments(digest_entry_id);
+CREATE TABLE IF NOT EXISTS digest_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    mode TEXT NOT NULL,
+    project TEXT NOT NULL
+);
+"""
+
+
+class SmtpSettings:
+    """SMTP settings as stored in config.json."""
+
+    def __init__(self, server, port=587, sender='', receiver='', user='', password='', starttls=True):
+        self.server = server
+        self.port = port
+        self.sender = sender
+        self.receiver = receiver
+        self.user = user or sender
+        self.password = password
+        self.starttls = starttls
+
+    @classmethod
+    def from_config(cls, config):
+        try:
+            port = int(config.get('smtp_port', 587))
+        except (TypeError, ValueError):
+            port = 587
+        return cls(
+            server=config.get('smtp_server', ''),
+            port=port,
+            sender=config.get('email_sender', ''),
+            receiver=config.get('email_receiver', ''),
+            user=config.get('smtp_user', ''),
+            password=config.get('smtp_password', ''),
+            starttls=bool(config.get('smtp_starttls', True)),
+        )
+
+    def is_complete(self):
+        return all([self.server, self.port, self.sender, self.receiver])
+
+    def connection_key(self):
+        """Settings that require a new connection when they change."""
+        return (self.server, self.port, self.user, self.password, self.starttls)
+
+    def recipients(self):
+        return [addr.strip() for addr in self.receiver.replace(';', ',').split(',') if addr.strip()]
+
+
+def build_message(settings, subject, body, attachments=()):
+    """Builds the MIME message; ``attachments`` is a list of (filename, bytes)."""
+    msg = MIMEMultipart()
+    msg['From'] = settings.sender
+    msg['To'] = settings.receiver
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    for filename, data in attachments:
+        part = MIMEBase("application", "octet-stream")
+        part.set_payload(data)
+        encoders.encode_base64(part)
+        part.add_header("Content-Disposition", f"attachment; filename= {filename}")
+        msg.attach(part)
+    return msg
+
+
+def read_attachment(path):
+    """Returns (filename, bytes) for ``path`` or None when it cannot be read."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return os.path.basename(path), f.read()
+    except OSError as e:
+        print(f"[EMAIL ERROR] Failed to attach file {path}: {e}")
+        return None
+
+
+def open_smtp(settings):
+    """Opens an SMTP connection, with STARTTLS and login when configured."""
+    conn = smtplib.SMTP(settings.server, settings.port, timeout=SMTP_TIMEOUT_S)
+    try:
+        conn.ehlo()
+        if settings.starttls:
+            conn.starttls()
+            conn.ehlo()
+        if settings.password:
+            conn.login(settings.user, settings.password)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+def send_immediately(settings, subject, body, attachments=()):
+    """Sends one message on a fresh connection (used for the test mail). Raises on failure."""
+    conn = open_smtp(settings)
+    try:
+        conn.sendmail(settings.sender, settings.recipients(), build_message(settings, subject, body, attachments).as_string())
+    finally:
+        try:
+            conn.quit()
+        except smtplib.SMTPException:
+            conn.close()
+
+
+def next_digest_time(created_at, hour):
+    """First moment at ``hour``:00 (local time) after ``created_at``."""
+    created = datetime.datetime.fromtimestamp(created_at)
+    due = created.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if due <= created:
+        due += datetime.timedelta(days=1)
+    return due.timestamp()
+
+
+def backoff_delay(attempts):
+    return min(BACKOFF_MAX_S, BACKOFF_BASE_S * (2 ** max(0, attempts - 1)))
+
+
+class EmailOutbox:
+    """SQLite-backed queue of outgoing messages and pending digest entries."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def enqueue(self, subject, body, attachments=(), now=None):
+        """Queues a message for delivery; returns its id."""
+        now = now or time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO messages (created_at, subject, body, next_attempt_at) VALUES (?, ?, ?, ?)",
+                (now, subject, body, now))
+            message_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO attachments (message_id, filename, data) VALUES (?, ?, ?)",
+                [(message_id, filename, sqlite3.Binary(data)) for filename, data in attachments])
+        return message_id
+
+    def add_digest_entry(self, mode, project, attachments=(), now=None):
+        """Records a completed project for the next ``mode`` digest."""
+        now = now or time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO digest_entries (created_at, mode, project) VALUES (?, ?, ?)", (now, mode, project))
+            entry_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO attachments (digest_entry_id, filename, data) VALUES (?, ?, ?)",
+                [(entry_id, filename, sqlite3.Binary(data)) for filename, data in attachments])
+        return entry_id
+
+    def oldest_digest_entries(self):
+        """Returns {mode: created_at of its oldest pending entry}."""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT mode, MIN(created_at) FROM digest_entries GROUP BY mode").fetchall())
+
+    def collect_digest(self, mode, now=None):
+        """Turns all pending ``mode`` digest entries into one queued message. Returns its id or None."""
+        now = now or time.time()
+        with self._connect() as conn:
+            entries = conn.execute(
+                "SELECT id, created_at, project FROM digest_entries WHERE mode = ? AND created_at <= ? ORDER BY created_at",
+                (mode, now)).fetchall()
+            if not entries:
+                return None
+            title = DIGEST_TITLES.get(mode, "Rapport")
+            day = datetime.datetime.fromtimestamp(now).strftime('%d-%m-%Y')
+            lines = [f"{len(entries)} project(en) voltooid:", ""]
+            lines += [f" - {datetime.datetime.fromtimestamp(created).strftime('%d-%m %H:%M')}  {project}"
+                      for _, created, project in entries]
+            body = "\n".join(lines) + "\n\nDe bijbehorende Excel-bestanden zijn bijgevoegd."
+            cursor = conn.execute(
+                "INSERT INTO messages (created_at, subject, body, next_attempt_at) VALUES (?, ?, ?, ?)",
+                (now, f"{title} BarcodeMatch {day}: {len(entries)} project(en) voltooid", body, now))
+            message_id = cursor.lastrowid
+            entry_ids = [(entry_id,) for entry_id, _, _ in entries]
+            conn.executemany(
+                "UPDATE attachments SET message_id = ?, digest_entry_id = NULL WHERE digest_entry_id = ?",
+                [(message_id, entry_id) for (entry_id,) in entry_ids])
+            conn.executemany("DELETE FROM digest_entries WHERE id = ?", entry_ids)
+        return message_id
+
+    def due_messages(self, now=None, limit=20):
+        """Returns pending messages whose next attempt is due, oldest first, with their attachments."""
+        now = now or time.time()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, subject, body, attempts FROM messages "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?", (now, limit)).fetchall()
+            messages = []
+            for message_id, subject, body, attempts in rows:
+                attachments = conn.execute(
+                    "SELECT filename, data FROM attachments WHERE message_id = ? ORDER BY id", (message_id,)).fetchall()
+                messages.append({'id': message_id, 'subject': subject, 'body': body, 'attempts': attempts,
+                                 'attachments': [(filename, bytes(data)) for filename, data in attachments]})
+        return messages
+
+    def mark_sent(self, message_id, now=None):
+        with self._connect() as conn:
+            conn.execute("UPDATE messages SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                         (now or time.time(), message_id))
+            # Attachments are only needed until delivery
+            conn.execute("DELETE FROM attachments WHERE message_id = ?", (message_id,))
+
+    def mark_attempt_failed(self, message_id, attempts, error, now=None):
+        """Schedules a retry with backoff, or gives up after MAX_ATTEMPTS. Returns the new status."""
+        now = now or time.time()
+        status = 'failed' if attempts >= MAX_ATTEMPTS else 'pending'
+        with self._connect() as conn:
+            conn.execute("UPDATE messages SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+                         (status, attempts, str(error)[:500], now + backoff_delay(attempts), message_id))
+        return status
+
+    def retry_failed(self):
+        """Puts messages that gave up back in the queue (e.g. after fixing the SMTP settings)."""
+        with self._connect() as conn:
+            return conn.execute("UPDATE messages SET status = 'pending', attempts = 0, next_attempt_at = ? "
+                                "WHERE status = 'failed'", (time.time(),)).rowcount
+
+    def purge_sent(self, older_than_s=SENT_RETENTION_S):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM messages WHERE status = 'sent' AND sent_at < ?", (time.time() - older_than_s,))
+
+    def counts(self):
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM messages GROUP BY status").fetchall())
+            counts['digest'] = conn.execute("SELECT COUNT(*) FROM digest_entries").fetchone()[0]
+        return {'pending': counts.get('pending', 0), 'failed': counts.get('failed', 0),
+                'sent': counts.get('sent', 0), 'digest': counts['digest']}
+
+
+class OutboxSender:
+    """Background thread delivering the outbox over one reused SMTP connection."""
+
+    def __init__(self, outbox, config_provider, poll_interval=POLL_INTERVAL_S, idle_disconnect=IDLE_DISCONNECT_S):
+        self.outbox = outbox
+        self.config_provider = config_provider
+        self.poll_interval = poll_interval
+        self.idle_disconnect = idle_disconnect
+        self._conn = None
+        self._conn_key = None
+        self._last_used = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._cycle_lock = threading.Lock()
+        self.connections_opened = 0
+        self.last_error = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._close()
+
+    def wake(self):
+        """Process the outbox now instead of at the next poll."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"[EMAIL ERROR] Outbox cycle failed: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+        self._close()
+
+    def run_once(self, now=None):
+        """One delivery cycle: fold due digests, send due messages. Returns the number sent."""
+        with self._cycle_lock:
+            config = self.config_provider()
+            now = now or time.time()
+            self._collect_due_digests(config, now)
+
+            messages = self.outbox.due_messages(now)
+            if not messages:
+                if self._conn is not None and time.time() - self._last_used > self.idle_disconnect:
+                    self._close()
+                return 0
+
+            settings = SmtpSettings.from_config(config)
+            if not settings.is_complete():
+                self.last_error = "Missing one or more required email settings."
+                return 0
+
+            sent = 0
+            for message in messages:
+                if self._stop.is_set():
+                    break
+                try:
+                    self._deliver(settings, message)
+                except Exception as e:
+                    self._close()
+                    self.last_error = str(e)
+                    attempts = message['attempts'] + 1
+                    status = self.outbox.mark_attempt_failed(message['id'], attempts, e)
+                    print(f"[EMAIL ERROR] Sending '{message['subject']}' failed (attempt {attempts}, {status}): {e}")
+                    # Same server for the rest of the batch; wait for the backoff instead of hammering it
+                    break
+                self.outbox.mark_sent(message['id'])
+                sent += 1
+                print(f"[EMAIL INFO] Email '{message['subject']}' sent to {settings.receiver}.")
+            if sent:
+                self.outbox.purge_sent()
+            return sent
+
+    def _collect_due_digests(self, config, now):
+        try:
+            hour = int(config.get('email_digest_hour', DEFAULT_DIGEST_HOUR))
+        except (TypeError, ValueError):
+            hour = DEFAULT_DIGEST_HOUR
+        for mode, oldest in self.outbox.oldest_digest_entries().items():
+            if now >= next_digest_time(oldest, hour):
+                self.outbox.collect_digest(mode, now)
+
+    def _deliver(self, settings, message):
+        raw = build_message(settings, message['subject'], message['body'], message['attachments']).as_string()
+        reused = self._ensure_connection(settings)
+        try:
+            self._conn.sendmail(settings.sender, settings.recipients(), raw)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            if not reused:
+                raise
+            # The kept-open connection went stale; one fresh attempt
+            self._close()
+            self._ensure_connection(settings)
+            self._conn.sendmail(settings.sender, settings.recipients(), raw)
+        self._last_used = time.time()
+
+    def _ensure_connection(self, settings):
+        """Returns True when an existing connection is reused."""
+        if self._conn is not None and self._conn_key == settings.connection_key():
+            return True
+        self._close()
+        self._conn = open_smtp(settings)
+        self._conn_key = settings.connection_key()
+        self.connections_opened += 1
+        return False
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.quit()
+            except Exception:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+            self._conn = None
+            self._conn_key = None
+
+
+_default_sender = None
+_default_sender_lock = threading.Lock()
+
+
+def get_email_sender():
+    """Returns the application-wide sender (outbox stored next to config.json). Not started automatically."""
+    global _default_sender
+    with _default_sender_lock:
+        if _default_sender is None:
+            from config_utils import get_config_path, get_cached_config
+            outbox = EmailOutbox(os.path.join(os.path.dirname(get_config_path()), OUTBOX_FILENAME))
+            _default_sender = OutboxSender(outbox, get_cached_config)
+        return _default_sender
+
+
+def _selftest():
+    """Delivers queued and digest mail to a local aiosmtpd server and checks connection reuse."""
+    import tempfile
+    from aiosmtpd.controller import Controller
+    from aiosmtpd.handlers import Sink
+
+    class Collector(Sink):
+        def __init__(self):
+            self.messages = []
+
+        async def handle_DATA(self, server, session, envelope):
+            self.messages.append(envelope)
+            return '250 OK'
+
+    # The controller's readiness check connects to the given port, so port 0 cannot be used
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    handler = Collector()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config = {'smtp_server': '127.0.0.1', 'smtp_port': port,
+                      'email_sender': 'barcodematch@example.com', 'email_receiver': 'werkvoorbereiding@example.com',
+                      'smtp_starttls': False}
+            outbox = EmailOutbox(os.path.join(tmp_dir, OUTBOX_FILENAME))
+            sender = OutboxSender(outbox, lambda: config)
+            for i in range(3):
+                outbox.enqueue(f"Project Voltooid: MO0000{i}", "Test", [(f"MO0000{i}.xlsx", b"xlsx")])
+            yesterday = time.time() - 2 * 24 * 3600
+            for i in range(2):
+                outbox.add_digest_entry('daily', f"MO1000{i}", [(f"MO1000{i}.xlsx", b"xlsx")], now=yesterday)
+            sent = sender.run_once()
+            sender.stop()
+            counts = outbox.counts()
+            print(f"verzonden: {sent}, ontvangen: {len(handler.messages)}, verbindingen: {sender.connections_opened}, "
+                  f"outbox: {counts}")
+            assert sent == 4 and len(handler.messages) == 4, "niet alle berichten afgeleverd"
+            assert sender.connections_opened == 1, "SMTP-verbinding niet hergebruikt"
+            assert counts['pending'] == 0 and counts['digest'] == 0
+            print("OK")
+    finally:
+        controller.stop()
+
+
+if __name__ == '__main__':
+    if '--selftest' in sys.argv:
+        _selftest()
+    else:
+        print(__doc__)
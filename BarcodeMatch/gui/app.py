@@ -2,6 +2,9 @@ import os
 import sys
 import time
 
+# Start of the cold-start clock for the startup report
+_IMPORT_START = time.perf_counter()
+
 # Debug mode check
 DEBUG = os.environ.get('BARCODEMATCH_DEBUG', '').lower() == 'true'
 if DEBUG:
@@ -9,22 +12,93 @@ if DEBUG:
 
 import tkinter as tk
 from tkinter import ttk
-from gui.panels.import_panel import ImportPanel
-from gui.panels.scanner_panel import ScannerPanel
-from gui.panels.email_panel import EmailPanel
-from gui.panels.database_panel import DatabasePanel
-from gui.panels.help_panel import HelpPanel
-from gui.panels.settings_panel import SettingsPanel
-from gui.menu import create_menu
-from gui.asset_utils import get_asset_path, asset_exists
+import importlib
+from gui.menu import create_menu, MENU_OPTIONS, MENU_ICON_SIZE
+from gui.asset_utils import get_asset_path, asset_exists, preload_images
 
 import threading
 import time
 import json
-from config_utils import get_config_path, load_config
+from config_utils import get_config_path, load_config, get_cached_config
+from startup_utils import create_startup_manager
+
+_IMPORT_END = time.perf_counter()
+
+# Panel classes are imported when a panel is first built, so importing this module
+# (and the splash) does not wait for pandas, pyserial and friends
+PANEL_CLASSES = {
+    "Import": ("gui.panels.import_panel", "ImportPanel"),
+    "Scanner": ("gui.panels.scanner_panel", "ScannerPanel"),
+    "Email": ("gui.panels.email_panel", "EmailPanel"),
+    "Database": ("gui.panels.database_panel", "DatabasePanel"),
+    "Help": ("gui.panels.help_panel", "HelpPanel"),
+    "Settings": ("gui.panels.settings_panel", "SettingsPanel"),
+}
+
+# Panels built right after the main window, in this order
+PRELOAD_PANELS = ("Scanner", "Database")
+
+
+def load_panel_class(name):
+    module_name, class_name = PANEL_CLASSES[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def probe_db_connection(config):
+    """Checks the database API once; returns (status text, color) for the status display."""
+    if not config.get('database_enabled', True):
+        if DEBUG:
+            print('[DB CHECK] Database disabled in config.')
+        return "Uitgeschakeld", "orange"
+    
+    url = config.get('api_url', 'http://localhost:5001/log')
+    # Robustly replace only the trailing '/log' with '/logs'
+    if url.endswith('/log'):
+        url = url[:-4] + '/logs'
+    elif not url.endswith('/logs'):
+        url = url.rstrip('/') + '/logs'
+    
+    if DEBUG:
+        print(f'[DB CHECK] Checking database connection at: {url}')
+    try:
+        import requests
+        resp = requests.get(url, timeout=5)
+        if resp.status_code == 200:
+            try:
+                # Optionally check if response is valid JSON (list of logs)
+                data = resp.json()
+                if isinstance(data, list):
+                    if DEBUG:
+                        print('[DB CHECK] Connection successful, valid logs received.')
+                else:
+                    if DEBUG:
+                        print(f'[DB CHECK] Connection OK but unexpected response: {data}')
+            except Exception as e:
+                if DEBUG:
+                    print(f'[DB CHECK] Connection OK but JSON decode failed: {e}')
+            return "Verbonden", "green"
+        if DEBUG:
+            print(f'[DB CHECK] Connection failed, status: {resp.status_code}, body: {resp.text}')
+        return "Niet verbonden", "red"
+    except Exception as e:
+        if DEBUG:
+            print(f'[DB CHECK] Exception during GET: {e}')
+        return "Niet verbonden", "red"
+
+
+def warm_up_pandas():
+    """Imports pandas/openpyxl ahead of the first checklist; returns the loaded module names."""
+    loaded = []
+    for module_name in ("pandas", "openpyxl"):
+        try:
+            importlib.import_module(module_name)
+            loaded.append(module_name)
+        except ImportError as e:
+            print(f'[STARTUP] {module_name} niet beschikbaar: {e}')
+    return loaded
 
 class BarcodeMatchApp:
-    def __init__(self, root, skip_preload=False):
+    def __init__(self, root, skip_preload=False, startup=None):
         self.root = root
         self.root.title("BarcodeMatch")
         self._set_icon()
@@ -34,25 +108,23 @@ class BarcodeMatchApp:
         self.db_connection_status_color = "red"
         self._db_status_callbacks = []
 
+        # StartupManager of run_app(); it runs the DB check and panel preload as startup tasks
+        self.startup = startup
+
         # Initialize panels lazily - only create when needed
         self.panels = {}
-        self._panel_classes = {
-            "Import": ImportPanel,
-            "Scanner": ScannerPanel,
-            "Email": EmailPanel,
-            "Database": DatabasePanel,
-            "Help": HelpPanel,
-            "Settings": SettingsPanel,
-        }
+        self._panel_classes = PANEL_CLASSES
         
         self.current_panel_name = None
         
         # Create menu and start background services
         create_menu(self.root, self)
-        self._start_db_connection_check()
+        if startup is None:
+            self._start_db_connection_check()
+        self._start_email_outbox()
         
         # Pre-load critical panels in background
-        if not skip_preload:
+        if not skip_preload and startup is None:
             self._preload_critical_panels()
 
         self.notebook = None
@@ -61,27 +133,28 @@ class BarcodeMatchApp:
         """Pre-load critical panels in background thread"""
         def preload():
             try:
-                # Pre-load Scanner panel as it's most commonly used
-                if DEBUG:
-                    print('[DIAG] Pre-loading Scanner panel...')
-                self.get_panel_by_name("Scanner")
-                if DEBUG:
-                    print('[DIAG] Scanner panel pre-loaded')
-                
-                # Pre-load Database panel for connection status
-                if DEBUG:
-                    print('[DIAG] Pre-loading Database panel...')
-                db_panel = self.get_panel_by_name("Database")
-                if db_panel:
-                    # Subscribe the database panel to status updates
-                    self.subscribe_db_status(db_panel.update_connection_status)
-                if DEBUG:
-                    print('[DIAG] Database panel pre-loaded')
+                self.preload_panels()
             except Exception as e:
                 print(f'[DIAG ERROR] Panel pre-loading failed: {e}')
         
         threading.Thread(target=preload, daemon=True).start()
 
+    def preload_panels(self):
+        """Builds the PRELOAD_PANELS (Scanner is used most, Database shows the connection status).
+
+        Each panel's build time is recorded as a startup phase when started from run_app().
+        """
+        for name in PRELOAD_PANELS:
+            if DEBUG:
+                print(f'[DIAG] Pre-loading {name} panel...')
+            start = time.perf_counter()
+            panel = self.get_panel_by_name(name)
+            if self.startup is not None:
+                self.startup.record_phase(f"Paneel {name}", start, time.perf_counter(),
+                                          'ok' if panel else 'error')
+            if DEBUG:
+                print(f'[DIAG] {name} panel pre-loaded')
+
     def get_panel_by_name(self, name):
         """Get panel by name, creating it lazily if needed"""
         if name not in self.panels:
@@ -89,7 +162,7 @@ class BarcodeMatchApp:
                 if DEBUG:
                     print(f'[DIAG] Creating panel: {name}')
                 try:
-                    panel_class = self._panel_classes[name]
+                    panel_class = load_panel_class(name)
                     panel = panel_class(self.root, self)
                     self.panels[name] = panel
                     
@@ -130,52 +203,18 @@ class BarcodeMatchApp:
     def _start_db_connection_check(self):
         """Start database connection checking"""
         def check():
-            config = load_config()
-            if not config.get('database_enabled', True):
-                if DEBUG:
-                    print('[DB CHECK] Database disabled in config.')
-                self._set_db_status("Uitgeschakeld", "orange")
-                return
-            
-            url = config.get('api_url', 'http://localhost:5001/log')
-            # Robustly replace only the trailing '/log' with '/logs'
-            if url.endswith('/log'):
-                url = url[:-4] + '/logs'
-            elif not url.endswith('/logs'):
-                url = url.rstrip('/') + '/logs'
-            
-            if DEBUG:
-                print(f'[DB CHECK] Checking database connection at: {url}')
-            try:
-                import requests
-                resp = requests.get(url, timeout=5)
-                if resp.status_code == 200:
-                    try:
-                        # Optionally check if response is valid JSON (list of logs)
-                        data = resp.json()
-                        if isinstance(data, list):
-                            if DEBUG:
-                                print('[DB CHECK] Connection successful, valid logs received.')
-                            self._set_db_status("Verbonden", "green")
-                        else:
-                            if DEBUG:
-                                print(f'[DB CHECK] Connection OK but unexpected response: {data}')
-                            self._set_db_status("Verbonden", "green")
-                    except Exception as e:
-                        if DEBUG:
-                            print(f'[DB CHECK] Connection OK but JSON decode failed: {e}')
-                        self._set_db_status("Verbonden", "green")
-                else:
-                    if DEBUG:
-                        print(f'[DB CHECK] Connection failed, status: {resp.status_code}, body: {resp.text}')
-                    self._set_db_status("Niet verbonden", "red")
-            except Exception as e:
-                if DEBUG:
-                    print(f'[DB CHECK] Exception during GET: {e}')
-                self._set_db_status("Niet verbonden", "red")
+            self._set_db_status(*probe_db_connection(load_config()))
         
         threading.Thread(target=check, daemon=True).start()
 
+    def _start_email_outbox(self):
+        """Start the background sender so mail queued in an earlier session is delivered too."""
+        try:
+            from email_outbox import get_email_sender
+            get_email_sender().start()
+        except Exception as e:
+            print(f'[EMAIL ERROR] Could not start email outbox: {e}')
+
     def recheck_db_connection(self):
         """Public method for panels to trigger a database connection recheck."""
         if DEBUG:
@@ -218,10 +257,9 @@ class BarcodeMatchApp:
                 self.tab_images[name] = None
 
     def load_app_config(self):
-        """Loads the application configuration."""
+        """Returns the application configuration (in-memory copy, see config_utils.get_cached_config)."""
         try:
-            # Use the current config system to get the configuration
-            return load_config()
+            return get_cached_config()
         except Exception as e:
             print(f"[ERROR] Could not load app config: {e}")
             return {}
@@ -322,13 +360,7 @@ class BarcodeMatchApp:
             print("No valid icon found.")
 
     def _init_tabs(self):
-        panels = [
-            ("Import", ImportPanel),
-            ("Scanner", ScannerPanel),
-            ("Email", EmailPanel),
-            ("Database", DatabasePanel),
-            ("Help", HelpPanel)
-        ]
+        panels = [(name, load_panel_class(name)) for name in ("Import", "Scanner", "Email", "Database", "Help")]
         for idx, (name, PanelClass) in enumerate(panels):
             frame = ttk.Frame(self.notebook)
             # Add tab with image and text if image is available
@@ -351,40 +383,81 @@ class BarcodeMatchApp:
 def run_app():
     if DEBUG:
         print('[DIAG] run_app() called')
-    root = tk.Tk()
-    root.withdraw()  # Hide main window for splash
+    startup = create_startup_manager(t0=_IMPORT_START)
+    startup.record_phase("Imports (gui.app)", _IMPORT_START, _IMPORT_END)
+
+    with startup.phase("Tk root"):
+        root = tk.Tk()
+        root.withdraw()  # Hide main window for splash
     
-    from gui.splashscreen import SplashScreen
-    logo_path = get_asset_path('Logo.png')
-    splash = SplashScreen(root, logo_path, duration=2000) # Set duration to 2 seconds
+    with startup.phase("Splash"):
+        from gui.splashscreen import SplashScreen
+        logo_path = get_asset_path('Logo.png')
+        splash = SplashScreen(root, logo_path, duration=2000) # Set duration to 2 seconds
+
+        # Force the splash screen to draw immediately
+        splash.update_idletasks()
+        splash.update()
+    splash_shown = time.perf_counter()
+
+    # Startup tasks; everything whose dependencies are done runs concurrently
+    def create_main_app():
+        if DEBUG:
+            print('[DIAG] Background initialization started')
+        # Its own __init__ starts the email outbox; DB check and preload run as tasks below
+        return BarcodeMatchApp(root, skip_preload=True, startup=startup)
+
+    startup.add_startup_task("Configuratie laden", get_cached_config)
+    startup.add_startup_task("Iconen en assets", preload_images,
+                             [(opt["icon"], MENU_ICON_SIZE) for opt in MENU_OPTIONS])
+    startup.add_startup_task("pandas warm-up", warm_up_pandas)
+    startup.add_startup_task("Database health check",
+                             lambda: probe_db_connection(startup.results["Configuratie laden"]),
+                             depends_on=("Configuratie laden",))
+    startup.add_startup_task("Hoofdvenster", create_main_app,
+                             depends_on=("Configuratie laden", "Iconen en assets"))
+    startup.add_startup_task("Database status tonen",
+                             lambda: startup.results["Hoofdvenster"]._set_db_status(
+                                 *startup.results["Database health check"]),
+                             depends_on=("Hoofdvenster", "Database health check"))
+    # Tk widgets are built one panel at a time; the preload waits for pandas so the
+    # Scanner panel import does not race the warm-up for the import lock
+    startup.add_startup_task("Panelen voorladen", lambda: startup.results["Hoofdvenster"].preload_panels(),
+                             depends_on=("Hoofdvenster", "pandas warm-up"))
+
+    # The report is written once the tasks are done and the main window is visible
+    pending_report = {'tasks': True, 'window': True}
 
-    # Force the splash screen to draw immediately
-    splash.update_idletasks()
-    splash.update()
+    def finish_step(step):
+        pending_report[step] = False
+        if any(pending_report.values()):
+            return
+        total = time.perf_counter() - startup.t0
 
-    # This function will run in the background to initialize the app
-    def background_init():
-        """Initialize the application in a background thread."""
+        def write():
+            try:
+                path = startup.write_report(total_seconds=total)
+                print(f'[STARTUP] Opstarttijd {total * 1000:.0f} ms, rapport: {path}')
+            except Exception as e:
+                print(f'[STARTUP ERROR] Could not write startup report: {e}')
+        threading.Thread(target=write, daemon=True).start()
+
+    def on_tasks_complete(completed, failed):
+        if DEBUG:
+            print(f'[DIAG] Background initialization completed ({len(failed)} failed)')
         try:
-            if DEBUG:
-                print('[DIAG] Background initialization started')
-            # Create the app instance. Its own __init__ will start background tasks.
-            BarcodeMatchApp(root)
-            if DEBUG:
-                print('[DIAG] Background initialization completed')
-        except Exception as e:
-            print(f'[DIAG ERROR] Background initialization failed: {e}')
-            import traceback
-            traceback.print_exc()
+            root.after(0, lambda: finish_step('tasks'))
+        except (tk.TclError, RuntimeError):
+            pass
 
-    # Start the background initialization
-    init_thread = threading.Thread(target=background_init, daemon=True)
-    init_thread.start()
+    startup.execute_startup_tasks(on_complete=on_tasks_complete)
 
     # This function will run after the 2-second splash duration
     def show_main_window():
         splash.destroy()
         root.deiconify()
+        startup.record_phase("Splash zichtbaar", splash_shown, time.perf_counter())
+        finish_step('window')
 
     # Schedule the main window to appear after 2 seconds
     root.after(2000, show_main_window)
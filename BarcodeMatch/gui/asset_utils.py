@@ -4,6 +4,8 @@ from pathlib import Path
 
 # Cache for asset paths to avoid repeated filesystem checks
 _asset_cache = {}
+# Decoded and resized PIL images by (filename, size); filled by preload_images() during startup
+_image_cache = {}
 
 def get_base_path():
     """Get the base path for assets, handling both development and frozen states."""
@@ -54,6 +56,31 @@ def asset_exists(filename):
     
     return exists
 
+def load_pil_image(filename, size):
+    """Returns the asset as a PIL image resized to ``size``, or None if it is missing/unreadable.
+
+    Results are cached, so images decoded by preload_images() in a startup thread are free here.
+    The Tk PhotoImage still has to be created on the Tk side by the caller.
+    """
+    key = (filename, tuple(size))
+    if key in _image_cache:
+        return _image_cache[key]
+    from PIL import Image
+    path = get_asset_path(filename)
+    img = None
+    if os.path.exists(path):
+        try:
+            with Image.open(path) as src:
+                img = src.resize(tuple(size), Image.LANCZOS)
+        except Exception as e:
+            print(f"[ERROR] Failed to load image {filename}: {e}")
+    _image_cache[key] = img
+    return img
+
+def preload_images(specs):
+    """Decodes [(filename, size)] ahead of time; returns how many images were found."""
+    return sum(1 for filename, size in specs if load_pil_image(filename, size) is not None)
+
 def list_assets():
     """List all available assets (useful for debugging)"""
     assets_dir = get_assets_dir()
@@ -1,24 +1,20 @@
 import tkinter as tk
 from tkinter import PhotoImage
-from PIL import Image, ImageTk
+from PIL import ImageTk
 import os
 
-# Panel imports for BarcodeMatch
-from gui.panels.import_panel import ImportPanel
-from gui.panels.scanner_panel import ScannerPanel
-from gui.panels.email_panel import EmailPanel
-from gui.panels.database_panel import DatabasePanel
-from gui.panels.help_panel import HelpPanel
-from gui.panels.settings_panel import SettingsPanel
-from gui.asset_utils import get_asset_path, asset_exists
+from gui.asset_utils import get_asset_path, asset_exists, load_pil_image
 
+MENU_ICON_SIZE = (75, 75)
+
+# Panels are built by BarcodeMatchApp.get_panel_by_name (see gui.app.PANEL_CLASSES)
 MENU_OPTIONS = [
-    {"name": "Import", "panel": ImportPanel, "icon": "importeren.png"},
-    {"name": "Scanner", "panel": ScannerPanel, "icon": "scanner.png"},
-    {"name": "Email", "panel": EmailPanel, "icon": "email.png"},
-    {"name": "Database", "panel": DatabasePanel, "icon": "database.png"},
-    {"name": "Help", "panel": HelpPanel, "icon": "help.png"},
-    {"name": "Settings", "panel": SettingsPanel, "icon": "settings.png"},
+    {"name": "Import", "icon": "importeren.png"},
+    {"name": "Scanner", "icon": "scanner.png"},
+    {"name": "Email", "icon": "email.png"},
+    {"name": "Database", "icon": "database.png"},
+    {"name": "Help", "icon": "help.png"},
+    {"name": "Settings", "icon": "settings.png"},
 ]
 
 def create_menu(root, main_app):
@@ -31,9 +27,10 @@ def create_menu(root, main_app):
     for opt in MENU_OPTIONS:
         icon_path = get_asset_path(opt["icon"])
         if os.path.exists(icon_path):
+            # Usually already decoded by the startup asset task
+            pil_img = load_pil_image(opt["icon"], MENU_ICON_SIZE)
             try:
-                pil_img = Image.open(icon_path).resize((75, 75), Image.LANCZOS)
-                icon_img = ImageTk.PhotoImage(pil_img)
+                icon_img = ImageTk.PhotoImage(pil_img) if pil_img is not None else None
             except Exception as e:
                 print(f"[ERROR] Failed to load icon {opt['icon']}: {e}")
                 icon_img = None
@@ -2,19 +2,20 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import json
-import smtplib
+import threading
 import traceback
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
 from config_utils import update_config, get_config_path
+from email_outbox import get_email_sender, read_attachment, send_immediately, SmtpSettings
+
+OUTBOX_REFRESH_MS = 5000
 
 class EmailPanel(ttk.Frame):
     def __init__(self, parent, main_app):
         super().__init__(parent)
         self.main_app = main_app
+        self.email_sender = get_email_sender()
         self._setup_ui()
+        self._refresh_outbox_status()
 
     def _setup_ui(self):
         email_group = ttk.LabelFrame(self, text="Email Configuratie", padding="10")
@@ -91,6 +92,11 @@ class EmailPanel(ttk.Frame):
         self.email_send_mode_combobox.grid(row=8, column=1, sticky=tk.W, pady=(15, 5))
         self.email_send_mode_combobox.bind("<<ComboboxSelected>>", self.on_email_mode_select)
 
+        self.outbox_status_var = tk.StringVar(value="")
+        ttk.Label(email_group, textvariable=self.outbox_status_var).grid(row=9, column=0, columnspan=2, sticky=tk.W, pady=(10, 2))
+        self.retry_button = ttk.Button(email_group, text="Mislukte e-mails opnieuw proberen", command=self.retry_failed_emails)
+        self.retry_button.grid(row=10, column=0, columnspan=2, sticky=tk.W, pady=2)
+
     def save_email_settings_to_config(self):
         try:
             updates = {
@@ -110,63 +116,80 @@ class EmailPanel(ttk.Frame):
         self.email_send_mode_var.set(value)
         self.save_email_settings_to_config()
 
-    def _send_email(self, subject, body, attachment_path=None):
-        sender = self.sender_var.get()
-        receiver = self.receiver_var.get()
-        password = self.password_var.get()
-        smtp_server = self.smtp_var.get()
+    def _current_settings(self):
         try:
             smtp_port = int(self.port_var.get())
         except (ValueError, TypeError):
             smtp_port = 587
             print("[WARN] Invalid SMTP port, falling back to 587.")
-
-        if not all([sender, receiver, password, smtp_server, smtp_port]):
-            print("[EMAIL ERROR] Missing one or more required email settings.")
-            return False
-
-        msg = MIMEMultipart()
-        msg['From'] = sender
-        msg['To'] = receiver
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-
-        if attachment_path and os.path.exists(attachment_path):
-            try:
-                with open(attachment_path, "rb") as attachment:
-                    part = MIMEBase("application", "octet-stream")
-                    part.set_payload(attachment.read())
-                encoders.encode_base64(part)
-                part.add_header("Content-Disposition", f"attachment; filename= {os.path.basename(attachment_path)}")
-                msg.attach(part)
-            except Exception as e:
-                print(f"[EMAIL ERROR] Failed to attach file {attachment_path}: {e}")
-
+        config = {
+            'email_sender': self.sender_var.get(), 'email_receiver': self.receiver_var.get(),
+            'smtp_server': self.smtp_var.get(), 'smtp_port': smtp_port,
+            'smtp_user': self.user_var.get(), 'smtp_password': self.password_var.get(),
+        }
+        if self.main_app is not None:
+            config['smtp_starttls'] = self.main_app.load_app_config().get('smtp_starttls', True)
+        return SmtpSettings.from_config(config)
+
+    def _refresh_outbox_status(self):
+        """Shows the outbox counters; refreshed periodically while the panel exists."""
+        if not self.winfo_exists():
+            return
         try:
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.starttls()
-            server.login(sender, password)
-            server.sendmail(sender, receiver, msg.as_string())
-            server.quit()
-            print(f"[EMAIL INFO] Email sent successfully to {receiver}.")
-            return True
+            counts = self.email_sender.outbox.counts()
+            text = f"Wachtrij: {counts['pending']} te verzenden, {counts['digest']} voor rapport"
+            if counts['failed']:
+                text += f", {counts['failed']} mislukt"
+            if counts['pending'] and self.email_sender.last_error:
+                text += f" (laatste fout: {self.email_sender.last_error})"
+            self.outbox_status_var.set(text)
         except Exception as e:
-            print(f"[EMAIL ERROR] Failed to send email: {e}")
-            print(traceback.format_exc())
-            return False
+            self.outbox_status_var.set(f"Wachtrij niet beschikbaar: {e}")
+        self.after(OUTBOX_REFRESH_MS, self._refresh_outbox_status)
+
+    def retry_failed_emails(self):
+        count = self.email_sender.outbox.retry_failed()
+        self.email_sender.wake()
+        messagebox.showinfo("E-mail wachtrij", f"{count} mislukte e-mail(s) opnieuw in de wachtrij geplaatst.")
 
     def send_test_email(self):
+        """Sends a test mail directly (bypassing the outbox) in a worker thread."""
         subject = "Test E-mail van BarcodeMatch"
         body = "Dit is een test e-mail om de SMTP-instellingen te verifiëren."
-        if self._send_email(subject, body):
-            messagebox.showinfo("Testmail", "Testmail succesvol verzonden!")
-        else:
-            messagebox.showerror("Testmail Fout", "Verzenden van testmail mislukt. Controleer de instellingen en logs.")
+        settings = self._current_settings()
+        if not settings.is_complete():
+            messagebox.showerror("Testmail Fout", "Vul afzender, ontvanger en SMTP server in.")
+            return
+
+        def worker():
+            try:
+                send_immediately(settings, subject, body)
+                print(f"[EMAIL INFO] Test email sent successfully to {settings.receiver}.")
+                self.after(0, lambda: messagebox.showinfo("Testmail", "Testmail succesvol verzonden!"))
+            except Exception as e:
+                print(f"[EMAIL ERROR] Failed to send test email: {e}")
+                print(traceback.format_exc())
+                msg = f"Verzenden van testmail mislukt: {e}"
+                self.after(0, messagebox.showerror, "Testmail Fout", msg)
+
+        threading.Thread(target=worker, daemon=True).start()
 
     def send_project_complete_email(self, project_name, excel_path):
-        if not self.email_enabled_var.get() or self.email_send_mode_var.get() != 'per_scan':
-            return
+        """Queues the project-complete mail ('per_scan') or adds the project to the digest (other modes).
 
-        subject = f"Project Voltooid: {project_name}"
-        body = f"Alle items voor project '{project_name}' zijn succesvol gescand.\n\nHet bijbehorende Excel-bestand is bijgevoegd."
-        self._send_email(subject, body, attachment_path=excel_path)
+        Returns immediately; the background sender delivers it. The Excel file is copied into
+        the outbox now, because it may be archived before the mail goes out.
+        """
+        if not self.email_enabled_var.get():
+            return False
+
+        attachments = [a for a in [read_attachment(excel_path)] if a]
+        mode = self.email_send_mode_var.get()
+        if mode == 'per_scan':
+            subject = f"Project Voltooid: {project_name}"
+            body = f"Alle items voor project '{project_name}' zijn succesvol gescand.\n\nHet bijbehorende Excel-bestand is bijgevoegd."
+            self.email_sender.outbox.enqueue(subject, body, attachments)
+        else:
+            self.email_sender.outbox.add_digest_entry(mode, project_name, attachments)
+        self.email_sender.wake()
+        return True
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from build_info import get_build_number
 from gui.asset_utils import get_asset_path
+from startup_utils import load_startup_report, format_startup_report
 import os
 import sys
 
@@ -18,11 +19,36 @@ class HelpPanel(ttk.Frame):
         help_tab_btn.pack(pady=20)
         build_label = tk.Label(frame, text=f"Build: {get_build_number()}", font=("Arial", 9), fg="#888888")
         build_label.pack(pady=(0, 12))
-        spacer = tk.Label(frame)
-        spacer.pack(expand=True, fill='both')
+
+        # Startup timings (written by run_app, see startup_utils.StartupManager)
+        startup_frame = ttk.LabelFrame(frame, text="Opstarttijd")
+        startup_frame.pack(fill='both', expand=True, padx=20, pady=(0, 8))
+        self.startup_summary_var = tk.StringVar()
+        tk.Label(startup_frame, textvariable=self.startup_summary_var, font=("Arial", 9), anchor='w',
+                 justify='left').pack(fill='x', padx=6, pady=(4, 2))
+        self.startup_text = tk.Text(startup_frame, height=12, font=("Courier New", 9), wrap='none',
+                                    relief=tk.FLAT, bg="#f7f7f7")
+        self.startup_text.pack(fill='both', expand=True, padx=6)
+        ttk.Button(startup_frame, text="Vernieuwen", command=self._show_startup_report).pack(anchor='e', padx=6, pady=4)
+        self._show_startup_report()
+
         copyright_label = tk.Label(frame, text="© 2025 RVL", font=(None, 9), fg="#888888")
         copyright_label.pack(side=tk.BOTTOM, pady=2)
 
+    def _show_startup_report(self):
+        runs = load_startup_report()
+        self.startup_text.config(state='normal')
+        self.startup_text.delete('1.0', tk.END)
+        if not runs:
+            self.startup_summary_var.set("Nog geen opstartrapport beschikbaar.")
+        else:
+            totals = [run.get('total_ms', 0) for run in runs]
+            self.startup_summary_var.set(
+                f"Laatste {len(runs)} starts: gemiddeld {sum(totals) / len(totals):.0f} ms, "
+                f"snelste {min(totals):.0f} ms, traagste {max(totals):.0f} ms")
+            self.startup_text.insert('1.0', format_startup_report(runs[0]))
+        self.startup_text.config(state='disabled')
+
     def _open_manual(self):
         # Use the asset_utils to get the correct path for both dev and frozen states
         manual_path = get_asset_path('BarcodeMatch_Gebruikershandleiding.pdf')
@@ -6,6 +6,10 @@ from tkinter import ttk, filedialog, messagebox
 import json
 import threading
 
+from hop_scanner import scan_hop_files, DirectoryIndex, DEFAULT_WORKERS
+from batch_import import (extract_mdb_items, find_projects, run_batch, format_summary, checklist_excel_path,
+                          write_checklist, DEFAULT_BATCH_WORKERS, MODE_GANNOMAT, MODE_OPUS)
+
 # Debug mode check
 DEBUG = os.environ.get('BARCODEMATCH_DEBUG', '').lower() == 'true'
 
@@ -33,6 +37,10 @@ class ImportPanel(ttk.Frame):
         self.base_dir_var.trace_add('write', lambda *args: self.save_config())
         self.CONFIG_FILE = get_config_path()
         self.scan_mode_var = tk.StringVar(value="OPUS")
+        self.use_scan_index_var = tk.BooleanVar(value=False)
+        self.scan_workers = DEFAULT_WORKERS
+        self.batch_workers = DEFAULT_BATCH_WORKERS
+        self._stop_scan_event = threading.Event()
         
         # Lazy loading flags
         self._pandas = None
@@ -80,6 +88,15 @@ class ImportPanel(ttk.Frame):
                         self.scan_mode_var.set(config.get('default_scan_mode', 'OPUS'))
                     if hasattr(self, 'scanner_type_var'):
                         self.scanner_type_var.set(config.get('default_scanner_type', 'COM'))
+                    self.use_scan_index_var.set(bool(config.get('import_scan_index', False)))
+                    try:
+                        self.scan_workers = max(1, int(config.get('import_scan_workers', DEFAULT_WORKERS)))
+                    except (TypeError, ValueError):
+                        self.scan_workers = DEFAULT_WORKERS
+                    try:
+                        self.batch_workers = max(1, int(config.get('import_batch_workers', DEFAULT_BATCH_WORKERS)))
+                    except (TypeError, ValueError):
+                        self.batch_workers = DEFAULT_BATCH_WORKERS
             else:
                 self.base_dir_var.set('')
                 if hasattr(self, 'scan_mode_var'):
@@ -138,8 +155,13 @@ class ImportPanel(ttk.Frame):
         self.progress.grid(row=0, column=0, sticky=(tk.W, tk.E))
         self.scan_button = ttk.Button(self.progress_frame, text="Map scannen", command=self.start_scan)
         self.scan_button.grid(row=0, column=1, padx=(10, 0))
+        self.scan_index_check = ttk.Checkbutton(self.progress_frame, text="Scanindex gebruiken",
+                                                variable=self.use_scan_index_var, command=self._on_scan_index_toggle)
+        self.scan_index_check.grid(row=0, column=2, padx=(10, 0))
+        self.batch_button = ttk.Button(self.progress_frame, text="Batch importeren...", command=self.start_batch_import)
+        self.batch_button.grid(row=0, column=3, padx=(10, 0))
         self.status_label = ttk.Label(self.progress_frame, text="")
-        self.status_label.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 0))
+        self.status_label.grid(row=1, column=0, columnspan=4, sticky=(tk.W, tk.E), pady=(5, 0))
         
         # Results
         self.results_frame = ttk.LabelFrame(self.main_frame, text="Resultaten", padding="5")
@@ -179,8 +201,8 @@ class ImportPanel(ttk.Frame):
         try:
             self.files = []
             self.processed_files = 0
-            self.progress_var.set(0)
-            self.status_label.config(text="Scannen gestart...")
+            self.after(0, lambda: self.progress_var.set(0))
+            self.after(0, lambda: self.status_label.config(text="Scannen gestart..."))
             
             if scan_mode == "GANNOMAT" and (path.lower().endswith('.mdb') or path.lower().endswith('.accdb')):
                 if not self._ensure_pyodbc():
@@ -189,44 +211,13 @@ class ImportPanel(ttk.Frame):
                     self.after(0, lambda: messagebox.showerror("Scanfout", "pyodbc is niet geïnstalleerd. Kan MDB-bestanden niet scannen."))
                     return
                 
-                pyodbc = self._pyodbc
-                results = []
-                
                 try:
-                    conn_str = (
-                        r'DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};'
-                        f'DBQ={path};'
-                    )
-                    conn = pyodbc.connect(conn_str, autocommit=True)
-                    cursor = conn.cursor()
-                    tables = [tbl_info.table_name for tbl_info in cursor.tables(tableType='TABLE')]
-                    program_table = None
-                    fallback_table = None
-                    mdb_filename_without_extension = os.path.splitext(os.path.basename(path))[0]
-                    
-                    for table in tables:
-                        columns = [column.column_name for column in cursor.columns(table=table)]
-                        if table.lower() == 'program' and 'ProgramNumber' in columns:
-                            program_table = table
-                            break
-                        elif not fallback_table and 'ProgramNumber' in columns:
-                            fallback_table = table
-                    
-                    if program_table:
-                        cursor.execute(f'SELECT ProgramNumber FROM [{program_table}]')
-                        for row in cursor.fetchall():
-                            item_name = f"{mdb_filename_without_extension}:{row.ProgramNumber}"
-                            results.append({'MDB File': os.path.basename(path), 'Item': item_name})
-                    elif fallback_table:
-                        cursor.execute(f'SELECT ProgramNumber FROM [{fallback_table}]')
-                        for row in cursor.fetchall():
-                            item_name = f"{mdb_filename_without_extension}:{row.ProgramNumber}"
-                            results.append({'MDB File': os.path.basename(path), 'Item': item_name})
-                    else:
-                        self.after(0, lambda: self.results_text.insert('end', 
-                                  f"Geen tabel met 'ProgramNumber' kolom gevonden in {os.path.basename(path)}\n"))
+                    try:
+                        results = extract_mdb_items(path)
+                    except LookupError as e:
+                        results = []
+                        self.after(0, lambda msg=str(e): self.results_text.insert('end', f"{msg}\n"))
                     
-                    conn.close()
                     self.files = results
                     self.processed_files = 1
                     self.total_files = 1
@@ -240,50 +231,55 @@ class ImportPanel(ttk.Frame):
                     self.after(0, lambda: messagebox.showerror("Scanfout", 
                                                                f"Fout bij het scannen van het MDB-bestand: {str(e)}"))
             else:
-                # Directory scan for .hop/.hops
-                def count_files():
-                    total_files = 0
-                    for root, _, filenames in os.walk(path):
-                        for filename in filenames:
-                            if filename.lower().endswith(('.hop', '.hops')):
-                                total_files += 1
-                    return total_files
-                
+                # Directory scan for .hop/.hops: one parallel pass, results streamed in batches
                 user_basis_map_setting = self.base_dir_var.get().strip()
                 if DEBUG:
                     print(f"[DEBUG] OPUS scan started for directory: {path}. User 'Basis map' setting: '{user_basis_map_setting}'.")
 
-                self.total_files = count_files()
+                def display(full_hop_path):
+                    return os.path.basename(full_hop_path) if user_basis_map_setting else full_hop_path
+
+                index = None
+                if self.use_scan_index_var.get():
+                    index = DirectoryIndex.for_root(self._scan_index_dir(), path)
+
+                self._stop_scan_event.clear()
+                self.after(0, lambda: self._begin_streamed_results(path, scan_mode))
+                result = scan_hop_files(
+                    path,
+                    on_batch=lambda batch: self.after(0, self._append_results, [display(p) for p in batch]),
+                    on_progress=lambda visited, found, files: self.after(0, self._update_scan_progress, visited, found, files),
+                    max_workers=self.scan_workers,
+                    index=index,
+                    stop_event=self._stop_scan_event,
+                )
                 if DEBUG:
-                    print(f"[DEBUG] Total .hop/.hops files found: {self.total_files}")
-                
+                    print(f"[DEBUG] Scan done in {result.elapsed:.2f}s: {len(result.files)} files, "
+                          f"{result.dirs_visited} dirs ({result.dirs_from_index} from index), {len(result.errors)} errors")
+                if result.cancelled:
+                    return
+
+                for directory, error in result.errors[:10]:
+                    self.after(0, lambda d=directory, e=error: self.results_text.insert('end', f"Map overgeslagen: {d} ({e})\n"))
+                if len(result.errors) > 10:
+                    self.after(0, lambda: self.results_text.insert('end', f"... en nog {len(result.errors) - 10} mappen overgeslagen\n"))
+
+                self.total_files = self.processed_files = len(result.files)
                 if self.total_files == 0:
                     self.after(0, lambda: self.results_text.insert('end', f"Geen .hop/.hops bestanden gevonden in {path}\n"))
                     self.after(0, lambda: self.scan_button.config(state=tk.NORMAL))
                     return
-                
-                found_files = []
-                for root, _, filenames_in_loop in os.walk(path):
-                    for filename_item in filenames_in_loop:
-                        if filename_item.lower().endswith(('.hop', '.hops')):
-                            full_hop_path = os.path.join(root, filename_item)
-                            item_to_display = ""
-
-                            if not user_basis_map_setting:
-                                item_to_display = full_hop_path
-                            else:
-                                item_to_display = filename_item
-                            
-                            found_files.append({'Item': item_to_display})
-                            self.processed_files += 1
-                            if self.processed_files % 10 == 0 or self.processed_files == self.total_files:
-                                self.after(0, lambda: self._update_progress(self.processed_files, self.total_files))
-                
+
+                found_files = [{'Item': display(p)} for p in result.files]
                 self.files = found_files
                 if DEBUG:
                     print(f"[DEBUG] Files to show: {len(found_files)}")
+                # Re-render once in sorted order (batches arrive in completion order)
                 self.after(0, lambda: self._show_results(found_files, scan_mode, path))
-                self.after(0, lambda: self._update_progress(self.total_files, self.total_files))
+                self.after(0, lambda: self.status_label.config(
+                    text=f"{len(found_files)} bestanden in {result.dirs_visited} mappen ({result.elapsed:.1f}s"
+                         + (f", {result.dirs_from_index} uit index)" if index is not None else ")")))
+                self.after(0, lambda: self.progress_var.set(100))
                 self.after(0, lambda: self.scan_button.config(state=tk.NORMAL))
                 self.after(0, lambda: messagebox.showinfo("Scan voltooid", 
                                                          f"Scan voltooid. {len(found_files)} bestanden gevonden."))
@@ -294,7 +290,8 @@ class ImportPanel(ttk.Frame):
             self.after(0, lambda: self.scan_button.config(state=tk.NORMAL))
         finally:
             self.scanning = False
-            self.after(0, lambda: self._create_excel(path, scan_mode))
+            if not self._stop_scan_event.is_set():  # Set when the panel is destroyed mid-scan
+                self.after(0, lambda: self._create_excel(path, scan_mode))
 
     def _create_excel(self, directory, scan_mode="OPUS"):
         if DEBUG:
@@ -305,28 +302,17 @@ class ImportPanel(ttk.Frame):
             return
         
         try:
-            pd = self._ensure_pandas()
-            df = pd.DataFrame(self.files)
-            
-            export_dir = directory
+            self._ensure_pandas()
             if scan_mode == "GANNOMAT" and os.path.isfile(directory):
-                export_dir = os.path.dirname(directory)
-                folder_name = os.path.splitext(os.path.basename(directory))[0]
-            else:
-                folder_name = os.path.basename(os.path.normpath(directory))
-            
-            if scan_mode == "GANNOMAT":
-                if 'Item' in df.columns:
-                    df = df[['Item']]
-                    df['Status'] = ''
-                excel_path = os.path.join(export_dir, f"{folder_name}.xlsx")
+                excel_path = checklist_excel_path(directory, MODE_GANNOMAT)
             else:
-                if 'Status' not in df.columns:
-                    df['Status'] = ''
-                excel_path = os.path.join(export_dir, f"{folder_name}.xlsx")
-            
-            df.to_excel(excel_path, index=False)
+                excel_path = checklist_excel_path(directory, MODE_OPUS)
+            df = write_checklist(self.files, excel_path, scan_mode)
             self.results_text.insert('end', f"Excel bestand opgeslagen: {excel_path}\n")
+
+            # Parse the checklist in the background so the scanner panel opens it from the cache
+            from checklist_cache import prewarm_async
+            prewarm_async(excel_path, df.copy())
         except Exception as e:
             self.results_text.insert('end', f"Fout bij opslaan van Excel: {e}\n")
 
@@ -335,16 +321,118 @@ class ImportPanel(ttk.Frame):
         self.progress_var.set(progress)
         self.status_label.config(text=f"{processed} van {total} bestanden verwerkt...")
 
+    def start_batch_import(self):
+        """Generates checklists for many projects: every subfolder of a map (OPUS) or several MDB files (GANNOMAT)."""
+        if self.scanning:
+            return
+        scan_mode = self.scan_mode_var.get() if hasattr(self, 'scan_mode_var') else "OPUS"
+        if scan_mode == MODE_GANNOMAT:
+            if not self._ensure_pyodbc():
+                messagebox.showerror("Scanfout", "pyodbc is niet geïnstalleerd. Kan MDB-bestanden niet scannen.")
+                return
+            projects = list(filedialog.askopenfilenames(
+                title="Selecteer MDB/ACCDB-bestanden",
+                filetypes=[("Access Database", "*.mdb;*.accdb"), ("All Files", "*.*")]))
+            if not projects:
+                return
+            source = os.path.dirname(projects[0])
+        else:
+            source = filedialog.askdirectory(title="Selecteer map met projectmappen")
+            if not source:
+                return
+            try:
+                projects = find_projects(source, scan_mode)
+            except OSError as e:
+                messagebox.showerror("Batch import", f"Kan map niet lezen: {e}")
+                return
+            if not projects:
+                messagebox.showwarning("Batch import", "Geen projecten gevonden.")
+                return
+
+        self._ensure_pandas()
+        filename_only = bool(self.base_dir_var.get().strip())
+        self.scanning = True
+        self._stop_scan_event.clear()
+        self.scan_button.config(state=tk.DISABLED)
+        self.batch_button.config(state=tk.DISABLED)
+        self.progress_var.set(0)
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, f"Batch import: {len(projects)} projecten uit {source} (mode: {scan_mode})\n")
+        threading.Thread(target=self._batch_thread, args=(projects, filename_only), daemon=True).start()
+
+    def _batch_thread(self, projects, filename_only):
+        start = time.perf_counter()
+        try:
+            results = run_batch(
+                projects,
+                max_workers=self.batch_workers,
+                filename_only=filename_only,
+                on_result=lambda result, done, total: self.after(0, self._on_batch_result, result, done, total),
+                stop_event=self._stop_scan_event,
+            )
+            if self._stop_scan_event.is_set():
+                return
+            summary = format_summary(results, time.perf_counter() - start)
+            self.after(0, lambda: self._finish_batch(summary))
+        except Exception as e:
+            if not self._stop_scan_event.is_set():
+                msg = f"Batch import afgebroken: {e}"
+                self.after(0, self._finish_batch, msg)
+        finally:
+            self.scanning = False
+
+    def _on_batch_result(self, result, done, total):
+        if result.status == 'error':
+            line = f"[FOUT] {result.project}: {result.error}"
+        elif result.status == 'skipped':
+            line = f"{result.project}: overgeslagen"
+        else:
+            line = f"{result.project}: {result.item_count} items ({result.seconds:.1f}s)"
+        self.results_text.insert(tk.END, line + "\n")
+        self.results_text.see(tk.END)
+        self._update_progress(done, total)
+        self.status_label.config(text=f"{done} van {total} projecten verwerkt...")
+
+    def _finish_batch(self, summary):
+        self.results_text.insert(tk.END, "\n" + summary + "\n")
+        self.results_text.see(tk.END)
+        self.status_label.config(text=summary.splitlines()[0])
+        self.scan_button.config(state=tk.NORMAL)
+        self.batch_button.config(state=tk.NORMAL)
+
+    def _update_scan_progress(self, dirs_visited, dirs_found, files_found):
+        """Progress against directories visited; the total grows while subdirectories are discovered."""
+        progress = (dirs_visited / dirs_found) * 100 if dirs_found > 0 else 0
+        self.progress_var.set(progress)
+        self.status_label.config(text=f"{dirs_visited} van {dirs_found} mappen doorzocht, {files_found} bestanden gevonden...")
+
+    def _begin_streamed_results(self, path, scan_mode):
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, f"Scanned directory: {path} (mode: {scan_mode})\n")
+
+    def _append_results(self, items):
+        """Appends a batch of streamed scan results with a single Text insert."""
+        if items:
+            self.results_text.insert(tk.END, "\n".join(items) + "\n")
+
     def _show_results(self, results, scan_mode, path):
         self.results_text.delete(1.0, tk.END)
         if scan_mode == "GANNOMAT":
             self.results_text.insert(tk.END, f"Scanned file: {os.path.basename(path)} (mode: {scan_mode})\n")
-            for row in results:
-                self.results_text.insert(tk.END, f"{row['Item']}\n")
         else:
             self.results_text.insert(tk.END, f"Scanned directory: {path} (mode: {scan_mode})\n")
-            for row in results:
-                self.results_text.insert(tk.END, f"{row['Item']}\n")
+        if results:
+            self.results_text.insert(tk.END, "\n".join(str(row['Item']) for row in results) + "\n")
+
+    def _scan_index_dir(self):
+        """Directory for the persisted scan indexes, next to config.json."""
+        return os.path.join(os.path.dirname(self.CONFIG_FILE), 'cache', 'scan_index')
+
+    def _on_scan_index_toggle(self):
+        try:
+            update_config({'import_scan_index': bool(self.use_scan_index_var.get())})
+        except Exception as e:
+            print(f"Error saving config: {str(e)}")
 
     def browse_directory(self):
         scan_mode = self.scan_mode_var.get() if hasattr(self, 'scan_mode_var') else "OPUS"
@@ -379,4 +467,5 @@ class ImportPanel(ttk.Frame):
     def destroy(self):
         """Clean up when panel is destroyed"""
         self.scanning = False
+        self._stop_scan_event.set()
         super().destroy()
\ No newline at end of file
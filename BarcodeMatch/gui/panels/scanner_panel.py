@@ -3,6 +3,7 @@ from tkinter import ttk, filedialog, messagebox, font as tkfont # Added font imp
 import pandas as pd
 import threading
 import time
+import queue
 import keyboard
 import serial
 import serial.tools.list_ports
@@ -11,8 +12,18 @@ import re
 import re
 import requests # Added for API calls
 import os
-import json
-from config_utils import get_config_path, load_config as _load_full_config, update_config as _save_full_config
+from config_utils import get_cached_config as _load_full_config, update_config as _save_full_config
+from serial_line_reader import SerialLineReader, DEFAULT_DEBOUNCE_MS
+from status_journal import StatusJournal, xlsx_seq_keyword
+from checklist_loader import parse_checklist, normalize_barcode_key
+from checklist_cache import get_checklist_cache, fingerprint as checklist_fingerprint
+from gui.virtual_treeview import VirtualTreeview
+
+# Status changes go to the journal immediately; the _updated.xlsx is rewritten after this quiet period
+EXCEL_COMPACT_DEBOUNCE_MS = 5000
+# How often the Tk thread collects the result of a background compaction
+EXCEL_COMPACT_POLL_MS = 100
+
 
 class ScannerPanel(ttk.Frame):
     def __init__(self, parent, main_app, **kwargs):
@@ -21,6 +32,24 @@ class ScannerPanel(ttk.Frame):
 
         # --- Variables ---
         self.barcode_data = {}
+        # Secondary indexes for flexible matching, rebuilt with barcode_data
+        self._normalized_index = {}   # normalized key -> barcode_data key
+        self._suffix_index = {}       # tuple of trailing path parts -> set of barcode_data keys
+        self._filename_index = {}     # normalized filename -> set of barcode_data keys
+        self._match_path_suffix = False
+        self._match_filename_only = False
+        self._item_keys = {}          # Treeview row ID -> barcode_data key
+        # Live per-status counters (blank status counts as 'NIET OK'), so completion is O(1)
+        self._status_counts = {'OK': 0, 'NIET OK': 0, 'DUPLICAAT': 0}
+        self.progress_var = tk.StringVar(value="Voortgang: -")
+
+        # --- Status persistence ---
+        self._status_journal = None
+        self._compact_job = None
+        self._compact_thread = None
+        self._compact_poll_job = None
+        # The compaction worker reports here instead of touching Tk; drained with after()
+        self._compact_results = queue.Queue()
         self.selected_item_id = None
         self.excel_file_path_var = tk.StringVar()
         self.scanner_type_var = tk.StringVar(value="USB")
@@ -28,9 +57,7 @@ class ScannerPanel(ttk.Frame):
         self.baud_rate_var = tk.StringVar(value="9600")
 
         # --- Threading and Serial ---
-        self.ser = None
-        self.is_reading_com = False
-        self.com_read_thread = None
+        self.serial_reader = None
         self._usb_listener_thread = None
         self._stop_usb_listener_event = threading.Event()
 
@@ -107,6 +134,7 @@ class ScannerPanel(ttk.Frame):
         excel_entry.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
         browse_button = ttk.Button(excel_frame, text="Bladeren...", command=self._browse_excel_file)
         browse_button.grid(row=0, column=2, padx=5, pady=5)
+        ttk.Label(excel_frame, textvariable=self.progress_var).grid(row=1, column=0, columnspan=3, padx=5, pady=(0, 5), sticky="w")
 
         # --- Inhoud COM-poort Frame ---
         ttk.Label(self.com_frame, text="COM-poort:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
@@ -121,7 +149,8 @@ class ScannerPanel(ttk.Frame):
         ttk.Label(self.usb_frame, text="USB-scanner is actief indien geselecteerd. Scans worden globaal vastgelegd.").pack(padx=5, pady=5, fill="x")
 
         # --- Treeview ---
-        self.tree = ttk.Treeview(tree_frame, columns=('Status', 'Item'), show='headings')
+        # Virtualized: only the visible rows exist as Treeview items, so 100k-row checklists stay responsive
+        self.tree = VirtualTreeview(tree_frame, columns=('Status', 'Item'), show='headings')
         self.tree.heading('Status', text='Status')
         self.tree.heading('Item', text='Item')
         self.tree.column('Status', width=150, minwidth=150, stretch=tk.NO, anchor='center') # Status column, centered text
@@ -186,6 +215,8 @@ class ScannerPanel(ttk.Frame):
         self.scanner_type_var.set(self._get_config_setting('Scanner', 'type', 'USB'))
         self.com_port_var.set(self._get_config_setting('Scanner', 'com_port', ''))
         self.baud_rate_var.set(self._get_config_setting('Scanner', 'baud_rate', '9600'))
+        self._match_path_suffix = bool(self._get_config_setting('Scanner', 'match_path_suffix', False))
+        self._match_filename_only = bool(self._get_config_setting('Scanner', 'match_filename_only', False))
         last_file = self._get_config_setting('Paths', 'last_excel_file', '')
         if last_file and os.path.exists(last_file):
             self.excel_file_path_var.set(last_file)
@@ -275,6 +306,9 @@ class ScannerPanel(ttk.Frame):
 
     def _load_excel_data(self, file_path, update_config_path=True):
         """Laadt gegevens uit het geselecteerde Excel-bestand en vult de treeview."""
+        # Persist pending changes of the currently loaded checklist first
+        self._flush_status_journal()
+        self._close_status_journal()
         try:
             path_to_load = file_path
             potential_updated_path = self._generate_updated_path(file_path)
@@ -285,67 +319,64 @@ class ScannerPanel(ttk.Frame):
                 self._log(f"Laden van origineel bestand: {file_path}")
 
             self._log(f"Effectief Excel-bestand laden: {path_to_load}")
-            df = pd.read_excel(path_to_load)
-
-            # Updated column check: 'Item' is required.
-            if 'Item' not in df.columns:
-                messagebox.showerror("Fout", "Excel-bestand moet de kolom 'Item' bevatten.")
-                self._log("[FOUT] Excel-bestand mist vereiste kolom 'Item'.")
-                return
+            # An unchanged workbook (same path, size and mtime) comes from the cache without Excel parsing
+            cache = get_checklist_cache()
+            parsed = cache.get(path_to_load)
+            if parsed is not None:
+                self._log("Checklist geladen uit cache (Excel niet opnieuw ingelezen).")
+            else:
+                cache_key = checklist_fingerprint(path_to_load)
+                df = pd.read_excel(path_to_load)
+
+                # Updated column check: 'Item' is required.
+                if 'Item' not in df.columns:
+                    messagebox.showerror("Fout", "Excel-bestand moet de kolom 'Item' bevatten.")
+                    self._log("[FOUT] Excel-bestand mist vereiste kolom 'Item'.")
+                    return
+
+                # Column-wise status normalization
+                parsed = parse_checklist(df)
+                parsed.ensure_match_indexes()
+                threading.Thread(target=cache.put, args=(path_to_load, parsed, cache_key), daemon=True).start()
+
+            # Replay journaled status changes that did not make it into the xlsx yet
+            journal = StatusJournal(potential_updated_path)
+            journal_overrides = journal.replay()
+            if journal_overrides:
+                self._log(f"Journaal met {len(journal_overrides)} statuswijziging(en) wordt toegepast: {os.path.basename(journal.path)}")
+            elif journal.entry_count:
+                # Everything in it is already in the xlsx (crash before the journal was trimmed)
+                journal.compacted(journal.folded_seq)
 
             self.barcode_data.clear()
-            self.tree.delete(*self.tree.get_children()) # Clear existing tree items
-
-            for index, row in df.iterrows():
-                barcode_val = str(row['Item']).strip() # Strip leading/trailing whitespace
-                description_val = str(row['Omschrijving']) if 'Omschrijving' in df.columns else ""
-
-                # --- Start of new logic for status handling ---
-                raw_status_from_excel = row.get('Status', pd.NA) # Use pd.NA for missing/empty
-
-                display_status_for_treeview = ""  # Value for Treeview display
-                internal_status = 'NIET OK'       # Value for internal logic and saving
-                tree_tag = 'NOT_OK'               # Default tag for Treeview
-
-                if pd.isna(raw_status_from_excel):
-                    # If Excel status is NaN (empty), display blank, internal is 'NIET OK'
-                    display_status_for_treeview = ""
-                    # internal_status is already 'NIET OK'
-                    # tree_tag is already 'NOT_OK' (white background)
-                else:
-                    # If Excel status is not NaN, process it as a string
-                    processed_status_str = str(raw_status_from_excel).strip().upper()
-
-                    if processed_status_str == 'OK':
-                        display_status_for_treeview = 'OK'
-                        internal_status = 'OK'
-                        tree_tag = 'OK'
-                    elif processed_status_str == 'DUPLICAAT':
-                        display_status_for_treeview = 'DUPLICAAT'
-                        internal_status = 'DUPLICAAT'
-                        tree_tag = 'DUPLICATE'
-                    elif processed_status_str == 'NIET OK':
-                        display_status_for_treeview = 'NIET OK'
-                        internal_status = 'NIET OK'
-                        tree_tag = 'NOT_OK'
-                    else:
-                        # Unrecognized string in Status column
-                        self._log(f"[WARN] Ongeldige status '{processed_status_str}' (origineel: '{raw_status_from_excel}') voor item '{barcode_val}' in Excel. Standaard naar 'NIET OK'.")
-                        display_status_for_treeview = 'NIET OK' # Display 'NIET OK' for unrecognized strings
-                        internal_status = 'NIET OK' # Treat as 'NIET OK'
-                        tree_tag = 'NOT_OK'
-                # --- End of new logic for status handling ---
-
-                # Treeview: Status, Item.
-                item_id = self.tree.insert('', 'end', values=(display_status_for_treeview, barcode_val), tags=(tree_tag,))
+            self._item_keys.clear()
+
+            # Journaled statuses take precedence (applied to a copy; the cached parse stays as on disk)
+            parsed = parsed.with_status_overrides(journal_overrides)
+            for barcode_val, raw_status in parsed.invalid[:20]:
+                self._log(f"[WARN] Ongeldige status '{raw_status}' voor item '{barcode_val}' in Excel. Standaard naar 'NIET OK'.")
+            if len(parsed.invalid) > 20:
+                self._log(f"[WARN] Nog {len(parsed.invalid) - 20} items met een ongeldige status, standaard naar 'NIET OK'.")
+
+            # Treeview: Status, Item. All rows are handed over at once.
+            row_ids = self.tree.set_rows(
+                ((display, barcode_val), (tag,))
+                for display, barcode_val, tag in zip(parsed.displays, parsed.items, parsed.tags)
+            )
+            for item_id, barcode_val, description_val, internal_status in zip(
+                    row_ids, parsed.items, parsed.descriptions, parsed.statuses):
                 self.barcode_data[barcode_val] = {
                     'description': description_val,
-                    'status': internal_status, # Store the determined internal_status
+                    'status': internal_status,
                     'id': item_id,
                     'item_value': barcode_val
                 }
+                self._item_keys[item_id] = barcode_val
+            self._recount_statuses()
+            self._normalized_index, self._suffix_index, self._filename_index = parsed.ensure_match_indexes()
 
             self._log(f"{len(self.barcode_data)} items geladen uit {os.path.basename(path_to_load)}.")
+            self._status_journal = journal
             # self.excel_file_path_var should store the original path selected by the user
             # or the path that was last loaded from config, to correctly derive _updated path for saving.
             self.excel_file_path_var.set(file_path) 
@@ -353,6 +384,9 @@ class ScannerPanel(ttk.Frame):
                 # Save the original user-selected path to config, not the potentially loaded _updated one.
                 self._set_config_setting('Paths', 'last_excel_file', file_path)
                 self.save_config() 
+            if journal_overrides:
+                # Fold the replayed changes into the xlsx in the background
+                self._schedule_excel_compaction()
             # After loading, immediately save to ensure the loaded data (even from original) is in an _updated file if changes occur
             # Or, only save when a change actually occurs. Let's opt for saving on change.
             # self._save_updated_excel() # Consider if initial save is needed or only on change.
@@ -371,18 +405,13 @@ class ScannerPanel(ttk.Frame):
         item = self.barcode_data.get(barcode)
         original_barcode_from_excel = barcode if item else None
 
-        # If no exact match, try a more lenient match by ignoring all whitespace and normalizing path separators
+        # If no exact match, fall back to the precomputed flexible-match indexes
         if not item:
             self._log(f"Exacte match niet gevonden. Poging tot een meer flexibele match...")
-            # Normalize by removing all whitespace characters and standardizing path separators
-            normalized_scanned = re.sub(r'\s', '', os.path.normpath(barcode))
-            for key, value in self.barcode_data.items():
-                normalized_key = re.sub(r'\s', '', os.path.normpath(key))
-                if normalized_key == normalized_scanned:
-                    item = value
-                    original_barcode_from_excel = key
-                    self._log(f"Flexibele match gevonden! Scanner: '{barcode}', Excel: '{original_barcode_from_excel}'")
-                    break # Stop after finding the first match
+            original_barcode_from_excel = self._find_flexible_match(barcode)
+            if original_barcode_from_excel is not None:
+                item = self.barcode_data[original_barcode_from_excel]
+                self._log(f"Flexibele match gevonden! Scanner: '{barcode}', Excel: '{original_barcode_from_excel}'")
 
         if not item:
             self._log(f"[NIET GEVONDEN] Barcode {barcode} niet in de lijst.")
@@ -403,41 +432,105 @@ class ScannerPanel(ttk.Frame):
             # No change to item['status'], no _update_treeview, item remains DUPLICATE
         else: # This implies current_status is 'NIET OK' or similar (e.g., empty from Excel)
             self._log(f"[OK] Barcode {log_barcode} komt overeen en is nu gemarkeerd als OK.")
-            item['status'] = 'OK'
+            self._set_item_status(item, 'OK')
             self._update_treeview(item_id, 'OK')
-            self._save_updated_excel() # Save changes
+            self._record_status_change(original_barcode_from_excel)
             self._all_items_ok_check()
 
 
+    @staticmethod
+    def _status_bucket(status):
+        """Counter bucket for an internal status; blank/unknown counts as 'NIET OK'."""
+        return status if status in ('OK', 'DUPLICAAT') else 'NIET OK'
+
+    def _set_item_status(self, item, status):
+        """Sets an item's status and keeps the status counters and progress display in step."""
+        old_bucket = self._status_bucket(item.get('status'))
+        item['status'] = status
+        new_bucket = self._status_bucket(status)
+        if old_bucket != new_bucket:
+            self._status_counts[old_bucket] -= 1
+            self._status_counts[new_bucket] += 1
+        self._update_progress_display()
+
+    def _recount_statuses(self):
+        """Rebuilds the status counters from barcode_data (after loading or clearing)."""
+        counts = {'OK': 0, 'NIET OK': 0, 'DUPLICAAT': 0}
+        for item in self.barcode_data.values():
+            counts[self._status_bucket(item['status'])] += 1
+        self._status_counts = counts
+        self._update_progress_display()
+
+    def _update_progress_display(self):
+        total = len(self.barcode_data)
+        if not total:
+            self.progress_var.set("Voortgang: -")
+            return
+        done = self._status_counts['OK'] + self._status_counts['DUPLICAAT']
+        text = f"Voortgang: {done}/{total} gescand ({done * 100 // total}%)"
+        if self._status_counts['DUPLICAAT']:
+            text += f", {self._status_counts['DUPLICAAT']} duplicaat"
+        self.progress_var.set(text)
+
+    def _clear_barcode_indexes(self):
+        """Drops the flexible-match indexes (replaced, not cleared: they may be shared with a cache write)."""
+        self._normalized_index = {}
+        self._suffix_index = {}
+        self._filename_index = {}
+
+    def _find_flexible_match(self, barcode):
+        """Looks up a scanned barcode in the flexible-match indexes; returns the barcode_data key or None.
+
+        Order: normalized full key, then the longest unique trailing path match
+        (Scanner.match_path_suffix, default off), then a unique filename
+        (Scanner.match_filename_only, default off).
+        """
+        normalized = normalize_barcode_key(barcode)
+        key = self._normalized_index.get(normalized)
+        if key is not None:
+            return key
+
+        parts = [part for part in normalized.split('/') if part]
+        if len(parts) > 1 and self._match_path_suffix:
+            for length in range(len(parts), 1, -1):
+                keys = self._suffix_index.get(tuple(parts[-length:]))
+                if keys:
+                    if len(keys) == 1:
+                        key = next(iter(keys))
+                        self._log(f"Match op padeinde ({length} delen): '{key}'")
+                        return key
+                    self._log(f"[WARN] Padeinde ({length} delen) is niet uniek ({len(keys)} items); geen match.")
+                    break
+
+        if parts and self._match_filename_only:
+            keys = self._filename_index.get(parts[-1], set())
+            if len(keys) == 1:
+                key = next(iter(keys))
+                self._log(f"Match op bestandsnaam: '{key}'")
+                return key
+            if keys:
+                self._log(f"[WARN] Bestandsnaam '{parts[-1]}' is niet uniek ({len(keys)} items); geen match.")
+        return None
+
     def _all_items_ok_check(self):
         """Checks if all items are OK, then triggers completion actions and optional archiving."""
         if not self.barcode_data:
             return
 
-        all_ok = all(item['status'] in ['OK', 'DUPLICATE'] for item in self.barcode_data.values())
+        # Constant time: every item is done (OK or DUPLICAAT) once no item is open any more
+        all_ok = self._status_counts['NIET OK'] == 0
 
         if all_ok:
             self._log("Alle items zijn OK. Voltooiingsacties worden gestart.")
+            # The xlsx must be complete before it is mailed or archived
+            self._flush_status_journal()
             
             # Perform the main completion actions (DB, email, etc.).
             # This function will show its own completion message.
             self._perform_completion_actions()
 
             # Now, handle archiving.
-            config = {}
-            config_file_path = get_config_path()
-            if os.path.exists(config_file_path):
-                with open(config_file_path, 'r') as f:
-                    try:
-                        config = json.load(f)
-                    except json.JSONDecodeError:
-                        self._log(f"[FOUT] Kon configuratiebestand niet lezen (JSON decode error): {config_file_path}")
-                        messagebox.showerror("Configuratie Fout", f"Fout bij het lezen van het configuratiebestand.\nControleer of {config_file_path} een valide JSON-bestand is.")
-                        return # Stop if config is corrupt
-            else:
-                self._log(f"[WAARSCHUWING] Configuratiebestand niet gevonden: {config_file_path}")
-                # Allow to proceed with defaults if config file is missing, api_url will be empty
-
+            config = self.main_app.load_app_config()
             archive_enabled = config.get('archive_on_all_ok', False)
 
             if archive_enabled:
@@ -473,6 +566,10 @@ class ScannerPanel(ttk.Frame):
                 files_to_move.append(original_path)
             if updated_path and os.path.exists(updated_path):
                 files_to_move.append(updated_path)
+            self._close_status_journal()
+            if updated_path and os.path.exists(updated_path + StatusJournal.SUFFIX):
+                # Only left behind if compaction failed; keep it with the checklist
+                files_to_move.append(updated_path + StatusJournal.SUFFIX)
 
             if not files_to_move:
                 self._log("Geen bestanden gevonden om te archiveren.")
@@ -504,8 +601,12 @@ class ScannerPanel(ttk.Frame):
 
     def _clear_panel_state(self):
         """Resets the panel to its initial state after completion and/or archiving."""
+        self._close_status_journal()
         self.tree.delete(*self.tree.get_children())
         self.barcode_data.clear()
+        self._clear_barcode_indexes()
+        self._item_keys.clear()
+        self._recount_statuses()
         self.excel_file_path_var.set("")
         self._log("Paneel gereset.")
         self._set_config_setting('Paths', 'last_excel_file', '')
@@ -531,7 +632,7 @@ class ScannerPanel(ttk.Frame):
 
     def _connect_com_port(self):
         """Connects to or disconnects from the selected COM port."""
-        if self.ser and self.ser.is_open:
+        if self.serial_reader and self.serial_reader.is_running:
             self._disconnect_com_port()
             return
         port = self.com_port_var.get()
@@ -540,10 +641,14 @@ class ScannerPanel(ttk.Frame):
             self._log("[FOUT] Verbindingspoging mislukt: Geen COM-poort geselecteerd.")
             return
         try:
-            self.ser = serial.Serial(port=port, baudrate=int(self.baud_rate_var.get()), timeout=1)
-            self.is_reading_com = True
-            self.com_read_thread = threading.Thread(target=self._read_com_port, daemon=True)
-            self.com_read_thread.start()
+            self.serial_reader = SerialLineReader(
+                self, port, int(self.baud_rate_var.get()),
+                on_line=self._on_com_line,
+                on_error=self._on_com_read_error,
+                debounce_ms=self._get_config_setting('Scanner', 'debounce_ms', DEFAULT_DEBOUNCE_MS),
+                log_callback=self._log
+            )
+            self.serial_reader.start()
             self.connect_button.config(text="Verbinding verbreken")
             self._log(f"Verbonden met {port}.")
             self.com_port_combo.config(state='disabled')
@@ -551,42 +656,29 @@ class ScannerPanel(ttk.Frame):
         except serial.SerialException as e:
             messagebox.showerror("Verbindingsfout", f"Verbinden met {port} mislukt: {e}")
             self._log(f"[FOUT] Verbinden met {port} mislukt: {e}")
-            self.ser = None
+            self.serial_reader = None
 
     def _disconnect_com_port(self):
         """Disconnects from the serial port."""
-        self.is_reading_com = False
-        if self.com_read_thread and self.com_read_thread.is_alive():
-            self.com_read_thread.join(timeout=1)
-        if self.ser and self.ser.is_open:
-            port_name = self.ser.port
-            self.ser.close()
+        if self.serial_reader:
+            port_name = self.serial_reader.port
+            self.serial_reader.stop()
             self._log(f"Verbinding verbroken met {port_name}.")
-        self.ser = None
+        self.serial_reader = None
         if self.winfo_exists():
             self.connect_button.config(text="Verbinden")
             self.com_port_combo.config(state='readonly')
             self.refresh_com_button.config(state='normal')
 
-    def _read_com_port(self):
-        """Leest gegevens van de seriële poort in een aparte thread."""
-        port_name = self.ser.port # Store before thread potentially outlives self.ser validity
-        self._log(f"COM-poort leesthread gestart voor {port_name}.")
-        while self.is_reading_com and self.ser and self.ser.is_open:
-            try:
-                if self.ser.in_waiting > 0:
-                    line = self.ser.readline().decode('utf-8').strip()
-                    if line:
-                        self._log(f"COM-gegevens ontvangen: {line}")
-                        self.after(0, self._check_barcode, line)
-            except serial.SerialException as e:
-                self._log(f"[FOUT] Seriële fout: {e}")
-                break # Exit thread on serial error
-            except Exception as e:
-                self._log(f"[FOUT] Een onverwachte fout is opgetreden in de COM-leeslus: {e}")
-                break # Exit thread on other critical error
-            time.sleep(0.1)
-        self._log(f"COM-poort leesthread voor {port_name} beëindigd.")
+    def _on_com_line(self, line):
+        """Handles a complete line from the COM reader (runs on the Tk thread)."""
+        self._log(f"COM-gegevens ontvangen: {line}")
+        self._check_barcode(line)
+
+    def _on_com_read_error(self, error):
+        """Handles a serial error reported by the COM reader (runs on the Tk thread)."""
+        self._log(f"[FOUT] Seriële fout: {error}")
+        self._disconnect_com_port()
 
     def _start_usb_listener(self):
         """Starts the USB keyboard listener thread."""
@@ -642,10 +734,9 @@ class ScannerPanel(ttk.Frame):
     def _update_treeview(self, item_id, status_tag, display_override=None):
         """Updates a single item in the treeview with a new status and tag."""
         original_barcode_val = None
-        for barcode_key, data_dict in self.barcode_data.items():
-            if data_dict.get('id') == item_id:
-                original_barcode_val = data_dict.get('item_value', barcode_key)
-                break
+        barcode_key = self._item_keys.get(item_id)
+        if barcode_key is not None and barcode_key in self.barcode_data:
+            original_barcode_val = self.barcode_data[barcode_key].get('item_value', barcode_key)
         
         if original_barcode_val is None:
             try:
@@ -704,20 +795,15 @@ class ScannerPanel(ttk.Frame):
             return
 
         # Find the item in barcode_data using the tree item_id
-        item_to_update = None
-        barcode_key_of_item = None
-        for key, value in self.barcode_data.items():
-            if value.get('id') == self.selected_item_id:
-                item_to_update = value
-                barcode_key_of_item = key
-                break
+        barcode_key_of_item = self._item_keys.get(self.selected_item_id)
+        item_to_update = self.barcode_data.get(barcode_key_of_item) if barcode_key_of_item is not None else None
 
         if item_to_update:
             self._log(f"Status wissen voor item: {item_to_update.get('item_value', barcode_key_of_item)}")
-            item_to_update['status'] = None  # Set internal status to None for blank Excel cell
+            self._set_item_status(item_to_update, None)  # None = blank Excel cell
             # Update Treeview: display blank, use 'NOT_OK' tag for white background
             self._update_treeview(self.selected_item_id, 'NOT_OK', display_override="") 
-            self._save_updated_excel() # Save changes
+            self._record_status_change(barcode_key_of_item)
         else:
             self._log(f"[FOUT] Kon item met ID {self.selected_item_id} niet vinden in barcode_data om status te wissen.")
 
@@ -739,10 +825,10 @@ class ScannerPanel(ttk.Frame):
             return
 
         if barcode in self.barcode_data:
-            self.barcode_data[barcode]['status'] = 'OK'
+            self._set_item_status(self.barcode_data[barcode], 'OK')
             self._update_treeview(self.selected_item_id, 'OK')
             self._log(f"{barcode} handmatig gemarkeerd als OK.")
-            self._save_updated_excel() # Save changes
+            self._record_status_change(barcode)
             self._all_items_ok_check()
 
     def _mark_item_not_ok(self):
@@ -763,14 +849,155 @@ class ScannerPanel(ttk.Frame):
             return
 
         if barcode in self.barcode_data:
-            self.barcode_data[barcode]['status'] = 'NIET OK'
+            self._set_item_status(self.barcode_data[barcode], 'NIET OK')
             self._update_treeview(self.selected_item_id, 'NOT_OK') # Use tag for consistency
             self._log(f"{barcode} handmatig gemarkeerd als NIET OK.")
-            self._save_updated_excel() # Save changes
+            self._record_status_change(barcode)
+
+    def _record_status_change(self, barcode_key):
+        """Journals a status change right away and schedules a debounced rewrite of the _updated.xlsx."""
+        item = self.barcode_data.get(barcode_key)
+        if item is None:
+            return
+        if self._status_journal is None:
+            self._save_updated_excel()
+            return
+        try:
+            self._status_journal.append(barcode_key, item.get('status'))
+        except OSError as e:
+            self._log(f"[FOUT] Schrijven naar journaal mislukt ({e}). Excel wordt direct opgeslagen.")
+            self._save_updated_excel()
+            return
+        self._schedule_excel_compaction()
+
+    def _schedule_excel_compaction(self):
+        """(Re)starts the debounce timer for rewriting the _updated.xlsx."""
+        if self._compact_job is not None:
+            self.after_cancel(self._compact_job)
+        self._compact_job = self.after(EXCEL_COMPACT_DEBOUNCE_MS, self._compact_in_background)
+
+    def _compact_in_background(self):
+        """Writes the _updated.xlsx in a worker thread and trims the journal afterwards."""
+        self._compact_job = None
+        journal = self._status_journal
+        if journal is None or journal.entry_count == 0 or not self.barcode_data:
+            return
+        if self._compact_thread and self._compact_thread.is_alive():
+            # Previous write still busy; try again after the next quiet period
+            self._schedule_excel_compaction()
+            return
+
+        save_path = journal.xlsx_path
+        rows = self._snapshot_excel_rows()
+        upto_seq = journal.last_seq
+        results = self._compact_results
+
+        def _worker():
+            # No Tk calls in here: the Tk thread may be waiting for this thread
+            try:
+                df = self._write_updated_excel(save_path, rows, upto_seq)
+                cache_key = checklist_fingerprint(save_path)
+                journal.compacted(upto_seq)
+                self._cache_written_checklist(save_path, df, cache_key)
+                results.put(f"Status succesvol opgeslagen in {os.path.basename(save_path)}.")
+            except Exception as e:
+                # The journal still holds the changes; the next change or close retries
+                results.put(f"[FOUT] Opslaan van bijgewerkt Excel-bestand {save_path} mislukt: {e}")
+
+        self._compact_thread = threading.Thread(target=_worker, daemon=True)
+        self._compact_thread.start()
+        if self._compact_poll_job is None:
+            self._compact_poll_job = self.after(EXCEL_COMPACT_POLL_MS, self._poll_compaction)
+
+    def _poll_compaction(self):
+        """Logs the compaction results on the Tk thread until the worker has finished."""
+        self._compact_poll_job = None
+        self._drain_compaction_results()
+        if self._compact_thread and self._compact_thread.is_alive():
+            self._compact_poll_job = self.after(EXCEL_COMPACT_POLL_MS, self._poll_compaction)
+
+    def _drain_compaction_results(self):
+        while True:
+            try:
+                message = self._compact_results.get_nowait()
+            except queue.Empty:
+                return
+            self._log(message)
+
+    def _wait_for_compaction(self):
+        """Waits on the Tk thread for a running compaction, keeping the window painted."""
+        thread = self._compact_thread
+        while thread and thread.is_alive():
+            thread.join(EXCEL_COMPACT_POLL_MS / 1000.0)
+            # Only redraws; processing input here could start another save re-entrantly
+            self.update_idletasks()
+        self._drain_compaction_results()
+
+    def _flush_status_journal(self):
+        """Synchronously folds pending journal entries into the _updated.xlsx (completion/close)."""
+        if self._status_journal is not None and self._status_journal.entry_count > 0:
+            self._save_updated_excel()
+
+    def _close_status_journal(self):
+        """Stops pending compaction and releases the journal of the current checklist."""
+        if self._compact_job is not None:
+            self.after_cancel(self._compact_job)
+            self._compact_job = None
+        self._wait_for_compaction()
+        if self._compact_poll_job is not None:
+            self.after_cancel(self._compact_poll_job)
+            self._compact_poll_job = None
+        if self._status_journal is not None:
+            self._status_journal.close()
+            self._status_journal = None
+
+    def _snapshot_excel_rows(self):
+        """Copies barcode_data into rows for the _updated.xlsx (call on the Tk thread)."""
+        return [{
+            'Item': item_data.get('item_value', barcode_val),
+            'Status': item_data.get('status'), # Ensure None is preserved for blank cell
+            'Omschrijving': item_data.get('description', '')
+        } for barcode_val, item_data in self.barcode_data.items()]
+
+    @staticmethod
+    def _write_updated_excel(save_path, rows, journal_seq=0):
+        """Writes the rows to save_path via a temporary file, so a crash never leaves a half-written xlsx.
+
+        ``journal_seq`` is the last status-journal entry the rows contain; it is stored in the
+        document keywords, so it is replaced together with the data.
+        """
+        df = pd.DataFrame(rows)
+        # Ensure column order, especially if Omschrijving might be missing in some items
+        columns_ordered = ['Item', 'Status']
+        if any('Omschrijving' in d for d in rows):
+            if not df['Omschrijving'].isnull().all(): # only add if there's actual data
+                columns_ordered.append('Omschrijving')
+        df = df[columns_ordered]
+
+        name, ext = os.path.splitext(save_path)
+        tmp_path = f"{name}.tmp{ext}"
+        with pd.ExcelWriter(tmp_path, engine='openpyxl') as writer:
+            df.to_excel(writer, index=False)
+            writer.book.properties.keywords = xlsx_seq_keyword(journal_seq)
+        os.replace(tmp_path, save_path)
+        return df
+
+    @staticmethod
+    def _cache_written_checklist(save_path, df, cache_key):
+        """Caches the parse of a just-written _updated.xlsx, so reopening the project skips Excel parsing.
+
+        ``cache_key`` is the fingerprint taken right after the write, so a later rewrite is never
+        cached with this content.
+        """
+        try:
+            get_checklist_cache().put(save_path, parse_checklist(df), cache_key)
+        except Exception as e:
+            print(f"[CACHE] Kon checklist niet cachen voor {save_path}: {e}")
 
     def _save_updated_excel(self):
         """Saves the current state of barcode_data to a new Excel file with '_updated' suffix.
-           Ensures that None status is written as a blank cell.
+           Ensures that None status is written as a blank cell. Runs synchronously and
+           trims the status journal on success.
         """
         original_path = self.excel_file_path_var.get()
         if not original_path:
@@ -788,24 +1015,20 @@ class ScannerPanel(ttk.Frame):
             # For now, do nothing if no data.
             return
 
+        # Don't race a background compaction writing the same file
+        if self._compact_job is not None:
+            self.after_cancel(self._compact_job)
+            self._compact_job = None
+        self._wait_for_compaction()
+
+        journal = self._status_journal
+        upto_seq = journal.last_seq if journal is not None else 0
         try:
-            data_to_save = []
-            for barcode_val, item_data in self.barcode_data.items():
-                data_to_save.append({
-                    'Item': item_data.get('item_value', barcode_val),
-                    'Status': item_data.get('status'), # Ensure None is preserved for blank cell
-                    'Omschrijving': item_data.get('description', '')
-                })
-            
-            df = pd.DataFrame(data_to_save)
-            # Ensure column order, especially if Omschrijving might be missing in some items
-            columns_ordered = ['Item', 'Status']
-            if any('Omschrijving' in d for d in data_to_save):
-                 if not df['Omschrijving'].isnull().all(): # only add if there's actual data
-                    columns_ordered.append('Omschrijving')
-            df = df[columns_ordered]
-
-            df.to_excel(save_path, index=False)
+            df = self._write_updated_excel(save_path, self._snapshot_excel_rows(), upto_seq)
+            cache_key = checklist_fingerprint(save_path)
+            if journal is not None and journal.entry_count:
+                journal.compacted(upto_seq)
+            threading.Thread(target=self._cache_written_checklist, args=(save_path, df, cache_key), daemon=True).start()
             self._log(f"Status succesvol opgeslagen in {os.path.basename(save_path)}.")
         except Exception as e:
             self._log(f"[FOUT] Opslaan van bijgewerkt Excel-bestand {save_path} mislukt: {e}")
@@ -876,19 +1099,7 @@ class ScannerPanel(ttk.Frame):
             messagebox.showerror("Fout bij Afmelden", f"Kan projectcode niet afleiden uit bestandsnaam: {filename_base}")
             return
 
-        config = {}
-        config_file_path = get_config_path()
-        if os.path.exists(config_file_path):
-            with open(config_file_path, 'r') as f:
-                try:
-                    config = json.load(f)
-                except json.JSONDecodeError:
-                    self._log(f"[FOUT] Kon configuratiebestand niet lezen (JSON decode error): {config_file_path}")
-                    messagebox.showerror("Configuratie Fout", f"Fout bij het lezen van het configuratiebestand.\nControleer of {config_file_path} een valide JSON-bestand is.")
-                    return # Stop if config is corrupt
-        else:
-            self._log(f"[WAARSCHUWING] Configuratiebestand niet gevonden: {config_file_path}")
-            # Allow to proceed with defaults if config file is missing, api_url will be empty
+        config = self.main_app.load_app_config()
 
         # Read API URL and username consistent with DatabasePanel
         api_url = config.get('api_url', '') # Reads 'api_url' from the root of the config
@@ -915,16 +1126,21 @@ class ScannerPanel(ttk.Frame):
         if email_panel is not None:
             try:
                 email_is_enabled = email_panel.email_enabled_var.get()
-                email_mode_is_per_scan = email_panel.email_send_mode_var.get() == 'per_scan'
-
-                if email_is_enabled and email_mode_is_per_scan:
-                    self._log(f"Email-notificatie voorbereiden voor project '{full_project_code}' (emails ingeschakeld, modus 'per_scan').")
-                    email_panel.send_project_complete_email(full_project_code, excel_path)
-                elif not email_is_enabled:
+                current_mode = email_panel.email_send_mode_var.get()
+
+                if email_is_enabled:
+                    # Attach the checklist with the scan results; the original only if it was never updated
+                    attachment_path = self._generate_updated_path(excel_full_path)
+                    if not attachment_path or not os.path.exists(attachment_path):
+                        attachment_path = excel_full_path
+                    # Only queued here; the outbox sender delivers in the background
+                    email_panel.send_project_complete_email(full_project_code, attachment_path)
+                    if current_mode == 'per_scan':
+                        self._log(f"Email-notificatie voor project '{full_project_code}' in de wachtrij geplaatst.")
+                    else:
+                        self._log(f"Project '{full_project_code}' toegevoegd aan het e-mailrapport (modus '{current_mode}').")
+                else:
                     self._log(f"Email notificatie overgeslagen voor project '{full_project_code}': emails zijn niet ingeschakeld in Email paneel.")
-                elif not email_mode_is_per_scan:
-                    current_mode = email_panel.email_send_mode_var.get()
-                    self._log(f"Email notificatie overgeslagen voor project '{full_project_code}': email modus is '{current_mode}', niet 'per_scan'.")
             except AttributeError:
                 self._log("[FOUT] Benodigde attributen (bv. 'email_enabled_var', 'email_send_mode_var', 'send_project_complete_email') niet gevonden op Email paneel.")
             except Exception as e:
@@ -934,6 +1150,8 @@ class ScannerPanel(ttk.Frame):
         """Verwerkt opschoning wanneer het paneel wordt gesloten."""
         self._log("Scannerpaneel sluiten...")
         self.save_config()
+        self._flush_status_journal()
+        self._close_status_journal()
         self._stop_usb_listener()
         self._disconnect_com_port()
         self._log("Scannerpaneel gesloten.")
@@ -0,0 +1,265 @@
+"""
+Virtualized ttk.Treeview for large flat lists.
+
+Only as many native tree items ("slots") exist as fit on screen; scrolling
+re-fills those slots from an in-memory row model. The public methods used by
+the scanner panel (insert, delete, get_children, item, see, selection,
+selection_set, identify_row, yview, configure) keep the ttk.Treeview call
+signatures but work on row IDs instead of native item IDs.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+DEFAULT_ROW_HEIGHT = 20
+DEFAULT_HEADING_HEIGHT = 24
+
+
+class VirtualTreeview(ttk.Treeview):
+    """A flat Treeview that only materializes the visible rows."""
+
+    def __init__(self, master=None, **kwargs):
+        self._yscrollcommand = kwargs.pop('yscrollcommand', None)
+        super().__init__(master, **kwargs)
+
+        self._rows = []          # row IDs in display order
+        self._row_index = {}     # row ID -> position in self._rows
+        self._values = {}        # row ID -> values tuple
+        self._tags = {}          # row ID -> tags tuple
+        self._next_row = 0
+        self._offset = 0         # index of the first visible row
+        self._slots = []         # native item IDs, one per visible line
+        self._selected_row = None
+        self._row_height = DEFAULT_ROW_HEIGHT
+        self._heading_height = DEFAULT_HEADING_HEIGHT
+
+        # Internal bindings run before the widget's own bindings (set by the panel)
+        self._bind_tag = f"VirtualTreeview{id(self)}"
+        self.bindtags((self._bind_tag,) + self.bindtags())
+        self.bind_class(self._bind_tag, '<Configure>', self._on_configure)
+        self.bind_class(self._bind_tag, '<<TreeviewSelect>>', self._on_native_select)
+        self.bind_class(self._bind_tag, '<MouseWheel>', self._on_mousewheel)
+        self.bind_class(self._bind_tag, '<Button-4>', lambda e: self._scroll_units(-3))
+        self.bind_class(self._bind_tag, '<Button-5>', lambda e: self._scroll_units(3))
+        self.bind_class(self._bind_tag, '<Up>', lambda e: self._move_selection(-1))
+        self.bind_class(self._bind_tag, '<Down>', lambda e: self._move_selection(1))
+        self.bind_class(self._bind_tag, '<Prior>', lambda e: self._move_selection(-max(1, len(self._slots) - 1)))
+        self.bind_class(self._bind_tag, '<Next>', lambda e: self._move_selection(max(1, len(self._slots) - 1)))
+
+    # --- Row model API (ttk.Treeview compatible) ---
+
+    def configure(self, cnf=None, **kw):
+        if 'yscrollcommand' in kw:
+            self._yscrollcommand = kw.pop('yscrollcommand')
+            self._update_scrollbar()
+        if cnf is None and not kw:
+            return super().configure()
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def insert(self, parent='', index='end', iid=None, **kw):
+        """Appends a row and returns its row ID (only flat lists are supported)."""
+        row_id = self._add_row(kw.get('values', ()), kw.get('tags', ()), iid)
+        self._render()
+        return row_id
+
+    def set_rows(self, rows):
+        """Replaces all rows at once. ``rows`` yields (values, tags); returns the new row IDs."""
+        self._clear_model()
+        row_ids = [self._add_row(values, tags) for values, tags in rows]
+        self._render()
+        return row_ids
+
+    def delete(self, *items):
+        if not items:
+            return
+        if len(items) >= len(self._rows):
+            self._clear_model()
+        else:
+            removed = set(items)
+            self._rows = [row_id for row_id in self._rows if row_id not in removed]
+            self._row_index = {row_id: i for i, row_id in enumerate(self._rows)}
+            for row_id in removed:
+                self._values.pop(row_id, None)
+                self._tags.pop(row_id, None)
+            if self._selected_row in removed:
+                self._selected_row = None
+        self._render()
+
+    def get_children(self, item=None):
+        return tuple(self._rows)
+
+    def exists(self, item):
+        return item in self._row_index
+
+    def item(self, item, option=None, **kw):
+        if item not in self._row_index:
+            raise tk.TclError(f'Item {item} not found')
+        if kw:
+            if 'values' in kw:
+                self._values[item] = tuple(kw['values'])
+            if 'tags' in kw:
+                tags = kw['tags']
+                self._tags[item] = (tags,) if isinstance(tags, str) else tuple(tags)
+            self._render_row(item)
+            return None
+        if option == 'values':
+            return self._values[item]
+        if option == 'tags':
+            return self._tags[item]
+        if option is None:
+            return {'text': '', 'image': '', 'values': list(self._values[item]),
+                    'open': 0, 'tags': list(self._tags[item])}
+        return ''
+
+    def see(self, item):
+        index = self._row_index.get(item)
+        if index is None:
+            return
+        visible = max(1, len(self._slots))
+        if index < self._offset:
+            self._set_offset(index)
+        elif index >= self._offset + visible:
+            self._set_offset(index - visible + 1)
+
+    def selection(self):
+        return (self._selected_row,) if self._selected_row is not None else ()
+
+    def selection_set(self, *items):
+        if len(items) == 1 and isinstance(items[0], (list, tuple)):
+            items = items[0]
+        self._selected_row = items[0] if items and items[0] in self._row_index else None
+        self._sync_native_selection()
+
+    def identify_row(self, y):
+        slot = super().identify_row(y)
+        if not slot or slot not in self._slots:
+            return ''
+        index = self._offset + self._slots.index(slot)
+        return self._rows[index] if index < len(self._rows) else ''
+
+    def yview(self, *args):
+        if not args:
+            return self._fractions()
+        if args[0] == 'moveto':
+            self._set_offset(int(round(float(args[1]) * len(self._rows))))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if len(args) > 2 and args[2] == 'pages':
+                amount *= max(1, len(self._slots) - 1)
+            self._set_offset(self._offset + amount)
+        return None
+
+    # --- Internals ---
+
+    def _add_row(self, values, tags, iid=None):
+        row_id = iid if iid is not None else f"R{self._next_row}"
+        self._next_row += 1
+        self._row_index[row_id] = len(self._rows)
+        self._rows.append(row_id)
+        self._values[row_id] = tuple(values)
+        self._tags[row_id] = (tags,) if isinstance(tags, str) else tuple(tags)
+        return row_id
+
+    def _clear_model(self):
+        self._rows = []
+        self._row_index = {}
+        self._values = {}
+        self._tags = {}
+        self._offset = 0
+        self._selected_row = None
+
+    def _visible_capacity(self):
+        height = self.winfo_height()
+        if height <= 1:
+            return max(1, int(self.cget('height') or 10))
+        return max(1, (height - self._heading_height) // self._row_height)
+
+    def _on_configure(self, event=None):
+        # Measure the real row and heading height from a rendered slot
+        if self._slots:
+            bbox = super().bbox(self._slots[0])
+            if bbox:
+                self._heading_height = bbox[1]
+                self._row_height = max(1, bbox[3])
+        self._render()
+
+    def _ensure_slots(self, count):
+        while len(self._slots) < count:
+            self._slots.append(super().insert('', 'end', values=(), tags=()))
+        while len(self._slots) > count:
+            super().delete(self._slots.pop())
+
+    def _set_offset(self, offset):
+        max_offset = max(0, len(self._rows) - max(1, len(self._slots)))
+        offset = max(0, min(offset, max_offset))
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def _render(self):
+        capacity = self._visible_capacity()
+        self._ensure_slots(min(capacity, len(self._rows)))
+        max_offset = max(0, len(self._rows) - len(self._slots))
+        self._offset = max(0, min(self._offset, max_offset))
+        for i, slot in enumerate(self._slots):
+            row_id = self._rows[self._offset + i]
+            super().item(slot, values=self._values[row_id], tags=self._tags[row_id])
+        self._sync_native_selection()
+        self._update_scrollbar()
+
+    def _render_row(self, row_id):
+        index = self._row_index[row_id] - self._offset
+        if 0 <= index < len(self._slots):
+            super().item(self._slots[index], values=self._values[row_id], tags=self._tags[row_id])
+
+    def _sync_native_selection(self):
+        index = self._row_index.get(self._selected_row)
+        slot_index = None if index is None else index - self._offset
+        if slot_index is not None and 0 <= slot_index < len(self._slots):
+            slot = self._slots[slot_index]
+            if super().selection() != (slot,):
+                super().selection_set(slot)
+        elif super().selection():
+            super().selection_remove(super().selection())
+
+    def _on_native_select(self, event=None):
+        # Clicks select a slot; map it to the row shown there. An empty native
+        # selection only means the selected row was scrolled out of view.
+        native = super().selection()
+        if native and native[0] in self._slots:
+            index = self._offset + self._slots.index(native[0])
+            if index < len(self._rows):
+                self._selected_row = self._rows[index]
+
+    def _fractions(self):
+        total = len(self._rows)
+        if not total:
+            return (0.0, 1.0)
+        return (self._offset / total, min(1.0, (self._offset + len(self._slots)) / total))
+
+    def _update_scrollbar(self):
+        if self._yscrollcommand:
+            first, last = self._fractions()
+            self._yscrollcommand(first, last)
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS small deltas
+        step = -event.delta // 120 if abs(event.delta) >= 120 else -event.delta
+        self._scroll_units(step * 3)
+        return 'break'
+
+    def _scroll_units(self, amount):
+        self._set_offset(self._offset + amount)
+        return 'break'
+
+    def _move_selection(self, amount):
+        if not self._rows:
+            return 'break'
+        # Without a selection, start from the first visible row
+        index = self._row_index.get(self._selected_row, self._offset - amount)
+        index = max(0, min(len(self._rows) - 1, index + amount))
+        self.selection_set(self._rows[index])
+        self.see(self._rows[index])
+        return 'break'
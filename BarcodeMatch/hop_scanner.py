@@ -0,0 +1,201 @@
+"""
+Single-pass, parallel scanner for OPUS .hop/.hops files.
+
+Walks a directory tree once with ``os.scandir``; subdirectories are listed
+concurrently by a bounded thread pool, because on network shares each listing
+is dominated by SMB round-trip latency rather than CPU. Results are handed to
+the caller in batches while the scan runs, and progress is reported as
+directories visited out of directories discovered so far (no pre-count pass).
+
+An optional persisted DirectoryIndex remembers every directory's mtime and
+listing. On a re-scan a directory whose mtime did not change is not listed
+again; its remembered files and subdirectories are reused. Subdirectories are
+still checked (one stat each), since a change deep in the tree does not
+update the mtime of its parents.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+HOP_EXTENSIONS = ('.hop', '.hops')
+DEFAULT_WORKERS = 8
+DEFAULT_BATCH_SIZE = 200
+PROGRESS_INTERVAL_S = 0.1
+INDEX_FORMAT_VERSION = 1
+
+
+class DirectoryIndex:
+    """Persisted {directory: (mtime_ns, hop files, subdirectories)} for one scan root."""
+
+    def __init__(self, path, root):
+        self.path = path
+        self.root = os.path.normcase(os.path.abspath(root))
+        self._dirs = {}
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    @classmethod
+    def for_root(cls, index_dir, root):
+        """Loads (or starts) the index for ``root`` stored in ``index_dir``."""
+        key = hashlib.sha1(os.path.normcase(os.path.abspath(root)).encode('utf-8')).hexdigest()
+        index = cls(os.path.join(index_dir, f"{key}.json"), root)
+        index.load()
+        return index
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == INDEX_FORMAT_VERSION and data.get('root') == self.root:
+            self._dirs = {d: tuple(entry) for d, entry in data.get('dirs', {}).items()}
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with self._lock:
+            data = {'version': INDEX_FORMAT_VERSION, 'root': self.root,
+                    'dirs': {d: list(entry) for d, entry in self._dirs.items()}}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def lookup(self, directory, mtime_ns):
+        """Returns (files, subdirs) if ``directory`` is unchanged since it was indexed, else None."""
+        with self._lock:
+            entry = self._dirs.get(directory)
+        if entry is not None and entry[0] == mtime_ns:
+            return entry[1], entry[2]
+        return None
+
+    def store(self, directory, mtime_ns, files, subdirs):
+        with self._lock:
+            self._dirs[directory] = (mtime_ns, files, subdirs)
+            self.dirty = True
+
+    def prune(self, visited):
+        """Forgets directories that no longer exist (not visited in a complete scan)."""
+        with self._lock:
+            stale = [d for d in self._dirs if d not in visited]
+            for d in stale:
+                del self._dirs[d]
+            if stale:
+                self.dirty = True
+
+
+class ScanResult:
+    """Outcome of scan_hop_files()."""
+
+    def __init__(self):
+        self.files = []            # full paths, sorted
+        self.dirs_visited = 0
+        self.dirs_from_index = 0
+        self.errors = []           # (directory, error message)
+        self.cancelled = False
+        self.elapsed = 0.0
+
+
+def _list_directory(directory, index):
+    """Returns (hop files, subdirectory names, from_index) for one directory."""
+    if index is not None:
+        mtime_ns = os.stat(directory).st_mtime_ns
+        cached = index.lookup(directory, mtime_ns)
+        if cached is not None:
+            return cached[0], cached[1], True
+
+    files, subdirs = [], []
+    with os.scandir(directory) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.name.lower().endswith(HOP_EXTENSIONS) and entry.is_file():
+                    files.append(entry.name)
+            except OSError:
+                continue
+
+    if index is not None:
+        index.store(directory, mtime_ns, files, subdirs)
+    return files, subdirs, False
+
+
+def scan_hop_files(root, on_batch=None, on_progress=None, max_workers=DEFAULT_WORKERS,
+                   batch_size=DEFAULT_BATCH_SIZE, index=None, stop_event=None):
+    """Scans ``root`` for .hop/.hops files and returns a ScanResult.
+
+    on_batch(paths)                        called with lists of full paths as they are found
+    on_progress(dirs_visited, dirs_found, files_found)  called at most every 100 ms and once at the end
+    index                                  optional DirectoryIndex; saved when the scan completes
+    stop_event                             optional threading.Event to cancel the scan
+
+    Callbacks run on the calling thread.
+    """
+    result = ScanResult()
+    start = time.perf_counter()
+    pending_batch = []
+    dirs_found = 1
+    visited = set()
+    last_progress = 0.0
+
+    def _flush_batch():
+        if pending_batch and on_batch:
+            on_batch(list(pending_batch))
+        pending_batch.clear()
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='hop-scan') as pool:
+        futures = {pool.submit(_list_directory, root, index): root}
+        while futures:
+            if stop_event is not None and stop_event.is_set():
+                result.cancelled = True
+                for future in futures:
+                    future.cancel()
+                break
+            done, _ = wait(futures, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                directory = futures.pop(future)
+                result.dirs_visited += 1
+                visited.add(directory)
+                try:
+                    files, subdirs, from_index = future.result()
+                except OSError as e:
+                    result.errors.append((directory, str(e)))
+                    continue
+                if from_index:
+                    result.dirs_from_index += 1
+                for name in subdirs:
+                    sub_path = os.path.join(directory, name)
+                    futures[pool.submit(_list_directory, sub_path, index)] = sub_path
+                    dirs_found += 1
+                for name in files:
+                    full_path = os.path.join(directory, name)
+                    result.files.append(full_path)
+                    pending_batch.append(full_path)
+                if len(pending_batch) >= batch_size:
+                    _flush_batch()
+
+            now = time.perf_counter()
+            if on_progress and now - last_progress >= PROGRESS_INTERVAL_S:
+                last_progress = now
+                on_progress(result.dirs_visited, dirs_found, len(result.files))
+
+    _flush_batch()
+    if on_progress:
+        on_progress(result.dirs_visited, dirs_found, len(result.files))
+    result.files.sort(key=lambda p: p.casefold())
+    if index is not None and not result.cancelled:
+        if not result.errors:
+            index.prune(visited)
+        try:
+            index.save()
+        except OSError as e:
+            result.errors.append((index.path, f"Index niet opgeslagen: {e}"))
+    result.elapsed = time.perf_counter() - start
+    return result
@@ -0,0 +1,193 @@
+"""
+Serial line reader for barcode scanners.
+
+A background thread blocks on ``read_until`` (bounded by the port timeout)
+instead of polling ``in_waiting``, and hands complete lines to the Tk thread
+through a queue that is drained with ``after``. Duplicate scans inside the
+debounce window are dropped, and the scan-to-handler latency is measured for
+every line.
+
+The same module is used by BarcodeMaster and BarcodeMatch; keep both copies
+identical.
+"""
+
+import queue
+import threading
+import time
+
+import serial
+
+DEFAULT_DEBOUNCE_MS = 500
+DEFAULT_POLL_INTERVAL_MS = 20
+DEFAULT_READ_TIMEOUT = 0.5
+
+
+class SerialLineReader:
+    """Reads lines from a serial port and delivers them on the Tk thread.
+
+    ``on_line(line)`` and ``on_error(exception)`` are always called from the
+    Tk main loop of ``widget``, so handlers can touch widgets directly.
+    """
+
+    def __init__(self, widget, port, baud_rate, on_line, on_error=None,
+                 debounce_ms=DEFAULT_DEBOUNCE_MS, poll_interval_ms=DEFAULT_POLL_INTERVAL_MS,
+                 log_callback=None, debug_callback=None, encoding='utf-8'):
+        self.widget = widget
+        self.port = port
+        self.baud_rate = int(baud_rate)
+        self.on_line = on_line
+        self.on_error = on_error
+        self.debounce_seconds = max(0, int(debounce_ms)) / 1000.0
+        self.poll_interval_ms = max(1, int(poll_interval_ms))
+        self.log_callback = log_callback
+        self.debug_callback = debug_callback
+        self.encoding = encoding
+
+        self.ser = None
+        self._lines = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._drain_job = None
+
+        # Debounce state (only touched on the Tk thread)
+        self._last_line = None
+        self._last_line_time = 0.0
+
+        # Latency statistics (only touched on the Tk thread)
+        self.lines_delivered = 0
+        self.lines_debounced = 0
+        self.last_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self._total_latency_ms = 0.0
+
+    def _log(self, message):
+        if self.log_callback:
+            self.log_callback(message)
+
+    def _debug(self, message):
+        # Per-scan details stay out of the operator log; console unless a debug callback is set
+        if self.debug_callback:
+            self.debug_callback(message)
+        else:
+            print(f"[SerialLineReader] {message}")
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Open the port and start reading. Raises serial.SerialException if the port cannot be opened."""
+        if self.is_running:
+            return
+        self.ser = serial.Serial(self.port, self.baud_rate, timeout=DEFAULT_READ_TIMEOUT)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._read_loop, name=f"serial-reader-{self.port}", daemon=True)
+        self._thread.start()
+        self._schedule_drain()
+
+    def stop(self, timeout=1.0):
+        """Stop the reader thread and close the port. Safe to call more than once."""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        if self._drain_job is not None:
+            try:
+                self.widget.after_cancel(self._drain_job)
+            except Exception:
+                pass
+            self._drain_job = None
+        if self.ser is not None:
+            try:
+                if self.ser.is_open:
+                    self.ser.close()
+            except Exception:
+                pass
+        self.ser = None
+
+    def _read_loop(self):
+        """Background thread: block on read_until and queue complete lines with their receive time."""
+        pending = b''
+        while not self._stop_event.is_set():
+            try:
+                chunk = self.ser.read_until(b'\n')
+            except serial.SerialException as e:
+                self._lines.put((None, e))
+                return
+            except Exception as e:
+                if self._stop_event.is_set():
+                    return
+                self._lines.put((None, e))
+                return
+            if not chunk:
+                continue
+            pending += chunk
+            if not pending.endswith(b'\n'):
+                # Read timed out in the middle of a line; wait for the rest
+                continue
+            received_at = time.perf_counter()
+            line = pending.decode(self.encoding, errors='ignore').strip()
+            pending = b''
+            if line:
+                self._lines.put((line, received_at))
+
+    def _schedule_drain(self):
+        try:
+            self._drain_job = self.widget.after(self.poll_interval_ms, self._drain)
+        except Exception:
+            self._drain_job = None
+
+    def _drain(self):
+        """Tk thread: deliver all queued lines, then reschedule while running."""
+        self._drain_job = None
+        while True:
+            try:
+                line, info = self._lines.get_nowait()
+            except queue.Empty:
+                break
+            if line is None:
+                self._log(f"[FOUT] Seriële fout op {self.port}: {info}")
+                if self.on_error:
+                    self.on_error(info)
+                return
+            self._deliver(line, info)
+        if not self._stop_event.is_set():
+            self._schedule_drain()
+
+    def _deliver(self, line, received_at):
+        now = time.perf_counter()
+        if (self.debounce_seconds and line == self._last_line
+                and now - self._last_line_time < self.debounce_seconds):
+            self.lines_debounced += 1
+            self._log(f"Dubbele scan binnen {int(self.debounce_seconds * 1000)} ms genegeerd: {line}")
+            return
+        # The window starts at the last accepted scan, so a repeating scanner is not muted indefinitely
+        self._last_line = line
+        self._last_line_time = now
+
+        latency_ms = (now - received_at) * 1000.0
+        self.lines_delivered += 1
+        self.last_latency_ms = latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        self._total_latency_ms += latency_ms
+        self._debug(f"Scan-naar-handler latentie: {latency_ms:.1f} ms (gem. {self.avg_latency_ms:.1f} ms, max {self.max_latency_ms:.1f} ms)")
+        try:
+            self.on_line(line)
+        except Exception as e:
+            self._log(f"[FOUT] Fout bij verwerken van scan '{line}': {e}")
+
+    @property
+    def avg_latency_ms(self):
+        return self._total_latency_ms / self.lines_delivered if self.lines_delivered else 0.0
+
+    def get_stats(self):
+        """Return a snapshot of the reader statistics."""
+        return {
+            'port': self.port,
+            'running': self.is_running,
+            'lines': self.lines_delivered,
+            'debounced': self.lines_debounced,
+            'last_latency_ms': round(self.last_latency_ms, 2),
+            'avg_latency_ms': round(self.avg_latency_ms, 2),
+            'max_latency_ms': round(self.max_latency_ms, 2),
+        }
@@ -3,20 +3,41 @@ Startup utilities for BarcodeMatch application.
 Provides global functions for improved startup management and background initialization.
 """
 
+import json
+import os
+import platform
+import sys
 import threading
 import time
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
 from typing import Callable, Optional
 
+STARTUP_REPORT_FILENAME = 'startup_report.json'
+STARTUP_REPORT_HISTORY = 20   # Startups kept in the report file
+DEFAULT_STARTUP_WORKERS = 4
+
 
 class StartupManager:
-    """Manages application startup with background threading and progress tracking"""
+    """Manages application startup with background threading and progress tracking.
+
+    Tasks declare the tasks they depend on; every task whose dependencies have
+    finished runs immediately on a small thread pool, so independent work
+    (config, DB health check, assets, pandas warm-up) overlaps. A task whose
+    dependency failed is not run. Durations of all tasks and of phases timed
+    with phase()/record_phase() end up in the startup report.
+    """
     
-    def __init__(self):
+    def __init__(self, t0: Optional[float] = None):
         self.progress_callbacks = []
         self.startup_tasks = []
         self.completed_tasks = []
         self.failed_tasks = []
+        self.results = {}
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.phases = []   # {'name', 'start', 'duration', 'thread', 'status'} (seconds since t0)
+        self._lock = threading.Lock()
         
     def add_progress_callback(self, callback: Callable[[str], None]):
         """Add a callback for progress updates"""
@@ -31,34 +52,117 @@ class StartupManager:
             except Exception as e:
                 print(f'[STARTUP ERROR] Progress callback failed: {e}')
     
-    def add_startup_task(self, name: str, task_func: Callable, *args, **kwargs):
-        """Add a startup task to be executed in background"""
+    def add_startup_task(self, name: str, task_func: Callable, *args, depends_on=(), **kwargs):
+        """Add a startup task to be executed in background.
+
+        depends_on: names of tasks that must have completed before this one starts.
+        The return value is available to later tasks as ``self.results[name]``.
+        """
         self.startup_tasks.append({
             'name': name,
             'func': task_func,
             'args': args,
-            'kwargs': kwargs
+            'kwargs': kwargs,
+            'depends_on': tuple(depends_on),
         })
+
+    def record_phase(self, name: str, start: float, end: float, status: str = 'ok'):
+        """Records a phase timed elsewhere (time.perf_counter() values)."""
+        with self._lock:
+            self.phases.append({
+                'name': name,
+                'start': start - self.t0,
+                'duration': end - start,
+                'thread': threading.current_thread().name,
+                'status': status,
+            })
+
+    @contextmanager
+    def phase(self, name: str):
+        """Times the enclosed block as a startup phase."""
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            yield
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            self.record_phase(name, start, time.perf_counter(), status)
+
+    def _run_task(self, task):
+        start = time.perf_counter()
+        try:
+            return task['func'](*task['args'], **task['kwargs'])
+        finally:
+            task['start'], task['end'] = start, time.perf_counter()
     
-    def execute_startup_tasks(self, on_complete: Optional[Callable] = None):
-        """Execute all startup tasks in background thread"""
+    def execute_startup_tasks(self, on_complete: Optional[Callable] = None,
+                              max_workers: int = DEFAULT_STARTUP_WORKERS):
+        """Execute all startup tasks in background threads, respecting their dependencies"""
         def run_tasks():
             try:
                 total_tasks = len(self.startup_tasks)
-                for i, task in enumerate(self.startup_tasks):
-                    try:
-                        self.update_progress(f"{task['name']} ({i+1}/{total_tasks})")
-                        result = task['func'](*task['args'], **task['kwargs'])
-                        self.completed_tasks.append({
-                            'name': task['name'],
-                            'result': result
-                        })
-                    except Exception as e:
-                        print(f"[STARTUP ERROR] Task '{task['name']}' failed: {e}")
-                        self.failed_tasks.append({
-                            'name': task['name'],
-                            'error': str(e)
-                        })
+                known = {task['name'] for task in self.startup_tasks}
+                pending = list(self.startup_tasks)
+                done_names, failed_names = set(), set()
+                running = {}
+                with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='startup') as pool:
+                    while pending or running:
+                        for task in list(pending):
+                            missing = [d for d in task['depends_on'] if d not in known]
+                            blocked = [d for d in task['depends_on'] if d in failed_names]
+                            if missing or blocked:
+                                pending.remove(task)
+                                reason = (f"onbekende afhankelijkheid: {', '.join(missing)}" if missing
+                                          else f"afhankelijkheid mislukt: {', '.join(blocked)}")
+                                print(f"[STARTUP ERROR] Task '{task['name']}' skipped ({reason})")
+                                self.failed_tasks.append({'name': task['name'], 'error': reason})
+                                self.record_phase(task['name'], time.perf_counter(), time.perf_counter(), 'skipped')
+                                failed_names.add(task['name'])
+                            elif all(d in done_names for d in task['depends_on']):
+                                pending.remove(task)
+                                self.update_progress(f"{task['name']} ({len(done_names) + len(failed_names) + len(running) + 1}/{total_tasks})")
+                                running[pool.submit(self._run_task, task)] = task
+                        if not running:
+                            if pending:
+                                # Only reachable with a dependency cycle
+                                for task in pending:
+                                    self.failed_tasks.append({'name': task['name'], 'error': 'afhankelijkheidscyclus'})
+                                    failed_names.add(task['name'])
+                                print(f"[STARTUP ERROR] Dependency cycle: {', '.join(t['name'] for t in pending)}")
+                                pending = []
+                            break
+                        finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            task = running.pop(future)
+                            try:
+                                result = future.result()
+                                self.results[task['name']] = result
+                                self.completed_tasks.append({
+                                    'name': task['name'],
+                                    'result': result
+                                })
+                                done_names.add(task['name'])
+                                status = 'ok'
+                            except Exception as e:
+                                print(f"[STARTUP ERROR] Task '{task['name']}' failed: {e}")
+                                self.failed_tasks.append({
+                                    'name': task['name'],
+                                    'error': str(e)
+                                })
+                                failed_names.add(task['name'])
+                                status = 'error'
+                            if 'start' in task:
+                                with self._lock:
+                                    self.phases.append({
+                                        'name': task['name'],
+                                        'start': task['start'] - self.t0,
+                                        'duration': task['end'] - task['start'],
+                                        'thread': 'startup-pool',
+                                        'status': status,
+                                        'depends_on': list(task['depends_on']),
+                                    })
                 
                 self.update_progress("Opstarten voltooid!")
                 
@@ -71,10 +175,83 @@ class StartupManager:
                 
         threading.Thread(target=run_tasks, daemon=True).start()
 
+    def build_report(self, total_seconds: Optional[float] = None):
+        """Returns this startup's phases and environment as a dict (one entry of the report file)."""
+        if total_seconds is None:
+            total_seconds = time.perf_counter() - self.t0
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p['start'])
+        try:
+            from build_info import get_build_number
+            build = get_build_number()
+        except Exception:
+            build = None
+        return {
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'total_ms': round(total_seconds * 1000, 1),
+            'build': build,
+            'python': sys.version.split()[0],
+            'architecture': '32-bit' if sys.maxsize <= 2**32 else '64-bit',
+            'frozen': bool(getattr(sys, 'frozen', False)),
+            'platform': platform.platform(),
+            'phases': [{
+                'name': p['name'],
+                'start_ms': round(p['start'] * 1000, 1),
+                'duration_ms': round(p['duration'] * 1000, 1),
+                'thread': p['thread'],
+                'status': p['status'],
+                'depends_on': p.get('depends_on', []),
+            } for p in phases],
+            'failed': [t['name'] for t in self.failed_tasks],
+        }
+
+    def write_report(self, path: Optional[str] = None, total_seconds: Optional[float] = None):
+        """Prepends this startup to the report file (last STARTUP_REPORT_HISTORY startups are kept)."""
+        path = path or get_startup_report_path()
+        runs = load_startup_report(path)
+        runs.insert(0, self.build_report(total_seconds))
+        del runs[STARTUP_REPORT_HISTORY:]
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'runs': runs}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+
+def get_startup_report_path() -> str:
+    """The startup report lives next to config.json (writable in the frozen build too)."""
+    from config_utils import get_config_path
+    return os.path.join(os.path.dirname(get_config_path()), STARTUP_REPORT_FILENAME)
+
+
+def load_startup_report(path: Optional[str] = None) -> list:
+    """Returns the recorded startups, newest first ([] if there is no readable report)."""
+    try:
+        with open(path or get_startup_report_path(), 'r', encoding='utf-8') as f:
+            runs = json.load(f).get('runs', [])
+        return runs if isinstance(runs, list) else []
+    except (OSError, ValueError, AttributeError):
+        return []
+
+
+def format_startup_report(run: dict) -> str:
+    """Plain-text view of one startup (used by the Help panel)."""
+    lines = [
+        f"Laatste start: {run.get('timestamp', '?')} - totaal {run.get('total_ms', 0):.0f} ms "
+        f"({run.get('architecture', '?')}{', exe' if run.get('frozen') else ''}, Python {run.get('python', '?')})",
+        "",
+        f"{'Fase':<28} {'start':>8} {'duur':>9}",
+    ]
+    for p in run.get('phases', []):
+        status = '' if p.get('status') == 'ok' else f"  [{p.get('status')}]"
+        lines.append(f"{p['name'][:28]:<28} {p['start_ms']:>6.0f}ms {p['duration_ms']:>7.0f}ms{status}")
+    return "\n".join(lines)
+
 
-def create_startup_manager() -> StartupManager:
-    """Create a new startup manager instance"""
-    return StartupManager()
+def create_startup_manager(t0: Optional[float] = None) -> StartupManager:
+    """Create a new startup manager instance (phases are timed relative to ``t0``)"""
+    return StartupManager(t0)
 
 
 def safe_ui_update(root: tk.Tk, update_func: Callable, *args, **kwargs):
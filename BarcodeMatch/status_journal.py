@@ -0,0 +1,151 @@
+"""
+Append-only journal for checklist status changes.
+
+Every status change is written as one JSON line and fsync'd straight away, so
+a scan is durable without rewriting the whole ``_updated.xlsx``. The xlsx is
+compacted later (see ScannerPanel) after which the journal entries that are
+already in the xlsx are dropped.
+
+Entries carry an increasing sequence number. The xlsx records the last
+sequence number it contains in its document keywords
+(``xlsx_seq_keyword()``), written in the same file replace as the data. On
+load only the entries above that number are replayed, so a crash between
+writing the xlsx and trimming the journal can neither lose a scan nor apply
+an old one twice. An xlsx without the keyword (written before sequence
+numbers existed) gets the whole journal replayed; the statuses are the last
+one per item, so replaying changes it already contains is harmless.
+"""
+
+import json
+import os
+import threading
+import time
+import zipfile
+from xml.etree import ElementTree
+
+SEQ_KEYWORD_PREFIX = 'statusjournal-seq='
+_CORE_KEYWORDS_TAG = '{http://schemas.openxmlformats.org/package/2006/metadata/core-properties}keywords'
+
+
+def xlsx_seq_keyword(seq):
+    """The document keywords that mark an xlsx as containing journal entries up to ``seq``."""
+    return f"{SEQ_KEYWORD_PREFIX}{int(seq)}"
+
+
+def read_xlsx_seq(xlsx_path):
+    """Returns the journal sequence number recorded in ``xlsx_path``, or 0 if there is none."""
+    try:
+        with zipfile.ZipFile(xlsx_path) as archive:
+            core = ElementTree.fromstring(archive.read('docProps/core.xml'))
+    except (OSError, KeyError, zipfile.BadZipFile, ElementTree.ParseError):
+        return 0
+    for word in (core.findtext(_CORE_KEYWORDS_TAG) or '').replace(';', ' ').replace(',', ' ').split():
+        if word.startswith(SEQ_KEYWORD_PREFIX):
+            try:
+                return int(word[len(SEQ_KEYWORD_PREFIX):])
+            except ValueError:
+                return 0
+    return 0
+
+
+class StatusJournal:
+    """A sidecar journal file next to an ``_updated.xlsx`` checklist."""
+
+    SUFFIX = '.journal'
+
+    def __init__(self, xlsx_path):
+        self.xlsx_path = xlsx_path
+        self.path = xlsx_path + self.SUFFIX
+        self._lock = threading.Lock()
+        self._file = None
+        entries = self.read_entries()
+        self.entry_count = len(entries)
+        # Last sequence number contained in the xlsx, and the last one handed out
+        self.folded_seq = read_xlsx_seq(xlsx_path)
+        self.last_seq = max([self.folded_seq] + [self._seq(entry) for entry in entries])
+
+    @staticmethod
+    def _seq(entry):
+        # Entries written before sequence numbers existed count as 0
+        seq = entry.get('seq', 0)
+        return seq if isinstance(seq, int) else 0
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def read_entries(self):
+        """Return the journal entries in order. A torn last line (crash mid-write) is ignored."""
+        entries = []
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return entries
+
+    def replay(self):
+        """Return {item: status} with the last journaled status per item the xlsx does not contain yet."""
+        return {entry['item']: entry.get('status') for entry in self.read_entries()
+                if 'item' in entry and (not self.folded_seq or self._seq(entry) > self.folded_seq)}
+
+    def append(self, item, status):
+        """Append a status change and fsync it. Returns its sequence number."""
+        with self._lock:
+            seq = self.last_seq + 1
+            record = json.dumps({'seq': seq, 't': time.time(), 'item': item, 'status': status}, ensure_ascii=False)
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(record + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.last_seq = seq
+            self.entry_count += 1
+            return seq
+
+    def compacted(self, upto_seq):
+        """Drop the entries up to ``upto_seq`` once an xlsx recording that number has been written.
+
+        Entries appended while the xlsx was being written are kept.
+        """
+        with self._lock:
+            self._close_file()
+            self.folded_seq = max(self.folded_seq, upto_seq)
+            remaining = [entry for entry in self.read_entries() if self._seq(entry) > upto_seq]
+            if not remaining:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+            else:
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for entry in remaining:
+                        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            self.entry_count = len(remaining)
+
+    def discard(self):
+        """Remove the journal file entirely."""
+        with self._lock:
+            self._close_file()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.entry_count = 0
+
+    def close(self):
+        with self._lock:
+            self._close_file()
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None